@@ -9,6 +9,8 @@ Options:
     --no-django                 Skip running the Django web server.
     --django-port <port>        Django's web server port [default: 8000].
     -D, --daemon                Run as a background process.
+    --stats-port <port>         Serve the server's statistics as plain text
+                                over HTTP on the given port.
 """
 from __future__ import print_function
 import sys
@@ -17,7 +19,7 @@ import subprocess
 import django
 import docopt
 
-from rotest.common.config import RESOURCE_MANAGER_PORT
+from rotest.common.config import RESOURCE_MANAGER_PORT, SERVER_STATE_DIR
 from rotest.management.server.main import ResourceManagerServer
 
 
@@ -25,7 +27,8 @@ if sys.platform != "win32":
     import daemon
 
 
-def start_server(server_port, run_django_server, django_port):
+def start_server(server_port, run_django_server, django_port,
+                 stats_port=None):
     """Run the resource management server, and optionally the Django server.
 
     Args:
@@ -33,6 +36,8 @@ def start_server(server_port, run_django_server, django_port):
         run_django_server (bool): whether to run the Django server as well,
             or not.
         django_port (number): port for the Django server.
+        stats_port (number): port for the statistics HTTP page, None to
+            disable it.
     """
     django_process = None
     try:
@@ -44,7 +49,8 @@ def start_server(server_port, run_django_server, django_port):
                  "0.0.0.0:{}".format(django_port)]
             )
 
-        ResourceManagerServer(port=server_port).start()
+        ResourceManagerServer(port=server_port, stats_port=stats_port,
+                              state_dir=SERVER_STATE_DIR).start()
 
     finally:
         if django_process is not None:
@@ -60,6 +66,9 @@ def server():
     no_django = arguments["--no-django"]
     django_port = int(arguments["--django-port"])
     run_as_daemon = arguments["--daemon"]
+    stats_port = arguments["--stats-port"]
+    if stats_port is not None:
+        stats_port = int(stats_port)
 
     if run_as_daemon:
         if sys.platform == "win32":
@@ -70,10 +79,12 @@ def server():
         with daemon.DaemonContext():
             start_server(server_port=port,
                          run_django_server=not no_django,
-                         django_port=django_port)
+                         django_port=django_port,
+                         stats_port=stats_port)
 
     else:
         print("Running in attached mode")
         start_server(server_port=port,
                      run_django_server=not no_django,
-                     django_port=django_port)
+                     django_port=django_port,
+                     stats_port=stats_port)
@@ -220,6 +220,56 @@ CONFIGURATION_SCHEMA = {
                                "RESOURCE_WAITING_TIME"],
         config_file_options=["resource_request_timeout"],
         default_value=0),
+    "resource_request_priority": Option(
+        command_line_options=["--resource-request-priority"],
+        environment_variables=["ROTEST_RESOURCE_REQUEST_PRIORITY"],
+        config_file_options=["resource_request_priority"],
+        default_value=0),
+    "resource_setup_workers": Option(
+        command_line_options=["--resource-setup-workers"],
+        environment_variables=["ROTEST_RESOURCE_SETUP_WORKERS"],
+        config_file_options=["resource_setup_workers"],
+        default_value=1),
+    "resource_cleanup_workers": Option(
+        command_line_options=["--resource-cleanup-workers"],
+        environment_variables=["ROTEST_RESOURCE_CLEANUP_WORKERS"],
+        config_file_options=["resource_cleanup_workers"],
+        default_value=1),
+    "resource_early_release": Option(
+        command_line_options=["--resource-early-release"],
+        environment_variables=["ROTEST_RESOURCE_EARLY_RELEASE"],
+        config_file_options=["resource_early_release"],
+        default_value=False),
+    "resource_validation_cache_ttl": Option(
+        command_line_options=["--resource-validation-cache-ttl"],
+        environment_variables=["ROTEST_RESOURCE_VALIDATION_CACHE_TTL"],
+        config_file_options=["resource_validation_cache_ttl"],
+        default_value=0),
+    "resource_prefetch": Option(
+        command_line_options=["--resource-prefetch"],
+        environment_variables=["ROTEST_RESOURCE_PREFETCH"],
+        config_file_options=["resource_prefetch"],
+        default_value=False),
+    "resource_lease_period": Option(
+        command_line_options=["--resource-lease-period"],
+        environment_variables=["ROTEST_RESOURCE_LEASE_PERIOD"],
+        config_file_options=["resource_lease_period"],
+        default_value=300),
+    "resource_reclaim_grace_period": Option(
+        command_line_options=["--resource-reclaim-grace-period"],
+        environment_variables=["ROTEST_RESOURCE_RECLAIM_GRACE_PERIOD"],
+        config_file_options=["resource_reclaim_grace_period"],
+        default_value=120),
+    "server_state_dir": Option(
+        command_line_options=["--server-state-dir"],
+        environment_variables=["ROTEST_SERVER_STATE_DIR"],
+        config_file_options=["server_state_dir"],
+        default_value=os.path.expanduser("~/.rotest/server_state")),
+    "results_spool_dir": Option(
+        command_line_options=["--results-spool-dir"],
+        environment_variables=["ROTEST_RESULTS_SPOOL_DIR"],
+        config_file_options=["results_spool_dir"],
+        default_value=os.path.expanduser("~/.rotest/results_spool")),
     "django_settings": Option(
         command_line_options=["--django-settings"],
         environment_variables=["DJANGO_SETTINGS_MODULE",
@@ -250,6 +300,20 @@ ROTEST_WORK_DIR = os.path.expanduser(CONFIGURATION.workdir)
 RESOURCE_MANAGER_HOST = CONFIGURATION.host
 RESOURCE_MANAGER_PORT = int(CONFIGURATION.port)
 RESOURCE_REQUEST_TIMEOUT = int(CONFIGURATION.resource_request_timeout)
+RESOURCE_REQUEST_PRIORITY = int(CONFIGURATION.resource_request_priority)
+RESOURCE_SETUP_WORKERS = int(CONFIGURATION.resource_setup_workers)
+RESOURCE_CLEANUP_WORKERS = int(CONFIGURATION.resource_cleanup_workers)
+RESOURCE_EARLY_RELEASE = str(CONFIGURATION.resource_early_release).lower() \
+                                                    in ("1", "true", "yes")
+RESOURCE_VALIDATION_CACHE_TTL = int(
+                            CONFIGURATION.resource_validation_cache_ttl)
+RESOURCE_PREFETCH = str(CONFIGURATION.resource_prefetch).lower() \
+                                                    in ("1", "true", "yes")
+RESOURCE_LEASE_PERIOD = int(CONFIGURATION.resource_lease_period)
+RESOURCE_RECLAIM_GRACE_PERIOD = int(
+                            CONFIGURATION.resource_reclaim_grace_period)
+SERVER_STATE_DIR = os.path.expanduser(CONFIGURATION.server_state_dir)
+RESULTS_SPOOL_DIR = os.path.expanduser(CONFIGURATION.results_spool_dir)
 DJANGO_SETTINGS_MODULE = CONFIGURATION.django_settings
 ARTIFACTS_DIR = os.path.expanduser(CONFIGURATION.artifacts_dir)
 
@@ -1,8 +1,13 @@
 """Common useful utils."""
+# pylint: disable=broad-except
 import os
+import sys
 from shutil import copy
 from itertools import count
 from datetime import datetime
+from collections import deque
+from Queue import Queue, Empty
+from threading import Event, Thread
 
 
 RUNTIME_ORDER = '-start_time'
@@ -45,3 +50,86 @@ def get_work_dir(base_dir, test_name):
 
     os.makedirs(work_dir)
     return work_dir
+
+
+def run_in_threads(function, items, max_workers, stop_on_error=False):
+    """Call a function on each of the items, using parallel threads.
+
+    The results are yielded by the order the calls end. The threads are
+    started by the first iteration, and the results of the calls which are
+    still running are waited for by the next iterations.
+
+    Args:
+        function (callable): function to call on each item.
+        items (iterable): the items to call the function on.
+        max_workers (number): maximal amount of calls to run at the same
+            time, 1 or less to call the function on the items one by one.
+        stop_on_error (bool): whether to refrain from calling the function on
+            items which weren't started yet once any of the calls failed.
+
+    Yields:
+        tuple. the item, the result of the call on it and the exception info
+            of the call (None if it succeeded, and the result is None if not).
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        for item in items:
+            try:
+                result = function(item)
+
+            except Exception:
+                yield (item, None, sys.exc_info())
+                if stop_on_error:
+                    return
+
+            else:
+                yield (item, result, None)
+
+        return
+
+    pending_items = deque(items)
+    results = Queue()
+    stopped = Event()
+    worker_done = object()
+
+    def run_worker():
+        """Call the function on the pending items, until there are none."""
+        try:
+            while not stopped.is_set():
+                try:
+                    item = pending_items.popleft()
+
+                except IndexError:
+                    return
+
+                try:
+                    results.put((item, function(item), None))
+
+                except Exception:
+                    if stop_on_error:
+                        stopped.set()
+
+                    results.put((item, None, sys.exc_info()))
+
+        finally:
+            results.put(worker_done)
+
+    workers_count = min(max_workers, len(items))
+    for _ in xrange(workers_count):
+        worker = Thread(target=run_worker)
+        worker.daemon = True
+        worker.start()
+
+    while workers_count > 0:
+        try:
+            # Waiting with a timeout keeps the main thread interruptible
+            result = results.get(timeout=1)
+
+        except Empty:
+            continue
+
+        if result is worker_done:
+            workers_count -= 1
+
+        else:
+            yield result
@@ -12,6 +12,7 @@ from attrdict import AttrDict
 
 from rotest.management.base_resource import BaseResource
 from rotest.management.client.manager import ResourceRequest
+from rotest.management.client.manager import ResourcesRequest
 from rotest.management.client.manager import ClientResourceManager
 
 
@@ -163,6 +164,9 @@ class AbstractTest(unittest.TestCase):
         chosen resources. This method can also be used to add resources to all
         the sibling blocks under the test-flow.
 
+        The resources of a :class:`ResourcesRequest` are assigned as a list
+        to its requested name.
+
         Args:
             resources_to_request (list): list of resource requests to lock.
             use_previous (bool): whether to use previously locked resources and
@@ -182,12 +186,86 @@ class AbstractTest(unittest.TestCase):
                                         enable_debug=self.enable_debug,
                                         force_initialize=self.force_initialize)
 
-        self.add_resources(requested_resources)
+        test_resources = AttrDict(requested_resources)
+        for resource_request in resources_to_request:
+            if isinstance(resource_request, ResourcesRequest):
+                test_resources[resource_request.name] = [
+                                requested_resources[name]
+                                for name in resource_request.get_item_names()]
+
+        self.add_resources(test_resources)
         self.locked_resources.update(requested_resources)
 
         if self.result is not None:
             self.result.updateResources(self)
 
+    @classmethod
+    def _get_first_test(cls, test):
+        """Return the first test case or flow under a test.
+
+        Args:
+            test (object): TestSuite / TestCase / TestFlow object.
+
+        Returns:
+            AbstractTest. the first test case or flow to run under the test,
+                None if there's none.
+        """
+        if isinstance(test, AbstractTest):
+            return test
+
+        for sub_test in test:
+            first_test = cls._get_first_test(sub_test)
+            if first_test is not None:
+                return first_test
+
+        return None
+
+    def _get_next_test(self):
+        """Return the test case or flow which runs after this test.
+
+        Returns:
+            AbstractTest. the next test case or flow under the test's suites,
+                None if this test is the last one or isn't under a suite.
+        """
+        test = self
+        while test.parent is not None and \
+                not isinstance(test.parent, AbstractTest):
+            siblings = list(test.parent)
+            index = next(index for index, sibling in enumerate(siblings)
+                         if sibling is test)
+
+            for sibling in siblings[index + 1:]:
+                next_test = self._get_first_test(sibling)
+                if next_test is not None:
+                    return next_test
+
+            test = test.parent
+
+        return None
+
+    def prefetch_next_resources(self):
+        """Prefetch the resources of the next test, if the client is set to.
+
+        The resources of the next test are locked and set up in the
+        background, and handed over to the next test when it requests them.
+        Resources aren't prefetched for tests which enable debugging, since
+        the debugger can't be used in a background thread.
+        """
+        if self._is_client_local or not self.resource_manager.prefetch:
+            return
+
+        next_test = self._get_next_test()
+        if next_test is None or next_test.enable_debug:
+            return
+
+        self.resource_manager.prefetch_resources(
+                                config=next_test.config,
+                                skip_init=next_test.skip_init,
+                                save_state=next_test.save_state,
+                                base_work_dir=next_test.work_dir,
+                                requests=next_test.get_resource_requests(),
+                                force_initialize=next_test.force_initialize)
+
     def release_resources(self, resources=None, dirty=False,
                           force_release=True):
         """Release given resources using the client.
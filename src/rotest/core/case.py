@@ -119,6 +119,7 @@ class TestCase(AbstractTest):
             """setup method wrapper.
 
             * Locks the required resources for the test.
+            * Prefetches the resources of the next test, if configured to.
             * Executes the original setUp method.
             * Upon exception, finalizes the resources.
             """
@@ -128,6 +129,7 @@ class TestCase(AbstractTest):
 
             self.request_resources(self.get_resource_requests(),
                                    use_previous=True)
+            self.prefetch_next_resources()
 
             try:
                 setup_method(*args, **kwargs)
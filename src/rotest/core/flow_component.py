@@ -219,6 +219,8 @@ class AbstractFlowComponent(AbstractTest):
 
                 raise
 
+            self.prefetch_next_resources()
+
             try:
                 if not self.IS_COMPLEX:
                     self._set_parameters(override_previous=False,
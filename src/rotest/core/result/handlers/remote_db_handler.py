@@ -24,9 +24,12 @@ class RemoteDBHandler(AbstractResultHandler):
         self.client.start_test_run(self.main_test)
 
     def stop_test_run(self):
-        """Disconnect from the result server."""
-        self.client.update_run_data(self.main_test.data.run_data)
-        self.client.disconnect()
+        """Wait for the run's reports and disconnect from the result server."""
+        try:
+            self.client.stop_test_run(self.main_test.data.run_data)
+
+        finally:
+            self.client.disconnect()
 
     def start_test(self, test):
         """Update the remote test data to 'in progress' and set the start time.
@@ -109,6 +109,20 @@ class MultiprocessRunner(BaseTestRunner):
         """
         return None
 
+    def create_worker_resource_manager(self):
+        """Create the resource manager client of a worker.
+
+        Prefetching is disabled, since the tests are pulled from a shared
+        queue, so the next test is usually run by another worker.
+
+        Returns:
+            ClientResourceManager. a resource manager client.
+        """
+        resource_manager = \
+            super(MultiprocessRunner, self).create_resource_manager()
+        resource_manager.prefetch = False
+        return resource_manager
+
     def initialize_worker(self):
         """Create and start a new worker process and add it to the pool."""
         worker = WorkerProcess(config=self.config,
@@ -124,8 +138,7 @@ class MultiprocessRunner(BaseTestRunner):
                                results_queue=self.results_queue,
                                requests_queue=self.requests_queue)
 
-        worker.resource_manager = \
-            super(MultiprocessRunner, self).create_resource_manager()
+        worker.resource_manager = self.create_worker_resource_manager()
 
         worker.start()
 
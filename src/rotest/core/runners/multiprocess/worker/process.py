@@ -41,7 +41,11 @@ class WorkerProcess(Process):
         start_time (datetime.datetime): the start time of the current test.
         skip_init (bool): True to skip resources initialization and validation.
         output_handlers (list): output handlers for the worker's runner.
+        GET_TEST_TIMEOUT (number): seconds to wait for a test in the pending
+            tests queue before deciding it's empty.
     """
+    GET_TEST_TIMEOUT = 0.5
+
     def __init__(self, save_state, config, run_delta, run_name, requests_queue,
                  reply_queue, results_queue, root_test, failfast, parent_id,
                  skip_init, output_handlers, *args, **kwargs):
@@ -93,11 +97,16 @@ class WorkerProcess(Process):
     def _get_tests(self):
         """Try to get a new test from the pending tests queue.
 
+        Note:
+            The tests are queued before the workers start, but the queue
+            passes them in the background, so a worker which starts quickly
+            may find the queue empty if it doesn't wait for them.
+
         Returns:
             object. a pending test, or None if queue is empty.
         """
         try:
-            return self.requests_queue.get(block=False)
+            return self.requests_queue.get(timeout=self.GET_TEST_TIMEOUT)
 
         except Empty:
             return None
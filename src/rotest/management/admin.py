@@ -133,7 +133,7 @@ def register_resource_to_admin(resource_type, attr_list=(), link_list=()):
         list_display = (['name', 'owner', 'is_available', 'reserved',
                          'comment', 'group'] + list(attr_list) +
                         link_properties)
-        readonly_fields = ('owner_time', 'reserved_time')
+        readonly_fields = ('owner_time', 'reserved_time', 'lease_expiration')
 
         list_filter = (IsUsableFilter, 'group')
 
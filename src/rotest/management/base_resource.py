@@ -6,12 +6,13 @@ responsible for the resource static & dynamic information.
 # pylint: disable=too-many-instance-attributes,no-self-use,broad-except
 import os
 from bdb import BdbQuit
+from operator import methodcaller
 
 from ipdbugger import debug
 from attrdict import AttrDict
 
 from rotest.common import core_log
-from rotest.common.utils import get_work_dir
+from rotest.common.utils import get_work_dir, run_in_threads
 from rotest.management.common.utils import HOST_PORT_SEPARATOR
 
 
@@ -53,6 +54,10 @@ class BaseResource(object):
 
     Attributes:
         DATA_CLASS (class): class of the resource's global data container.
+        SUB_RESOURCES_WORKERS (number): maximal amount of sub-resources to
+            connect to, validate, initialize and finalize at the same time.
+            Override with a larger number if the sub-resources don't depend
+            on each other, to bring them up in parallel threads.
         logger (logger): resource's logger instance.
         data (ResourceData): assigned data instance.
         config (AttrDict): run configuration.
@@ -64,6 +69,7 @@ class BaseResource(object):
     __metaclass__ = ConvertToKwargsMeta
 
     DATA_CLASS = None
+    SUB_RESOURCES_WORKERS = 1
 
     _SHELL_CLIENT = None
     _SHELL_REQUEST_NAME = 'shell_resource'
@@ -166,6 +172,44 @@ class BaseResource(object):
             raise RuntimeError("Some of the callbacks have failed. "
                                "Reasons: %s" % "\n".join(error_messages))
 
+    def _execute_sub_resources(self, function, safe=False):
+        """Call a function on each of the sub-resources.
+
+        The sub-resources are handled in parallel threads if the resource
+        declares more than one sub-resources worker. In that case, failures
+        are aggregated like in a safe execution, but sub-resources which
+        weren't started once one failed are skipped unless it's safe.
+
+        Args:
+            function (callable): function to call on each sub-resource.
+            safe (bool): whether to handle all the sub-resources, even if
+                some of them fail.
+
+        Raises:
+            RuntimeError: when handling one, or more, of the sub-resources
+                failed, if they're handled safely or in parallel.
+        """
+        parallel = self.SUB_RESOURCES_WORKERS > 1
+        error_messages = []
+        for sub_resource, _, exc_info in run_in_threads(
+                                            function,
+                                            self.get_sub_resources(),
+                                            self.SUB_RESOURCES_WORKERS,
+                                            stop_on_error=not safe):
+            if exc_info is None:
+                continue
+
+            if not safe and not parallel:
+                raise exc_info[0], exc_info[1], exc_info[2]
+
+            self.logger.error("Sub-resource %r failed", sub_resource.name,
+                              exc_info=exc_info)
+            error_messages.append("%s: %s" % (sub_resource.name, exc_info[1]))
+
+        if len(error_messages) != 0:
+            raise RuntimeError("Some of the sub-resources have failed. "
+                               "Reasons: %s" % "\n".join(error_messages))
+
     def set_work_dir(self, resource_name, containing_work_dir):
         """Set the work directory under the given case's work directory.
 
@@ -228,9 +272,7 @@ class BaseResource(object):
         resource is locked successfully.
         """
         self.logger.debug("Connecting resource %r", self.name)
-
-        for resource in self.get_sub_resources():
-            resource.connect()
+        self._execute_sub_resources(methodcaller("connect"))
 
     def finalize(self):
         """Hook method for cleaning up the resource after using it.
@@ -239,11 +281,22 @@ class BaseResource(object):
         Override to specify the resource's finalization procedure
         (remember to call 'super' at the end).
         """
-        # Create a list of resources finalize calls in a specific order.
         self.logger.debug("Finalizing resource %r", self.name)
-        finalization_methods = [resource.finalize for resource
-                                in self.get_sub_resources()]
-        self._safe_execute(finalization_methods)
+        self._execute_sub_resources(methodcaller("finalize"), safe=True)
+
+    def get_state_fingerprint(self):
+        """Return a fingerprint of the resource's state.
+
+        Override to let the resource manager client cache the resource's
+        validation. While the cache is valid, and the fingerprint hasn't
+        changed, the resource isn't validated nor initialized. Hence, the
+        fingerprint should change whenever the resource's state might, e.g.
+        a digest of its software version and configuration.
+
+        Returns:
+            str. the state's fingerprint, None to never cache the validation.
+        """
+        return None
 
     def validate(self):
         """Validate whether the resource is ready for work or not.
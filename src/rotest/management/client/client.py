@@ -1,38 +1,174 @@
 """Define an abstract client."""
-# pylint: disable=too-many-arguments
+# pylint: disable=too-many-arguments,too-many-instance-attributes
+import sys
 import socket
 from itertools import count
+from threading import Lock, RLock, Event, Thread, current_thread
 
 from rotest.common import core_log
 from rotest.management.common import messages
 from rotest.management.common.errors import ErrorFactory
-from rotest.management.common.parsers import DEFAULT_PARSER
+from rotest.management.common.compressors import COMPRESSORS
+from rotest.management.common.parsers import PARSERS, DEFAULT_PARSER
 from rotest.management.common.parsers.abstract_parser import ParsingError
+from rotest.management.client.socket_reader import SocketReader
+from rotest.management.common.parsers.binary_parser import BinaryParser
 from rotest.common.config import (RESOURCE_REQUEST_TIMEOUT,
+                                  RESOURCE_REQUEST_PRIORITY,
                                   RESOURCE_MANAGER_PORT)
-from rotest.management.common.utils import (MESSAGE_DELIMITER,
+from rotest.management.common.utils import (FRAME_HEADER,
+                                            MESSAGE_DELIMITER,
                                             MESSAGE_MAX_LENGTH)
 
 
+class PendingRequest(object):
+    """A request which was sent to the server and waits for its reply.
+
+    Attributes:
+        message (AbstractMessage): the sent request.
+        timeout (number): seconds to wait for the reply, None to wait
+            forever.
+        _reply (AbstractMessage): the server's reply, once received.
+        _exc_info (tuple): type, value and traceback of the error which
+            prevented getting the reply, None if there's no such error.
+        _done (Event): set once the reply was received or failed.
+    """
+    def __init__(self, message, timeout):
+        self.message = message
+        self.timeout = timeout
+
+        self._reply = None
+        self._exc_info = None
+        self._done = Event()
+
+    def __repr__(self):
+        return "PendingRequest(%r)" % self.message
+
+    def done(self):
+        """Check whether the request was answered or failed.
+
+        Returns:
+            bool. True if waiting for the reply won't block, False otherwise.
+        """
+        return self._done.is_set()
+
+    def set_reply(self, reply):
+        """Pass the server's reply to the waiting side.
+
+        Args:
+            reply (AbstractMessage): the server's reply.
+        """
+        self._reply = reply
+        self._done.set()
+
+    def set_error(self, error, traceback=None):
+        """Fail the request.
+
+        Args:
+            error (Exception): the error to raise to the waiting side.
+            traceback (traceback): where the error was raised, None if it
+                wasn't raised.
+        """
+        self._exc_info = (type(error), error, traceback)
+        self._done.set()
+
+    def get_reply(self):
+        """Wait for the server's reply and validate it.
+
+        Returns:
+            AbstractReply. the server's reply.
+
+        Raises:
+            TypeError: client received an illegal reply message.
+            ParsingError: client failed to decode server's reply.
+            ParsingError: server failed to decode client's request.
+            RuntimeError: server didn't respond, timeout expired.
+            ServerError: server failed to execute the request.
+            socket.error: the connection to the server was lost.
+        """
+        if not self._done.wait(self.timeout):
+            raise RuntimeError("Server failed to respond to %r after %r "
+                               "seconds" % (self.message, self.timeout))
+
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+
+        reply_msg = self._reply
+        if isinstance(reply_msg, messages.ParsingFailure):
+            raise ParsingError("Server failed to parse a message, assumed ID "
+                               "%r. Failure Reason is: %r."
+                               % (self.message.msg_id, reply_msg.reason))
+
+        if not isinstance(reply_msg, messages.AbstractReply):
+            raise TypeError("Server sent an illegal message. Replies should "
+                            "be of type AbstractReply. Received message is: %r"
+                            % reply_msg)
+
+        if isinstance(reply_msg, messages.ErrorReply):
+            raise ErrorFactory.build_error(reply_msg.code, reply_msg.content)
+
+        return reply_msg
+
+
 class AbstractClient(object):
     """Abstract client class.
 
     Basic requests handling for communicating with the remote server.
 
+    On connection, the client negotiates a faster parser with the server.
+    If the server agrees, the messages are sent in length-prefixed frames
+    using the negotiated parser. Otherwise (e.g. an older server), the
+    client keeps using its parser, delimiting the messages by lines. Once
+    the messages are sent in frames, the client negotiates a compressor too,
+    which compresses the large messages in both directions.
+
+    Requests are multiplexed over the connection: they are sent without
+    waiting for the replies of the former requests, and a reader thread
+    passes each reply to its request by the reply's request id. Thus a
+    request waiting for resources doesn't block the other requests of the
+    client, and requests whose reply isn't needed right away can be sent
+    without waiting for it (see :meth:`_send_request`).
+
     Attributes:
         logger (logging.Logger): resource manager logger.
         lock_timeout (number): default waiting time on requests.
+        lock_priority (number): default priority of lock requests.
         _host (str): server's host.
         _port (number): server's port.
         _messages_counter (itertools.count): msg_id counter.
         _parser (AbstractParser): messages parser.
+        _initial_parser (AbstractParser): messages parser to use until a
+            parser is negotiated.
+        _framed (bool): whether the messages are sent in length-prefixed
+            frames, rather than delimited by lines.
+        _compressor (AbstractCompressor): compressor of the frames, None if
+            the frames aren't compressed.
+        _reader (SocketReader): reads the messages the server sends.
+        _request_lock (RLock): serializes the sending of requests by
+            different threads over the socket.
+        _pending_requests (dict): maps the msg_id of each request which
+            waits for its reply to its PendingRequest.
+        _pending_lock (Lock): guards the pending requests and the
+            connection error.
+        _connection_error (str): the reason the connection was
+            lost, None while the replies are received.
+        _reader_thread (Thread): receives the server's replies and passes
+            them to their requests, None until a parser was negotiated.
+        PREFERRED_PARSERS (tuple): names of the parsers to negotiate, in
+            order of preference.
+        PREFERRED_COMPRESSORS (tuple): names of the compressors to
+            negotiate, in order of preference. Compressors which aren't
+            installed are skipped.
     """
     REPLY_OVERHEAD_TIME = 2
     _DEFAULT_REPLY_TIMEOUT = 18
+    PREFERRED_PARSERS = (BinaryParser.NAME,)
+    PREFERRED_COMPRESSORS = ('lz4', 'zlib')
 
     def __init__(self, host, port=RESOURCE_MANAGER_PORT,
                  parser=DEFAULT_PARSER(),
                  lock_timeout=RESOURCE_REQUEST_TIMEOUT,
+                 lock_priority=RESOURCE_REQUEST_PRIORITY,
                  logger=core_log):
         """Initialize a socket connection to the server.
 
@@ -41,6 +177,7 @@ class AbstractClient(object):
             port (number): Server's port.
             parser (AbstractParser): parser to parse the messages with.
             lock_timeout (number): default waiting time on requests.
+            lock_priority (number): default priority of lock requests.
             logger (logging.Logger): client's logger.
         """
         self._host = host
@@ -48,8 +185,18 @@ class AbstractClient(object):
         self._socket = None
         self.logger = logger
         self._parser = parser
+        self._initial_parser = parser
+        self._framed = False
+        self._compressor = None
         self._messages_counter = count()
         self.lock_timeout = lock_timeout
+        self.lock_priority = lock_priority
+        self._reader = None
+        self._request_lock = RLock()
+        self._pending_requests = {}
+        self._pending_lock = Lock()
+        self._connection_error = None
+        self._reader_thread = None
 
     def connect(self, timeout=_DEFAULT_REPLY_TIMEOUT):
         """Connect to manager server.
@@ -63,9 +210,72 @@ class AbstractClient(object):
             return
 
         self.logger.debug("Connecting to server. Hostname: %r", self._host)
+        self._parser = self._initial_parser
+        self._framed = False
+        self._compressor = None
+        self._connection_error = None
         self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._reader = SocketReader(self._socket)
         self._set_reply_timeout(timeout)
         self._socket.connect((self._host, self._port))
+        self._negotiate_parser(timeout)
+        if self._framed:
+            self._negotiate_compressor(timeout)
+
+        # From now on the replies are awaited by their requests
+        self._socket.settimeout(None)
+        self._reader_thread = Thread(target=self._read_replies)
+        self._reader_thread.daemon = True
+        self._reader_thread.start()
+
+    def _negotiate_parser(self, timeout=_DEFAULT_REPLY_TIMEOUT):
+        """Switch to the first preferred parser the server supports.
+
+        Note:
+            The negotiation's reply is received by the requesting thread,
+            since the replies after it are decoded by the negotiated parser.
+
+        Args:
+            timeout (number): time to wait for a reply from the server.
+        """
+        request = messages.NegotiateParser(
+                                        parsers=list(self.PREFERRED_PARSERS))
+        try:
+            reply = self._request(request, timeout=timeout)
+
+        except ParsingError as ex:
+            self.logger.debug("The server doesn't support negotiating a "
+                              "parser, using %r: %s", self._parser.NAME, ex)
+            return
+
+        if reply.parser != self._parser.NAME and reply.parser in PARSERS:
+            self.logger.debug("Switching to the %r parser", reply.parser)
+            self._parser = PARSERS[reply.parser]()
+            self._framed = True
+
+    def _negotiate_compressor(self, timeout=_DEFAULT_REPLY_TIMEOUT):
+        """Compress the large frames using a compressor the server supports.
+
+        Args:
+            timeout (number): time to wait for a reply from the server.
+        """
+        compressors = [name for name in self.PREFERRED_COMPRESSORS
+                       if name in COMPRESSORS]
+        if len(compressors) == 0:
+            return
+
+        request = messages.NegotiateCompressor(compressors=compressors)
+        try:
+            reply = self._request(request, timeout=timeout)
+
+        except ParsingError as ex:
+            self.logger.debug("The server doesn't support compression: %s",
+                              ex)
+            return
+
+        if reply.compressor in COMPRESSORS:
+            self.logger.debug("Compressing using %r", reply.compressor)
+            self._compressor = COMPRESSORS[reply.compressor]()
 
     def is_connected(self):
         """Check if the socket is connected or not.
@@ -84,8 +294,30 @@ class AbstractClient(object):
         if not self.is_connected():
             raise RuntimeError("Socket was not connected")
 
+        self._close_socket()
+
+    def _close_socket(self):
+        """Close the connection and stop the replies reader thread.
+
+        Requests which still wait for their replies fail.
+        """
+        try:
+            # Wakes up the reader thread, which might be blocked on the socket
+            self._socket.shutdown(socket.SHUT_RDWR)
+
+        except socket.error:
+            # The connection was already lost
+            pass
+
         self._socket.close()
 
+        if self._reader_thread is not None and \
+                self._reader_thread is not current_thread():
+            self._reader_thread.join()
+
+        self._reader_thread = None
+        self._fail_pending_requests("The connection was closed")
+
     def __enter__(self):
         """Connect to manager server."""
         self.connect()
@@ -109,73 +341,211 @@ class AbstractClient(object):
 
         self._socket.settimeout(timeout)
 
-    def _request(self, request_msg, timeout=_DEFAULT_REPLY_TIMEOUT):
-        """Send a message to manager server and wait for an answer.
+    def _receive_message(self):
+        """Receive and decode a single message from the server.
 
-        * Encodes the request message and sends it to manager server.
-        * Waits for manager server reply message.
+        Returns:
+            AbstractMessage. the received message.
+
+        Raises:
+            socket.error: the server closed the connection.
+        """
+        if self._framed:
+            encoded_message = self._reader.read_frame()
+            if self._compressor is not None:
+                encoded_message = self._compressor.unpack(encoded_message)
+
+        else:
+            encoded_message = self._reader.read_line()
+
+        return self._parser.decode(encoded_message)
+
+    def _receive_reply(self):
+        """Receive a single message and pass it to its pending request.
+
+        Messages that can't be matched to a request by their request id
+        (e.g. parsing failures) are passed to the oldest pending request.
+
+        Raises:
+            socket.error: the server closed the connection.
+        """
+        try:
+            message = self._receive_message()
+
+        except ParsingError as ex:
+            pending_request = self._pop_pending_request(None)
+            if pending_request is None:
+                self.logger.warning("Failed to decode a message: %s", ex)
+                return
+
+            pending_request.set_error(ex, sys.exc_info()[2])
+            return
+
+        if isinstance(message, messages.WaitingReply):
+            self.logger.info("Waiting for resources, %d requests are ahead "
+                             "in the queue (estimated wait: %s seconds)",
+                             message.queue_position, message.estimated_wait)
+            return
+
+        if isinstance(message, messages.AbstractReply):
+            pending_request = self._pop_pending_request(message.request_id)
+
+        else:
+            pending_request = self._pop_pending_request(None)
+
+        if pending_request is None:
+            self.logger.warning("Got a message on an unknown request: %r",
+                                message)
+            return
+
+        pending_request.set_reply(message)
+
+    def _pop_pending_request(self, request_id):
+        """Remove a request from the pending requests.
+
+        Args:
+            request_id (number): msg_id of the request, None to get the
+                oldest pending request.
+
+        Returns:
+            PendingRequest. the request, None if there's no such request.
+        """
+        with self._pending_lock:
+            if request_id is None and len(self._pending_requests) > 0:
+                request_id = min(self._pending_requests)
+
+            return self._pending_requests.pop(request_id, None)
+
+    def _fail_pending_requests(self, reason):
+        """Fail all the pending requests, and the requests sent from now on.
+
+        Args:
+            reason (str): the reason the connection was lost.
+        """
+        with self._pending_lock:
+            self._connection_error = reason
+            pending_requests = self._pending_requests.values()
+            self._pending_requests.clear()
+
+        for pending_request in pending_requests:
+            pending_request.set_error(socket.error(reason))
+
+    def _read_replies(self):
+        """Receive the server's replies until the connection is lost."""
+        try:
+            while True:
+                self._receive_reply()
+
+        # Any error (a socket error, a corrupted frame, etc.) leaves the
+        # stream in an unknown state, so instead of letting the thread die
+        # and the waiting requests hang, they are all failed.
+        except Exception as ex:  # pylint: disable=broad-except
+            self.logger.debug("Stopped receiving replies from the server: "
+                              "%s", ex)
+            self._fail_pending_requests(
+                            "Lost the connection to the server: %s" % ex)
+
+    def _send_request(self, request_msg, timeout=_DEFAULT_REPLY_TIMEOUT):
+        """Send a message to manager server without waiting for its reply.
 
         Args:
             request_msg (AbstractMessage): request for manager server.
             timeout (number): the request's waiting timeout.
 
         Returns:
-            AbstractMessage. Server reply for given request.
+            PendingRequest. the sent request, to wait for its reply with.
 
         Raises:
-            TypeError: client received an illegal reply message.
-            ParsingError: client failed to decode server's reply.
-            ParsingError: server failed to decode client's request.
-            RuntimeError: server reply on a different request.
-            RuntimeError: server didn't respond, timeout expired.
-            ServerError: server failed to execute the request.
+            RuntimeError: trying to send a too long message.
+            socket.error: the connection to the server was lost.
         """
-        self._set_reply_timeout(timeout)
+        if timeout is not None:
+            timeout += self.REPLY_OVERHEAD_TIME
 
-        request_msg.msg_id = self._messages_counter.next()
-        encoded_request = self._parser.encode(request_msg) + MESSAGE_DELIMITER
-        sent_bytes = 0
+        with self._request_lock:
+            request_msg.msg_id = self._messages_counter.next()
+            encoded_request = self._parser.encode(request_msg)
+            if self._framed:
+                if self._compressor is not None:
+                    encoded_request = self._compressor.pack(encoded_request)
 
-        if len(encoded_request) > MESSAGE_MAX_LENGTH:
-            raise RuntimeError("Client error: Trying to send a too long "
-                               "message to the server (%d > %d)" %
-                               (len(encoded_request), MESSAGE_MAX_LENGTH))
+                encoded_request = (FRAME_HEADER.pack(len(encoded_request)) +
+                                   encoded_request)
 
-        while sent_bytes < len(encoded_request):
-            sent_bytes += self._socket.send(encoded_request[sent_bytes:])
+            else:
+                encoded_request += MESSAGE_DELIMITER
+                if len(encoded_request) > MESSAGE_MAX_LENGTH:
+                    raise RuntimeError("Client error: Trying to send a too "
+                                       "long message to the server "
+                                       "(%d > %d)" % (len(encoded_request),
+                                                      MESSAGE_MAX_LENGTH))
 
-        encoded_reply = ""
+            pending_request = PendingRequest(request_msg, timeout)
+            with self._pending_lock:
+                if self._connection_error is not None:
+                    raise socket.error(self._connection_error)
 
-        try:
-            while not encoded_reply.endswith(MESSAGE_DELIMITER):
-                encoded_reply += self._socket.recv(MESSAGE_MAX_LENGTH)
+                self._pending_requests[request_msg.msg_id] = pending_request
 
-            reply_msg = self._parser.decode(encoded_reply)
+            try:
+                self._socket.sendall(encoded_request)
 
-        except socket.timeout:
-            raise RuntimeError("Server failed to respond to %r after %r "
-                               "seconds" %
-                               (request_msg, self._socket.gettimeout()))
+            except Exception:
+                self._pop_pending_request(request_msg.msg_id)
+                raise
 
-        if isinstance(reply_msg, messages.ParsingFailure):
-            raise ParsingError("Server failed to parse a message, assumed ID "
-                               "%r. Failure Reason is: %r."
-                               % (request_msg.msg_id, reply_msg.reason))
+        return pending_request
 
-        if not isinstance(reply_msg, messages.AbstractReply):
-            raise TypeError("Server sent an illegal message. Replies should "
-                            "be of type AbstractReply. Received message is: %r"
-                            % reply_msg)
+    def _request(self, request_msg, timeout=_DEFAULT_REPLY_TIMEOUT):
+        """Send a message to manager server and wait for an answer.
+
+        * Encodes the request message and sends it to manager server.
+        * Waits for manager server reply message, skipping the waiting
+          replies sent while the request waits for resources.
 
-        if reply_msg.request_id != request_msg.msg_id:
-            raise RuntimeError("Client expect for reply on message with id %r,"
-                               " but got a reply on message with id %r" %
-                               (request_msg.msg_id, reply_msg.request_id))
+        Note:
+            Requests of different threads are sent concurrently, each waiting
+            for its own reply.
 
-        if isinstance(reply_msg, messages.ErrorReply):
-            raise ErrorFactory.build_error(reply_msg.code, reply_msg.content)
+        Args:
+            request_msg (AbstractMessage): request for manager server.
+            timeout (number): the request's waiting timeout.
 
-        return reply_msg
+        Returns:
+            AbstractMessage. Server reply for given request.
+
+        Raises:
+            TypeError: client received an illegal reply message.
+            ParsingError: client failed to decode server's reply.
+            ParsingError: server failed to decode client's request.
+            RuntimeError: server didn't respond, timeout expired.
+            ServerError: server failed to execute the request.
+            socket.error: the connection to the server was lost.
+        """
+        with self._request_lock:
+            pending_request = self._send_request(request_msg, timeout)
+            if self._reader_thread is None:
+                # Still negotiating, receive the reply in this thread
+                self._set_reply_timeout(timeout)
+                try:
+                    while not pending_request.done():
+                        self._receive_reply()
+
+                except socket.timeout:
+                    self._pop_pending_request(request_msg.msg_id)
+                    pending_request.set_error(RuntimeError(
+                            "Server failed to respond to %r after %r seconds"
+                            % (request_msg, self._socket.gettimeout())))
+
+        return pending_request.get_reply()
+
+    def get_server_stats(self):
+        """Query the statistics of the server's requests handling.
+
+        Returns:
+            dict. the statistics of the server's requests paths.
+        """
+        return self._request(messages.ServerStats()).stats
 
     def update_fields(self, model, filter_dict=None, **kwargs):
         """Update content in the server's DB.
@@ -0,0 +1,207 @@
+"""Generate load on the resource management server.
+
+Opens many clients, each locking and releasing a resource repeatedly, and
+reports the connection rate, the requests rate and the requests latencies.
+
+Usage:
+    python -m rotest.management.client.load_generator <resource> [options]
+
+Arguments:
+    <resource>                  Full path of the resource class to lock,
+                                e.g. my_package.resources.Device.
+
+Options:
+    -h,  --help                 Show help message and exit.
+    -n <clients>, --clients <clients>
+                                Amount of concurrent clients [default: 100].
+    -c <cycles>, --cycles <cycles>
+                                Lock/release cycles per client [default: 10].
+    -t <timeout>, --timeout <timeout>
+                                Seconds to wait for a resource [default: 60].
+    --host <host>               Host of the resource management server.
+"""
+# pylint: disable=protected-access,broad-except,too-many-arguments
+# pylint: disable=too-many-instance-attributes,too-many-locals
+from __future__ import print_function
+import time
+import threading
+
+import django
+import docopt
+
+from rotest.common import core_log
+from rotest.common.config import RESOURCE_MANAGER_HOST
+from rotest.management.common.utils import extract_type
+from rotest.management.client.manager import ClientResourceManager
+from rotest.management.common.resource_descriptor import ResourceDescriptor
+
+
+PERCENTILES = (50, 90, 99)
+CLIENT_THREAD_STACK_SIZE = 512 * 1024
+
+
+def get_percentile(sorted_values, percent):
+    """Return the given percentile of the values (nearest rank).
+
+    Args:
+        sorted_values (list): values sorted in ascending order.
+        percent (number): the percentile to return, between 0 and 100.
+
+    Returns:
+        number. the percentile, None if there are no values.
+    """
+    if len(sorted_values) == 0:
+        return None
+
+    rank = int(round(percent / 100.0 * len(sorted_values)))
+    return sorted_values[max(rank, 1) - 1]
+
+
+class LoadClient(threading.Thread):
+    """A client which locks and releases a resource repeatedly.
+
+    Attributes:
+        connected_time (number): time in which the client was connected.
+        latencies (list): seconds each of the client's requests took.
+        errors (list): the exceptions raised by the client's requests.
+        daemon (bool): marked as True, so a hung client won't block the exit.
+    """
+    daemon = True
+
+    def __init__(self, host, descriptor, cycles, timeout, start_event):
+        """Initialize the client.
+
+        Args:
+            host (str): host of the resource management server.
+            descriptor (ResourceDescriptor): descriptor of the resource to
+                lock.
+            cycles (number): amount of lock/release cycles.
+            timeout (number): seconds to wait for a resource.
+            start_event (threading.Event): set once all the clients should
+                start connecting.
+        """
+        super(LoadClient, self).__init__()
+
+        self.errors = []
+        self.latencies = []
+        self.connected_time = None
+
+        self._host = host
+        self._cycles = cycles
+        self._timeout = timeout
+        self._descriptor = descriptor
+        self._start_event = start_event
+
+    def _measure(self, method, *args, **kwargs):
+        """Call a request method and record its latency.
+
+        Args:
+            method (method): the client's request method.
+
+        Returns:
+            object. the method's return value, None if it failed.
+        """
+        start_time = time.time()
+        try:
+            return method(*args, **kwargs)
+
+        except Exception as ex:
+            self.errors.append(ex)
+
+        finally:
+            self.latencies.append(time.time() - start_time)
+
+    def run(self):
+        """Connect to the server and run the lock/release cycles."""
+        self._start_event.wait()
+
+        client = ClientResourceManager(host=self._host, logger=core_log)
+        try:
+            client.connect()
+
+        except Exception as ex:
+            self.errors.append(ex)
+            return
+
+        self.connected_time = time.time()
+        try:
+            for _ in xrange(self._cycles):
+                resources = self._measure(client._lock_resources,
+                                          descriptors=[self._descriptor],
+                                          timeout=self._timeout)
+
+                if resources is not None:
+                    self._measure(client._release_resources,
+                                  resources=resources)
+
+        finally:
+            client.disconnect()
+
+
+def run_load(host, resource_type, clients_amount, cycles, timeout):
+    """Run the load clients and return their statistics.
+
+    Args:
+        host (str): host of the resource management server.
+        resource_type (type): class of the resource to lock.
+        clients_amount (number): amount of concurrent clients.
+        cycles (number): lock/release cycles per client.
+        timeout (number): seconds to wait for a resource.
+
+    Returns:
+        dict. the rates and latencies of the run.
+    """
+    start_event = threading.Event()
+    descriptor = ResourceDescriptor(resource_type)
+
+    threading.stack_size(CLIENT_THREAD_STACK_SIZE)
+    clients = [LoadClient(host, descriptor, cycles, timeout, start_event)
+               for _ in xrange(clients_amount)]
+
+    for client in clients:
+        client.start()
+
+    start_time = time.time()
+    start_event.set()
+    for client in clients:
+        client.join()
+
+    duration = time.time() - start_time
+
+    connected_times = [client.connected_time for client in clients
+                       if client.connected_time is not None]
+    connecting_duration = max(connected_times + [start_time]) - start_time
+    latencies = sorted(latency for client in clients
+                       for latency in client.latencies)
+
+    stats = {"connections": len(connected_times),
+             "connections_per_second":
+                 len(connected_times) / max(connecting_duration, 1e-6),
+             "requests": len(latencies),
+             "requests_per_second": len(latencies) / duration,
+             "errors": sum(len(client.errors) for client in clients),
+             "max_latency": latencies[-1] if len(latencies) > 0 else None}
+
+    for percent in PERCENTILES:
+        stats["p%d_latency" % percent] = get_percentile(latencies, percent)
+
+    return stats
+
+
+def main():
+    """Run the load generator and print its report."""
+    django.setup()
+
+    arguments = docopt.docopt(__doc__)
+    stats = run_load(host=arguments["--host"] or RESOURCE_MANAGER_HOST,
+                     resource_type=extract_type(arguments["<resource>"]),
+                     clients_amount=int(arguments["--clients"]),
+                     cycles=int(arguments["--cycles"]),
+                     timeout=int(arguments["--timeout"]))
+
+    for name in sorted(stats):
+        print("%s: %s" % (name, stats[name]))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,34 @@ also for the resources cleanup procedure and release.
 # pylint: disable=invalid-name,too-many-instance-attributes
 # pylint: disable=too-few-public-methods,too-many-arguments
 # pylint: disable=no-member,method-hidden,broad-except,too-many-public-methods
-from itertools import izip
+# pylint: disable=protected-access
+import os
+import time
+import socket
+from threading import Event, Thread
 
 from attrdict import AttrDict
 
 from rotest.common import core_log
+from rotest.common.utils import run_in_threads
 from rotest.management.common import messages
 from rotest.management.client.client import AbstractClient
-from rotest.management.common.errors import ResourceDoesNotExistError
-from rotest.common.config import ROTEST_WORK_DIR, RESOURCE_MANAGER_HOST
+from rotest.management.client.prefetcher import Prefetcher
+from rotest.management.client.validation_cache import ValidationCache
+from rotest.management.common.errors import (ServerError,
+                                             ResourceDoesNotExistError)
+from rotest.common.config import (ROTEST_WORK_DIR, RESOURCE_MANAGER_HOST,
+                                  RESOURCE_LEASE_PERIOD,
+                                  RESOURCE_SETUP_WORKERS,
+                                  RESOURCE_EARLY_RELEASE,
+                                  RESOURCE_CLEANUP_WORKERS,
+                                  RESOURCE_PREFETCH,
+                                  RESOURCE_VALIDATION_CACHE_TTL)
 from rotest.management.common.resource_descriptor import ResourceDescriptor
+from rotest.management.client.resources_setup import (setup_resource,
+                                                      cleanup_resource,
+                                                      prepare_resources,
+                                                      invalidate_validation)
 
 
 class ResourceRequest(object):
@@ -55,6 +73,114 @@ class ResourceRequest(object):
         return ResourceRequest(self.name, self.type, self.force_initialize,
                                self.save_state, **self.kwargs)
 
+    def get_descriptor(self):
+        """Return the descriptor of the requested resources.
+
+        Returns:
+            ResourceDescriptor. descriptor of the requested resources.
+        """
+        return ResourceDescriptor(self.type, **self.kwargs)
+
+    def get_item_names(self):
+        """Return the names of the resources locked by the request.
+
+        Returns:
+            list. the names, by the order of the locked resources.
+        """
+        return [self.name]
+
+
+class ResourcesRequest(ResourceRequest):
+    """Holds the data for a request of several interchangeable resources.
+
+    The resources are locked using a single descriptor, and are assigned
+    to the test as a list. Each of them is also registered by its item name,
+    i.e. the request name followed by its index ('<name>_<index>').
+
+    Attributes:
+        count (number): amount of resources to lock.
+    """
+    def __init__(self, resource_name, resource_class, count,
+                 force_initialize=False, save_state=True, **kwargs):
+        """Initialize the required parameters of resources request."""
+        super(ResourcesRequest, self).__init__(resource_name, resource_class,
+                                               force_initialize, save_state,
+                                               **kwargs)
+        self.count = count
+
+    def __repr__(self):
+        """Return a string representing the request."""
+        return "Request %r of %d * %r (kwargs=%r)" % (self.name, self.count,
+                                                      self.type, self.kwargs)
+
+    def clone(self):
+        """Create a copy of the request."""
+        return ResourcesRequest(self.name, self.type, self.count,
+                                self.force_initialize, self.save_state,
+                                **self.kwargs)
+
+    def get_descriptor(self):
+        """Return the descriptor of the requested resources.
+
+        Returns:
+            ResourceDescriptor. descriptor of the requested resources.
+        """
+        descriptor = super(ResourcesRequest, self).get_descriptor()
+        descriptor.count = self.count
+        return descriptor
+
+    def get_item_names(self):
+        """Return the names of the resources locked by the request.
+
+        Returns:
+            list. the names, by the order of the locked resources.
+        """
+        return ["%s_%d" % (self.name, index) for index in xrange(self.count)]
+
+
+class AlternativesRequest(ResourceRequest):
+    """Holds the data for a request of a resource out of ordered alternatives.
+
+    The first alternative that can be locked (together with the other
+    resources of the test) is used.
+
+    Attributes:
+        alternatives (list): tuples of a resource type and a dictionary of
+            its requested arguments, in order of preference.
+    """
+    def __init__(self, resource_name, alternatives,
+                 force_initialize=False, save_state=True):
+        """Initialize the required parameters of resource request."""
+        resource_class, kwargs = alternatives[0]
+        super(AlternativesRequest, self).__init__(resource_name,
+                                                  resource_class,
+                                                  force_initialize,
+                                                  save_state, **kwargs)
+        self.alternatives = alternatives
+
+    def __repr__(self):
+        """Return a string representing the request."""
+        return "Request %r of any of %r" % (self.name, self.alternatives)
+
+    def clone(self):
+        """Create a copy of the request."""
+        return AlternativesRequest(self.name, self.alternatives,
+                                   self.force_initialize, self.save_state)
+
+    def get_descriptor(self):
+        """Return the descriptor of the requested resource.
+
+        Returns:
+            ResourceDescriptor. descriptor of the first alternative, with the
+                other alternatives.
+        """
+        descriptor = super(AlternativesRequest, self).get_descriptor()
+        descriptor.alternatives = [ResourceDescriptor(resource_class,
+                                                      **kwargs)
+                                   for resource_class, kwargs
+                                   in self.alternatives[1:]]
+        return descriptor
+
 
 class ClientResourceManager(AbstractClient):
     """Client side resource manager.
@@ -70,113 +196,205 @@ class ClientResourceManager(AbstractClient):
             that are yet to be released.
         keep_resources (bool): whether to keep the resources locked until
             they are not needed.
+        setup_workers (number): maximal amount of resources to connect to,
+            validate and initialize at the same time, 1 to set them up one
+            by one.
+        cleanup_workers (number): maximal amount of resources to store their
+            states and finalize at the same time, 1 to clean them up one by
+            one.
+        early_release (bool): whether to release each resource as soon as
+            it's cleaned up, instead of releasing them all together.
+        validation_cache (ValidationCache): recent validations of resources,
+            which aren't validated again, None to always validate them.
+        prefetch (bool): whether tests should prefetch the resources of the
+            tests which run after them.
+        _prefetcher (Prefetcher): locks and sets up the prefetched resources
+            in the background.
+        lease_period (number): seconds the server keeps the client's lease
+            without a heartbeat, updated by the server's replies.
+        _heartbeat_thread (Thread): renews the client's lease on its locked
+            resources while the client is connected.
+        _heartbeat_stop (Event): stops the heartbeat thread once set.
+        _query_cache (dict): maps a query's key to a list of its result's
+            expiration time, generation and resources.
+        query_hits_count (number): queries answered from the client's cache.
+        query_revalidations_count (number): cached queries whose result was
+            confirmed by the server without sending it again.
+        query_misses_count (number): queries whose result was sent by the
+            server.
+        MIN_HEARTBEAT_INTERVAL (number): minimal seconds between heartbeats.
+        QUERY_CACHE_TTL (number): seconds a cached query result is used
+            before revalidating it with the server.
+        VALIDATION_CACHE_FILE (str): name of the validations cache file,
+            under the work directory.
     """
     DEFAULT_STATE_DIR = "state"
+    VALIDATION_CACHE_FILE = "validation_cache.json"
     DEFAULT_KEEP_RESOURCES = True
+    MIN_HEARTBEAT_INTERVAL = 1
+    QUERY_CACHE_TTL = 5
 
     def __init__(self, host=None, logger=core_log,
-                 keep_resources=DEFAULT_KEEP_RESOURCES):
+                 keep_resources=DEFAULT_KEEP_RESOURCES,
+                 setup_workers=RESOURCE_SETUP_WORKERS,
+                 cleanup_workers=RESOURCE_CLEANUP_WORKERS,
+                 early_release=RESOURCE_EARLY_RELEASE,
+                 validation_cache_ttl=RESOURCE_VALIDATION_CACHE_TTL,
+                 prefetch=RESOURCE_PREFETCH):
         """Initialize the resource client."""
         if host is None:
             host = RESOURCE_MANAGER_HOST
 
         self.locked_resources = []
         self.keep_resources = keep_resources
+        self.setup_workers = setup_workers
+        self.cleanup_workers = cleanup_workers
+        self.early_release = early_release
 
-        super(ClientResourceManager, self).__init__(logger=logger, host=host)
+        self.validation_cache = None
+        if validation_cache_ttl > 0:
+            self.validation_cache = ValidationCache(
+                        os.path.join(ROTEST_WORK_DIR,
+                                     self.VALIDATION_CACHE_FILE),
+                        validation_cache_ttl)
 
-    def _release_locked_resources(self):
-        """Release the locked resources of the client."""
-        if len(self.locked_resources) > 0:
-            self.logger.debug("Releasing locked resources %r",
-                              self.locked_resources)
+        self.prefetch = prefetch
+        self._prefetcher = Prefetcher(self)
 
-            self.release_resources({res.name: res for
-                                    res in self.locked_resources},
-                                   force_release=True)
+        self.lease_period = RESOURCE_LEASE_PERIOD
+        self._heartbeat_thread = None
+        self._heartbeat_stop = Event()
 
-    def disconnect(self):
-        """Disconnect from manager server and release locked resources.
+        self._query_cache = {}
+        self.query_hits_count = 0
+        self.query_misses_count = 0
+        self.query_revalidations_count = 0
 
-        Raises:
-            RuntimeError: wasn't connected in the first place.
+        super(ClientResourceManager, self).__init__(logger=logger, host=host)
+
+    def _send_heartbeats(self):
+        """Renew the client's lease periodically, until asked to stop.
+
+        Heartbeats are sent three times per lease period. The server replies
+        with its lease period, which is used to time the next heartbeats.
+        If the connection to the server was lost (e.g. the server restarted),
+        the client connects again and reclaims its locked resources, retrying
+        every MIN_HEARTBEAT_INTERVAL until it succeeds.
         """
-        self._release_locked_resources()
-        if self.is_connected():
-            super(ClientResourceManager, self).disconnect()
+        interval = max(self.lease_period / 3.0, self.MIN_HEARTBEAT_INTERVAL)
+        while not self._heartbeat_stop.wait(interval):
+            interval = max(self.lease_period / 3.0,
+                           self.MIN_HEARTBEAT_INTERVAL)
+            try:
+                reply = self._request(messages.RenewLeases())
 
-    def _initialize_resource(self, resource, skip_init=False):
-        """Try to initialize the resource.
+            except socket.error as ex:
+                self.logger.warning("Lost the connection to the server (%s), "
+                                    "reconnecting", ex)
+                if not self._reconnect():
+                    interval = self.MIN_HEARTBEAT_INTERVAL
 
-        Note:
-            Initialization failure will cause a finalization attempt.
+                continue
 
-        Args:
-            resource(BaseResource): resource to initialize.
-            skip_init (bool): True to skip initialize and validation.
-        """
-        try:
-            resource.connect()
+            except Exception:
+                self.logger.exception("Failed renewing the resources lease")
+                continue
 
-        except Exception:
-            self.logger.exception("Connecting to %r failed", resource.name)
-            raise
+            self.lease_period = reply.lease_period
+            if self.lease_period == 0:
+                self.logger.debug("Resources leases never expire, "
+                                  "stopping the heartbeats")
+                return
 
-        if skip_init:
-            self.logger.debug("Skipping validation and initialization")
+    def _reconnect(self):
+        """Connect to the server again and reclaim the locked resources.
+
+        Returns:
+            bool. whether the client connected to the server.
+        """
+        with self._request_lock:
+            self._close_socket()
+            self._socket = None
+            # The generations of the cached queries are of the former server
+            self._query_cache.clear()
+            try:
+                super(ClientResourceManager, self).connect()
+                if len(self.locked_resources) > 0:
+                    self._request(messages.ReclaimResources(
+                            resources=[resource.name
+                                       for resource in self.locked_resources]))
+
+            except socket.error as ex:
+                self.logger.debug("Failed connecting to the server: %s", ex)
+                self._close_socket()
+                return False
+
+            except ServerError as ex:
+                self.logger.warning("Failed reclaiming the locked "
+                                    "resources: %s", ex)
+
+        return True
+
+    def _start_heartbeat(self):
+        """Start sending heartbeats to the server in a background thread."""
+        if self._heartbeat_thread is not None:
             return
 
-        try:
-            self.logger.debug("Initializing resource %r", resource.name)
-            self._validate_resource(resource)
-            self.logger.debug("Resource %r was initialized", resource.name)
+        self._heartbeat_stop.clear()
+        self._heartbeat_thread = Thread(target=self._send_heartbeats)
+        self._heartbeat_thread.daemon = True
+        self._heartbeat_thread.start()
 
-        except Exception:
-            self.logger.exception("Failed initializing %r, calling finalize",
-                                  resource.name)
-            resource.finalize()
-            raise
+    def _stop_heartbeat(self):
+        """Stop the heartbeats thread and wait for it to finish."""
+        if self._heartbeat_thread is None:
+            return
+
+        self._heartbeat_stop.set()
+        self._heartbeat_thread.join()
+        self._heartbeat_thread = None
 
-    def _validate_resource(self, resource):
-        """Validate and initialize if needed the resource and its subresources.
+    def connect(self, timeout=AbstractClient._DEFAULT_REPLY_TIMEOUT):
+        """Connect to manager server and start renewing the client's lease.
 
         Args:
-            resource (BaseResource): resource to validate and initialize.
+            timeout (number): time to wait for a reply from the server.
         """
-        for sub_resource in resource.get_sub_resources():
-            self._validate_resource(sub_resource)
-
-        if resource.force_initialize or not resource.validate():
-            if not resource.force_initialize:
-                self.logger.debug("Resource %r validation failed",
-                                  resource.name)
+        super(ClientResourceManager, self).connect(timeout)
+        self._query_cache.clear()
+        self._start_heartbeat()
 
-            resource.initialize()
+    def _release_locked_resources(self):
+        """Release the locked resources of the client."""
+        if len(self.locked_resources) > 0:
+            self.logger.debug("Releasing locked resources %r",
+                              self.locked_resources)
 
-        else:
-            self.logger.debug("Resource %r skipped initialization",
-                              resource.name)
+            self.release_resources({res.name: res for
+                                    res in self.locked_resources},
+                                   force_release=True)
 
-    def _propagate_attributes(self, resource, config, save_state,
-                              force_initialize):
-        """Update the resource's config dictionary recursively.
+    def disconnect(self):
+        """Disconnect from manager server and release locked resources.
 
-        Args:
-            resource (BaseResource): resource to update.
-            config (dict): run configuration dictionary.
-            save_state (bool): determine if storing state is required.
-            force_initialize (bool): determines if the resources will be
-                initialized even if their validation succeeds.
+        Raises:
+            RuntimeError: wasn't connected in the first place.
         """
-        resource.config = config
-        resource.logger = self.logger
-        resource.save_state = save_state
-        resource.force_initialize = force_initialize
+        self._stop_heartbeat()
+        self._hand_over_prefetched()
+        self._release_locked_resources()
+        self.logger.debug("Resources queries: %d cache hits, %d revalidated, "
+                          "%d misses", self.query_hits_count,
+                          self.query_revalidations_count,
+                          self.query_misses_count)
 
-        for sub_resource in resource.get_sub_resources():
-            if sub_resource is not None:
-                self._propagate_attributes(sub_resource, config,
-                                           save_state, force_initialize)
+        if self.validation_cache is not None:
+            self.logger.info("Resources validations: %d cache hits, "
+                             "%d misses", self.validation_cache.hits_count,
+                             self.validation_cache.misses_count)
+
+        if self.is_connected():
+            super(ClientResourceManager, self).disconnect()
 
     def _setup_resources(self, requests, resources, save_state,
                          force_initialize, base_work_dir, config,
@@ -185,6 +403,8 @@ class ClientResourceManager(AbstractClient):
 
         Iterates over the resources and tries to prepare them for
         work by validating, resetting and initializing them.
+        Up to setup_workers resources are set up at the same time, and once
+        any of them fails, the resources which weren't started are skipped.
 
         The locked and initialized resources are yielded instead of returned
         as a list so in case one got an exception in initialization, the
@@ -206,34 +426,43 @@ class ClientResourceManager(AbstractClient):
         Raises:
             ServerError. resource manager failed to lock resources.
         """
-        for resource, request in izip(resources, requests):
-
-            resource.set_sub_resources()
-
-            self._propagate_attributes(resource=resource, config=config,
-               save_state=request.save_state and save_state,
-               force_initialize=request.force_initialize or force_initialize)
-
-            resource.set_work_dir(request.name, base_work_dir)
-            resource.logger.debug("Resource %r work dir was created under %r",
-                                  request.name, base_work_dir)
-
-            if enable_debug:
-                resource.enable_debug()
-
-            self._initialize_resource(resource, skip_init)
-
-            yield (request.name, resource)
-
-    def _cleanup_resources(self, resources):
+        named_resources = prepare_resources(requests, resources, self.logger,
+                                            save_state, force_initialize,
+                                            base_work_dir, config,
+                                            enable_debug)
+
+        def setup_named_resource(named_resource):
+            """Set up one of the named resources."""
+            name, resource = named_resource
+            return setup_resource(name, resource, skip_init,
+                                  self.validation_cache, self.logger)
+
+        error = None
+        for _, result, exc_info in run_in_threads(setup_named_resource,
+                                                  named_resources,
+                                                  self.setup_workers,
+                                                  stop_on_error=True):
+            if exc_info is None:
+                yield result
+
+            elif error is None:
+                error = exc_info
+
+        if error is not None:
+            raise error[0], error[1], error[2]
+
+    def _cleanup_resources(self, resources, release=False):
         """Cleanup the resources and release them.
 
         Iterates over the resources dictionary and tries to cleanup each
         resource then releases them.
         Cleanup includes storing state, and finalizing resources.
+        Up to cleanup_workers resources are cleaned up at the same time.
 
         Args:
             resources (AttrDict): dictionary of resources {name: BaseResource}.
+            release (bool): whether to release each resource as soon as it's
+                cleaned up, even if its cleanup failed.
 
         Raises:
             RuntimeError. releasing resources failed.
@@ -242,34 +471,33 @@ class ClientResourceManager(AbstractClient):
 
         self.logger.debug("cleaning up the locked resources")
 
-        for name, resource in resources.iteritems():
+        def cleanup_named_resource(named_resource):
+            """Clean up one of the named resources."""
+            name, resource = named_resource
+            return cleanup_resource(name, resource, self.DEFAULT_STATE_DIR,
+                                    self.logger)
 
-            try:
-                if resource.save_state:
+        for (name, resource), errors, _ in run_in_threads(
+                                                cleanup_named_resource,
+                                                resources.items(),
+                                                self.cleanup_workers):
+            exceptions.extend(errors)
+            if not release:
+                continue
 
-                    try:
-                        resource.store_state_dir(self.DEFAULT_STATE_DIR)
-
-                    except Exception as err:
-                        exceptions.append("%s: %s" % (str(err), name))
-                        self.logger.exception("Resource %r failed to store "
-                                              "state", name)
-
-                resource.logger.debug("Finalizing resource %r", name)
-                resource.finalize()
-                resource.logger.debug("Resource %r Finalized", name)
+            try:
+                self._release_resources([resource])
 
             except Exception as err:
-                # A finalize failure should not stop other resources from
-                # finalizing and from the release process to complete
                 exceptions.append("%s: %s" % (str(err), name))
-                self.logger.exception("Resource %r failed to finalize", name)
+                self.logger.exception("Resource %r failed to be released",
+                                      name)
 
         if len(exceptions) > 0:
             raise RuntimeError("Releasing resources has failed. "
                                "Reasons: %s" % "\n".join(exceptions))
 
-    def _lock_resources(self, descriptors, timeout=None):
+    def _lock_resources(self, descriptors, timeout=None, priority=None):
         """Send LockResources request to resource manager server.
 
         Note:
@@ -280,14 +508,21 @@ class ClientResourceManager(AbstractClient):
                 resource_descriptor.ResourceDescriptor`.
             timeout (number): seconds to wait for resources if they're
                 unavailable. None - use the default timeout.
+            priority (number): priority of the request over other requests
+                waiting for the same resources. None - use the default
+                priority.
 
         Returns:
-            list. list of locked resources.
+            list. list of locked resources, the resources of every descriptor
+                by the descriptors order, as many as its count.
         """
         if timeout is None:
             timeout = self.lock_timeout
 
-        resources = []
+        if priority is None:
+            priority = self.lock_priority
+
+        resources_datas = iter([])
         server_requests = [descriptor for descriptor in descriptors
                            if descriptor.type.DATA_CLASS is not None]
 
@@ -299,19 +534,26 @@ class ClientResourceManager(AbstractClient):
                                 server_requests]
 
             request = messages.LockResources(descriptors=encoded_requests,
-                                             timeout=timeout)
+                                             timeout=timeout,
+                                             priority=priority,
+                                             notify_position=True)
 
             reply = self._request(request, timeout=timeout)
+            resources_datas = iter(reply.resources)
 
-            resources.extend(descriptor.type(data=resource_data) for
-                             (descriptor, resource_data) in
-                             zip(server_requests, reply.resources))
-
-        for index, descriptor in enumerate(descriptors):
-            if descriptor.type.DATA_CLASS is None:
-                # it's a service
-                resources.insert(index,
-                                 descriptor.type(**descriptor.properties))
+        resources = []
+        for descriptor in descriptors:
+            for _ in xrange(descriptor.count):
+                if descriptor.type.DATA_CLASS is None:
+                    # it's a service
+                    resources.append(
+                                descriptor.type(**descriptor.properties))
+
+                else:
+                    resource_data = next(resources_datas)
+                    resource_type = descriptor.get_resource_type(
+                                                                resource_data)
+                    resources.append(resource_type(data=resource_data))
 
         return resources
 
@@ -384,6 +626,10 @@ class ClientResourceManager(AbstractClient):
             return retrieved_resources
 
         for descriptor, request in zip(descriptors[:], requests[:]):
+            if request.get_item_names() != [request.name]:
+                # Multiple resources are always locked together
+                continue
+
             # Check if the previously locked holds a similar resource
             if any(resource.DATA_CLASS == descriptor.type.DATA_CLASS
                    for resource in unused_locked_resources):
@@ -415,6 +661,48 @@ class ClientResourceManager(AbstractClient):
 
         return retrieved_resources
 
+    def _hand_over_prefetched(self):
+        """Wait for the prefetching, and hold the prefetched resources.
+
+        The prefetched resources are added to the client's locked resources,
+        so the next request of resources uses them (or releases them).
+        """
+        prefetched_resources = self._prefetcher.hand_over()
+        if len(prefetched_resources) > 0:
+            self.logger.debug("Handing over the prefetched resources %r",
+                              prefetched_resources)
+            self.locked_resources.extend(prefetched_resources)
+
+    def prefetch_resources(self, requests,
+                           config=None,
+                           skip_init=False,
+                           save_state=False,
+                           force_initialize=False,
+                           base_work_dir=ROTEST_WORK_DIR):
+        """Lock and set up resources in the background, for a later request.
+
+        Only resources the client doesn't hold already are prefetched. They
+        are handed over to the next request of resources, which uses them
+        like previously locked resources, and releases the unused ones.
+
+        Note:
+            Failures are logged instead of raised, since the later request
+            locks and sets up the resources which weren't prefetched.
+
+        Args:
+            requests (tuple): List of the ResourceRequest.
+            config (dict): run configuration dictionary.
+            skip_init (bool): True to skip resources initialize and validation.
+            save_state (bool): Determine if storing state is required.
+            force_initialize (bool): determines if the resources will be
+                initialized even if their validation succeeds.
+            base_work_dir (str): base work directory path.
+        """
+        self._hand_over_prefetched()
+        self._prefetcher.start(list(requests), self.locked_resources[:],
+                               save_state, force_initialize, base_work_dir,
+                               config, skip_init)
+
     def request_resources(self, requests,
                           config=None,
                           skip_init=False,
@@ -447,9 +735,10 @@ class ClientResourceManager(AbstractClient):
         Raises:
             ServerError. resource manager failed to lock resources.
         """
+        self._hand_over_prefetched()
+
         requests = list(requests)
-        descriptors = [ResourceDescriptor(request.type, **request.kwargs)
-                       for request in requests]
+        descriptors = [request.get_descriptor() for request in requests]
 
         initialized_resources = AttrDict()
 
@@ -492,6 +781,8 @@ class ClientResourceManager(AbstractClient):
         Iterates over the resources dictionary and tries to cleanup each
         resource then releases them.
         Cleanup includes storing state, and finalizing resources.
+        If the client releases resources early, each resource is released
+        once its own cleanup is done.
 
         Args:
             resources (AttrDict): resources AttrDict {name: BaseResource}.
@@ -502,10 +793,18 @@ class ClientResourceManager(AbstractClient):
         Raises:
             RuntimeError. releasing resources failed.
         """
+        if dirty and self.validation_cache is not None:
+            for resource in resources.itervalues():
+                invalidate_validation(resource, self.validation_cache)
+
         if self.keep_resources and not force_release and not dirty:
             self.logger.debug("Refraining from releasing the resources")
             return
 
+        if self.early_release:
+            self._cleanup_resources(resources, release=True)
+            return
+
         try:
             self._cleanup_resources(resources)
 
@@ -515,15 +814,48 @@ class ClientResourceManager(AbstractClient):
     def query_resources(self, descriptor):
         """Query the content of the server's DB.
 
+        Note:
+            The results are cached for QUERY_CACHE_TTL seconds. Afterwards,
+            the cached result is revalidated with the server, which sends
+            the resources again only if the result has changed.
+
         Args:
             descriptor (ResourceDescriptor): descriptor of the query
                 (containing model class and query filter kwargs).
+
+        Returns:
+            list. the resource datas answering the query.
         """
-        request = messages.QueryResources(descriptors=descriptor.encode())
+        key = (descriptor.type,
+               repr(sorted(descriptor.properties.iteritems())))
+
+        cached = self._query_cache.get(key)
+        generation = None
+        if cached is not None:
+            expiration_time, generation, resources = cached
+            if time.time() < expiration_time:
+                self.query_hits_count += 1
+                return resources
+
+        request = messages.QueryResources(descriptors=descriptor.encode(),
+                                          generation=generation)
         try:
             reply = self._request(request)
 
         except ResourceDoesNotExistError:
+            self._query_cache.pop(key, None)
             return []
 
-        return reply.resources
+        if reply.resources is None:
+            self.query_revalidations_count += 1
+            resources = cached[2]
+
+        else:
+            self.query_misses_count += 1
+            resources = reply.resources
+
+        if reply.generation is not None:
+            self._query_cache[key] = [time.time() + self.QUERY_CACHE_TTL,
+                                      reply.generation, resources]
+
+        return resources
@@ -0,0 +1,164 @@
+"""Prefetch resources in the background, for a later request."""
+# pylint: disable=broad-except,too-many-arguments,protected-access
+from threading import Thread
+
+from attrdict import AttrDict
+
+
+class Prefetcher(object):
+    """Locks and sets up the resources of the next request in a thread.
+
+    Attributes:
+        client (ClientResourceManager): the client to lock and set up the
+            resources with.
+        _thread (Thread): locks and sets up the prefetched resources.
+        _resources (list): resources prefetched by the thread, which weren't
+            handed over yet.
+    """
+    def __init__(self, client):
+        """Initialize the prefetcher.
+
+        Args:
+            client (ClientResourceManager): the client to lock and set up the
+                resources with.
+        """
+        self.client = client
+        self._thread = None
+        self._resources = []
+
+    def _get_missing_requests(self, requests, held_resources):
+        """Return the requests which the held resources don't answer.
+
+        Note:
+            Requests of several resources are never returned, since they're
+            always locked together (instead of using held resources).
+
+        Args:
+            requests (list): list of the ResourceRequest.
+            held_resources (list): the resources to match the requests to.
+
+        Returns:
+            list. the requests of single resources which none of the held
+                resources answer.
+        """
+        held_resources = list(held_resources)
+        missing_requests = []
+        for request in requests:
+            if request.get_item_names() != [request.name]:
+                continue
+
+            matching_resources = self.client._find_matching_resources(
+                                                    request.get_descriptor(),
+                                                    held_resources)
+
+            if len(matching_resources) > 0:
+                held_resources.remove(matching_resources[0])
+
+            else:
+                missing_requests.append(request)
+
+        return missing_requests
+
+    def _prefetch(self, requests, held_resources, save_state,
+                  force_initialize, base_work_dir, config, skip_init):
+        """Lock and set up the resources of the requests which aren't held.
+
+        Args:
+            requests (list): list of the ResourceRequest.
+            held_resources (list): resources held by the client, which
+                needn't be prefetched.
+            save_state (bool): determine if storing state is required.
+            force_initialize (bool): determines if the resources will be
+                initialized even if their validation succeeds.
+            base_work_dir (str): base work directory path.
+            config (dict): run configuration dictionary.
+            skip_init (bool): True to skip initialization and validation.
+        """
+        logger = self.client.logger
+        try:
+            requests = self._get_missing_requests(requests, held_resources)
+            if len(requests) == 0:
+                return
+
+            logger.debug("Prefetching resources for %r", requests)
+            locked_resources = self.client._lock_resources(
+                            [request.get_descriptor() for request in requests])
+
+        except Exception:
+            logger.warning("Failed prefetching resources", exc_info=True)
+            return
+
+        prefetched_resources = AttrDict()
+        try:
+            for name, resource in self.client._setup_resources(
+                                                        requests,
+                                                        locked_resources,
+                                                        save_state,
+                                                        force_initialize,
+                                                        base_work_dir,
+                                                        config,
+                                                        False,
+                                                        skip_init):
+
+                prefetched_resources[name] = resource
+
+        except Exception:
+            logger.warning("Failed setting up the prefetched resources",
+                           exc_info=True)
+            try:
+                self.client._cleanup_resources(prefetched_resources)
+
+            except RuntimeError:
+                logger.warning("Failed cleaning up the prefetched resources",
+                               exc_info=True)
+
+            finally:
+                self.client._release_resources(locked_resources)
+
+            return
+
+        logger.info("Prefetched resources %r", locked_resources)
+        self._resources = locked_resources
+
+    def start(self, requests, held_resources, save_state, force_initialize,
+              base_work_dir, config, skip_init):
+        """Start prefetching the resources of the requests which aren't held.
+
+        Args:
+            requests (list): list of the ResourceRequest.
+            held_resources (list): resources held by the client, which
+                needn't be prefetched.
+            save_state (bool): determine if storing state is required.
+            force_initialize (bool): determines if the resources will be
+                initialized even if their validation succeeds.
+            base_work_dir (str): base work directory path.
+            config (dict): run configuration dictionary.
+            skip_init (bool): True to skip initialization and validation.
+        """
+        self._thread = Thread(target=self._prefetch,
+                              args=(requests,
+                                    held_resources,
+                                    save_state,
+                                    force_initialize,
+                                    base_work_dir,
+                                    config,
+                                    skip_init))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def hand_over(self):
+        """Wait for the prefetching, and return the prefetched resources.
+
+        Returns:
+            list. the prefetched resources, which the client should hold from
+                now on.
+        """
+        if self._thread is None:
+            return []
+
+        self._thread.join()
+        self._thread = None
+
+        resources = self._resources
+        self._resources = []
+        return resources
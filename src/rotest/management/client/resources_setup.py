@@ -0,0 +1,231 @@
+"""Set up locked resources for work, and clean them up afterwards.
+
+Setting up includes connecting to the resources, and validating and
+initializing them if needed. Cleaning up includes storing their state
+and finalizing them.
+"""
+# pylint: disable=broad-except,too-many-arguments,protected-access
+import time
+from itertools import izip
+from functools import partial
+
+
+def propagate_attributes(resource, config, logger, save_state,
+                         force_initialize):
+    """Update the resource's config dictionary recursively.
+
+    Args:
+        resource (BaseResource): resource to update.
+        config (dict): run configuration dictionary.
+        logger (logging.Logger): logger for the resource to use.
+        save_state (bool): determine if storing state is required.
+        force_initialize (bool): determines if the resources will be
+            initialized even if their validation succeeds.
+    """
+    resource.config = config
+    resource.logger = logger
+    resource.save_state = save_state
+    resource.force_initialize = force_initialize
+
+    for sub_resource in resource.get_sub_resources():
+        if sub_resource is not None:
+            propagate_attributes(sub_resource, config, logger,
+                                 save_state, force_initialize)
+
+
+def prepare_resources(requests, resources, logger, save_state,
+                      force_initialize, base_work_dir, config, enable_debug):
+    """Name the locked resources and prepare them to be set up.
+
+    Args:
+        requests (tuple): list of the ResourceRequest.
+        resources (list): list of the resources instances, by the order of
+            the requests' items.
+        logger (logging.Logger): logger for the resources to use.
+        save_state (bool): determine if storing state is required.
+        force_initialize (bool): determines if the resources will be
+            initialized even if their validation succeeds.
+        base_work_dir (str): base work directory path.
+        config (dict): run configuration dictionary.
+        enable_debug (bool): True to wrap the resource's method with debug.
+
+    Returns:
+        list. pairs of the resources' names and the resources.
+    """
+    items = ((name, request) for request in requests
+             for name in request.get_item_names())
+
+    named_resources = []
+    for resource, (name, request) in izip(resources, items):
+
+        resource.set_sub_resources()
+
+        propagate_attributes(resource=resource, config=config, logger=logger,
+               save_state=request.save_state and save_state,
+               force_initialize=request.force_initialize or force_initialize)
+
+        resource.set_work_dir(name, base_work_dir)
+        resource.logger.debug("Resource %r work dir was created under %r",
+                              name, base_work_dir)
+
+        if enable_debug:
+            resource.enable_debug()
+
+        named_resources.append((name, resource))
+
+    return named_resources
+
+
+def validate_resource(resource, validation_cache, logger):
+    """Validate and initialize if needed the resource and its subresources.
+
+    Note:
+        The sub-resources are handled before the resource, in parallel if
+        the resource declares its sub-resources can be brought up in
+        parallel. Resources whose validation is cached are skipped,
+        along with their sub-resources.
+
+    Args:
+        resource (BaseResource): resource to validate and initialize.
+        validation_cache (ValidationCache): recent validations of resources,
+            None to always validate them.
+        logger (logging.Logger): logger to use.
+    """
+    fingerprint = None
+    if validation_cache is not None:
+        fingerprint = resource.get_state_fingerprint()
+
+    if fingerprint is not None and not resource.force_initialize and \
+            validation_cache.is_valid(resource.name, fingerprint):
+        logger.debug("Resource %r skipped validation, it was validated "
+                     "recently", resource.name)
+        return
+
+    resource._execute_sub_resources(partial(validate_resource,
+                                            validation_cache=validation_cache,
+                                            logger=logger))
+
+    if resource.force_initialize or not resource.validate():
+        if not resource.force_initialize:
+            logger.debug("Resource %r validation failed", resource.name)
+
+        resource.initialize()
+
+    else:
+        logger.debug("Resource %r skipped initialization", resource.name)
+
+    if fingerprint is not None:
+        # Initializing the resource might have changed its state
+        validation_cache.add(resource.name, resource.get_state_fingerprint())
+
+
+def invalidate_validation(resource, validation_cache):
+    """Drop the cached validations of the resource and its subresources.
+
+    Args:
+        resource (BaseResource): resource whose validation to drop.
+        validation_cache (ValidationCache): recent validations of resources.
+    """
+    validation_cache.invalidate(resource.name)
+    for sub_resource in resource.get_sub_resources():
+        invalidate_validation(sub_resource, validation_cache)
+
+
+def initialize_resource(resource, skip_init, validation_cache, logger):
+    """Try to initialize the resource.
+
+    Note:
+        Initialization failure will cause a finalization attempt.
+
+    Args:
+        resource(BaseResource): resource to initialize.
+        skip_init (bool): True to skip initialize and validation.
+        validation_cache (ValidationCache): recent validations of resources,
+            None to always validate them.
+        logger (logging.Logger): logger to use.
+    """
+    try:
+        resource.connect()
+
+    except Exception:
+        logger.exception("Connecting to %r failed", resource.name)
+        raise
+
+    if skip_init:
+        logger.debug("Skipping validation and initialization")
+        return
+
+    try:
+        logger.debug("Initializing resource %r", resource.name)
+        validate_resource(resource, validation_cache, logger)
+        logger.debug("Resource %r was initialized", resource.name)
+
+    except Exception:
+        logger.exception("Failed initializing %r, calling finalize",
+                         resource.name)
+        resource.finalize()
+        raise
+
+
+def setup_resource(name, resource, skip_init, validation_cache, logger):
+    """Connect to the resource, and validate and initialize it if needed.
+
+    Args:
+        name (str): name of the resource in the test.
+        resource (BaseResource): resource to set up.
+        skip_init (bool): True to skip initialization and validation.
+        validation_cache (ValidationCache): recent validations of resources,
+            None to always validate them.
+        logger (logging.Logger): logger to use.
+
+    Returns:
+        tuple. the name of the resource and the resource.
+    """
+    start_time = time.time()
+    initialize_resource(resource, skip_init, validation_cache, logger)
+    logger.info("Resource %r was set up in %.2f seconds",
+                name, time.time() - start_time)
+
+    return (name, resource)
+
+
+def cleanup_resource(name, resource, state_dir, logger):
+    """Store the state of the resource if needed, and finalize it.
+
+    Args:
+        name (str): name of the resource in the test.
+        resource (BaseResource): resource to clean up.
+        state_dir (str): name of the directory to store the state in, under
+            the resource's work directory.
+        logger (logging.Logger): logger to use.
+
+    Returns:
+        list. messages of the cleanup's failures.
+    """
+    exceptions = []
+    start_time = time.time()
+
+    try:
+        if resource.save_state:
+
+            try:
+                resource.store_state_dir(state_dir)
+
+            except Exception as err:
+                exceptions.append("%s: %s" % (str(err), name))
+                logger.exception("Resource %r failed to store state", name)
+
+        resource.logger.debug("Finalizing resource %r", name)
+        resource.finalize()
+        resource.logger.debug("Resource %r Finalized", name)
+
+    except Exception as err:
+        # A finalize failure should not stop other resources from
+        # finalizing and from the release process to complete
+        exceptions.append("%s: %s" % (str(err), name))
+        logger.exception("Resource %r failed to finalize", name)
+
+    logger.info("Resource %r was cleaned up in %.2f seconds",
+                name, time.time() - start_time)
+
+    return exceptions
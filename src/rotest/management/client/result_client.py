@@ -5,11 +5,26 @@ tests' events in real-time, so at the end of a run, the server's database could
 tell what and when tests and tests containers were run (including their
 hierarchial structure), what were their results and error descriptions, and
 additional data about the run.
+
+The events are appended to a local spool file, from which a shipper thread
+sends them to the server in batches, so the run is slowed down neither by the
+round trips to the server nor by its DB. Events which weren't sent by the end
+of the run (e.g. since the server was unreachable) are kept in the spool, and
+are sent by the next run.
 """
+# pylint: disable=broad-except,too-many-instance-attributes
+import sys
+import time
+from threading import Event, Thread, Condition
+
 from rotest.common import core_log
 from rotest.management.common import messages
-from rotest.common.config import RESOURCE_MANAGER_HOST
+from rotest.management.common.errors import ServerError
 from rotest.management.client.client import AbstractClient
+from rotest.management.client.result_spool import ResultSpool
+from rotest.common.config import RESOURCE_MANAGER_HOST, RESULTS_SPOOL_DIR
+from rotest.management.common.parsers.binary_parser import BinaryParser
+from rotest.management.common.parsers.abstract_parser import ParsingError
 from rotest.management.common.resource_descriptor import ResourceDescriptor
 from rotest.management.common.utils import (TEST_ID_KEY,
                                             TEST_NAME_KEY,
@@ -21,14 +36,308 @@ class ClientResultManager(AbstractClient):
     """Client side result manager.
 
     Responsible for updating the server of test events and run data.
+
+    The reports are appended to a spool, and a shipper thread connects to
+    the server and sends them, reconnecting whenever the connection is lost.
+    Spools which were left by former runs are shipped before this run's.
+
+    Attributes:
+        spool_dir (str): directory of the spools.
+        _spool (ResultSpool): the spool of the reports of this client, None
+            while the client isn't connected.
+        _orphans (list): spools of former runs which weren't shipped yet.
+        _spool_parser (BinaryParser): encodes the spooled reports.
+        _shipper (Thread): ships the spools' reports to the server.
+        _stop_shipping (Event): set when the shipper should stop.
+        _wakeup (Event): set when reports were added to the spool.
+        _shipped (Condition): notified when the spools were shipped.
+        _server_run (ResultSpool): spool whose run the server is updated of
+            over the current connection, None if there's no such spool.
+        _connect_timeout (number): time to wait for the server's replies
+            when connecting.
+        _report_exc_info (tuple): type, value and traceback of the first
+            error of shipping the reports, which wasn't raised yet.
+        BATCH_WINDOW (number): seconds to wait for more reports before
+            shipping the reports in the spool.
+        BATCH_MAX_EVENTS (number): maximal amount of events to send at once.
+        RETRY_INTERVAL (number): seconds to wait before reconnecting to the
+            server after the connection failed.
+        FLUSH_TIMEOUT (number): seconds to wait for the reports to be shipped
+            at the end of the run.
+        SHIPPING_ERRORS (tuple): errors of shipping reports which would
+            recur if the reports were shipped again.
     """
-    def __init__(self, host=None, logger=core_log):
-        """Initialize the result client."""
+    BATCH_WINDOW = 0.05
+    BATCH_MAX_EVENTS = 200
+    RETRY_INTERVAL = 5
+    FLUSH_TIMEOUT = 60
+    SHIPPING_ERRORS = (TypeError, ServerError, ParsingError)
+
+    def __init__(self, host=None, logger=core_log, spool_dir=None):
+        """Initialize the result client.
+
+        Args:
+            host (str): Server's IP address.
+            logger (logging.Logger): client's logger.
+            spool_dir (str): directory of the spools, None to use the
+                configured directory.
+        """
         if host is None:
             host = RESOURCE_MANAGER_HOST
 
+        if spool_dir is None:
+            spool_dir = RESULTS_SPOOL_DIR
+
+        self.spool_dir = spool_dir
+        self._spool = None
+        self._orphans = []
+        self._spool_parser = BinaryParser()
+        self._shipper = None
+        self._stop_shipping = Event()
+        self._wakeup = Event()
+        self._shipped = Condition()
+        self._server_run = None
+        self._connect_timeout = None
+        self._report_exc_info = None
+
         super(ClientResultManager, self).__init__(logger=logger, host=host)
 
+    def connect(self, timeout=AbstractClient._DEFAULT_REPLY_TIMEOUT):
+        """Open a spool for the reports and start shipping them.
+
+        The connection to the server is made by the shipper, so the run
+        doesn't fail if the server is unreachable.
+
+        Args:
+            timeout (number): time to wait for a reply from the server.
+        """
+        if self._spool is not None:
+            self.logger.debug("Ignoring attempt to re-connect to server: %r",
+                              self._host)
+            return
+
+        self._spool = ResultSpool.create(self.spool_dir)
+        self._orphans = ResultSpool.find_orphans(self.spool_dir)
+        for orphan in self._orphans:
+            self.logger.info("Shipping the results left in %r", orphan.path)
+
+        self._connect_timeout = timeout
+        self._stop_shipping.clear()
+        self._shipper = Thread(target=self._ship)
+        self._shipper.daemon = True
+        self._shipper.start()
+
+    def disconnect(self):
+        """Stop shipping the reports and disconnect from the server.
+
+        Reports which weren't shipped are left in the spool, for the next
+        run to ship.
+
+        Raises:
+            RuntimeError: wasn't connected in the first place.
+        """
+        if self._spool is None:
+            raise RuntimeError("Client was not connected")
+
+        self._stop_shipping.set()
+        self._wakeup.set()
+        self._shipper.join()
+        self._shipper = None
+
+        with self._request_lock:
+            self._drop_connection()
+
+        for spool in self._orphans + [self._spool]:
+            if spool.has_pending():
+                self.logger.warning("Some results weren't sent to the "
+                                    "server, they are kept in %r", spool.path)
+
+            spool.close()
+
+        self._orphans = []
+        self._spool = None
+
+    def _drop_connection(self):
+        """Close the connection to the server, if there's one."""
+        if self._socket is not None:
+            self._close_socket()
+            self._socket = None
+
+        self._server_run = None
+
+    def _get_pending_spool(self):
+        """Return the first spool which has reports to ship.
+
+        Orphan spools which were shipped are closed.
+
+        Returns:
+            ResultSpool. the spool to ship, None if all were shipped.
+        """
+        while len(self._orphans) > 0 and not self._orphans[0].has_pending():
+            self._orphans.pop(0).close()
+
+        if len(self._orphans) > 0:
+            return self._orphans[0]
+
+        if self._spool.has_pending():
+            return self._spool
+
+        return None
+
+    def _ship(self):
+        """Ship the spools' reports to the server, until asked to stop."""
+        while not self._stop_shipping.is_set():
+            spool = self._get_pending_spool()
+            if spool is None:
+                with self._shipped:
+                    self._shipped.notify_all()
+
+                self._wakeup.wait()
+                self._wakeup.clear()
+                # Let more events be reported, to send them together
+                self._stop_shipping.wait(self.BATCH_WINDOW)
+                continue
+
+            try:
+                self._ship_records(spool)
+
+            except Exception as ex:
+                self.logger.warning("Failed sending the results to the "
+                                    "server, retrying in %s seconds: %s",
+                                    self.RETRY_INTERVAL, ex)
+                with self._request_lock:
+                    self._drop_connection()
+
+                self._stop_shipping.wait(self.RETRY_INTERVAL)
+
+    def _ship_records(self, spool):
+        """Send the first records of a spool to the server.
+
+        The records are acknowledged once the server handled them. If the
+        server failed handling them, sending them again won't help, so they
+        are moved aside to the spool's rejected records.
+
+        Args:
+            spool (ResultSpool): the spool to ship.
+
+        Raises:
+            socket.error: the connection to the server failed.
+            RuntimeError: the server didn't respond in time.
+        """
+        with self._request_lock:
+            if self._socket is None:
+                super(ClientResultManager, self).connect(
+                                                    self._connect_timeout)
+
+        records = spool.read(self.BATCH_MAX_EVENTS)
+        try:
+            msgs = [self._spool_parser.decode(record)
+                    for record, _ in records]
+            if isinstance(msgs[0], messages.StartTestRun):
+                records = records[:1]
+                reply = self._request(msgs[0])
+                self._server_run = spool
+                if isinstance(reply, messages.TestRunReply):
+                    resume_msg = messages.ResumeTestRun(tests=msgs[0].tests,
+                                                        run_id=reply.run_id)
+                    spool.set_run(self._spool_parser.encode(resume_msg))
+
+            else:
+                if self._server_run is not spool:
+                    self._resume_run(spool)
+
+                events = []
+                for msg in msgs:
+                    if isinstance(msg, messages.StartTestRun):
+                        break
+
+                    events.append(messages.BatchEvents.encode_event(msg))
+
+                records = records[:len(events)]
+                self._request(messages.BatchEvents(events=events))
+
+        except self.SHIPPING_ERRORS as ex:
+            self.logger.warning("Reporting the results in %r failed, moving "
+                                "%d records aside: %s", spool.path,
+                                len(records), ex)
+            if self._report_exc_info is None:
+                self._report_exc_info = sys.exc_info()
+
+            spool.reject(records)
+            return
+
+        spool.acknowledge(records[-1][1])
+
+    def _resume_run(self, spool):
+        """Update the server of the run whose events a spool contains.
+
+        Args:
+            spool (ResultSpool): the spool of the run.
+
+        Raises:
+            ServerError: the run wasn't started on the server.
+        """
+        run_record = spool.get_run()
+        if run_record is None:
+            raise ServerError("The run of %r wasn't started" % spool.path)
+
+        self._request(self._spool_parser.decode(run_record))
+        self._server_run = spool
+
+    def _report(self, msg):
+        """Append a report to the spool, to be sent to the server.
+
+        Args:
+            msg (AbstractMessage): the report.
+        """
+        self._spool.append(self._spool_parser.encode(msg))
+        self._wakeup.set()
+
+    def wait_for_shipping(self, timeout):
+        """Wait until all the spooled reports were shipped.
+
+        Args:
+            timeout (number): maximal seconds to wait.
+
+        Returns:
+            bool. whether all the reports were shipped.
+        """
+        end_time = time.time() + timeout
+        with self._shipped:
+            while self._spool.has_pending() or \
+                    any(orphan.has_pending() for orphan in self._orphans):
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    return False
+
+                self._shipped.wait(remaining)
+
+        return True
+
+    def flush(self, timeout=None):
+        """Wait for the reports to be shipped.
+
+        Reports which weren't shipped in time are left in the spool, to be
+        shipped by the next run.
+
+        Args:
+            timeout (number): maximal seconds to wait, None to wait
+                FLUSH_TIMEOUT seconds.
+
+        Raises:
+            Exception: the first error the server failed handling the reports
+                with, e.g. ServerError.
+        """
+        if timeout is None:
+            timeout = self.FLUSH_TIMEOUT
+
+        if not self.wait_for_shipping(timeout):
+            self.logger.warning("Timed out sending the results to the server")
+
+        exc_info, self._report_exc_info = self._report_exc_info, None
+        if exc_info is not None:
+            raise exc_info[0], exc_info[1], exc_info[2]
+
     @classmethod
     def _create_test_dict(cls, test_item):
         """Recursively create a dict representing the test's hierarchy.
@@ -63,7 +372,7 @@ class ClientResultManager(AbstractClient):
         msg = messages.StartTestRun(tests=tests_tree_dict,
                                     run_data=run_data)
 
-        self._request(msg)
+        self._report(msg)
 
     def update_run_data(self, run_data):
         """Update the run data in the server.
@@ -74,7 +383,19 @@ class ClientResultManager(AbstractClient):
         run_data_fields = run_data.get_fields()
         msg = messages.UpdateRunData(run_data=run_data_fields)
 
-        self._request(msg)
+        self._report(msg)
+
+    def stop_test_run(self, run_data):
+        """Update the final run data and wait for the reports to be shipped.
+
+        Args:
+            run_data (RunData): the run data instance.
+
+        Raises:
+            Exception: the first error that occurred reporting to the server.
+        """
+        self.update_run_data(run_data)
+        self.flush()
 
     def add_result(self, test_item, result_code, info=None):
         """Update the result of the test item in the result server.
@@ -87,7 +408,7 @@ class ClientResultManager(AbstractClient):
         msg = messages.AddResult(test_id=test_item.identifier,
                                  code=result_code,
                                  info=info)
-        self._request(msg)
+        self._report(msg)
 
     def start_test(self, test_item):
         """Inform the result server of the beginning of a test.
@@ -96,7 +417,7 @@ class ClientResultManager(AbstractClient):
             test_item (rotest.core.case.TestCase): the test to update about.
         """
         msg = messages.StartTest(test_id=test_item.identifier)
-        self._request(msg)
+        self._report(msg)
 
     def should_skip(self, test_item):
         """Check if the test passed in the last run according to results DB.
@@ -104,11 +425,28 @@ class ClientResultManager(AbstractClient):
         Args:
             test_item (rotest.core.case.TestCase): the test to query about.
 
+        Note:
+            The test isn't skipped if the server can't be queried.
+
         Returns:
             bool. True if the test should be skipped, False otherwise.
         """
+        # The server should be updated of the run's events before the query
+        if not self.wait_for_shipping(self._DEFAULT_REPLY_TIMEOUT):
+            self.logger.warning("Can't check if %r should be skipped, since "
+                                "the results weren't sent to the server",
+                                test_item.data.name)
+            return False
+
         msg = messages.ShouldSkip(test_id=test_item.identifier)
-        reply_msg = self._request(msg)
+        try:
+            reply_msg = self._request(msg)
+
+        except Exception as ex:
+            self.logger.warning("Failed checking if %r should be skipped: %s",
+                                test_item.data.name, ex)
+            return False
+
         return reply_msg.should_skip is not None
 
     def stop_test(self, test_item):
@@ -118,7 +456,7 @@ class ClientResultManager(AbstractClient):
             test_item (rotest.core.case.TestCase): the test to update about.
         """
         msg = messages.StopTest(test_id=test_item.identifier)
-        self._request(msg)
+        self._report(msg)
 
     def update_resources(self, test_item):
         """Inform the result server of locked resources of a test.
@@ -135,7 +473,7 @@ class ClientResultManager(AbstractClient):
 
         msg = messages.UpdateResources(test_id=test_item.identifier,
                                        resources=resources)
-        self._request(msg)
+        self._report(msg)
 
     def start_composite(self, test_item):
         """Inform the result server of the beginning of a composite test.
@@ -144,7 +482,7 @@ class ClientResultManager(AbstractClient):
             test_item (rotest.core.suite.TestSuite): the test to update about.
         """
         msg = messages.StartComposite(test_id=test_item.identifier)
-        self._request(msg)
+        self._report(msg)
 
     def stop_composite(self, test_item):
         """Inform the result server of the end of a composite test.
@@ -153,4 +491,4 @@ class ClientResultManager(AbstractClient):
             test_item (rotest.core.suite.TestSuite): the test to update about.
         """
         msg = messages.StopComposite(test_id=test_item.identifier)
-        self._request(msg)
+        self._report(msg)
@@ -0,0 +1,300 @@
+"""Define the local spool of the results reported to the server."""
+import os
+import time
+from glob import glob
+from threading import Lock
+
+try:
+    import fcntl
+
+except ImportError:  # pragma: no cover
+    fcntl = None
+    import msvcrt
+
+from rotest.management.common.utils import FRAME_HEADER
+
+
+class ResultSpool(object):
+    """Append-only file of results messages to send to the server.
+
+    The messages are appended to the spool as length-prefixed records, and
+    are acknowledged once the server handled them. The offset after the
+    acknowledged records is kept in a side file, which is replaced as a
+    whole, and the spool is truncated once all its records were acknowledged.
+
+    A spool is locked while it's open, so the spools of runs which ended
+    before shipping all their records (e.g. since the server was down) can
+    be found and shipped by later runs.
+
+    Records which can't be shipped (e.g. the server failed handling them)
+    are moved to a side file of rejected records, which is kept for
+    inspection, rather than being dropped.
+
+    Attributes:
+        path (str): path of the spool file.
+        _lock (Lock): guards the spool between its writer and its shipper.
+        _lock_file (file): the lock file, locked while the spool is open.
+        _file (file): the spool, open for appending.
+        _reader (file): the spool, open for reading.
+        _size (number): offset after the last complete record.
+        _acked_offset (number): offset after the last acknowledged record.
+        SPOOL_EXTENSION (str): extension of the spool files.
+        ACKED_EXTENSION (str): extension of the acknowledged offset files.
+        RUN_EXTENSION (str): extension of the run files.
+        LOCK_EXTENSION (str): extension of the lock files.
+        REJECTED_EXTENSION (str): extension of the rejected records files.
+    """
+    SPOOL_EXTENSION = ".spool"
+    ACKED_EXTENSION = ".acked"
+    RUN_EXTENSION = ".run"
+    LOCK_EXTENSION = ".lock"
+    REJECTED_EXTENSION = ".rejected"
+
+    def __init__(self, path):
+        """Open and lock a spool.
+
+        Note:
+            A record which was partially written when the spool's writer
+            stopped is truncated.
+
+        Args:
+            path (str): path of the spool file, created if it doesn't exist.
+
+        Raises:
+            IOError: the spool is locked, i.e. open by another spool object.
+        """
+        self.path = path
+        self._lock = Lock()
+        self._lock_file = open(path + self.LOCK_EXTENSION, "ab")
+        try:
+            self._acquire_lock()
+
+        except IOError:
+            self._lock_file.close()
+            raise
+
+        self._file = open(path, "ab")
+        # Unbuffered, since the spool is truncated & rewritten under it
+        self._reader = open(path, "rb", 0)
+        self._size = self._find_size()
+        self._file.truncate(self._size)
+        self._acked_offset = min(self._read_acked_offset(), self._size)
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.path)
+
+    @classmethod
+    def create(cls, spool_dir):
+        """Create a new spool.
+
+        Args:
+            spool_dir (str): directory of the spools, created if needed.
+
+        Returns:
+            ResultSpool. the new spool, open and locked.
+        """
+        if not os.path.isdir(spool_dir):
+            os.makedirs(spool_dir)
+
+        name = "%.6f-%d" % (time.time(), os.getpid())
+        return cls(os.path.join(spool_dir, name + cls.SPOOL_EXTENSION))
+
+    @classmethod
+    def find_orphans(cls, spool_dir):
+        """Open the spools which aren't open by others, oldest first.
+
+        Args:
+            spool_dir (str): directory of the spools.
+
+        Returns:
+            list. the orphan spools, open and locked.
+        """
+        orphans = []
+        for path in sorted(glob(os.path.join(spool_dir,
+                                             "*" + cls.SPOOL_EXTENSION))):
+            try:
+                orphans.append(cls(path))
+
+            except IOError:
+                # The spool belongs to a running process
+                continue
+
+        return orphans
+
+    def _acquire_lock(self):
+        """Lock the spool's lock file without blocking.
+
+        Raises:
+            IOError: the lock file is already locked.
+        """
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(),
+                        fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        else:
+            msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _find_size(self):
+        """Return the offset after the last complete record in the spool.
+
+        Returns:
+            number. the size of the complete records in the spool.
+        """
+        file_size = os.fstat(self._reader.fileno()).st_size
+        offset = 0
+        while offset + FRAME_HEADER.size <= file_size:
+            self._reader.seek(offset)
+            length, = FRAME_HEADER.unpack(
+                                    self._reader.read(FRAME_HEADER.size))
+            if offset + FRAME_HEADER.size + length > file_size:
+                break
+
+            offset += FRAME_HEADER.size + length
+
+        return offset
+
+    def _read_acked_offset(self):
+        """Read the offset after the acknowledged records.
+
+        Returns:
+            number. the acknowledged offset, 0 if it wasn't written.
+        """
+        try:
+            with open(self.path + self.ACKED_EXTENSION, "rb") as acked_file:
+                return int(acked_file.read())
+
+        except (IOError, ValueError):
+            return 0
+
+    @staticmethod
+    def _write_file(path, data):
+        """Write a file via a temporary file, so it isn't partially written.
+
+        Args:
+            path (str): path of the file.
+            data (str): content of the file.
+        """
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as temp_file:
+            temp_file.write(data)
+
+        os.rename(temp_path, path)
+
+    @staticmethod
+    def _remove_file(path):
+        """Remove a file if it exists.
+
+        Args:
+            path (str): path of the file.
+        """
+        if os.path.exists(path):
+            os.remove(path)
+
+    def append(self, record):
+        """Append a record to the spool.
+
+        Args:
+            record (str): the record to append.
+        """
+        with self._lock:
+            self._file.write(FRAME_HEADER.pack(len(record)) + record)
+            self._file.flush()
+            self._size += FRAME_HEADER.size + len(record)
+
+    def has_pending(self):
+        """Return whether there are records which weren't acknowledged."""
+        with self._lock:
+            return self._acked_offset < self._size
+
+    def read(self, max_count):
+        """Read the first records which weren't acknowledged.
+
+        Args:
+            max_count (number): maximal amount of records to read.
+
+        Returns:
+            list. tuples of each record and the offset after it.
+        """
+        records = []
+        with self._lock:
+            offset = self._acked_offset
+            self._reader.seek(offset)
+            while offset < self._size and len(records) < max_count:
+                length, = FRAME_HEADER.unpack(
+                                    self._reader.read(FRAME_HEADER.size))
+                offset += FRAME_HEADER.size + length
+                records.append((self._reader.read(length), offset))
+
+        return records
+
+    def acknowledge(self, offset):
+        """Mark the records before an offset as handled by the server.
+
+        The spool is truncated once all of its records were acknowledged.
+
+        Args:
+            offset (number): the offset after the last handled record.
+        """
+        with self._lock:
+            if offset < self._size:
+                self._acked_offset = offset
+                self._write_file(self.path + self.ACKED_EXTENSION,
+                                 str(offset))
+                return
+
+            self._file.truncate(0)
+            self._size = self._acked_offset = 0
+            self._remove_file(self.path + self.ACKED_EXTENSION)
+
+    def reject(self, records):
+        """Move records which can't be shipped to the rejected records file.
+
+        The records are acknowledged only once they were written there.
+
+        Args:
+            records (list): tuples of each record and the offset after it,
+                as returned by :meth:`read`.
+        """
+        with open(self.path + self.REJECTED_EXTENSION, "ab") as rejected_file:
+            for record, _ in records:
+                rejected_file.write(FRAME_HEADER.pack(len(record)) + record)
+
+        self.acknowledge(records[-1][1])
+
+    def get_run(self):
+        """Return the run record of the spool.
+
+        Returns:
+            str. the record of the spool's run, None if it wasn't set.
+        """
+        try:
+            with open(self.path + self.RUN_EXTENSION, "rb") as run_file:
+                return run_file.read()
+
+        except IOError:
+            return None
+
+    def set_run(self, record):
+        """Keep the record which the spool's run is resumed with.
+
+        Args:
+            record (str): the record of the spool's run.
+        """
+        self._write_file(self.path + self.RUN_EXTENSION, record)
+
+    def close(self):
+        """Close and unlock the spool.
+
+        The spool's files are removed if all its records were acknowledged.
+        """
+        with self._lock:
+            self._file.close()
+            self._reader.close()
+            if self._acked_offset == self._size:
+                for extension in (self.ACKED_EXTENSION,
+                                  self.RUN_EXTENSION,
+                                  self.LOCK_EXTENSION,
+                                  ""):
+                    self._remove_file(self.path + extension)
+
+            self._lock_file.close()
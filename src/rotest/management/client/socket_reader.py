@@ -0,0 +1,146 @@
+"""Define a buffered reader of the messages received by a socket."""
+import socket
+
+from rotest.management.common.utils import (FRAME_HEADER,
+                                            MESSAGE_DELIMITER,
+                                            MESSAGE_MAX_LENGTH)
+
+
+class SocketReader(object):
+    """Buffered reader of delimited or length-prefixed messages.
+
+    The received data is kept in a reusable buffer, into which the socket
+    receives directly. Messages are extracted from the buffer without
+    copying the data before them, and the buffer is compacted or grown only
+    when there's no room left to receive into, so receiving a message takes
+    linear time in its length.
+
+    Reading a message can be retried after the socket's timeout expires,
+    since the received part of the message is kept in the buffer.
+
+    Attributes:
+        _socket (socket.socket): the socket to receive from.
+        _buffer (bytearray): the received data.
+        _start (number): offset of the first byte which wasn't read yet.
+        _end (number): offset after the last received byte.
+        _search_start (number): offset to resume searching the delimiter
+            from.
+        RECEIVE_SIZE (number): minimal amount of bytes to receive at once.
+    """
+    RECEIVE_SIZE = MESSAGE_MAX_LENGTH
+
+    def __init__(self, sock):
+        self._socket = sock
+        self._buffer = bytearray(self.RECEIVE_SIZE)
+        self._start = 0
+        self._end = 0
+        self._search_start = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def _reserve(self, size):
+        """Make room to receive data into the buffer.
+
+        Args:
+            size (number): amount of bytes needed after the unread data.
+        """
+        if len(self._buffer) - self._end >= size:
+            return
+
+        unread = len(self)
+        if self._start > 0:
+            self._buffer[:unread] = self._buffer[self._start:self._end]
+            self._search_start -= self._start
+            self._start = 0
+            self._end = unread
+
+        if len(self._buffer) - self._end < size:
+            new_buffer = bytearray(max(2 * len(self._buffer),
+                                       self._end + size))
+            new_buffer[:unread] = self._buffer[:unread]
+            self._buffer = new_buffer
+
+    def _receive(self, size=RECEIVE_SIZE):
+        """Receive data from the socket into the buffer.
+
+        Args:
+            size (number): maximal amount of bytes to receive.
+
+        Raises:
+            socket.error: the other side closed the connection.
+            socket.timeout: the socket's timeout expired.
+        """
+        size = max(size, self.RECEIVE_SIZE)
+        self._reserve(size)
+        received = self._socket.recv_into(
+                        memoryview(self._buffer)[self._end:self._end + size])
+        if received == 0:
+            raise socket.error("The server closed the connection")
+
+        self._end += received
+
+    def _consume(self, start, end, next_start):
+        """Read a message from the buffer.
+
+        Args:
+            start (number): offset of the message's start.
+            end (number): offset of the message's end.
+            next_start (number): offset of the data after the message.
+
+        Returns:
+            str. the message.
+        """
+        message = memoryview(self._buffer)[start:end].tobytes()
+        self._start = self._search_start = next_start
+        if self._start == self._end:
+            self._start = self._end = self._search_start = 0
+
+        return message
+
+    def read_line(self, delimiter=MESSAGE_DELIMITER):
+        """Read a message which ends with a delimiter.
+
+        Args:
+            delimiter (str): the messages' delimiter.
+
+        Returns:
+            str. the message, without its delimiter.
+
+        Raises:
+            socket.error: the other side closed the connection.
+            socket.timeout: the socket's timeout expired.
+        """
+        while True:
+            index = self._buffer.find(delimiter, self._search_start,
+                                      self._end)
+            if index != -1:
+                return self._consume(self._start, index,
+                                     index + len(delimiter))
+
+            # The delimiter may be split between the received chunks
+            self._search_start = max(self._start,
+                                     self._end - len(delimiter) + 1)
+            self._receive()
+
+    def read_frame(self):
+        """Read a message which is prefixed by its length.
+
+        Returns:
+            str. the message, without its header.
+
+        Raises:
+            socket.error: the other side closed the connection.
+            socket.timeout: the socket's timeout expired.
+        """
+        while len(self) < FRAME_HEADER.size:
+            self._receive()
+
+        length, = FRAME_HEADER.unpack_from(self._buffer, self._start)
+        frame_size = FRAME_HEADER.size + length
+        while len(self) < frame_size:
+            self._receive(frame_size - len(self))
+
+        message_start = self._start + FRAME_HEADER.size
+        return self._consume(message_start, message_start + length,
+                             message_start + length)
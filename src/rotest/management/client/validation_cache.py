@@ -0,0 +1,106 @@
+"""Define the local cache of the resources' validations."""
+import os
+import json
+import time
+from threading import Lock
+
+
+class ValidationCache(object):
+    """Local file of the resources which were validated recently.
+
+    Each resource is cached by its name, along with the fingerprint of its
+    state when it was validated, until the cache's TTL expires. The file is
+    re-read on each access and replaced as a whole, so the cache is shared
+    by the runs (and processes) which use the same file.
+
+    Attributes:
+        path (str): path of the cache file.
+        ttl (number): seconds a validation is cached for.
+        hits_count (number): validations answered by the cache.
+        misses_count (number): validations which weren't cached, expired or
+            whose resource's fingerprint has changed.
+        _lock (Lock): guards the cache file between the client's threads.
+    """
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self.hits_count = 0
+        self.misses_count = 0
+        self._lock = Lock()
+
+    def __repr__(self):
+        return "%s(%r, ttl=%r)" % (type(self).__name__, self.path, self.ttl)
+
+    def _read(self):
+        """Read the cache file.
+
+        Returns:
+            dict. maps each cached resource's name to a list of its
+                fingerprint and the expiration time of its validation.
+        """
+        try:
+            with open(self.path, "rb") as cache_file:
+                return json.load(cache_file)
+
+        except (IOError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        """Replace the cache file, via a temporary file.
+
+        Args:
+            entries (dict): the cache's entries, as returned by :meth:`_read`.
+        """
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir != "" and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+        temp_path = "%s.%d.tmp" % (self.path, os.getpid())
+        with open(temp_path, "wb") as temp_file:
+            json.dump(entries, temp_file)
+
+        os.rename(temp_path, self.path)
+
+    def is_valid(self, name, fingerprint):
+        """Return whether a resource was validated in its current state.
+
+        Args:
+            name (str): name of the resource.
+            fingerprint (str): fingerprint of the resource's current state.
+
+        Returns:
+            bool. whether the resource's validation is cached and hasn't
+                expired, and its state hasn't changed since.
+        """
+        with self._lock:
+            entry = self._read().get(name)
+            if entry is not None and entry[0] == fingerprint and \
+                    time.time() < entry[1]:
+                self.hits_count += 1
+                return True
+
+            self.misses_count += 1
+            return False
+
+    def add(self, name, fingerprint):
+        """Cache the validation of a resource.
+
+        Args:
+            name (str): name of the validated resource.
+            fingerprint (str): fingerprint of the resource's validated state.
+        """
+        with self._lock:
+            entries = self._read()
+            entries[name] = [fingerprint, time.time() + self.ttl]
+            self._write(entries)
+
+    def invalidate(self, name):
+        """Remove the cached validation of a resource.
+
+        Args:
+            name (str): name of the resource.
+        """
+        with self._lock:
+            entries = self._read()
+            if entries.pop(name, None) is not None:
+                self._write(entries)
@@ -0,0 +1,137 @@
+"""Define the compressors of the frames sent between clients and server.
+
+Once a compressor is negotiated on a connection, every frame's message is
+prefixed by a marker byte, which tells whether the message is compressed.
+Only messages above the compressor's threshold are compressed, since
+compressing small messages costs more than sending them as they are.
+"""
+# pylint: disable=no-self-use
+import zlib
+from abc import ABCMeta, abstractmethod
+
+from rotest.management.common.parsers.abstract_parser import ParsingError
+
+try:
+    import lz4.frame as lz4_frame
+
+except ImportError:  # pragma: no cover
+    lz4_frame = None
+
+
+class AbstractCompressor(object):
+    """Basic frames compressor class.
+
+    Attributes:
+        NAME (str): name the client and the server negotiate the compressor
+            by.
+        THRESHOLD (number): minimal length of messages to compress.
+    """
+    __metaclass__ = ABCMeta
+
+    NAME = NotImplemented
+    THRESHOLD = 16 * 1024
+
+    _RAW_MARKER = '\x00'
+    _COMPRESSED_MARKER = '\x01'
+
+    @abstractmethod
+    def compress(self, data):
+        """Compress data.
+
+        Args:
+            data (str): the data to compress.
+
+        Returns:
+            str. the compressed data.
+        """
+        pass
+
+    @abstractmethod
+    def decompress(self, data):
+        """Decompress data.
+
+        Args:
+            data (str): compressed data.
+
+        Returns:
+            str. the decompressed data.
+
+        Raises:
+            Exception: the data isn't valid compressed data.
+        """
+        pass
+
+    def pack(self, message):
+        """Return the frame content of an encoded message.
+
+        Args:
+            message (str): the encoded message.
+
+        Returns:
+            str. the message prefixed by its marker, compressed if it's
+                larger than the threshold and compressing shortens it.
+        """
+        if len(message) >= self.THRESHOLD:
+            compressed = self.compress(message)
+            if len(compressed) < len(message):
+                return self._COMPRESSED_MARKER + compressed
+
+        return self._RAW_MARKER + message
+
+    def unpack(self, frame):
+        """Return the encoded message of a frame's content.
+
+        Args:
+            frame (str): the frame content, as returned by :meth:`pack`.
+
+        Returns:
+            str. the encoded message.
+
+        Raises:
+            ParsingError: the frame is malformed.
+        """
+        marker = frame[:1]
+        if marker == self._RAW_MARKER:
+            return frame[1:]
+
+        if marker != self._COMPRESSED_MARKER:
+            raise ParsingError("Unknown frame marker %r" % marker)
+
+        try:
+            return self.decompress(frame[1:])
+
+        except Exception as ex:
+            raise ParsingError("Failed decompressing a frame: %s" % ex)
+
+
+class ZlibCompressor(AbstractCompressor):
+    """zlib compressor, using the fastest compression level.
+
+    Higher levels barely improve the ratio of the encoded messages, which
+    is about 10 on resources replies and tests trees, at thrice the time.
+    """
+    NAME = 'zlib'
+    LEVEL = 1
+
+    def compress(self, data):
+        return zlib.compress(data, self.LEVEL)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class Lz4Compressor(AbstractCompressor):
+    """LZ4 compressor, which is faster than zlib at a lower ratio."""
+    NAME = 'lz4'
+
+    def compress(self, data):
+        return lz4_frame.compress(data)
+
+    def decompress(self, data):
+        return lz4_frame.decompress(data)
+
+
+COMPRESSORS = {ZlibCompressor.NAME: ZlibCompressor}
+
+if lz4_frame is not None:
+    COMPRESSORS[Lz4Compressor.NAME] = Lz4Compressor
@@ -96,19 +96,116 @@ class ResourcesReply(AbstractReply):
     pass
 
 
-@slots_extender(('descriptors',))
+@slots_extender(('resources', 'generation'))
+class QueryReply(AbstractReply):
+    """Query reply message.
+
+    Sent as an answer to a successful 'QueryResources' request.
+
+    Attributes:
+        resources (list): the resource datas answering the query, None if
+            the client's cached result of the query is up to date.
+        generation (number): generation of the query's result, None if the
+            result isn't cached by the server.
+    """
+    pass
+
+
+@slots_extender(('queue_position', 'estimated_wait'))
+class WaitingReply(AbstractReply):
+    """Waiting reply message.
+
+    Sent while a 'LockResources' request waits for unavailable resources,
+    before the request's final reply.
+
+    Attributes:
+        queue_position (number): amount of requests for the same resources
+            which are ahead of the request in the queue.
+        estimated_wait (number): estimated seconds to wait for the resources,
+            None if unknown.
+    """
+    pass
+
+
+@slots_extender(('lease_period',))
+class LeaseReply(AbstractReply):
+    """Lease reply message.
+
+    Sent as an answer to a 'RenewLeases' request.
+
+    Attributes:
+        lease_period (number): seconds until the renewed lease expires, 0 if
+            the server doesn't expire leases.
+    """
+    pass
+
+
+@slots_extender(('parser',))
+class ParserReply(AbstractReply):
+    """Parser reply message.
+
+    Sent as an answer to a 'NegotiateParser' request, after which both sides
+    use the chosen parser and its framing.
+
+    Attributes:
+        parser (str): name of the parser chosen by the server.
+    """
+    pass
+
+
+@slots_extender(('compressor',))
+class CompressorReply(AbstractReply):
+    """Compressor reply message.
+
+    Sent as an answer to a 'NegotiateCompressor' request, after which both
+    sides compress the large messages using the chosen compressor.
+
+    Attributes:
+        compressor (str): name of the compressor chosen by the server, None
+            if it supports none of the client's compressors.
+    """
+    pass
+
+
+@slots_extender(('stats',))
+class StatsReply(AbstractReply):
+    """Statistics reply message.
+
+    Sent as an answer to a 'ServerStats' request.
+
+    Attributes:
+        stats (dict): the statistics of the server's requests paths.
+    """
+    pass
+
+
+@slots_extender(('run_id',))
+class TestRunReply(AbstractReply):
+    """Test run reply message.
+
+    Sent as an answer to a 'StartTestRun' request.
+
+    Attributes:
+        run_id (number): identifier of the run's data in the DB, with which
+            the run can be resumed by a 'ResumeTestRun' request.
+    """
+    pass
+
+
+@slots_extender(('descriptors', 'generation'))
 class QueryResources(AbstractMessage):
     """Query resources request message.
 
     Attributes:
         descriptors (dict): descriptors of to query in the format
             {'type': resource_type_name, 'properties': {'key': value}}
-        timeout (number): seconds to wait for resources if they're unavailable.
+        generation (number): generation of the client's cached result of the
+            query, None if it has none.
     """
     pass
 
 
-@slots_extender(('descriptors', 'timeout'))
+@slots_extender(('descriptors', 'timeout', 'priority', 'notify_position'))
 class LockResources(AbstractMessage):
     """Lock resources request message.
 
@@ -116,6 +213,10 @@ class LockResources(AbstractMessage):
         descriptors (list): descriptors of resources. list of dictionaries of
             {'type': resource_type_name, 'properties': {'key': value}}
         timeout (number): seconds to wait for resources if they're unavailable.
+        priority (number): priority of the request over other requests
+            waiting for the same resources, higher is handled first.
+        notify_position (bool): whether to send the request's position in the
+            queue (as WaitingReply messages) while it waits for resources.
     """
     pass
 
@@ -130,6 +231,48 @@ class ReleaseResources(AbstractMessage):
     pass
 
 
+@slots_extender(('resources',))
+class ReclaimResources(AbstractMessage):
+    """Reclaim resources locked before the server restarted.
+
+    Attributes:
+        resources (list): names of the resources locked by the client.
+    """
+    pass
+
+
+class RenewLeases(AbstractMessage):
+    """Renew the lease of the client on its locked resources (heartbeat)."""
+    pass
+
+
+class ServerStats(AbstractMessage):
+    """Query the statistics of the server's requests handling."""
+    pass
+
+
+@slots_extender(('parsers',))
+class NegotiateParser(AbstractMessage):
+    """Request to switch to a faster parser than the XML parser.
+
+    Attributes:
+        parsers (list): names of the parsers the client supports, in order
+            of preference.
+    """
+    pass
+
+
+@slots_extender(('compressors',))
+class NegotiateCompressor(AbstractMessage):
+    """Request to compress the large messages sent in frames.
+
+    Attributes:
+        compressors (list): names of the compressors the client supports, in
+            order of preference.
+    """
+    pass
+
+
 @slots_extender(('user_name',))
 class CleanupUser(AbstractMessage):
     """Clean user's resources request message.
@@ -151,6 +294,19 @@ class StartTestRun(AbstractMessage):
     pass
 
 
+@slots_extender(('tests', 'run_id'))
+class ResumeTestRun(AbstractMessage):
+    """Resume a run of tests started by another connection message.
+
+    Attributes:
+        tests (dict): structure and data of the tests of the run, as sent in
+            the run's 'StartTestRun' request.
+        run_id (number): identifier of the run's data in the DB, as given in
+            the 'StartTestRun' request's reply.
+    """
+    pass
+
+
 class RunFinished(AbstractMessage):
     """Signals the end of the run.
 
@@ -261,3 +417,59 @@ class AddResult(AbstractTestEventMessage):
         info (str): additional data about the result (traceback, reason, etc.).
     """
     pass
+
+
+@slots_extender(('events',))
+class BatchEvents(AbstractMessage):
+    """Report a batch of test events message.
+
+    Attributes:
+        events (list): the events, in the order they occurred. Each event is
+            a dictionary of an event message's fields, and the message's type
+            name under EVENT_KEY.
+    """
+    EVENT_KEY = 'event'
+
+    @classmethod
+    def encode_event(cls, message):
+        """Return the event of the given message.
+
+        Args:
+            message (AbstractMessage): an event message, e.g. StartTest.
+
+        Returns:
+            dict. the event, to add to the batch's events.
+        """
+        event = {slot: getattr(message, slot) for slot in message.__slots__
+                 if slot != 'msg_id'}
+        event[cls.EVENT_KEY] = type(message).__name__
+        return event
+
+    def get_messages(self):
+        """Return the messages of the batch's events.
+
+        Returns:
+            list. the event messages, in the order they occurred.
+
+        Raises:
+            ValueError: one of the events isn't a test event message.
+        """
+        event_messages = []
+        for event in self.events:
+            event = dict(event)
+            message_class = globals().get(event.pop(self.EVENT_KEY, None))
+            if message_class not in BATCHED_EVENTS:
+                raise ValueError("Event %r can't be batched" % event)
+
+            event_messages.append(message_class(**event))
+
+        return event_messages
+
+
+BATCHED_EVENTS = (StopTest,
+                  StartTest,
+                  AddResult,
+                  StopComposite,
+                  UpdateRunData,
+                  StartComposite,
+                  UpdateResources)
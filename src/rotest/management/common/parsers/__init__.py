@@ -1,4 +1,8 @@
 """Define all parsers that supports resource_management messages"""
 from .xml_parser import XMLParser
+from .binary_parser import BinaryParser
 
 DEFAULT_PARSER = XMLParser
+
+PARSERS = {XMLParser.NAME: XMLParser,
+           BinaryParser.NAME: BinaryParser}
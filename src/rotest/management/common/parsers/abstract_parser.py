@@ -1,4 +1,5 @@
 """An interface of a typical parser."""
+# pylint: disable=protected-access
 from abc import ABCMeta, abstractmethod
 
 from rotest.management.common.messages import AbstractMessage
@@ -9,9 +10,15 @@ class ParsingError(Exception):
 
 
 class AbstractParser(object):
-    """Basic parser class."""
+    """Basic parser class.
+
+    Attributes:
+        NAME (str): name the client and the server negotiate the parser by.
+    """
     __metaclass__ = ABCMeta
 
+    NAME = NotImplemented
+
     def encode(self, message):
         """Encode a message.
 
@@ -56,6 +63,49 @@ class AbstractParser(object):
             raise ParsingError("Decoding data %r has failed. Reason: %s." %
                                (data, err))
 
+    @staticmethod
+    def _build_resource_data(resource_type, resource_properties):
+        """Build a decoded resource data.
+
+        Args:
+            resource_type (type): type of the resource data.
+            resource_properties (dict): decoded fields of the resource data,
+                related objects are given as lists.
+
+        Returns:
+            ResourceData. the resource data.
+
+        Raises:
+            ParsingError: one of the list fields isn't a reverse relation.
+        """
+        # Get the related fields.
+        list_field_names = [key for key, value in resource_properties.items()
+                            if isinstance(value, list)]
+
+        list_fields = [(field_name, resource_properties.pop(field_name))
+                       for field_name in list_field_names]
+
+        resource = resource_type(**resource_properties)
+
+        for field_name, field_values in list_fields:
+            # Set the related fields' values.
+            field_object, _, is_direct, is_many_to_many = \
+                resource_type._meta.get_field_by_name(field_name)
+
+            if is_direct:
+                raise ParsingError("Got unsupported direct list field %r" %
+                                   field_name)
+
+            if is_many_to_many:
+                raise ParsingError("Got unsupported many to many field %r" %
+                                   field_name)
+
+            for related_object in field_values:
+                # Set the related model's pointer to the current model.
+                setattr(related_object, field_object.field.name, resource)
+
+        return resource
+
     @abstractmethod
     def _encode_message(self, message):
         """Encode a message.
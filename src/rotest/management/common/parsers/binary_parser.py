@@ -0,0 +1,377 @@
+"""Binary parser module.
+
+Note:
+    Django works with Unicode therefore, we use here basestring which is the
+    base class of unicode and str type.
+"""
+# pylint: disable=too-many-return-statements,protected-access,no-self-use
+import struct
+from numbers import Number
+
+from django.db import models
+
+from rotest.management.common import messages
+from rotest.management.base_resource import BaseResource
+from rotest.management.common.parsers.abstract_parser import \
+                                            ParsingError, AbstractParser
+from rotest.management.common.utils import extract_type, extract_type_path
+
+
+class BinaryParser(AbstractParser):
+    """Compact binary messages parser.
+
+    This message parser encodes & decodes the same messages as the XML
+    parser, i.e. messages composed from basic types (None, booleans, numbers
+    and strings), lists, dictionaries, classes, resource datas and resources,
+    without building and validating XML trees.
+
+    Every value is encoded as a single type tag byte followed by its content:
+    numbers are packed in big-endian, strings and containers are prefixed by
+    their length, and classes, resources and resource datas are encoded by
+    their type's path followed by their content. For instance, the inner
+    message object:
+        [False, {'key1': 5}]
+    will be encoded as:
+        'L' <2> 'F' 'D' <1> 's' <4> 'key1' 'i' <5>
+
+    Tuples are decoded as lists, like the XML parser does.
+    """
+    NAME = 'binary'
+
+    _NONE_TYPE = 'N'
+    _TRUE_TYPE = 'T'
+    _FALSE_TYPE = 'F'
+    _INT_TYPE = 'i'
+    _LONG_TYPE = 'l'
+    _FLOAT_TYPE = 'f'
+    _STRING_TYPE = 's'
+    _UNICODE_TYPE = 'u'
+    _LIST_TYPE = 'L'
+    _DICT_TYPE = 'D'
+    _CLASS_TYPE = 'C'
+    _RESOURCE_TYPE = 'R'
+    _RESOURCE_DATA_TYPE = 'r'
+    _MESSAGE_TYPE = 'M'
+
+    _INT = struct.Struct(">q")
+    _FLOAT = struct.Struct(">d")
+    _LENGTH = struct.Struct(">I")
+
+    _MIN_INT = -2 ** 63
+    _MAX_INT = 2 ** 63 - 1
+
+    def __init__(self):
+        """Initialize the encoders and the decoders of the types.
+
+        Warning:
+            Do not change the order of the encoders! Some types match more
+            than one encoder (e.g: bool is also a Number).
+        """
+        self.encoders = ((type(None), self._encode_none),
+                         (bool, self._encode_bool),
+                         (str, self._encode_string),
+                         (unicode, self._encode_unicode),
+                         ((int, long), self._encode_int),
+                         (Number, self._encode_float),
+                         (dict, self._encode_dict),
+                         ((list, tuple), self._encode_list),
+                         (type, self._encode_class),
+                         (models.Model, self._encode_resource_data),
+                         (BaseResource, self._encode_resource))
+        self._type_encoders = {}
+
+        self.decoders = {self._NONE_TYPE: self._decode_none,
+                         self._TRUE_TYPE: self._decode_true,
+                         self._FALSE_TYPE: self._decode_false,
+                         self._INT_TYPE: self._decode_int,
+                         self._LONG_TYPE: self._decode_long,
+                         self._FLOAT_TYPE: self._decode_float,
+                         self._STRING_TYPE: self._decode_string,
+                         self._UNICODE_TYPE: self._decode_unicode,
+                         self._LIST_TYPE: self._decode_list,
+                         self._DICT_TYPE: self._decode_dict,
+                         self._CLASS_TYPE: self._decode_class,
+                         self._RESOURCE_TYPE: self._decode_resource,
+                         self._RESOURCE_DATA_TYPE: self._decode_resource_data}
+
+    def _encode_message(self, message):
+        """Encode a message to a binary string.
+
+        Args:
+            message (AbstractMessage): a message to encode.
+
+        Returns:
+            str. binary string that represent the encoded message.
+        """
+        chunks = [self._MESSAGE_TYPE]
+        self._encode_text(message.__class__.__name__, chunks)
+        self._encode([getattr(message, slot) for slot in message.__slots__],
+                     chunks)
+
+        return "".join(chunks)
+
+    def _decode_message(self, data):
+        """Decode a message from a binary string.
+
+        Args:
+            data (str): data to decode, a binary string that represent an
+                'AbstractMessage' object.
+
+        Returns:
+            AbstractMessage. decoded message.
+
+        Raises:
+            ParsingError: the data isn't a valid encoded message.
+        """
+        if data[:1] != self._MESSAGE_TYPE:
+            raise ParsingError("Data isn't an encoded message")
+
+        message_name, offset = self._decode_text(data, 1)
+        message_class = getattr(messages, message_name, None)
+        if not isinstance(message_class, type) or \
+                not issubclass(message_class, messages.AbstractMessage):
+            raise ParsingError("Unknown message type %r" % message_name)
+
+        values, offset = self._decode(data, offset)
+        if offset != len(data):
+            raise ParsingError("Got %d extra bytes after the message" %
+                               (len(data) - offset))
+
+        if not isinstance(values, list) or \
+                len(values) != len(message_class.__slots__):
+            raise ParsingError("Message %r has illegal fields" % message_name)
+
+        return message_class(**dict(zip(message_class.__slots__, values)))
+
+    def _encode_text(self, text, chunks):
+        """Encode a string, without a type tag.
+
+        Args:
+            text (str): string to encode.
+            chunks (list): encoded chunks, to add the string's chunks to.
+        """
+        chunks.append(self._LENGTH.pack(len(text)))
+        chunks.append(text)
+
+    def _encode(self, data, chunks):
+        """Encode the given data according to its type.
+
+        Args:
+            data (object): an object to encode.
+            chunks (list): encoded chunks, to add the object's chunks to.
+
+        Raises:
+            TypeError: given 'data' couldn't be encoded by this parser.
+            ParsingError: one of the keys of a dictionary is not a string.
+        """
+        data_type = type(data)
+        encoder = self._type_encoders.get(data_type)
+        if encoder is None:
+            encoder = next((type_encoder
+                            for types, type_encoder in self.encoders
+                            if isinstance(data, types)), None)
+
+            if encoder is None:
+                raise TypeError("Type %r isn't supported by the parser" %
+                                data_type)
+
+            self._type_encoders[data_type] = encoder
+
+        encoder(data, chunks)
+
+    def _encode_none(self, _, chunks):
+        """Encode None."""
+        chunks.append(self._NONE_TYPE)
+
+    def _encode_bool(self, data, chunks):
+        """Encode a boolean."""
+        chunks.append(self._TRUE_TYPE if data else self._FALSE_TYPE)
+
+    def _encode_string(self, data, chunks):
+        """Encode a string."""
+        chunks.append(self._STRING_TYPE)
+        self._encode_text(data, chunks)
+
+    def _encode_unicode(self, data, chunks):
+        """Encode a unicode string."""
+        chunks.append(self._UNICODE_TYPE)
+        self._encode_text(data.encode("utf-8"), chunks)
+
+    def _encode_int(self, data, chunks):
+        """Encode an integer, packed if it's small enough."""
+        if self._MIN_INT <= data <= self._MAX_INT:
+            chunks.append(self._INT_TYPE)
+            chunks.append(self._INT.pack(data))
+
+        else:
+            chunks.append(self._LONG_TYPE)
+            self._encode_text(str(data), chunks)
+
+    def _encode_float(self, data, chunks):
+        """Encode a number which isn't an integer."""
+        chunks.append(self._FLOAT_TYPE)
+        chunks.append(self._FLOAT.pack(float(data)))
+
+    def _encode_dict(self, data, chunks):
+        """Encode a dictionary, whose keys are strings."""
+        chunks.append(self._DICT_TYPE)
+        chunks.append(self._LENGTH.pack(len(data)))
+        for key, value in data.iteritems():
+            if not isinstance(key, basestring):
+                raise ParsingError("Failed to encode dictionary, "
+                                   "key %r is not a string" % key)
+
+            self._encode(key, chunks)
+            self._encode(value, chunks)
+
+    def _encode_list(self, data, chunks):
+        """Encode a list or a tuple."""
+        chunks.append(self._LIST_TYPE)
+        chunks.append(self._LENGTH.pack(len(data)))
+        for item in data:
+            self._encode(item, chunks)
+
+    def _encode_class(self, data, chunks):
+        """Encode a class by its path."""
+        chunks.append(self._CLASS_TYPE)
+        self._encode_text(extract_type_path(data), chunks)
+
+    def _encode_resource_data(self, data, chunks):
+        """Encode a resource data by its type and fields."""
+        chunks.append(self._RESOURCE_DATA_TYPE)
+        self._encode_text(extract_type_path(type(data)), chunks)
+        self._encode(data.get_fields(), chunks)
+
+    def _encode_resource(self, data, chunks):
+        """Encode a resource by its type and data."""
+        chunks.append(self._RESOURCE_TYPE)
+        self._encode_text(extract_type_path(type(data)), chunks)
+        self._encode(data.data, chunks)
+
+    def _decode(self, data, offset):
+        """Decode the value in the given offset according to its type tag.
+
+        Args:
+            data (str): the encoded data.
+            offset (number): offset of the value's type tag.
+
+        Returns:
+            tuple. the decoded value and the offset after it.
+
+        Raises:
+            ParsingError: the type tag is unknown.
+        """
+        type_tag = data[offset:offset + 1]
+        decoder = self.decoders.get(type_tag)
+        if decoder is None:
+            raise ParsingError("Unknown type tag %r at offset %d" %
+                               (type_tag, offset))
+
+        return decoder(data, offset + 1)
+
+    def _decode_text(self, data, offset):
+        """Decode a string which has no type tag.
+
+        Args:
+            data (str): the encoded data.
+            offset (number): offset of the string's length.
+
+        Returns:
+            tuple. the decoded string and the offset after it.
+
+        Raises:
+            ParsingError: the data ends before the string.
+        """
+        length, = self._LENGTH.unpack_from(data, offset)
+        offset += self._LENGTH.size
+        if offset + length > len(data):
+            raise ParsingError("String at offset %d exceeds the data" %
+                               offset)
+
+        return data[offset:offset + length], offset + length
+
+    def _decode_none(self, _, offset):
+        """Decode None."""
+        return None, offset
+
+    def _decode_true(self, _, offset):
+        """Decode True."""
+        return True, offset
+
+    def _decode_false(self, _, offset):
+        """Decode False."""
+        return False, offset
+
+    def _decode_int(self, data, offset):
+        """Decode a packed integer."""
+        value, = self._INT.unpack_from(data, offset)
+        return value, offset + self._INT.size
+
+    def _decode_long(self, data, offset):
+        """Decode an integer which is too big to be packed."""
+        text, offset = self._decode_text(data, offset)
+        return long(text), offset
+
+    def _decode_float(self, data, offset):
+        """Decode a packed float."""
+        value, = self._FLOAT.unpack_from(data, offset)
+        return value, offset + self._FLOAT.size
+
+    def _decode_string(self, data, offset):
+        """Decode a string."""
+        return self._decode_text(data, offset)
+
+    def _decode_unicode(self, data, offset):
+        """Decode a unicode string."""
+        text, offset = self._decode_text(data, offset)
+        return text.decode("utf-8"), offset
+
+    def _decode_list(self, data, offset):
+        """Decode a list."""
+        length, = self._LENGTH.unpack_from(data, offset)
+        offset += self._LENGTH.size
+
+        items = []
+        for _ in xrange(length):
+            item, offset = self._decode(data, offset)
+            items.append(item)
+
+        return items, offset
+
+    def _decode_dict(self, data, offset):
+        """Decode a dictionary."""
+        length, = self._LENGTH.unpack_from(data, offset)
+        offset += self._LENGTH.size
+
+        dictionary = {}
+        for _ in xrange(length):
+            key, offset = self._decode(data, offset)
+            if not isinstance(key, basestring):
+                raise ParsingError("Failed to decode dictionary, "
+                                   "key %r is not a string" % key)
+
+            dictionary[key], offset = self._decode(data, offset)
+
+        return dictionary, offset
+
+    def _decode_class(self, data, offset):
+        """Decode a class."""
+        type_path, offset = self._decode_text(data, offset)
+        return extract_type(type_path), offset
+
+    def _decode_resource_data(self, data, offset):
+        """Decode a resource data."""
+        resource_type, offset = self._decode_class(data, offset)
+        resource_properties, offset = self._decode(data, offset)
+        if not isinstance(resource_properties, dict):
+            raise ParsingError("Resource data of type %r has no properties" %
+                               resource_type)
+
+        return (self._build_resource_data(resource_type, resource_properties),
+                offset)
+
+    def _decode_resource(self, data, offset):
+        """Decode a resource."""
+        resource_type, offset = self._decode_class(data, offset)
+        resource_data, offset = self._decode(data, offset)
+        return resource_type(data=resource_data), offset
@@ -61,6 +61,8 @@ class XMLParser(AbstractParser):
         scheme (lxml.etree.XMLSchema): a scheme to validate messages with.
         complex_decoders (dict): map element type to its decoding method.
     """
+    NAME = 'xml'
+
     _NONE_TYPE = 'None'
     _LIST_TYPE = 'List'
     _CLASS_TYPE = 'Class'
@@ -339,33 +341,7 @@ class XMLParser(AbstractParser):
         properties_element = getattr(resource_element, PROPERTIES)
         resource_properties = self._decode(properties_element)
 
-        # Get the related fields.
-        list_field_names = [key for key, value in resource_properties.items()
-                            if isinstance(value, list)]
-
-        list_fields = [(field_name, resource_properties.pop(field_name))
-                       for field_name in list_field_names]
-
-        resource = resource_type(**resource_properties)
-
-        for field_name, field_values in list_fields:
-            # Set the related fields' values.
-            field_object, _, is_direct, is_many_to_many = \
-                resource_type._meta.get_field_by_name(field_name)
-
-            if is_direct:
-                raise ParsingError("Got unsupported direct list field %r" %
-                                   field_name)
-
-            if is_many_to_many:
-                raise ParsingError("Got unsupported many to many field %r" %
-                                   field_name)
-
-            for related_object in field_values:
-                # Set the related model's pointer to the current model.
-                setattr(related_object, field_object.field.name, resource)
-
-        return resource
+        return self._build_resource_data(resource_type, resource_properties)
 
     def _decode_resource(self, resource_element):
         """Decode a resource element.
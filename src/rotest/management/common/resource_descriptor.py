@@ -1,13 +1,25 @@
 """Represent a descriptor of a resource."""
 from rotest.management.common.errors import ResourceBuildError
 from rotest.management.common.utils import (TYPE_NAME,
+                                            COUNT_NAME,
                                             PROPERTIES,
+                                            ALTERNATIVES,
                                             extract_type,
                                             extract_type_path)
 
 
 class ResourceDescriptor(object):
-    """Holds the data for a resource request."""
+    """Holds the data for a resource request.
+
+    Attributes:
+        type (type): resource type.
+        properties (dict): properties of the resource.
+        count (number): amount of interchangeable resources answering the
+            descriptor to lock.
+        alternatives (list): descriptors to use instead of this one, in
+            order, if it can't be satisfied. The count of the alternatives
+            is ignored, it is the count of this descriptor.
+    """
     def __init__(self, resource_type, **properties):
         """Initialize the required parameters of resource request.
 
@@ -18,12 +30,52 @@ class ResourceDescriptor(object):
         self.type = resource_type
         self.properties = properties
 
+        self.count = 1
+        self.alternatives = []
+
     def __repr__(self):
         """Returns the descriptor's repr string."""
         type_name = self.type.__name__
         keywords = ', '.join(['%s=%r' % (key, val)
                               for key, val in self.properties.iteritems()])
-        return "%s(%s)" % (type_name, keywords)
+        description = "%s(%s)" % (type_name, keywords)
+
+        if self.count != 1:
+            description = "%d * %s" % (self.count, description)
+
+        return " or ".join([description] + [repr(alternative) for alternative
+                                            in self.alternatives])
+
+    def get_options(self):
+        """Return the descriptors that may satisfy this descriptor.
+
+        Returns:
+            list. this descriptor followed by its alternatives.
+        """
+        return [self] + self.alternatives
+
+    def get_resource_type(self, resource_data):
+        """Return the type of the option a locked resource data answers.
+
+        Note:
+            A resource data answers an option if it's of the option's data
+            class and its fields equal to the option's properties (properties
+            that are field lookups, e.g. 'name__in', aren't compared).
+
+        Args:
+            resource_data (ResourceData): a locked resource data.
+
+        Returns:
+            type. the resource type of the first option it answers.
+        """
+        for option in self.get_options():
+            if isinstance(resource_data, option.type.DATA_CLASS) and \
+                    all(getattr(resource_data, key) == value
+                        for key, value in option.properties.iteritems()
+                        if "__" not in key):
+                return option.type
+
+        return self.type
 
     def build_resource(self):
         """Build a resource.
@@ -49,7 +101,15 @@ class ResourceDescriptor(object):
         """
         name = extract_type_path(self.type.DATA_CLASS)
 
-        return {TYPE_NAME: name, PROPERTIES: self.properties}
+        descriptor = {TYPE_NAME: name, PROPERTIES: self.properties}
+        if self.count != 1:
+            descriptor[COUNT_NAME] = self.count
+
+        if len(self.alternatives) > 0:
+            descriptor[ALTERNATIVES] = [alternative.encode() for alternative
+                                        in self.alternatives]
+
+        return descriptor
 
     @staticmethod
     def decode(descriptor):
@@ -58,6 +118,8 @@ class ResourceDescriptor(object):
         Args:
             descriptor (dict): a dictionary that represent a descriptor.
                 For instance: {'type': 'my_res', 'properties': {'key1': 1}}.
+                It may also contain the descriptor's 'count' and a list of
+                its 'alternatives'.
 
         Returns:
             ResourceDescriptor. the corresponding ResourceDescriptor.
@@ -75,4 +137,11 @@ class ResourceDescriptor(object):
 
         properties = descriptor[PROPERTIES]
 
-        return ResourceDescriptor(resource_type, **properties)
+        decoded_descriptor = ResourceDescriptor(resource_type, **properties)
+        decoded_descriptor.count = descriptor.get(COUNT_NAME, 1)
+        decoded_descriptor.alternatives = [
+                                ResourceDescriptor.decode(alternative)
+                                for alternative in descriptor.get(ALTERNATIVES,
+                                                                  [])]
+
+        return decoded_descriptor
@@ -1,5 +1,6 @@
 """Common resource management constants."""
 # pylint: disable=exec-used
+import struct
 import importlib
 from socket import gethostbyaddr
 
@@ -9,6 +10,7 @@ HOST_PORT_SEPARATOR = ':'
 
 MESSAGE_DELIMITER = '\r\n'
 MESSAGE_MAX_LENGTH = 240000
+FRAME_HEADER = struct.Struct(">I")
 
 TEST_ID_KEY = 'id'
 TEST_NAME_KEY = 'name'
@@ -17,7 +19,9 @@ TEST_SUBTESTS_KEY = 'subtests'
 
 TYPE_NAME = "type"
 DATA_NAME = "data"
+COUNT_NAME = "count"
 PROPERTIES = "properties"
+ALTERNATIVES = "alternatives"
 
 LOCAL_IP = "127.0.0.1"
 LOCALHOST = "localhost"
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0016_demoresourcedata_validation_result'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resourcedata',
+            name='lease_expiration',
+            field=models.DateTimeField(null=True, blank=True),
+            preserve_default=True,
+        ),
+    ]
@@ -39,12 +39,15 @@ class ResourceData(models.Model):
         comment (str): general comment for the resource.
         owner_time (datetime): timestamp of the last ownership event.
         reserved_time (datetime): timestamp of the last reserve event.
+        lease_expiration (datetime): expiration time of the owner's lease,
+            after which the resource is released unless the lease is renewed.
     """
     NAME_SEPERATOR = '_'
     MAX_COMMENT_LENGTH = 200
 
     # Fields that shouldn't be transmitted to the client:
-    IGNORED_FIELDS = ["group", "owner_time", "reserved_time"]
+    IGNORED_FIELDS = ["group", "owner_time", "reserved_time",
+                      "lease_expiration"]
 
     name = NameField(unique=True)
     is_usable = models.BooleanField(default=True)
@@ -56,6 +59,7 @@ class ResourceData(models.Model):
     reserved = NameField(blank=True)
     owner_time = models.DateTimeField(null=True, blank=True)
     reserved_time = models.DateTimeField(null=True, blank=True)
+    lease_expiration = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         """Define the Django application for this model."""
@@ -185,19 +189,20 @@ class ResourceData(models.Model):
 
         return resource_copy
 
-    def _was_reserved_changed(self):
-        """Check if the user is trying to change the value of 'Reserved'.
+    def _get_pre_reserved(self):
+        """Return the value of 'Reserved' currently saved in the DB.
 
         Returns:
-            bool. whether 'Reserved' was changed.
+            str. the saved value of 'Reserved', empty string if the resource
+                wasn't saved yet.
         """
-        try:
-            pre_reserved = ResourceData.objects.get(pk=self.pk).reserved
+        if self.pk is None:
+            return ''
 
-        except ObjectDoesNotExist:
-            pre_reserved = ''
+        pre_reserved = ResourceData.objects.filter(
+                            pk=self.pk).values_list('reserved', flat=True)
 
-        return pre_reserved != self.reserved
+        return pre_reserved[0] if len(pre_reserved) > 0 else ''
 
     def clean(self):
         """Block reserving and releasing if sub-resources are not available.
@@ -244,10 +249,10 @@ class ResourceData(models.Model):
 
     def save(self, *args, **kwargs):
         """Propagate reservation change to sub-resources of the resource."""
-        if self._was_reserved_changed():
+        pre_reserved = self._get_pre_reserved()
+        if pre_reserved != self.reserved:
             if self.reserved == '':
                 self.reserved_time = None
-                pre_reserved = ResourceData.objects.get(pk=self.pk).reserved
                 self._unreserve_sub_resources(pre_reserved)
 
             else:
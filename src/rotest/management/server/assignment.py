@@ -0,0 +1,62 @@
+"""Define the assignment of resources to the descriptors of a lock request."""
+
+
+def find_assignment(candidates):
+    """Assign a distinct resource to as many descriptors as possible.
+
+    Finds a maximum bipartite matching between the descriptors and their
+    candidate resources, using augmenting paths (Kuhn's algorithm). Unlike
+    choosing a resource for every descriptor in turn, a descriptor never
+    takes the only resource another descriptor could use, if it has other
+    candidates.
+
+    Every descriptor prefers a free candidate, in the order of its
+    candidates, and takes a candidate assigned to an earlier descriptor only
+    if that descriptor can be moved to another one of its candidates.
+
+    Args:
+        candidates (list): list of the candidate resource ids of every
+            descriptor, each in the order of preference.
+
+    Returns:
+        dict. maps the index of every assigned descriptor to its resource id.
+    """
+    assigned_indices = {}
+    for index in xrange(len(candidates)):
+        _assign(index, candidates, assigned_indices, set())
+
+    return dict((index, resource_id)
+                for resource_id, index in assigned_indices.iteritems())
+
+
+def _assign(index, candidates, assigned_indices, visited_ids):
+    """Assign a resource to a descriptor, moving other descriptors if needed.
+
+    Args:
+        index (number): index of the descriptor to assign.
+        candidates (list): list of the candidate resource ids of every
+            descriptor.
+        assigned_indices (dict): maps every assigned resource id to the index
+            of its descriptor, updated with the new assignment.
+        visited_ids (set): ids of the resources already visited while
+            looking for the current augmenting path.
+
+    Returns:
+        bool. whether the descriptor was assigned.
+    """
+    for resource_id in candidates[index]:
+        if resource_id not in assigned_indices:
+            assigned_indices[resource_id] = index
+            return True
+
+    for resource_id in candidates[index]:
+        if resource_id in visited_ids:
+            continue
+
+        visited_ids.add(resource_id)
+        if _assign(assigned_indices[resource_id], candidates,
+                   assigned_indices, visited_ids):
+            assigned_indices[resource_id] = index
+            return True
+
+    return False
@@ -0,0 +1,115 @@
+"""Define the encoding of the messages a worker exchanges with its client."""
+from itertools import count
+
+from rotest.management.common.utils import FRAME_HEADER
+
+
+class MessagesCodec(object):
+    """Decodes the requests of a client and encodes the replies to it.
+
+    Messages are delimited by lines, until the client negotiates a faster
+    parser. From then on, the messages are sent in length-prefixed frames,
+    whose large messages are compressed if the client negotiates a
+    compressor.
+
+    Attributes:
+        parser (AbstractParser): messages parser.
+        compressor (AbstractCompressor): compressor of the frames, None if
+            the frames aren't compressed.
+        _messages_counter (iterator): generates the replies' ids.
+        _frames_data (list): received chunks of the frames which weren't
+            split yet.
+        _frames_length (number): total length of the received chunks.
+        _needed_length (number): length of data needed to split the next
+            frame.
+    """
+    def __init__(self, parser):
+        """Initialize the codec.
+
+        Args:
+            parser (AbstractParser): the initial messages parser.
+        """
+        self.parser = parser
+        self.compressor = None
+
+        self._messages_counter = count()
+        self._frames_data = []
+        self._frames_length = 0
+        self._needed_length = FRAME_HEADER.size
+
+    def split_frames(self, data):
+        """Add received data, and return the messages of the complete frames.
+
+        Args:
+            data (str): data received in frames mode.
+
+        Returns:
+            list. the messages of the frames which were completed, without
+                their headers.
+        """
+        self._frames_data.append(data)
+        self._frames_length += len(data)
+        if self._frames_length < self._needed_length:
+            return []
+
+        data = "".join(self._frames_data)
+        encoded_messages = []
+        offset = 0
+        while len(data) - offset >= FRAME_HEADER.size:
+            length, = FRAME_HEADER.unpack_from(data, offset)
+            frame_end = offset + FRAME_HEADER.size + length
+            if frame_end > len(data):
+                break
+
+            encoded_messages.append(data[offset + FRAME_HEADER.size:
+                                         frame_end])
+            offset = frame_end
+
+        data = data[offset:]
+        self._frames_data = [data]
+        self._frames_length = len(data)
+        self._needed_length = FRAME_HEADER.size
+        if len(data) >= FRAME_HEADER.size:
+            self._needed_length += FRAME_HEADER.unpack_from(data)[0]
+
+        return encoded_messages
+
+    def decompress(self, encoded_message):
+        """Decompress a received message, if a compressor was negotiated.
+
+        Args:
+            encoded_message (str): the received message.
+
+        Returns:
+            str. the message, to decode with the parser.
+        """
+        if self.compressor is None:
+            return encoded_message
+
+        return self.compressor.unpack(encoded_message)
+
+    def encode(self, reply):
+        """Set the reply's id, and encode it.
+
+        Args:
+            reply (AbstractReply): the reply to encode.
+
+        Returns:
+            str. the encoded reply.
+        """
+        reply.msg_id = next(self._messages_counter)
+        return self.parser.encode(reply)
+
+    def build_frame(self, encoded_reply):
+        """Build the frame of an encoded reply, compressing it if needed.
+
+        Args:
+            encoded_reply (str): the encoded reply.
+
+        Returns:
+            str. the frame to send.
+        """
+        if self.compressor is not None:
+            encoded_reply = self.compressor.pack(encoded_reply)
+
+        return FRAME_HEADER.pack(len(encoded_reply)) + encoded_reply
@@ -0,0 +1,94 @@
+"""Define the resource manager's clients host names resolver."""
+import time
+
+from twisted.internet import defer, threads
+
+from rotest.management.common.utils import get_host_name
+
+
+class HostNameResolver(object):
+    """Resolves the host names of the clients without blocking the reactor.
+
+    The reverse lookups are done in the reactor's thread pool, and their
+    results are cached for a while, so clients which connect again and again
+    from the same host are resolved immediately. Concurrent lookups of the
+    same address are done only once.
+
+    Attributes:
+        _reactor (PollReactor): the reactor to resolve the names with.
+        _cache (dict): maps an IP address to (host name, expiration time).
+        _pending (dict): maps an IP address being resolved to the list of
+            deferreds waiting for its host name.
+        CACHE_TTL (number): default seconds to keep a resolved host name.
+    """
+    CACHE_TTL = 300
+
+    def __init__(self, reactor, logger, ttl=CACHE_TTL):
+        """Initialize the resolver.
+
+        Args:
+            reactor (PollReactor): The reactor to work with.
+            logger (logging.Logger): The logger of the resource manager.
+            ttl (number): seconds to keep a resolved host name.
+        """
+        self.logger = logger
+
+        self._ttl = ttl
+        self._cache = {}
+        self._pending = {}
+        self._reactor = reactor
+
+    def resolve(self, ip_address):
+        """Return the host name of the given address.
+
+        Note:
+            Addresses which can't be resolved are named by the address
+            itself.
+
+        Args:
+            ip_address (str): IP address of a client.
+
+        Returns:
+            Deferred. fired with the host name of the address.
+        """
+        host, expiration_time = self._cache.get(ip_address, (None, 0))
+        if expiration_time > time.time():
+            return defer.succeed(host)
+
+        result = defer.Deferred()
+        if ip_address in self._pending:
+            self._pending[ip_address].append(result)
+            return result
+
+        self._pending[ip_address] = [result]
+        lookup = threads.deferToThreadPool(self._reactor,
+                                           self._reactor.getThreadPool(),
+                                           get_host_name, ip_address)
+        lookup.addErrback(self._on_failure, ip_address)
+        lookup.addCallback(self._on_resolved, ip_address)
+        return result
+
+    def _on_failure(self, failure, ip_address):
+        """Name an address which couldn't be resolved by the address itself.
+
+        Args:
+            failure (twisted.python.failure.Failure): the lookup's failure.
+            ip_address (str): the looked up address.
+
+        Returns:
+            str. the address.
+        """
+        self.logger.warning("Failed resolving the host name of %r: %s",
+                            ip_address, failure.getErrorMessage())
+        return ip_address
+
+    def _on_resolved(self, host, ip_address):
+        """Cache a resolved host name and fire the waiting deferreds.
+
+        Args:
+            host (str): the address's host name.
+            ip_address (str): the looked up address.
+        """
+        self._cache[ip_address] = (host, time.time() + self._ttl)
+        for waiting in self._pending.pop(ip_address):
+            waiting.callback(host)
@@ -0,0 +1,195 @@
+"""Define the resource manager's state journal."""
+# pylint: disable=broad-except
+import os
+import json
+import cPickle
+from glob import glob
+
+from django.db.models import Max, Count
+
+from rotest.management.models.resource_data import ResourceData
+
+
+class StateJournal(object):
+    """Persists the resources index, so a restarted server recovers quickly.
+
+    The state is kept in a directory, as a snapshot of the whole index plus
+    an append-only journal of the changes made to the index since that
+    snapshot. Every snapshot starts a new generation of the journal, so a
+    journal is only replayed on top of the snapshot it follows, even if the
+    server stopped while writing a snapshot.
+
+    The journal is an optimization of the server's startup and not a source
+    of truth: the recovered index is compared against the DB on the next
+    consistency check, like any other index.
+
+    Attributes:
+        events_count (number): amount of events written to the journal since
+            the last snapshot.
+        _state_dir (str): path of the state directory.
+        _generation (number): generation of the current snapshot & journal.
+        _journal_file (file): the current journal, open for appending.
+        SNAPSHOT_FILE (str): name of the snapshot file.
+        JOURNAL_PATTERN (str): name pattern of the journal files.
+        FORMAT_VERSION (number): version of the snapshot's format.
+    """
+    SNAPSHOT_FILE = "snapshot.pickle"
+    JOURNAL_PATTERN = "journal.%s.log"
+    FORMAT_VERSION = 1
+
+    def __init__(self, state_dir, logger):
+        """Initialize the journal.
+
+        Args:
+            state_dir (str): path of the state directory, created if needed.
+            logger (logging.Logger): The logger of the resource manager.
+        """
+        self.logger = logger
+        self.events_count = 0
+
+        self._generation = 0
+        self._state_dir = state_dir
+        self._journal_file = None
+
+    def _get_journal_path(self, generation):
+        """Return the path of the journal of a generation.
+
+        Args:
+            generation (number): generation of the journal, or a glob
+                pattern.
+
+        Returns:
+            str. path of the journal file.
+        """
+        return os.path.join(self._state_dir,
+                            self.JOURNAL_PATTERN % generation)
+
+    @staticmethod
+    def get_fingerprint():
+        """Return a cheap fingerprint of the resources in the DB.
+
+        Note:
+            Resources added or deleted while the server was down change the
+            fingerprint, so the snapshot won't be used. Other changes made
+            meanwhile are repaired by the consistency check.
+
+        Returns:
+            tuple. the amount of resources and their highest id.
+        """
+        fingerprint = ResourceData.objects.aggregate(Count('pk'), Max('pk'))
+        return (fingerprint['pk__count'], fingerprint['pk__max'])
+
+    def load(self):
+        """Read the last snapshot and the events journaled after it.
+
+        Returns:
+            tuple. the snapshot's state and the list of events, or
+                (None, []) if there's no usable snapshot.
+        """
+        snapshot_path = os.path.join(self._state_dir, self.SNAPSHOT_FILE)
+        if not os.path.exists(snapshot_path):
+            return None, []
+
+        try:
+            with open(snapshot_path, "rb") as snapshot_file:
+                snapshot = cPickle.load(snapshot_file)
+
+        except Exception as ex:
+            self.logger.warning("Failed reading the state snapshot %r: %s",
+                                snapshot_path, ex)
+            return None, []
+
+        if snapshot["version"] != self.FORMAT_VERSION or \
+                snapshot["fingerprint"] != self.get_fingerprint():
+            self.logger.info("The state snapshot doesn't match the DB")
+            return None, []
+
+        self._generation = snapshot["generation"]
+        return snapshot["state"], self._read_events(self._generation)
+
+    def _read_events(self, generation):
+        """Read the events of a journal.
+
+        Note:
+            The last event may have been partially written if the server
+            crashed, it is ignored in that case.
+
+        Args:
+            generation (number): generation of the journal.
+
+        Returns:
+            list. the journaled events, each is a list of an event name and
+                its arguments.
+        """
+        events = []
+        journal_path = self._get_journal_path(generation)
+        if not os.path.exists(journal_path):
+            return events
+
+        with open(journal_path, "rb") as journal_file:
+            for line in journal_file:
+                try:
+                    events.append(json.loads(line))
+
+                except ValueError:
+                    self.logger.warning("Ignoring a partially written event "
+                                        "in %r", journal_path)
+                    break
+
+        return events
+
+    def write_snapshot(self, state):
+        """Write a snapshot of the state and start a new journal.
+
+        The snapshot is written to a temporary file which then replaces the
+        previous snapshot, so a snapshot is never partially written.
+
+        Args:
+            state (object): picklable state of the server.
+        """
+        if not os.path.isdir(self._state_dir):
+            os.makedirs(self._state_dir)
+
+        generation = self._generation + 1
+        snapshot_path = os.path.join(self._state_dir, self.SNAPSHOT_FILE)
+        temp_path = snapshot_path + ".tmp"
+        with open(temp_path, "wb") as snapshot_file:
+            cPickle.dump({"version": self.FORMAT_VERSION,
+                          "generation": generation,
+                          "fingerprint": self.get_fingerprint(),
+                          "state": state},
+                         snapshot_file, cPickle.HIGHEST_PROTOCOL)
+
+        os.rename(temp_path, snapshot_path)
+
+        self.close()
+        self._generation = generation
+        self._journal_file = open(self._get_journal_path(generation), "wb")
+        self.events_count = 0
+
+        for journal_path in glob(self._get_journal_path("*")):
+            if journal_path != self._journal_file.name:
+                os.remove(journal_path)
+
+    def record(self, event, *args):
+        """Append an event to the journal.
+
+        Note:
+            Events are recorded only after a snapshot was written.
+
+        Args:
+            event (str): name of the event.
+            *args (tuple): JSON serializable arguments of the event.
+        """
+        if self._journal_file is None:
+            return
+
+        self._journal_file.write(json.dumps((event,) + args) + "\n")
+        self._journal_file.flush()
+        self.events_count += 1
+
+    def close(self):
+        """Close the current journal."""
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
@@ -0,0 +1,85 @@
+"""Define the resource manager's clients' resources leases."""
+import heapq
+
+
+class Leases(object):
+    """Expiration times of the clients' leases on their locked resources.
+
+    Each client holds a single lease on all the resources it locked, which
+    it renews by sending heartbeats. The expirations are tracked using a
+    timer heap, so expired leases are found without scanning all the leases.
+
+    Attributes:
+        _expirations (dict): maps an owner to its lease's expiration time.
+        _timers (list): heap of (expiration time, owner). Entries which don't
+            match the owner's current expiration are stale, and are dropped
+            when reaching the top of the heap.
+    """
+    def __init__(self):
+        self._timers = []
+        self._expirations = {}
+
+    def __len__(self):
+        return len(self._expirations)
+
+    def __contains__(self, owner):
+        return owner in self._expirations
+
+    def renew(self, owner, expiration_time):
+        """Set the expiration time of an owner's lease.
+
+        Args:
+            owner (str): name of the client owning the lease.
+            expiration_time (number): time (as in time.time()) in which the
+                lease expires.
+        """
+        self._expirations[owner] = expiration_time
+        heapq.heappush(self._timers, (expiration_time, owner))
+
+    def remove(self, owner):
+        """Remove an owner's lease, if it has one.
+
+        Args:
+            owner (str): name of the client owning the lease.
+        """
+        self._expirations.pop(owner, None)
+
+    def _drop_stale_timers(self):
+        """Pop the stale entries from the top of the timer heap."""
+        while len(self._timers) > 0:
+            expiration_time, owner = self._timers[0]
+            if self._expirations.get(owner) == expiration_time:
+                return
+
+            heapq.heappop(self._timers)
+
+    def pop_expired(self, now):
+        """Remove and return the owners whose leases expired.
+
+        Args:
+            now (number): the current time (as in time.time()).
+
+        Returns:
+            list. names of the owners of the expired leases.
+        """
+        expired_owners = []
+        self._drop_stale_timers()
+        while len(self._timers) > 0 and self._timers[0][0] <= now:
+            _, owner = heapq.heappop(self._timers)
+            del self._expirations[owner]
+            expired_owners.append(owner)
+            self._drop_stale_timers()
+
+        return expired_owners
+
+    def next_expiration(self):
+        """Return the closest expiration time of a lease.
+
+        Returns:
+            number. closest expiration time, None if there are no leases.
+        """
+        self._drop_stale_timers()
+        if len(self._timers) == 0:
+            return None
+
+        return self._timers[0][0]
@@ -1,14 +1,19 @@
 """Run resource manager server."""
+# pylint: disable=too-many-arguments
 import sys
 import logging
 
+from twisted.web.server import Site
 from twisted.internet.protocol import ServerFactory
-from twisted.internet.selectreactor import SelectReactor
 
 from rotest.management.server.worker import Worker
+from rotest.management.server.journal import StateJournal
+from rotest.management.server.stats_page import StatsPage
 from rotest.common.config import RESOURCE_MANAGER_PORT
 from rotest.management.server.manager import ManagerThread
 from rotest.management.common.parsers import DEFAULT_PARSER
+from rotest.management.server.host_names import HostNameResolver
+from rotest.management.server.result_writers import ResultWritersPool
 from rotest.common.log import (ROTEST_WORK_DIR, LOG_FORMAT, ColoredFormatter,
                                get_test_logger)
 
@@ -16,6 +21,57 @@ from rotest.common.log import (ROTEST_WORK_DIR, LOG_FORMAT, ColoredFormatter,
 LOG_NAME = 'resource_manager'
 
 
+def create_reactor():
+    """Create the most scalable reactor available on the platform.
+
+    Returns:
+        ReactorBase. an epoll reactor on Linux, a poll reactor on other
+            POSIX platforms and a select reactor on Windows.
+    """
+    try:
+        from twisted.internet.epollreactor import EPollReactor
+        return EPollReactor()
+
+    except ImportError:  # pragma: no cover
+        pass
+
+    try:
+        from twisted.internet.pollreactor import PollReactor
+        return PollReactor()
+
+    except ImportError:  # pragma: no cover
+        from twisted.internet.selectreactor import SelectReactor
+        return SelectReactor()
+
+
+def raise_open_files_limit(logger):
+    """Raise the open files limit of the process to its maximum.
+
+    Every connected client takes a file descriptor of the server, so the
+    default limit (usually 1024) limits the amount of connected clients.
+
+    Args:
+        logger (logging.Logger): the logger of the resource manager.
+    """
+    try:
+        import resource
+
+    except ImportError:  # pragma: no cover
+        return
+
+    soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft_limit == hard_limit:
+        return
+
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
+        logger.debug("Raised the open files limit from %d to %d",
+                     soft_limit, hard_limit)
+
+    except (ValueError, resource.error) as ex:
+        logger.warning("Failed raising the open files limit: %s", ex)
+
+
 def get_logger(log_to_screen):
     """Return the logger for resource manager.
 
@@ -36,43 +92,90 @@ def get_logger(log_to_screen):
 
 
 class ResourceManagerServer(object):
-    """Resource manager server."""
+    """Resource manager server.
+
+    The server uses the most scalable reactor available on the platform
+    (epoll on Linux), so it can serve thousands of connected clients.
+
+    Attributes:
+        LISTEN_BACKLOG (number): max amount of pending client connections.
+    """
+    LISTEN_BACKLOG = 1024
 
     def __init__(self, port=RESOURCE_MANAGER_PORT,
-                 parser=DEFAULT_PARSER, log_to_screen=True):
+                 parser=DEFAULT_PARSER, log_to_screen=True, stats_port=None,
+                 state_dir=None):
         """Initialize the resource manager server.
 
         Args:
             port (number): client listener port.
             parser (object): messages parser of type `AbstractParser`.
             log_to_screen (bool): Enable log prints to screen.
+            stats_port (number): port of the plain-text statistics HTTP
+                page, None to disable it.
+            state_dir (str): directory to keep the server's state in, so it
+                recovers quickly after a restart. None to not keep a state.
         """
         self.logger = get_logger(log_to_screen)
+        raise_open_files_limit(self.logger)
+
+        self._port = port
+        self._reactor = create_reactor()
 
         self._factory = ServerFactory()
         self._factory.protocol = Worker
         self._factory.logger = self.logger
         self._factory.protocol.parser = parser()
+        self._factory.get_stats = self.get_stats
+        self._factory.host_names = HostNameResolver(self._reactor,
+                                                    self.logger)
 
-        self._port = port
-        self._reactor = SelectReactor()
-        self._reactor.listenTCP(port, self._factory)
+        self._reactor.listenTCP(port, self._factory,
+                                backlog=self.LISTEN_BACKLOG)
 
-        self._resource_manager = ManagerThread(self._reactor, self.logger)
+        journal = None
+        if state_dir is not None:
+            journal = StateJournal(state_dir, self.logger)
+
+        self._resource_manager = ManagerThread(self._reactor, self.logger,
+                                               journal=journal)
         self._factory.request_queue = self._resource_manager.request_queue
 
+        self._result_writers = ResultWritersPool(self._reactor, self.logger)
+        self._factory.result_writers = self._result_writers
+
+        if stats_port is not None:
+            self._reactor.listenTCP(stats_port,
+                                    Site(StatsPage(self.get_stats)))
+
     def start(self):
         """Start resource manager server.
 
          * Starts resource manager thread.
+         * Starts result writer threads.
          * Starts client listener.
         """
         self.logger.debug("Starting resource manager, port:%d", self._port)
         self._resource_manager.start()
+        self._result_writers.start()
         self._reactor.run()
 
     def stop(self):
         """Stop the resource manager server."""
         self.logger.debug("Stopping resource manager server")
         self._resource_manager.stop()
+        self._result_writers.stop()
         self._reactor.callFromThread(self._reactor.stop)
+
+    def get_stats(self):
+        """Return the requests statistics of the server's paths.
+
+        Note:
+            The statistics are also sent to clients querying them using a
+            'ServerStats' message, and shown by the statistics HTTP page.
+
+        Returns:
+            dict. statistics of the resources path and of the results path.
+        """
+        return {"resources": self._resource_manager.get_stats(),
+                "results": self._result_writers.get_stats()}
@@ -1,5 +1,7 @@
 """Resource manager server."""
 # pylint: disable=no-self-use,protected-access,broad-except,too-many-locals
+# pylint: disable=too-many-instance-attributes,too-many-arguments
+# pylint: disable=too-many-lines
 import time
 from threading import Thread
 from datetime import datetime
@@ -8,11 +10,23 @@ from Queue import Queue, Empty as EmptyQueueError
 from django.db import transaction
 from django.db.models.query_utils import Q
 from django.contrib.auth import models as auth_models
-from django.core.exceptions import ObjectDoesNotExist
 
-from rotest.common.django_utils.common import get_sub_model
+from rotest.management.server.leases import Leases
+from rotest.management.server.stats import (DBTimer,
+                                            PathStats,
+                                            LatencyHistogram,
+                                            get_message_name)
 from rotest.management.models.resource_data import ResourceData
+from rotest.management.common.utils import HOST_PORT_SEPARATOR
+from rotest.management.server.scheduler import LockScheduler
+from rotest.management.server.query_cache import QueryCache
+from rotest.management.server.request import build_error_reply
+from rotest.management.server.assignment import find_assignment
+from rotest.management.server.resources_index import ResourcesIndex
+from rotest.management.server.pending_requests import PendingRequests
 from rotest.management.common.resource_descriptor import ResourceDescriptor
+from rotest.common.config import (RESOURCE_LEASE_PERIOD,
+                                  RESOURCE_RECLAIM_GRACE_PERIOD)
 from rotest.management.common.errors import (ServerError,
                                              UnknownUserError,
                                              ResourceReleaseError,
@@ -20,94 +34,202 @@ from rotest.management.common.errors import (ServerError,
                                              ResourceUnavailableError,
                                              ResourceDoesNotExistError,
                                              ResourceAlreadyAvailableError)
-from rotest.management.common.messages import (StopTest,
-                                               StartTest,
-                                               AddResult,
-                                               ErrorReply,
-                                               ShouldSkip,
+from rotest.management.common.messages import (LeaseReply,
                                                CleanupUser,
+                                               RenewLeases,
+                                               QueryReply,
                                                SuccessReply,
-                                               StartTestRun,
                                                UpdateFields,
-                                               StopComposite,
+                                               WaitingReply,
                                                LockResources,
-                                               UpdateRunData,
                                                ResourcesReply,
                                                QueryResources,
-                                               StartComposite,
-                                               UpdateResources,
-                                               ShouldSkipReply,
+                                               ReclaimResources,
                                                ReleaseResources)
 
 
 class _WaitingForResourceException(Exception):
-    """Raised when resources aren't available but timeout hasn't expired."""
-    pass
+    """Raised when resources aren't available but timeout hasn't expired.
+
+    Attributes:
+        resource_type (type): the resource data type which is unavailable,
+            None if unknown.
+        resources_count (number): amount of resources answering the
+            unavailable descriptor.
+    """
+    def __init__(self, message, resource_type=None, resources_count=0):
+        super(_WaitingForResourceException, self).__init__(message)
+        self.resource_type = resource_type
+        self.resources_count = resources_count
+
+
+class _OwnershipConflictException(Exception):
+    """Raised when the owner of some resources was changed concurrently.
+
+    Attributes:
+        resource_ids (list): ids of the resources whose ownership change
+            was attempted.
+    """
+    def __init__(self, resource_ids, *args):
+        super(_OwnershipConflictException, self).__init__(*args)
+        self.resource_ids = resource_ids
 
 
 class ManagerThread(Thread):
     """Resource manager main thread.
 
     Gets requests from the queue, add them to the requests list, process each
-    request and sends a reply via the worker instance.
+    request and sends a reply via the worker instance. Results requests are
+    handled separately, by the result writers.
+
+    Resources availability is looked up in an in-memory index of the
+    resources, which is compared against the DB (and repaired) periodically,
+    to catch changes made to the DB outside of the server (e.g. via the
+    admin).
+
+    Lock requests that cannot be satisfied yet are moved to a waiting set,
+    and are handled again only when a resource they may use is released,
+    when their timeout expires, or on the periodic refresh. The order in
+    which lock requests are handled is decided by the lock scheduler.
+
+    Clients which send heartbeats (RenewLeases requests) lock resources using
+    a lease, which the heartbeats renew. The resources of clients whose lease
+    expired are reclaimed, unless the client has requests pending in the
+    server. Clients which never sent a heartbeat (e.g. older clients) aren't
+    leased, and keep their resources until they disconnect.
+
+    On startup, the resources index is restored from the state journal (if
+    there's one and it matches the DB), and the clients of the previous run
+    are given a grace period to connect again and reclaim their resources,
+    after which their resources are released.
 
     Attributes:
-        _requests (list): list of requests to handle.
+        _pending (PendingRequests): the requests to handle and the lock
+            requests that are blocked on unavailable resources.
+        _resources_index (ResourcesIndex): resources availability index.
+        _query_cache (QueryCache): cached results of the resources queries.
+        _lock_scheduler (LockScheduler): orders the lock requests and holds
+            resources for blocked requests.
+        _leases (Leases): expiration times of the clients' leases.
+        _lease_period (number): seconds a lease lasts, 0 for no expiration.
+        _heartbeat_clients (set): names of the clients which sent heartbeats,
+            whose resources are leased.
+        _grace_period (number): seconds the clients of the previous run have
+            to reclaim their resources.
+        _stale_owners (set): names of the clients of the previous run which
+            still own resources.
+        _journal (StateJournal): persists the resources index, None to
+            always load the index from the DB.
+        _last_snapshot (number): time in which the last snapshot was written.
+        reclaimed_count (number): amount of resources reclaimed from clients
+            whose lease expired.
         request_queue (Queue): queue of new requests, added by the workers.
+        stats (PathStats): statistics of the handled requests.
+        hold_times (LatencyHistogram): seconds the released resources were
+            locked.
+        _db_timer (DBTimer): measures the time spent in DB queries.
         daemon (bool): A boolean value indicating whether this thread is a
             daemon thread (True) or not (False). Will be marked as True so
             once the server listener dies this thread will also die.
         REQUESTS_TIMEOUT (number): seconds to wait for new requests.
-        REQUESTS_MAX_AMOUNT (number): maximum request amount.
+        REFRESH_INTERVAL (number): seconds between consistency checks of the
+            resources index and re-evaluations of all the waiting requests.
+        CONSISTENCY_BATCH_SIZE (number): amount of resources each periodic
+            consistency check compares against the DB. The checks continue
+            from each other, so all the resources are checked once every
+            (resources / CONSISTENCY_BATCH_SIZE) refreshes.
+        OWNERSHIP_CHANGE_ATTEMPTS (number): times to retry locking or
+            releasing resources whose owner was changed concurrently.
+        SNAPSHOT_INTERVAL (number): max seconds between snapshots of the
+            resources index, while it changes.
+        MAX_JOURNAL_EVENTS (number): amount of journaled changes after which
+            a snapshot is written, to bound the recovery time.
     """
     daemon = True
 
     REQUESTS_TIMEOUT = 1
-    REQUESTS_MAX_AMOUNT = 10
-
-    def __init__(self, reactor, logger):
+    REFRESH_INTERVAL = 10
+    CONSISTENCY_BATCH_SIZE = 500
+    OWNERSHIP_CHANGE_ATTEMPTS = 3
+    SNAPSHOT_INTERVAL = 60
+    MAX_JOURNAL_EVENTS = 10000
+
+    def __init__(self, reactor, logger, lease_period=RESOURCE_LEASE_PERIOD,
+                 grace_period=RESOURCE_RECLAIM_GRACE_PERIOD, journal=None):
         """Construct the resource manager.
 
         Args:
             reactor (PollReactor): The reactor to work with.
             logger (logging.Logger): The logger of this resource manager.
+            lease_period (number): seconds a lease on resources lasts without
+                being renewed, 0 to never expire leases.
+            grace_period (number): seconds the clients of the previous run
+                have to reclaim their resources.
+            journal (StateJournal): persists the resources index, None to
+                always load the index from the DB.
         """
         super(ManagerThread, self).__init__()
 
         self.logger = logger
 
-        self._requests = []
+        self.stats = PathStats()
         self.request_queue = Queue()
+        self.hold_times = LatencyHistogram()
+        self._db_timer = DBTimer()
+        self._pending = PendingRequests()
+        self._resources_index = ResourcesIndex()
+        self._query_cache = QueryCache()
+        self._lock_scheduler = LockScheduler()
+        self._last_refresh = time.time()
+
+        self._leases = Leases()
+        self._lease_period = lease_period
+        self._heartbeat_clients = set()
+        self.reclaimed_count = 0
+
+        self._journal = journal
+        self._last_snapshot = 0
+        self._stale_owners = set()
+        self._grace_period = grace_period
 
         self._reactor = reactor
         self._stop_flag = False
-        self._requests_handlers = {StopTest: self.stop_test,
-                                   StartTest: self.start_test,
-                                   ShouldSkip: self.should_skip,
-                                   CleanupUser: self.cleanup_user,
-                                   AddResult: self.add_test_result,
+        self._requests_handlers = {CleanupUser: self.cleanup_user,
+                                   RenewLeases: self.renew_leases,
                                    UpdateFields: self.update_fields,
-                                   StartTestRun: self.start_test_run,
-                                   StopComposite: self.stop_composite,
                                    LockResources: self.lock_resources,
-                                   UpdateRunData: self.update_run_data,
                                    QueryResources: self.query_resources,
-                                   StartComposite: self.start_composite,
-                                   UpdateResources: self.update_resources,
+                                   ReclaimResources: self.reclaim_resources,
                                    ReleaseResources: self.release_resources}
 
     def run(self):
         """Handles the requests in the pool and waits for new requests."""
         self.logger.debug("Resource manager main thread started")
 
-        while not self._stop_flag:
-            try:
-                self._handle_requests()
-                self._accept_requests()
+        self._db_timer.install()
+        self._recover_state()
+        self._resources_index.connect_signals()
+        self._query_cache.connect_signals()
 
-            except Exception as ex:
-                self.logger.exception("Resource manager failed. "
-                                      "Reason: %s", ex)
+        try:
+            while not self._stop_flag:
+                try:
+                    self._handle_requests()
+                    self._accept_requests(self._get_accept_timeout())
+                    self._wake_waiting_requests()
+                    self._reclaim_expired_leases()
+                    self._write_snapshot_if_due()
+
+                except Exception as ex:
+                    self.logger.exception("Resource manager failed. "
+                                          "Reason: %s", ex)
+
+        finally:
+            self._resources_index.disconnect_signals()
+            self._query_cache.disconnect_signals()
+            if self._journal is not None:
+                self._write_snapshot()
+                self._journal.close()
 
         self.logger.debug("Resource manager thread is down")
 
@@ -115,26 +237,265 @@ class ManagerThread(Thread):
         """Turn on the 'stop' flag."""
         self._stop_flag = True
 
-    def _accept_requests(self):
-        """Add new requests.
+    def get_stats(self):
+        """Return the statistics of the resources path.
+
+        Returns:
+            dict. the statistics of the handled requests.
+        """
+        queue_depth = self.request_queue.qsize() + len(self._pending)
+
+        stats = self.stats.to_dict(queue_depth)
+        stats.update(leases_count=len(self._leases),
+                     reclaimed_count=self.reclaimed_count,
+                     stale_owners_count=len(self._stale_owners),
+                     hold_time=self.hold_times.to_dict(),
+                     query_cache=self._query_cache.to_dict(),
+                     waiters_by_type=self._pending.get_waiting_counts())
 
-        Pull new requests from the queue and add them to the requests list.
+        return stats
+
+    def _get_accept_timeout(self):
+        """Return the time to wait for new requests.
 
         Note:
-            Pulling max requests amount according to REQUESTS_MAX_AMOUNT.
-            Waiting max seconds for request according to REQUESTS_TIMEOUT.
+            The waiting time is bounded by REQUESTS_TIMEOUT, by the closest
+            expiration of a waiting request or a lease and by the next
+            refresh. If there are requests ready to be handled, the manager
+            doesn't wait at all.
+
+        Returns:
+            number. seconds to wait for new requests.
+        """
+        if self._pending.ready_count > 0:
+            return 0
+
+        now = time.time()
+        wake_times = [now + self.REQUESTS_TIMEOUT,
+                      self._last_refresh + self.REFRESH_INTERVAL]
+
+        for next_expiration in (self._pending.next_expiration(),
+                                self._leases.next_expiration()):
+            if next_expiration is not None:
+                wake_times.append(next_expiration)
+
+        return max(min(wake_times) - now, 0)
+
+    def _accept_requests(self, timeout=REQUESTS_TIMEOUT):
+        """Add new requests.
+
+        Wait for a new request, then pull all the requests in the queue and
+        add them to the pending requests.
+
+        Args:
+            timeout (number): max seconds to wait for a new request.
         """
         try:
-            request = self.request_queue.get(timeout=self.REQUESTS_TIMEOUT)
-            self.logger.debug("Adding new requests")
-            for _ in xrange(self.REQUESTS_MAX_AMOUNT):
-                self._requests.append(request)
-                request = self.request_queue.get_nowait()
+            request = self.request_queue.get(block=timeout > 0,
+                                             timeout=timeout)
 
         except EmptyQueueError:
             return
 
-        self.logger.debug("Done adding new requests")
+        accepted_count = 0
+        while request is not None:
+            self._pending.add(request)
+            accepted_count += 1
+            try:
+                request = self.request_queue.get_nowait()
+
+            except EmptyQueueError:
+                request = None
+
+        self.logger.debug("Added %d new requests", accepted_count)
+
+    def _log_woken_requests(self, requests):
+        """Log the waiting requests which were made ready again.
+
+        Args:
+            requests (list): requests woken from the waiting set.
+        """
+        if len(requests) > 0:
+            self.logger.debug("Waking up %d waiting requests", len(requests))
+
+    def _wake_waiting_requests(self):
+        """Wake the waiting requests that expired or are due to refresh."""
+        now = time.time()
+        if now - self._last_refresh >= self.REFRESH_INTERVAL:
+            self._last_refresh = now
+            self.logger.debug("Resources requests statistics: %r",
+                              self.get_stats())
+            self.check_resources_index(self.CONSISTENCY_BATCH_SIZE)
+            self._log_woken_requests(self._pending.wake_all())
+
+        else:
+            self._log_woken_requests(self._pending.wake_expired(now))
+
+    def _recover_state(self):
+        """Build the resources index and reconcile the previous run's owners.
+
+        The index is restored from the state journal when possible, and is
+        loaded from the DB otherwise.
+        """
+        start_time = time.time()
+        snapshot, events = None, []
+        if self._journal is not None:
+            snapshot, events = self._journal.load()
+
+        if snapshot is None:
+            self._resources_index.load()
+            source = "the DB"
+
+        else:
+            self._resources_index.restore(snapshot, events)
+            source = "a snapshot and %d journaled changes" % len(events)
+
+        self.logger.info("Recovered %d resources from %s in %.3f seconds",
+                         len(self._resources_index), source,
+                         time.time() - start_time)
+
+        self._start_grace_period()
+        if self._journal is not None:
+            self._write_snapshot()
+            self._resources_index.journal = self._journal
+
+    def _start_grace_period(self):
+        """Give the clients of the previous run time to reclaim resources.
+
+        All the connections of the previous run were lost, so the resources
+        owned by its clients (named <host>:<port>) are leased until the end
+        of the grace period, in which reconnecting clients may reclaim them.
+        Resources owned by other names (e.g. set by hand) are left as is.
+        """
+        self._stale_owners = set(ResourceData.objects.filter(
+                            owner__contains=HOST_PORT_SEPARATOR).values_list(
+                                            'owner', flat=True).distinct())
+        if len(self._stale_owners) == 0:
+            return
+
+        expiration_time = time.time() + self._grace_period
+        ResourceData.objects.filter(
+                    owner__contains=HOST_PORT_SEPARATOR).update(
+                    lease_expiration=datetime.fromtimestamp(expiration_time))
+
+        for owner in self._stale_owners:
+            self._leases.renew(owner, expiration_time)
+
+        self.logger.info("Waiting %d seconds for %d clients of the previous "
+                         "run to reclaim their resources", self._grace_period,
+                         len(self._stale_owners))
+
+    def _write_snapshot(self):
+        """Write a snapshot of the resources index to the state journal."""
+        start_time = time.time()
+        self._journal.write_snapshot(self._resources_index.get_snapshot())
+        self._last_snapshot = time.time()
+        self.logger.debug("Wrote a snapshot of the resources index in %.3f "
+                          "seconds", self._last_snapshot - start_time)
+
+    def _write_snapshot_if_due(self):
+        """Write a snapshot if the journal grew long or the last one is old."""
+        if self._journal is None or self._journal.events_count == 0:
+            return
+
+        if self._journal.events_count >= self.MAX_JOURNAL_EVENTS or \
+                time.time() - self._last_snapshot >= self.SNAPSHOT_INTERVAL:
+            self._write_snapshot()
+
+    def _renew_lease(self, owner):
+        """Renew the lease of an owner on all of its resources.
+
+        Args:
+            owner (str): name of the client owning the lease.
+        """
+        if self._lease_period == 0:
+            return
+
+        expiration_time = time.time() + self._lease_period
+        renewed_count = ResourceData.objects.filter(owner=owner).update(
+                    lease_expiration=datetime.fromtimestamp(expiration_time))
+
+        if renewed_count == 0:
+            self._leases.remove(owner)
+
+        else:
+            self._leases.renew(owner, expiration_time)
+
+    def _reclaim_expired_leases(self):
+        """Release the resources of the owners whose leases expired.
+
+        Note:
+            Clients which wait for a reply are alive, even though they can't
+            send heartbeats, so their leases are renewed instead.
+        """
+        for owner in self._leases.pop_expired(time.time()):
+            self._stale_owners.discard(owner)
+            if self._pending.has_worker_requests(owner):
+                self.logger.debug("Lease of %r expired while it has pending "
+                                  "requests, renewing it", owner)
+                self._renew_lease(owner)
+                continue
+
+            reclaimed_count = ResourceData.objects.filter(
+                                owner=owner,
+                                lease_expiration__lte=datetime.now()).update(
+                                            owner="", owner_time=None,
+                                            lease_expiration=None)
+
+            if reclaimed_count == 0:
+                continue
+
+            self.reclaimed_count += reclaimed_count
+            self.logger.warning("Lease of %r expired, reclaimed %d resources",
+                                owner, reclaimed_count)
+
+            owned_ids = self._resources_index.get_owned_ids(owner)
+            self._resources_index.sync_states(owned_ids)
+            released_ids = [resource_id for resource_id in owned_ids
+                            if self._resources_index.get_entry(
+                                            resource_id).owner == ""]
+
+            # The index is already up to date, this updates the hold times.
+            released_types = self._release_in_index(released_ids)
+            self._log_woken_requests(self._pending.wake(released_types))
+
+    def check_resources_index(self, batch_size=None):
+        """Compare the resources index against the DB and repair it.
+
+        Args:
+            batch_size (number): amount of resources to check, continuing
+                from the previous check. None to check all the resources.
+
+        Returns:
+            list. names of the resources whose indexed data was inconsistent.
+        """
+        inconsistent_names = self._resources_index.check_consistency(
+                                                    repair=True,
+                                                    batch_size=batch_size)
+        if len(inconsistent_names) > 0:
+            self._query_cache.clear()
+            self.logger.warning("Repaired the index of resources %r, which "
+                                "were inconsistent with the DB",
+                                inconsistent_names)
+
+        return inconsistent_names
+
+    def _wait_for_resources(self, request):
+        """Move a blocked lock request to the waiting set.
+
+        Args:
+            request (Request): LockResources request that can't be satisfied.
+        """
+        resource_types = [option.type
+                          for descriptor in request.message.descriptors
+                          for option in ResourceDescriptor.decode(
+                                                    descriptor).get_options()]
+
+        expiration_time = None
+        if request.message.timeout is not None:
+            expiration_time = request.creation_time + request.message.timeout
+
+        self._pending.wait(request, resource_types, expiration_time)
 
     def _get_request_handler(self, request):
         """Returns the suitable request handler.
@@ -155,71 +516,174 @@ class ManagerThread(Thread):
         except KeyError:
             raise ServerError("Invalid message type %r" % message_type)
 
+    def _notify_queue_position(self, request):
+        """Send the position of a blocked lock request to its client.
+
+        Note:
+            The position is sent only to clients which asked for it in the
+            request, and only if it changed since it was last sent.
+
+        Args:
+            request (Request): queued LockResources request.
+        """
+        if (not request.message.notify_position or
+                request not in self._lock_scheduler):
+            return
+
+        position = self._lock_scheduler.get_position(request)
+        if position == request.queue_position:
+            return
+
+        request.queue_position = position
+        reply = WaitingReply(
+                    queue_position=position,
+                    estimated_wait=self._lock_scheduler.estimate_wait(
+                                                            request, position))
+
+        reply.request_id = request.message.msg_id
+        self._reactor.callFromThread(request.respond, reply)
+
+    def _sort_requests(self):
+        """Return the requests pool in the order the requests should be handled.
+
+        Note:
+            Lock requests are handled after all other requests (which may free
+            resources), in the order decided by the lock scheduler.
+
+        Returns:
+            list. the requests to handle.
+        """
+        lock_requests = []
+        other_requests = []
+        for request in self._pending.get_ready():
+            if isinstance(request.message, LockResources):
+                lock_requests.append(request)
+
+            else:
+                other_requests.append(request)
+
+        now = time.time()
+        self._lock_scheduler.rank_queue(now)
+        return other_requests + self._lock_scheduler.sort(lock_requests, now)
+
     def _handle_requests(self):
         """Iterate the requests pool and handle requests one by one."""
-        for request in self._requests[:]:
+        for request in self._sort_requests():
+            # The request may have been removed by a previous cleanup.
+            if not self._pending.is_ready(request):
+                continue
+
             self.logger.debug("Handling request: %r", request)
 
             # an orphan request, client is not alive.
             if not request.server_request and not request.worker.is_alive:
                 self.logger.warning("Client %r disconnected, request dropped",
                                     request.worker.name)
-                self._requests.remove(request)
+                self._pending.remove(request)
+                self._lock_scheduler.dequeue(request)
                 continue
 
+            failed = False
+            start_time = time.time()
+            db_start_time = self._db_timer.total_time
             try:
                 request_handler = self._get_request_handler(request)
                 reply = request_handler(request)
 
             except _WaitingForResourceException as ex:
-                self.logger.exception(str(ex))
+                self.logger.debug(str(ex))
+                self._wait_for_resources(request)
+                self._notify_queue_position(request)
                 continue
 
             except Exception as ex:
-                if isinstance(ex, ServerError):
-                    code = ex.ERROR_CODE
-                    content = ex.get_error_content()
-
-                else:
-                    code = ServerError.ERROR_CODE
-                    content = str(ex)
-
                 self.logger.exception(str(ex))
-                reply = ErrorReply(code=code, content=content)
+                reply = build_error_reply(ex)
+                failed = True
 
             reply.request_id = request.message.msg_id
             self._reactor.callFromThread(request.respond, reply)
+            self.stats.record(get_message_name(request.message),
+                              start_time - request.creation_time,
+                              time.time() - start_time,
+                              self._db_timer.total_time - db_start_time,
+                              failed)
 
-            self._requests.remove(request)
+            self._pending.remove(request)
+            self._lock_scheduler.dequeue(request)
 
-    def _lock_resource(self, resource, user_name):
-        """Mark the resource as locked by the given user.
+    def _change_owner(self, resource_ids, previous_owner, new_owner):
+        """Atomically change the owner of the given resources.
 
-        For complex resource, marks also its sub-resources as locked by the
-        given user.
+        The change is done using a single conditional UPDATE, which affects
+        only the resources that are still owned by the previous owner (and
+        when locking, only the ones which aren't reserved for other users).
+        If not all the resources were affected, the change is rolled back.
 
         Note:
-            The given resource *must* be available.
+            Only the DB is updated, the resources index should be updated
+            once the transaction is committed.
+
+        Args:
+            resource_ids (list): ids of the resources to change.
+            previous_owner (str): the expected current owner of the
+                resources, empty string for free resources.
+            new_owner (str): name of the new owner, empty string to free.
+
+        Raises:
+            _OwnershipConflictException: the owner of some of the resources
+                was changed concurrently.
+        """
+        if len(resource_ids) == 0:
+            return
+
+        query = ResourceData.objects.filter(pk__in=resource_ids,
+                                            owner=previous_owner)
+
+        owner_time = None
+        lease_expiration = None
+        if new_owner != "":
+            user_name = new_owner.split(":")[0]
+            query = query.filter(reserved__in=("", user_name))
+            owner_time = datetime.now()
+            if new_owner in self._heartbeat_clients:
+                lease_expiration = datetime.fromtimestamp(
+                                            time.time() + self._lease_period)
+
+        with transaction.atomic():
+            changed_count = query.update(owner=new_owner,
+                                         owner_time=owner_time,
+                                         lease_expiration=lease_expiration)
+
+            if changed_count != len(resource_ids):
+                raise _OwnershipConflictException(
+                            resource_ids,
+                            "Expected to change the owner of %d resources "
+                            "but changed %d" % (len(resource_ids),
+                                                changed_count))
+
+    def _set_owner(self, resource, user_name):
+        """Set the owner of a resource data instance and its sub-resources.
 
         Args:
-            resource (ResourceData): resource to lock.
-            user_name (str): name of the locking user.
+            resource (ResourceData): resource data to update.
+            user_name (str): name of the owner, empty string for none.
         """
         for sub_resource in resource.get_sub_resources():
-            self._lock_resource(sub_resource, user_name)
+            self._set_owner(sub_resource, user_name)
 
         resource.owner = user_name
-        resource.owner_time = datetime.now()
-        resource.save()
 
-    def _release_resource(self, resource, user_name):
-        """Mark the resource as free.
+    def _plan_release(self, resource_id, user_name, released_ids):
+        """Collect the ids of the resource tree to be released.
 
-        For complex resource, marks also its sub-resources as free.
+        For complex resource, collects also its sub-resources.
 
         Args:
-            resource (ResourceData): resource to release.
+            resource_id (number): id of the resource to release.
             user_name (str): name of the releasing user.
+            released_ids (list): list to add the ids of the resources that
+                should be released to.
 
         Raises:
             ResourceReleaseError: if resource is a complex resource and fails.
@@ -227,29 +691,29 @@ class ManagerThread(Thread):
             ResourceAlreadyAvailableError: if resource was already available.
         """
         errors = {}
+        entry = self._resources_index.get_entry(resource_id)
 
-        for sub_resource in resource.get_sub_resources():
+        for sub_id in entry.sub_ids:
             try:
-                self._release_resource(sub_resource, user_name)
+                self._plan_release(sub_id, user_name, released_ids)
 
             except ServerError as ex:
-                errors[sub_resource.name] = (ex.ERROR_CODE, str(ex))
+                sub_name = self._resources_index.get_entry(sub_id).name
+                errors[sub_name] = (ex.ERROR_CODE, str(ex))
                 self.logger.debug("Failed to release sub-resource %r, "
-                                  "Reason: %s", sub_resource, ex)
+                                  "Reason: %s", sub_name, ex)
 
-        if resource.is_available(user_name):
+        if self._resources_index.is_available(resource_id, user_name):
             raise ResourceAlreadyAvailableError("Failed releasing resource "
                                                 "%r, it was not locked"
-                                                % resource.name)
+                                                % entry.name)
 
-        if resource.owner != user_name:
+        if entry.owner != user_name:
             raise ResourcePermissionError("Failed releasing resource %r, "
                                           "it is locked by %r"
-                                          % (resource.name, resource.owner))
+                                          % (entry.name, entry.owner))
 
-        resource.owner = ""
-        resource.owner_time = None
-        resource.save()
+        released_ids.append(resource_id)
 
         if len(errors) != 0:
             raise ResourceReleaseError(errors)
@@ -267,18 +731,23 @@ class ManagerThread(Thread):
         self.logger.debug("Clean up after user %r", user_name)
 
         self.logger.debug("Removing requests of user %r", user_name)
-        for request in self._requests[:]:
-            if request.worker.name == user_name and not request.server_request:
-                self._requests.remove(request)
+        for request in self._pending.pop_worker_requests(user_name):
+            self._lock_scheduler.dequeue(request)
 
         self.logger.debug("Releasing locked resources of user %r", user_name)
-        resources = ResourceData.objects.filter(owner=user_name)
-        if resources.count() == 0:
+        released_count = ResourceData.objects.filter(owner=user_name).update(
+                            owner="", owner_time=None, lease_expiration=None)
+        self._leases.remove(user_name)
+        self._heartbeat_clients.discard(user_name)
+        self._release_in_index(
+                    self._resources_index.get_owned_ids(user_name))
+
+        if released_count == 0:
             self.logger.debug("User %r didn't lock any resource", user_name)
 
         else:
-            resources.update(owner="", owner_time=None)
             self.logger.debug("User %r was successfully cleaned", user_name)
+            self._log_woken_requests(self._pending.wake_all())
 
         return SuccessReply()
 
@@ -286,34 +755,241 @@ class ManagerThread(Thread):
     def query_resources(self, request):
         """Find and return the resources that answer the client's query.
 
+        Note:
+            The results are cached. If the client already has the current
+            result of the query (i.e. it sent the result's generation), the
+            resources aren't sent again.
+
         Args:
             request (Request): QueryResources request.
 
         Returns:
-            ResourcesReply. a reply containing matching resources.
+            QueryReply. a reply containing matching resources and the
+                generation of the result.
         """
         desc = ResourceDescriptor.decode(request.message.descriptors)
         self.logger.debug("Looking for resources with description %r", desc)
 
+        cached = self._query_cache.get(desc.type, desc.properties,
+                                       request.message.generation)
+        if cached is not None:
+            generation, query_result = cached
+            return QueryReply(resources=query_result, generation=generation)
+
         # query for resources that are usable and match the descriptors
         query = (Q(is_usable=True, **desc.properties))
         matches = desc.type.objects.filter(query)
 
-        if matches.count() == 0:
+        query_result = [resource for resource in matches]
+        if len(query_result) == 0:
             raise ResourceDoesNotExistError("No existing resource meets "
                                             "the requirements: %r" % desc)
 
-        query_result = [resource for resource in matches]
+        generation = self._query_cache.add(desc.type, desc.properties,
+                                           query_result)
 
-        return ResourcesReply(resources=query_result)
+        return QueryReply(resources=query_result, generation=generation)
+
+    def _get_verified_resource(self, desc, resource_id, client):
+        """Fetch an indexed resource, verifying it still answers the request.
+
+        The index may be stale if the DB was changed outside of the server.
+        The ownership is verified when the resources are locked, but the
+        resource's properties are verified here, and the resource is reloaded
+        to the index if they don't match anymore.
+
+        Args:
+            desc (ResourceDescriptor): descriptor of the requested resource.
+            resource_id (number): id of the candidate resource.
+            client (str): name of the locking client.
+
+        Returns:
+            ResourceData. the resource, None if it can't be locked.
+        """
+        if not self._resources_index.is_available(resource_id, client):
+            return None
+
+        resource = desc.type.objects.filter(pk=resource_id, is_usable=True,
+                                            **desc.properties).first()
+
+        if resource is None:
+            self._resources_index.mark_dirty([resource_id])
+
+        return resource
+
+    def _find_options(self, request, desc, group_ids, held_ids):
+        """Find the available resources for every option of the descriptor.
+
+        Args:
+            request (Request): LockResources request.
+            desc (ResourceDescriptor): descriptor of the requested resources.
+            group_ids (set): ids of the groups of the locking user.
+            held_ids (set): ids of resources held for other requests, which
+                shouldn't be used.
+
+        Returns:
+            list. the descriptor's options (itself and its alternatives),
+                which enough resources answer, in order. Each option is a
+                tuple of the option's descriptor, the ids of the available
+                resources answering it (according to the index) in order of
+                preference, and the amount of resources answering it,
+                available or not.
+
+        Raises:
+            ResourceDoesNotExistError. not enough resources answer any of
+                the descriptor's options.
+        """
+        options = []
+        for option in desc.get_options():
+            self.logger.debug("Looking for %r resource", option)
+            matches = self._resources_index.find_matching(option.type,
+                                                          option.properties,
+                                                          group_ids)
+            if len(matches) < desc.count:
+                continue
+
+            candidates = self._resources_index.find_available(
+                                option.type, option.properties,
+                                request.worker.name, group_ids, held_ids)
+
+            options.append((option, candidates, len(matches)))
+
+        if len(options) == 0:
+            raise ResourceDoesNotExistError("No existing resource meets "
+                                            "the requirements: %r" % desc)
+
+        return options
+
+    def _wait_for_assignment(self, request, slots, assignment):
+        """Queue a request whose descriptors can't all be assigned.
+
+        Args:
+            request (Request): LockResources request.
+            slots (list): the chosen option of every requested resource.
+            assignment (dict): the partial assignment found, maps the index
+                of a slot to its resource id.
+
+        Raises:
+            ResourceUnavailableError. the request's timeout has expired.
+            _WaitingForResourceException. the request should wait, the
+                resources of the partial assignment are held for it by the
+                scheduler.
+        """
+        slot = min(set(xrange(len(slots))).difference(assignment))
+        _, (desc, _, resources_count) = slots[slot]
+
+        timeout = request.message.timeout
+        waiting_time = time.time() - request.creation_time
+        if timeout is not None and waiting_time > timeout:
+            raise ResourceUnavailableError("No available resource "
+                                           "meets the requirements: "
+                                           "%r" % desc)
+
+        held_ids = [tree_id for resource_id in assignment.itervalues()
+                    for tree_id in self._resources_index.get_tree_ids(
+                                                                resource_id)]
+        self._lock_scheduler.queue(request, desc.type, held_ids,
+                                   resources_count)
+
+        raise _WaitingForResourceException("Resource %r is unavailable"
+                                           ", waiting for it to be "
+                                           "released" % desc,
+                                           desc.type, resources_count)
+
+    def _lock_descriptors(self, request, group_ids):
+        """Find resources answering all the request's descriptors and lock them.
+
+        Every descriptor requests its count of resources, answering the
+        descriptor or one of its alternatives. The alternatives of a
+        descriptor are used in order, when the previous ones can't be
+        satisfied together with the other descriptors.
+
+        The resources are assigned to the descriptors together, using
+        bipartite matching, so overlapping descriptors get distinct resources
+        whenever possible. Either all the descriptors get resources or none
+        of the resources is locked, and all the resources trees are locked
+        together, using a single conditional UPDATE.
+
+        Args:
+            request (Request): LockResources request.
+            group_ids (set): ids of the groups of the locking user.
+
+        Returns:
+            tuple. ids of the locked resources and their sub-resources, and
+                the resource datas answering the descriptors, by the order
+                of the descriptors.
+
+        Raises:
+            _OwnershipConflictException: some of the chosen resources were
+                locked concurrently.
+            _WaitingForResourceException: no complete assignment is
+                available yet, the resources assigned to some of the
+                descriptors are held for the request by the scheduler.
+        """
+        client = request.worker.name
+        held_ids = self._lock_scheduler.get_held_ids(request)
+        descriptors = [ResourceDescriptor.decode(descriptor_dict)
+                       for descriptor_dict in request.message.descriptors]
+
+        options = [self._find_options(request, desc, group_ids, held_ids)
+                   for desc in descriptors]
+        choices = [0] * len(descriptors)
+
+        verified_resources = {}
+        while True:
+            slots = [(index, options[index][choice])
+                     for index, choice in enumerate(choices)
+                     for _ in xrange(descriptors[index].count)]
+
+            assignment = find_assignment([candidates for _, (_, candidates, _)
+                                          in slots])
+            if len(assignment) < len(slots):
+                slot = min(set(xrange(len(slots))).difference(assignment))
+                index = slots[slot][0]
+                if choices[index] + 1 < len(options[index]):
+                    choices[index] += 1
+                    continue
+
+                self._wait_for_assignment(request, slots, assignment)
+
+            locked_ids = []
+            locked_resources = []
+            for slot, (index, (option, candidates, _)) in enumerate(slots):
+                resource_id = assignment[slot]
+                tree_ids = self._resources_index.get_tree_ids(resource_id)
+                key = (index, choices[index], resource_id)
+                if key not in verified_resources:
+                    verified_resources[key] = self._get_verified_resource(
+                                                option, resource_id, client)
+
+                resource = verified_resources[key]
+                # Resources whose trees overlap can't be locked together
+                if resource is None or not set(locked_ids).isdisjoint(
+                                                                tree_ids):
+                    candidates.remove(resource_id)
+                    break
+
+                locked_ids.extend(tree_ids)
+                locked_resources.append(resource)
+
+            else:
+                break
+
+        self._change_owner(locked_ids, "", client)
+
+        for resource in locked_resources:
+            self._set_owner(resource, client)
+
+        return locked_ids, locked_resources
 
-    @transaction.atomic
     def lock_resources(self, request):
-        """Lock the given resources one by one.
+        """Lock all the given resources at once.
 
         Note:
-            If one of the resources fails to lock, all the resources that has
-            been locked until that resource will be released.
+            The resources are locked in a single conditional UPDATE. If some
+            of them were locked concurrently (e.g. the index was stale), none
+            of the resources is locked, and the locking is retried using the
+            up-to-date state of the conflicting resources.
 
         Args:
             request (Request): LockResources request.
@@ -328,8 +1004,6 @@ class ManagerThread(Thread):
                 available.
             UnknownUserError. when unknown user has tried to lock a resource.
         """
-        locked_resources = []
-
         client = request.worker.name
         user_name, _ = client.split(":")  # splitting <user_name>:<port>
 
@@ -339,223 +1013,250 @@ class ManagerThread(Thread):
 
         user = auth_models.User.objects.get(username=user_name)
 
-        groups = list(user.groups.all())
-
-        for descriptor_dict in request.message.descriptors:
-
-            desc = ResourceDescriptor.decode(descriptor_dict)
-            self.logger.debug("Locking %r resource", desc)
-
-            # query for resources that are usable and match the user's
-            # preference, which are either belong to a group he's in or
-            # don't belong to any group.
-            query = (Q(is_usable=True, **desc.properties) &
-                     (Q(group__isnull=True) | Q(group__in=groups)))
-            matches = desc.type.objects.filter(query).order_by('-reserved')
-
-            if matches.count() == 0:
-                raise ResourceDoesNotExistError("No existing resource meets "
-                                                "the requirements: %r" % desc)
-
-            availables = (resource for resource in matches
-                          if resource.is_available(client))
+        group_ids = set(user.groups.values_list('id', flat=True))
 
+        for _ in xrange(self.OWNERSHIP_CHANGE_ATTEMPTS):
             try:
-                resource = availables.next()
+                locked_ids, locked_resources = \
+                    self._lock_descriptors(request, group_ids)
+                break
 
-                self._lock_resource(resource, client)
-                locked_resources.append(resource)
-                self.logger.debug("Resource %r locked successfully", desc)
+            except _OwnershipConflictException as ex:
+                self.logger.debug("Failed locking resources: %s, "
+                                  "retrying", ex)
+                self._resources_index.sync_states(ex.resource_ids)
 
-            except StopIteration:
-                timeout = request.message.timeout
-                waiting_time = time.time() - request.creation_time
-                if timeout is not None and waiting_time > timeout:
-                    raise ResourceUnavailableError("No available resource "
-                                                   "meets the requirements: "
-                                                   "%r" % desc)
+        else:
+            raise _WaitingForResourceException("The resources were locked "
+                                               "concurrently, waiting for "
+                                               "them to be released")
 
-                raise _WaitingForResourceException("Resource %r is unavailable"
-                                                   ", waiting for it to be "
-                                                   "released", desc)
+        self._resources_index.set_owner(locked_ids, client)
+        self._lock_scheduler.record_lock(locked_ids, time.time())
+        if client in self._heartbeat_clients and len(locked_ids) > 0:
+            self._leases.renew(client, time.time() + self._lease_period)
+
+        self.logger.debug("Resources %r locked successfully",
+                          locked_resources)
 
         return ResourcesReply(resources=locked_resources)
 
-    def release_resources(self, request):
-        """Release the given resources one by one.
+    def _release_names(self, names, user_name):
+        """Release the resources with the given names at once.
 
         Args:
-            request (Request): ReleaseResources request.
+            names (list): names of the resources to release.
+            user_name (str): name of the releasing user.
 
         Returns:
-            SuccessReply. a reply indicating on a successful operation.
+            tuple. ids of the released resources, and a dict of the errors
+                that occurred, by the names of the resources.
 
         Raises:
-            ResourceReleaseError: when error occurred while trying to release
-                at least one of the given resources.
+            _OwnershipConflictException: the owner of some of the resources
+                was changed concurrently.
         """
         errors = {}
-        for name in request.message.requests:
-            try:
-                resource_data = ResourceData.objects.get(name=name)
-
-            except ObjectDoesNotExist:
+        released_ids = []
+        for name in names:
+            resource_id = self._resources_index.get_id(name)
+            if resource_id is None:
                 errors[name] = (ResourceDoesNotExistError.ERROR_CODE,
                                 "Resource %r doesn't exist" % name)
                 continue
 
-            resource = get_sub_model(resource_data)
-
             self.logger.debug("Releasing %r resource", name)
 
             try:
-                self._release_resource(resource, request.worker.name)
-                self.logger.debug("Resource %r released successfully", name)
+                self._plan_release(resource_id, user_name, released_ids)
 
             except ServerError as ex:
                 errors[name] = (ex.ERROR_CODE, ex.get_error_content())
 
-        if len(errors) > 0:
-            raise ResourceReleaseError(errors)
+        self._change_owner(released_ids, user_name, "")
 
-        return SuccessReply()
+        return released_ids, errors
 
-    def start_test_run(self, request):
-        """Build the tests tree and the run data of the new run.
+    def _release_in_index(self, resource_ids):
+        """Mark released resources as free in the index.
 
         Args:
-            request (Request): StartTestRun request.
+            resource_ids (list): ids of the released resources.
 
         Returns:
-            SuccessReply. a reply indicating on a successful operation.
+            set. types of the released resources.
         """
-        request.worker.initialize_test_run(request.message.tests,
-                                           request.message.run_data)
+        now = time.time()
+        released_types = set()
+        for resource_id in resource_ids:
+            resource_type = self._resources_index.get_entry(resource_id).type
+            hold_time = self._lock_scheduler.record_release(resource_id,
+                                                            resource_type,
+                                                            now)
+            if hold_time is not None:
+                self.hold_times.record(hold_time)
 
-        return SuccessReply()
+            released_types.add(resource_type)
 
-    def start_test(self, request):
-        """Start a test run.
+        self._resources_index.set_owner(resource_ids, "")
+        return released_types
 
-        Args:
-            request (Request): StartTest request.
+    def reclaim_resources(self, request):
+        """Transfer resources locked before the server restarted to a client.
 
-        Returns:
-            SuccessReply. a reply indicating on a successful operation.
-        """
-        request.worker.start_test(request.message.test_id)
-
-        return SuccessReply()
-
-    def should_skip(self, request):
-        """Check if the test previously passed in the results DB.
+        Note:
+            A resource can be reclaimed only from a client of the previous
+            run, which ran on the same host as the reclaiming client.
 
         Args:
-            request (Request): ShouldSkip request.
+            request (Request): ReclaimResources request.
 
         Returns:
-            ShouldSkipReply. a reply containing the query result.
-        """
-        query_result = request.worker.should_skip(request.message.test_id)
+            SuccessReply. a reply indicating on a successful operation.
 
-        return ShouldSkipReply(should_skip=query_result)
+        Raises:
+            ResourcePermissionError: some of the resources couldn't be
+                reclaimed, the others were reclaimed.
+        """
+        client = request.worker.name
+        user_name = client.split(HOST_PORT_SEPARATOR)[0]
 
-    def stop_test(self, request):
-        """End a test run.
+        failed_names = []
+        names_by_owner = {}
+        for name in request.message.resources:
+            resource_id = self._resources_index.get_id(name)
+            owner = None
+            if resource_id is not None:
+                owner = self._resources_index.get_entry(resource_id).owner
 
-        Args:
-            request (Request): StopTest request.
+            if owner == client:
+                continue
 
-        Returns:
-            SuccessReply. a reply indicating on a successful operation.
-        """
-        request.worker.stop_test(request.message.test_id)
+            if owner not in self._stale_owners or \
+                    owner.split(HOST_PORT_SEPARATOR)[0] != user_name:
+                failed_names.append(name)
+                continue
 
-        return SuccessReply()
+            names_by_owner.setdefault(owner, []).append(name)
 
-    def update_resources(self, request):
-        """Update the resources list for a test data.
+        reclaimed_ids = []
+        for owner, names in names_by_owner.iteritems():
+            owner_ids = [tree_id for name in names
+                         for tree_id in self._resources_index.get_tree_ids(
+                                        self._resources_index.get_id(name))]
+            try:
+                self._change_owner(owner_ids, owner, client)
 
-        Args:
-            request (Request): UpdateResources request.
+            except _OwnershipConflictException:
+                self._resources_index.sync_states(owner_ids)
+                failed_names.extend(names)
+                continue
 
-        Returns:
-            SuccessReply. a reply indicating on a successful operation.
-        """
-        request.worker.update_resources(request.message.test_id,
-                                        request.message.resources)
+            self._resources_index.set_owner(owner_ids, client)
+            reclaimed_ids.extend(owner_ids)
+            if len(self._resources_index.get_owned_ids(owner)) == 0:
+                self._stale_owners.discard(owner)
+                self._leases.remove(owner)
+
+        if len(reclaimed_ids) > 0:
+            self.logger.info("Client %r reclaimed resources %r", client,
+                             reclaimed_ids)
+            self._lock_scheduler.record_lock(reclaimed_ids, time.time())
+            if client in self._heartbeat_clients:
+                self._leases.renew(client, time.time() + self._lease_period)
+
+        if len(failed_names) > 0:
+            raise ResourcePermissionError("Failed reclaiming resources %r, "
+                                          "they aren't owned by a client of "
+                                          "the previous run on host %r"
+                                          % (failed_names, user_name))
 
         return SuccessReply()
 
-    def update_fields(self, request):
-        """Update content in the DB.
+    def renew_leases(self, request):
+        """Renew the lease of the client on its locked resources.
+
+        Note:
+            From its first heartbeat on, the resources the client locks are
+            leased.
 
         Args:
-            request (Request): UpdateFields request.
+            request (Request): RenewLeases request.
 
         Returns:
-            SuccessReply. a reply indicating on a successful operation.
+            LeaseReply. a reply containing the lease period.
         """
-        message = request.message
-        objects = message.model.objects
-        if message.filter is not None and len(message.filter) > 0:
-            objects.filter(**message.filter).update(**message.kwargs)
+        if self._lease_period != 0:
+            self._heartbeat_clients.add(request.worker.name)
 
-        else:
-            objects.all().update(**message.kwargs)
+        self._renew_lease(request.worker.name)
 
-        return SuccessReply()
+        return LeaseReply(lease_period=self._lease_period)
 
-    def update_run_data(self, request):
-        """Update the run data parameters for a run.
+    def release_resources(self, request):
+        """Release all the given resources at once.
 
         Args:
-            request (Request): UpdateRunData request.
+            request (Request): ReleaseResources request.
 
         Returns:
             SuccessReply. a reply indicating on a successful operation.
+
+        Raises:
+            ResourceReleaseError: when error occurred while trying to release
+                at least one of the given resources.
         """
-        request.worker.update_run_data(request.message.run_data)
+        client = request.worker.name
+        for _ in xrange(self.OWNERSHIP_CHANGE_ATTEMPTS):
+            try:
+                released_ids, errors = \
+                    self._release_names(request.message.requests, client)
+                break
 
-        return SuccessReply()
+            except _OwnershipConflictException as ex:
+                self.logger.debug("Failed releasing resources: %s, "
+                                  "retrying", ex)
+                self._resources_index.sync_states(ex.resource_ids)
 
-    def start_composite(self, request):
-        """Start a composite test run.
+        else:
+            raise ServerError("Failed releasing resources %r, their owner "
+                              "was changed concurrently"
+                              % request.message.requests)
 
-        Args:
-            request (Request): StartComposite request.
+        released_types = self._release_in_index(released_ids)
+        self._log_woken_requests(self._pending.wake(released_types))
 
-        Returns:
-            SuccessReply. a reply indicating on a successful operation.
-        """
-        request.worker.start_composite(request.message.test_id)
+        if len(errors) > 0:
+            raise ResourceReleaseError(errors)
 
         return SuccessReply()
 
-    def stop_composite(self, request):
-        """End a composite test run.
+    def update_fields(self, request):
+        """Update content in the DB.
 
         Args:
-            request (Request): StopComposite request.
+            request (Request): UpdateFields request.
 
         Returns:
             SuccessReply. a reply indicating on a successful operation.
         """
-        request.worker.stop_composite(request.message.test_id)
+        message = request.message
+        objects = message.model.objects
+        if message.filter is not None and len(message.filter) > 0:
+            objects = objects.filter(**message.filter)
 
-        return SuccessReply()
+        else:
+            objects = objects.all()
 
-    def add_test_result(self, request):
-        """Add a result to a test.
+        if issubclass(message.model, ResourceData):
+            updated_ids = list(objects.values_list('pk', flat=True))
+            objects.update(**message.kwargs)
+            self._resources_index.mark_dirty(updated_ids)
 
-        Args:
-            request (Request): AddResult request.
+            # Resources may have been marked usable or un-reserved.
+            self._log_woken_requests(self._pending.wake_all())
 
-        Returns:
-            SuccessReply. a reply indicating on a successful operation.
-        """
-        request.worker.add_test_result(request.message.test_id,
-                                       request.message.code,
-                                       request.message.info)
+        else:
+            objects.update(**message.kwargs)
 
         return SuccessReply()
@@ -0,0 +1,218 @@
+"""Define the resource manager's pool of pending requests."""
+from itertools import count
+
+from rotest.management.server.waiting_requests import WaitingRequests
+
+
+class PendingRequests(object):
+    """The requests accepted by the resource manager and not yet answered.
+
+    A pending request is either ready (to be handled on the next pass of the
+    resource manager's loop) or waiting (blocked on unavailable resources).
+    The clients' requests are also indexed by their worker, so the requests
+    of a disconnected client are found without scanning all the requests.
+    Adding and removing a request are O(1).
+
+    Note:
+        The requests are kept in plain dicts which map them to sequence
+        numbers, and are sorted by them only when their order is needed,
+        since an OrderedDict is implemented in Python and is several times
+        slower to update.
+
+    Attributes:
+        _ready (dict): maps the ready requests to the order in which they
+            became ready.
+        _waiting (WaitingRequests): the requests waiting for resources.
+        _requests_by_worker (dict): maps a worker's name to a dict of its
+            pending requests, which maps them to their arrival order.
+            Server requests aren't indexed.
+        _sequence (iterator): generates the sequence numbers.
+    """
+    def __init__(self):
+        self._ready = {}
+        self._waiting = WaitingRequests()
+        self._requests_by_worker = {}
+        self._sequence = count()
+
+    def __len__(self):
+        return len(self._ready) + len(self._waiting)
+
+    def __contains__(self, request):
+        return request in self._ready or request in self._waiting
+
+    @property
+    def ready_count(self):
+        """Return the amount of ready requests.
+
+        Returns:
+            number. amount of requests to handle on the next pass.
+        """
+        return len(self._ready)
+
+    @property
+    def waiting_count(self):
+        """Return the amount of requests waiting for resources.
+
+        Returns:
+            number. amount of blocked requests.
+        """
+        return len(self._waiting)
+
+    def get_waiting_counts(self):
+        """Return the amount of requests waiting for each resource type.
+
+        Returns:
+            dict. maps a resource data type's name to the amount of requests
+                waiting for it.
+        """
+        return self._waiting.get_waiting_counts()
+
+    def get_ready(self):
+        """Return the ready requests.
+
+        Returns:
+            list. the ready requests, in the order they became ready.
+        """
+        return sorted(self._ready, key=self._ready.get)
+
+    def is_ready(self, request):
+        """Return whether the given request is ready to be handled.
+
+        Args:
+            request (Request): a request.
+
+        Returns:
+            bool. whether the request is pending and isn't waiting.
+        """
+        return request in self._ready
+
+    def add(self, request):
+        """Add a new ready request.
+
+        Args:
+            request (Request): the accepted request.
+        """
+        sequence_number = next(self._sequence)
+        self._ready[request] = sequence_number
+        if request.server_request:
+            return
+
+        worker_requests = self._requests_by_worker.get(request.worker.name)
+        if worker_requests is None:
+            worker_requests = {}
+            self._requests_by_worker[request.worker.name] = worker_requests
+
+        worker_requests[request] = sequence_number
+
+    def remove(self, request):
+        """Remove a request (ready or waiting), if it is pending.
+
+        Args:
+            request (Request): the request to remove.
+        """
+        self._ready.pop(request, None)
+        self._waiting.remove(request)
+
+        if request.server_request:
+            return
+
+        worker_requests = self._requests_by_worker.get(request.worker.name)
+        if worker_requests is not None:
+            worker_requests.pop(request, None)
+            if len(worker_requests) == 0:
+                del self._requests_by_worker[request.worker.name]
+
+    def has_worker_requests(self, worker_name):
+        """Return whether a client has pending requests.
+
+        Args:
+            worker_name (str): name of the client's worker.
+
+        Returns:
+            bool. whether the client has ready or waiting requests.
+        """
+        return worker_name in self._requests_by_worker
+
+    def pop_worker_requests(self, worker_name):
+        """Remove and return the pending requests of a client.
+
+        Args:
+            worker_name (str): name of the client's worker.
+
+        Returns:
+            list. the removed requests, in their arrival order.
+        """
+        worker_requests = self._requests_by_worker.pop(worker_name, {})
+        requests = sorted(worker_requests, key=worker_requests.get)
+        for request in requests:
+            self._ready.pop(request, None)
+            self._waiting.remove(request)
+
+        return requests
+
+    def wait(self, request, resource_types, expiration_time=None):
+        """Move a ready request to the waiting set.
+
+        Args:
+            request (Request): the blocked LockResources request.
+            resource_types (iterable): the resource data types (subclasses of
+                ResourceData) the request waits for.
+            expiration_time (number): time (as in time.time()) in which the
+                request should be woken up even if no resource was freed.
+                None means the request never expires.
+        """
+        self._ready.pop(request, None)
+        self._waiting.add(request, resource_types, expiration_time)
+
+    def _make_ready(self, requests):
+        """Mark the given woken requests as ready.
+
+        Args:
+            requests (list): requests removed from the waiting set.
+
+        Returns:
+            list. the given requests.
+        """
+        for request in requests:
+            self._ready[request] = next(self._sequence)
+
+        return requests
+
+    def wake(self, resource_types):
+        """Make the requests that may use the given types ready.
+
+        Args:
+            resource_types (iterable): types of resource datas which changed
+                their state.
+
+        Returns:
+            list. the woken requests, sorted by their arrival order.
+        """
+        return self._make_ready(self._waiting.wake(resource_types))
+
+    def wake_all(self):
+        """Make all the waiting requests ready.
+
+        Returns:
+            list. the woken requests, sorted by their arrival order.
+        """
+        return self._make_ready(self._waiting.wake_all())
+
+    def wake_expired(self, now):
+        """Make the waiting requests whose expiration time has passed ready.
+
+        Args:
+            now (number): the current time (as in time.time()).
+
+        Returns:
+            list. the woken requests, sorted by their arrival order.
+        """
+        return self._make_ready(self._waiting.wake_expired(now))
+
+    def next_expiration(self):
+        """Return the closest expiration time of a waiting request.
+
+        Returns:
+            number. closest expiration time, None if no request expires.
+        """
+        return self._waiting.next_expiration()
@@ -0,0 +1,168 @@
+"""Define the resource manager's cache of resources queries results."""
+from threading import Lock
+
+from django.db.models import signals
+
+from rotest.management.models.resource_data import ResourceData
+
+
+class QueryCache(object):
+    """Cache of the results of QueryResources requests.
+
+    The results are cached by the query's resource type and properties, and
+    are invalidated when a resource data of a related type (the same type,
+    a base type or a subtype) is saved or deleted in this process. Changes
+    made to the DB by other processes are caught by the consistency checker,
+    which clears the cache when it finds the index inconsistent.
+
+    Every cached result gets a new generation number, which the clients
+    send back to revalidate their own cached copy of the result without
+    getting the resources again.
+
+    Queries filtering by the ownership fields aren't cached, since the
+    ownership changes are written to the DB without signals.
+
+    Attributes:
+        hits_count (number): queries answered from the cache.
+        misses_count (number): queries answered from the DB.
+        not_modified_count (number): cache hits whose result the client
+            already had.
+        _results (dict): maps a query key to its generation and result.
+        _next_generation (number): generation of the next cached result.
+        UNCACHED_FIELDS (tuple): fields whose filter bypasses the cache.
+    """
+    UNCACHED_FIELDS = ('owner', 'owner_time', 'reserved', 'reserved_time',
+                       'lease_expiration')
+
+    def __init__(self):
+        self.hits_count = 0
+        self.misses_count = 0
+        self.not_modified_count = 0
+
+        self._results = {}
+        self._next_generation = 1
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._results)
+
+    @classmethod
+    def _get_key(cls, resource_type, properties):
+        """Return the cache key of a query.
+
+        Args:
+            resource_type (type): resource data type to query.
+            properties (dict): the query's fields filter.
+
+        Returns:
+            tuple. the query's key, None if it shouldn't be cached.
+        """
+        if any(key.split("__")[0] in cls.UNCACHED_FIELDS
+               for key in properties):
+            return None
+
+        return (resource_type, repr(sorted(properties.iteritems())))
+
+    def get(self, resource_type, properties, generation=None):
+        """Return the cached result of a query.
+
+        Args:
+            resource_type (type): resource data type to query.
+            properties (dict): the query's fields filter.
+            generation (number): generation of the client's cached result.
+
+        Returns:
+            tuple. the generation and the resources of the cached result,
+                the resources are None if the client's result is up to date.
+                None if the query's result isn't cached.
+        """
+        key = self._get_key(resource_type, properties)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is None:
+                self.misses_count += 1
+                return None
+
+            self.hits_count += 1
+            cached_generation = cached[0]
+            if generation == cached_generation:
+                self.not_modified_count += 1
+                return cached_generation, None
+
+            return cached
+
+    def add(self, resource_type, properties, resources):
+        """Cache the result of a query.
+
+        Args:
+            resource_type (type): resource data type to query.
+            properties (dict): the query's fields filter.
+            resources (list): the resource datas answering the query.
+
+        Returns:
+            number. the generation of the result, None if it isn't cached.
+        """
+        key = self._get_key(resource_type, properties)
+        if key is None:
+            return None
+
+        with self._lock:
+            generation = self._next_generation
+            self._next_generation += 1
+            self._results[key] = (generation, resources)
+
+        return generation
+
+    def clear(self):
+        """Invalidate all the cached results."""
+        with self._lock:
+            self._results.clear()
+
+    def invalidate(self, resource_type):
+        """Invalidate the results of queries related to a resource type.
+
+        Args:
+            resource_type (type): the changed resource data type.
+        """
+        with self._lock:
+            stale_keys = [key for key in self._results
+                          if issubclass(key[0], resource_type) or
+                          issubclass(resource_type, key[0])]
+
+            for key in stale_keys:
+                del self._results[key]
+
+    def connect_signals(self):
+        """Invalidate the results when resources change in this process."""
+        signals.post_save.connect(self._on_resource_changed)
+        signals.post_delete.connect(self._on_resource_changed)
+
+    def disconnect_signals(self):
+        """Stop following the resources changes in this process."""
+        signals.post_save.disconnect(self._on_resource_changed)
+        signals.post_delete.disconnect(self._on_resource_changed)
+
+    def _on_resource_changed(self, sender, **_):
+        """Invalidate the results of a saved or deleted resource data.
+
+        Args:
+            sender (type): the model class of the changed instance.
+        """
+        if issubclass(sender, ResourceData):
+            self.invalidate(sender)
+
+    def to_dict(self):
+        """Return the statistics of the cache.
+
+        Returns:
+            dict. the cache's size, hits and misses counts and hit rate.
+        """
+        queries_count = self.hits_count + self.misses_count
+        hit_rate = (float(self.hits_count) / queries_count
+                    if queries_count > 0 else 0.0)
+
+        return {"size": len(self),
+                "hits_count": self.hits_count,
+                "misses_count": self.misses_count,
+                "not_modified_count": self.not_modified_count,
+                "hit_rate": hit_rate}
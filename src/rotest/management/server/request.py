@@ -2,6 +2,9 @@
 # pylint: disable=too-few-public-methods
 import time
 
+from rotest.management.common.errors import ServerError
+from rotest.management.common.messages import ErrorReply
+
 
 class Request(object):
     """Holds all details, needed by resource manager to execute a request.
@@ -9,6 +12,8 @@ class Request(object):
     Attributes:
         worker (Worker): a worker to work with.
         message (AbstractMessage): a message to execute.
+        queue_position (number): the last queue position sent to the client
+            of a blocked lock request, None if it wasn't blocked.
     """
     def __init__(self, worker, message, is_server_request=False):
         """Construct the request.
@@ -22,6 +27,7 @@ class Request(object):
         self.worker = worker
         self.message = message
         self.server_request = is_server_request
+        self.queue_position = None
 
         self.creation_time = time.time()
 
@@ -36,3 +42,19 @@ class Request(object):
         """
         if not self.server_request and self.worker.is_alive:
             self.worker.respond(reply)
+
+
+def build_error_reply(exception):
+    """Build the reply to a request whose handling raised an exception.
+
+    Args:
+        exception (Exception): the exception raised handling the request.
+
+    Returns:
+        ErrorReply. a reply describing the failure.
+    """
+    if isinstance(exception, ServerError):
+        return ErrorReply(code=exception.ERROR_CODE,
+                          content=exception.get_error_content())
+
+    return ErrorReply(code=ServerError.ERROR_CODE, content=str(exception))
@@ -0,0 +1,821 @@
+"""Define the resource manager's in-memory resources availability index."""
+# pylint: disable=protected-access,too-many-instance-attributes
+# pylint: disable=too-many-arguments
+from threading import Lock
+from collections import Hashable
+
+from django.apps import apps
+from django.db import models
+from django.db.models import signals
+from django.core.exceptions import ValidationError
+from django.db.models.fields import FieldDoesNotExist
+
+from rotest.management.models.resource_data import ResourceData
+from rotest.management.common.utils import HOST_PORT_SEPARATOR
+
+
+class _ResourceEntry(object):
+    """Hold the indexed state of a single resource data.
+
+    Attributes:
+        id (number): primary key of the resource data.
+        type (type): leaf type of the resource data.
+        name (str): name of the resource.
+        owner (str): name of the locking user.
+        reserved (str): name of the user allowed to lock the resource.
+        is_usable (bool): whether the resource may be locked.
+        group_id (number): primary key of the resource's group, or None.
+        sub_ids (tuple): primary keys of the resource's sub-resources.
+        fields (dict): values of the resource's fields, by attribute name,
+            except for the timestamp fields, which aren't kept up to date.
+    """
+    __slots__ = ('id', 'type', 'name', 'owner', 'reserved', 'is_usable',
+                 'group_id', 'sub_ids', 'fields')
+
+    STATE_FIELDS = ('owner', 'reserved', 'is_usable', 'group_id')
+    TIMESTAMP_FIELDS = ('owner_time', 'reserved_time', 'lease_expiration')
+
+    def __init__(self, resource_type, fields):
+        for attname in self.TIMESTAMP_FIELDS:
+            fields.pop(attname, None)
+
+        self.id = fields['id']
+        self.type = resource_type
+        self.name = fields['name']
+        self.fields = fields
+        self.sub_ids = tuple(fields[attname] for attname in
+                             ResourcesIndex.get_sub_resource_attnames(
+                                                               resource_type)
+                             if fields[attname] is not None)
+
+        self.update_state(fields)
+
+    def update_state(self, state):
+        """Update the entry's ownership and availability state.
+
+        Args:
+            state (dict): values of the state fields, by attribute name.
+        """
+        self.owner = state['owner']
+        self.reserved = state['reserved']
+        self.is_usable = state['is_usable']
+        self.group_id = state['group_id']
+        self.fields.update((key, state[key]) for key in self.STATE_FIELDS)
+
+    def get_state(self):
+        """Return the ownership and availability state of the entry.
+
+        Returns:
+            tuple. the values of the state fields.
+        """
+        return tuple(getattr(self, key) for key in self.STATE_FIELDS)
+
+    def __eq__(self, other):
+        return (self.type == other.type and
+                self.sub_ids == other.sub_ids and
+                self.fields == other.fields)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class ResourcesIndex(object):
+    """Authoritative in-memory index of the resources' availability.
+
+    The index holds, for every resource data, its leaf type, ownership and
+    reservation state, usability, group, field values and sub-resources, so
+    the resource manager can look for available resources without querying
+    the DB and without walking the sub-resources graph with more queries.
+
+    The resource manager writes ownership changes through to the DB and
+    then updates the index. Resources saved or deleted in this process
+    (e.g. by the admin or by the resources themselves) are marked dirty by
+    Django's signals and are reloaded on the next lookup. Changes made to
+    the DB by other processes are detected by the consistency checker.
+
+    The index's changes may be recorded to a state journal, so a restarted
+    server can restore the index from it instead of loading all the
+    resources from the DB.
+
+    Attributes:
+        journal (StateJournal): records the changes of the index, None to not
+            record them.
+        _entries (dict): maps a resource id to its entry.
+        _ids_by_name (dict): maps a resource name to its id.
+        _ids_by_type (dict): maps a resource data type to the ids of the
+            resources of that type (or of its subtypes).
+        _free_ids_by_type (dict): maps a resource data type to the ids of
+            the usable resources of that type that aren't owned by anyone.
+        _ids_by_field (dict): maps a field's attribute name to a dict, which
+            maps the field's values to the ids of the resources having them.
+            Fields are indexed once they are first queried, except for the
+            state fields, which change too often.
+        _ids_by_owner (dict): maps an owner name to the ids it owns.
+        _next_checked_id (number): id of the resource the next incremental
+            consistency check starts from.
+        _dirty_ids (set): ids of resources that changed outside of the
+            index and should be reloaded.
+        _BASE_TYPES (dict): cache of the resource data base types of every
+            resource data type.
+        _SUB_RESOURCE_ATTNAMES (dict): cache of the sub-resources attribute
+            names of every resource data type.
+    """
+    _BASE_TYPES = {}
+    _SUB_RESOURCE_ATTNAMES = {}
+
+    IN_MEMORY_FIELD_TYPES = frozenset(('AutoField',
+                                       'CharField',
+                                       'SlugField',
+                                       'TextField',
+                                       'EmailField',
+                                       'BooleanField',
+                                       'IntegerField',
+                                       'IPAddressField',
+                                       'BigIntegerField',
+                                       'NullBooleanField',
+                                       'SmallIntegerField',
+                                       'PositiveIntegerField',
+                                       'GenericIPAddressField',
+                                       'PositiveSmallIntegerField'))
+
+    def __init__(self):
+        self.journal = None
+
+        self._entries = {}
+        self._ids_by_name = {}
+        self._ids_by_type = {}
+        self._ids_by_owner = {}
+        self._ids_by_field = {}
+        self._free_ids_by_type = {}
+        self._next_checked_id = 0
+
+        self._dirty_ids = set()
+        self._dirty_lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, resource_id):
+        return resource_id in self._entries
+
+    @staticmethod
+    def get_resource_types():
+        """Return all the concrete resource data types.
+
+        Returns:
+            list. the resource data types, base types first.
+        """
+        resource_types = [model for model in apps.get_models()
+                          if issubclass(model, ResourceData)]
+
+        return sorted(resource_types, key=lambda model: len(model.__mro__))
+
+    @classmethod
+    def get_sub_resource_attnames(cls, resource_type):
+        """Return the attribute names of the type's sub-resources fields.
+
+        Args:
+            resource_type (type): resource data type.
+
+        Returns:
+            list. attribute names of the fields pointing to sub-resources.
+        """
+        if resource_type not in cls._SUB_RESOURCE_ATTNAMES:
+            cls._SUB_RESOURCE_ATTNAMES[resource_type] = [
+                    field.attname for field in resource_type._meta.fields
+                    if field.rel is not None and
+                    issubclass(field.rel.to, ResourceData) and
+                    not field.name.endswith("_ptr")]
+
+        return cls._SUB_RESOURCE_ATTNAMES[resource_type]
+
+    @classmethod
+    def _get_base_types(cls, resource_type):
+        """Return the resource data types a resource type answers to.
+
+        Args:
+            resource_type (type): resource data type.
+
+        Returns:
+            list. the type and its resource data base types.
+        """
+        if resource_type not in cls._BASE_TYPES:
+            cls._BASE_TYPES[resource_type] = [
+                    base_type for base_type in resource_type.__mro__
+                    if isinstance(base_type, type) and
+                    issubclass(base_type, ResourceData)]
+
+        return cls._BASE_TYPES[resource_type]
+
+    @classmethod
+    def _fetch_entries(cls, resource_type, ids=None):
+        """Fetch the entries of the resources of the given type from the DB.
+
+        Args:
+            resource_type (type): resource data type to fetch.
+            ids (iterable): ids of the resources to fetch, None for all.
+
+        Returns:
+            list. the fetched entries.
+        """
+        query = resource_type._default_manager.all()
+        if ids is not None:
+            query = query.filter(pk__in=list(ids))
+
+        return [_ResourceEntry(resource_type, fields)
+                for fields in query.values()]
+
+    @classmethod
+    def _fetch_leaf_entries(cls, ids=None):
+        """Fetch the entries of the given resources from the DB.
+
+        Args:
+            ids (iterable): ids of the resources to fetch, None for all.
+
+        Returns:
+            dict. maps resource id to its entry, with its leaf type.
+        """
+        entries = {}
+        # Base types come first, so every resource ends up with its leaf type
+        for resource_type in cls.get_resource_types():
+            entries.update((entry.id, entry) for entry in
+                           cls._fetch_entries(resource_type, ids))
+
+        return entries
+
+    def _add_entry(self, entry):
+        """Add an entry to the index, replacing previous entries of its id.
+
+        Args:
+            entry (_ResourceEntry): the entry to add.
+        """
+        self._remove_entry(entry.id)
+        self._entries[entry.id] = entry
+        self._ids_by_name[entry.name] = entry.id
+
+        for base_type in self._get_base_types(entry.type):
+            self._ids_by_type.setdefault(base_type, set()).add(entry.id)
+
+        for attname, ids_by_value in self._ids_by_field.iteritems():
+            self._index_field(ids_by_value, attname, entry)
+
+        self._index_owner(entry)
+
+    def _remove_entry(self, resource_id):
+        """Remove an entry from the index, if it is in it.
+
+        Args:
+            resource_id (number): id of the resource to remove.
+        """
+        entry = self._entries.pop(resource_id, None)
+        if entry is None:
+            return
+
+        if self._ids_by_name.get(entry.name) == resource_id:
+            del self._ids_by_name[entry.name]
+
+        self._unindex_owner(entry)
+        for base_type in self._get_base_types(entry.type):
+            self._ids_by_type[base_type].discard(resource_id)
+
+        for attname, ids_by_value in self._ids_by_field.iteritems():
+            value = entry.fields.get(attname)
+            if isinstance(value, Hashable) and value in ids_by_value:
+                ids = ids_by_value[value]
+                ids.discard(resource_id)
+                if len(ids) == 0:
+                    del ids_by_value[value]
+
+    @staticmethod
+    def _index_field(ids_by_value, attname, entry):
+        """Add the entry to the index of a field's values.
+
+        Note:
+            Unhashable values aren't indexed, since they can't be equal to
+            the values that are matched in-memory.
+
+        Args:
+            ids_by_value (dict): the field's index, maps the field's values to
+                the ids of the resources having them.
+            attname (str): attribute name of the field.
+            entry (_ResourceEntry): an entry in the index.
+        """
+        value = entry.fields.get(attname)
+        if attname in entry.fields and isinstance(value, Hashable):
+            ids_by_value.setdefault(value, set()).add(entry.id)
+
+    def _get_field_index(self, attname):
+        """Return the index of a field's values, building it if needed.
+
+        Args:
+            attname (str): attribute name of the field.
+
+        Returns:
+            dict. maps the field's values to the ids of the resources having
+                them, None if the field isn't indexed.
+        """
+        if attname in _ResourceEntry.STATE_FIELDS:
+            return None
+
+        ids_by_value = self._ids_by_field.get(attname)
+        if ids_by_value is None:
+            ids_by_value = {}
+            for entry in self._entries.itervalues():
+                self._index_field(ids_by_value, attname, entry)
+
+            self._ids_by_field[attname] = ids_by_value
+
+        return ids_by_value
+
+    def _index_owner(self, entry):
+        """Add the entry to the owner indices according to its state.
+
+        Args:
+            entry (_ResourceEntry): an entry in the index.
+        """
+        if entry.owner != "":
+            self._ids_by_owner.setdefault(entry.owner, set()).add(entry.id)
+
+        elif entry.is_usable:
+            for base_type in self._get_base_types(entry.type):
+                self._free_ids_by_type.setdefault(base_type,
+                                                  set()).add(entry.id)
+
+    def _unindex_owner(self, entry):
+        """Remove the entry from the owner indices.
+
+        Args:
+            entry (_ResourceEntry): an entry in the index.
+        """
+        if entry.owner != "":
+            owned_ids = self._ids_by_owner[entry.owner]
+            owned_ids.discard(entry.id)
+            if len(owned_ids) == 0:
+                del self._ids_by_owner[entry.owner]
+
+        elif entry.is_usable:
+            for base_type in self._get_base_types(entry.type):
+                self._free_ids_by_type[base_type].discard(entry.id)
+
+    def _record(self, event, *args):
+        """Record a change of the index to the journal, if there's one.
+
+        Args:
+            event (str): name of the change.
+            *args (tuple): arguments of the change.
+        """
+        if self.journal is not None:
+            self.journal.record(event, *args)
+
+    def _clear(self):
+        """Remove all the entries from the index."""
+        with self._dirty_lock:
+            self._dirty_ids.clear()
+
+        self._entries.clear()
+        self._ids_by_name.clear()
+        self._ids_by_type.clear()
+        self._ids_by_owner.clear()
+        self._ids_by_field.clear()
+        self._free_ids_by_type.clear()
+
+    def load(self):
+        """Build the index from the resources in the DB."""
+        entries = self._fetch_leaf_entries()
+
+        self._clear()
+        for entry in entries.itervalues():
+            self._add_entry(entry)
+
+    def get_snapshot(self):
+        """Return the state of the index, to be restored by a later server.
+
+        Returns:
+            list. the app label, model name and fields of every entry.
+        """
+        self._refresh_dirty()
+        return [(entry.type._meta.app_label, entry.type._meta.object_name,
+                 entry.fields) for entry in self._entries.itervalues()]
+
+    def restore(self, snapshot, events):
+        """Build the index from a snapshot and the changes recorded after it.
+
+        Args:
+            snapshot (list): the index's state, as returned by get_snapshot.
+            events (list): the changes recorded after the snapshot, each is
+                a list of the change's name and arguments.
+        """
+        self._clear()
+        types_by_name = {}
+        for app_label, model_name, fields in snapshot:
+            type_name = (app_label, model_name)
+            if type_name not in types_by_name:
+                types_by_name[type_name] = apps.get_model(*type_name)
+
+            self._add_entry(_ResourceEntry(types_by_name[type_name], fields))
+
+        reloaded_ids = set()
+        for event in events:
+            if event[0] == "owner":
+                _, ids, owner = event
+                reloaded_ids.update(resource_id for resource_id in ids
+                                    if resource_id not in self._entries)
+                self.set_owner((resource_id for resource_id in ids
+                                if resource_id in self._entries), owner)
+
+            elif event[0] == "state":
+                _, resource_id, state = event
+                if resource_id not in self._entries:
+                    reloaded_ids.add(resource_id)
+                    continue
+
+                self.update_state(resource_id,
+                                  dict(zip(_ResourceEntry.STATE_FIELDS,
+                                           state)))
+
+            elif event[0] == "reload":
+                reloaded_ids.update(event[1])
+
+        self.mark_dirty(reloaded_ids)
+
+    def _fetch_next_batch(self, batch_size):
+        """Fetch the entries of the next range of ids to check from the DB.
+
+        The range starts where the previous one ended, and wraps around once
+        it reaches the last resource.
+
+        Args:
+            batch_size (number): amount of resources to fetch.
+
+        Returns:
+            tuple. the fetched entries, by id, and the ids in the range (in
+                the DB or in the index).
+        """
+        first_id = self._next_checked_id
+        db_ids = list(ResourceData.objects.filter(
+                            pk__gte=first_id).order_by('pk').values_list(
+                                                'pk', flat=True)[:batch_size])
+
+        if len(db_ids) < batch_size:
+            last_id = None
+            self._next_checked_id = 0
+
+        else:
+            last_id = db_ids[-1]
+            self._next_checked_id = last_id + 1
+
+        checked_ids = set(db_ids)
+        checked_ids.update(resource_id for resource_id in self._entries
+                           if resource_id >= first_id and
+                           (last_id is None or resource_id <= last_id))
+
+        db_entries = {}
+        if len(db_ids) > 0:
+            db_entries = self._fetch_leaf_entries(db_ids)
+
+        return db_entries, checked_ids
+
+    def check_consistency(self, repair=False, batch_size=None):
+        """Compare the index against the DB.
+
+        Args:
+            repair (bool): whether to fix the inconsistent entries.
+            batch_size (number): amount of resources to check, continuing
+                from where the previous check of a batch ended. None to check
+                all the resources.
+
+        Returns:
+            list. names of the resources whose entries are inconsistent.
+        """
+        self._refresh_dirty()
+        if batch_size is None:
+            db_entries = self._fetch_leaf_entries()
+            checked_ids = set(db_entries).union(self._entries)
+
+        else:
+            db_entries, checked_ids = self._fetch_next_batch(batch_size)
+
+        inconsistent_ids = [resource_id for resource_id in checked_ids
+                            if db_entries.get(resource_id) is None or
+                            self._entries.get(resource_id) is None or
+                            db_entries[resource_id] !=
+                            self._entries[resource_id]]
+
+        names = [(db_entries.get(resource_id) or
+                  self._entries.get(resource_id)).name
+                 for resource_id in inconsistent_ids]
+
+        if repair and len(inconsistent_ids) > 0:
+            self._record("reload", inconsistent_ids)
+            for resource_id in inconsistent_ids:
+                if resource_id in db_entries:
+                    self._add_entry(db_entries[resource_id])
+
+                else:
+                    self._remove_entry(resource_id)
+
+        return names
+
+    def connect_signals(self):
+        """Mark resources saved or deleted in this process as dirty."""
+        signals.post_save.connect(self._on_resource_changed)
+        signals.post_delete.connect(self._on_resource_changed)
+
+    def disconnect_signals(self):
+        """Stop following the resources changes in this process."""
+        signals.post_save.disconnect(self._on_resource_changed)
+        signals.post_delete.disconnect(self._on_resource_changed)
+
+    def _on_resource_changed(self, sender, instance, **_):
+        """Mark a saved or deleted resource data as dirty.
+
+        Args:
+            sender (type): the model class of the changed instance.
+            instance (django.db.models.Model): the changed instance.
+        """
+        if issubclass(sender, ResourceData) and instance.pk is not None:
+            self.mark_dirty([instance.pk])
+
+    def mark_dirty(self, ids):
+        """Mark resources as changed, so they'll be reloaded before use.
+
+        Args:
+            ids (iterable): ids of the changed resources.
+        """
+        with self._dirty_lock:
+            self._dirty_ids.update(ids)
+
+    def _refresh_dirty(self):
+        """Reload the dirty resources from the DB."""
+        with self._dirty_lock:
+            dirty_ids = self._dirty_ids
+            self._dirty_ids = set()
+
+        if len(dirty_ids) == 0:
+            return
+
+        self._record("reload", list(dirty_ids))
+        ids_by_type = {}
+        new_ids = set()
+        for resource_id in dirty_ids:
+            entry = self._entries.get(resource_id)
+            if entry is None:
+                new_ids.add(resource_id)
+
+            else:
+                ids_by_type.setdefault(entry.type, set()).add(resource_id)
+                self._remove_entry(resource_id)
+
+        for resource_type, ids in ids_by_type.iteritems():
+            for entry in self._fetch_entries(resource_type, ids):
+                self._add_entry(entry)
+
+        if len(new_ids) > 0:
+            for entry in self._fetch_leaf_entries(new_ids).itervalues():
+                self._add_entry(entry)
+
+    def sync_states(self, ids):
+        """Reload the state of the resources and their sub-resources.
+
+        Args:
+            ids (iterable): ids of the resources to reload.
+        """
+        ids = set(resource_id for resource_id in ids
+                  if resource_id in self._entries)
+
+        while len(ids) > 0:
+            states = ResourceData.objects.filter(pk__in=list(ids)).values(
+                                        'id', *_ResourceEntry.STATE_FIELDS)
+
+            for state in states:
+                self.update_state(state['id'], state)
+
+            ids = set(sub_id for resource_id in ids
+                      for sub_id in self._entries[resource_id].sub_ids
+                      if sub_id in self._entries)
+
+    def update_state(self, resource_id, state):
+        """Update the ownership and availability state of a resource.
+
+        Args:
+            resource_id (number): id of the resource.
+            state (dict): values of the state fields, by attribute name.
+        """
+        entry = self._entries[resource_id]
+        self._unindex_owner(entry)
+        entry.update_state(state)
+        self._index_owner(entry)
+        self._record("state", resource_id, entry.get_state())
+
+    def set_owner(self, ids, owner):
+        """Set the owner of the given resources.
+
+        Args:
+            ids (iterable): ids of the resources.
+            owner (str): name of the new owner, empty string for none.
+        """
+        ids = list(ids)
+        for resource_id in ids:
+            entry = self._entries[resource_id]
+            self._unindex_owner(entry)
+            entry.owner = entry.fields['owner'] = owner
+            self._index_owner(entry)
+
+        self._record("owner", ids, owner)
+
+    def get_owned_ids(self, owner):
+        """Return the ids of the resources owned by the given user.
+
+        Args:
+            owner (str): name of the owner.
+
+        Returns:
+            list. ids of the resources owned by the user.
+        """
+        return list(self._ids_by_owner.get(owner, ()))
+
+    def get_id(self, name):
+        """Return the id of the resource with the given name.
+
+        Args:
+            name (str): name of the resource.
+
+        Returns:
+            number. id of the resource, None if it isn't in the index.
+        """
+        self._refresh_dirty()
+        return self._ids_by_name.get(name)
+
+    def get_entry(self, resource_id):
+        """Return the entry of the resource with the given id.
+
+        Args:
+            resource_id (number): id of the resource.
+
+        Returns:
+            _ResourceEntry. the resource's entry.
+        """
+        return self._entries[resource_id]
+
+    def get_tree_ids(self, resource_id):
+        """Return the ids of the resource and all its sub-resources.
+
+        Args:
+            resource_id (number): id of the resource.
+
+        Returns:
+            list. ids of the resource tree, the resource first.
+        """
+        tree_ids = [resource_id]
+        for tree_id in tree_ids:
+            tree_ids.extend(sub_id
+                            for sub_id in self._entries[tree_id].sub_ids
+                            if sub_id in self._entries)
+
+        return tree_ids
+
+    def is_available(self, resource_id, user_name=""):
+        """Return whether a resource is available for the given user.
+
+        Args:
+            resource_id (number): id of the resource.
+            user_name (str): user name to be checked. Empty string means
+                available to all.
+
+        Returns:
+            bool. whether the resource and its sub-resources are available.
+        """
+        user_name = user_name.split(HOST_PORT_SEPARATOR)[0]
+        return all(self._entries[tree_id].owner == "" and
+                   self._entries[tree_id].reserved in (user_name, "")
+                   for tree_id in self.get_tree_ids(resource_id))
+
+    def _get_expected_values(self, resource_type, properties):
+        """Return the values the query's properties expect, by attribute name.
+
+        Args:
+            resource_type (type): resource data type to match.
+            properties (dict): the query's fields filter.
+
+        Returns:
+            list. pairs of attribute names and their expected values, or None
+                if the properties can't be matched in-memory.
+        """
+        expected_values = []
+        for key, value in properties.iteritems():
+            try:
+                field = resource_type._meta.get_field(key)
+
+            except FieldDoesNotExist:
+                return None
+
+            if field.rel is not None:
+                if not isinstance(field, models.ForeignKey):
+                    return None
+
+                if isinstance(value, ResourceData):
+                    value = value.pk
+
+                expected_values.append((field.attname, value))
+                continue
+
+            if field.get_internal_type() not in self.IN_MEMORY_FIELD_TYPES:
+                return None
+
+            try:
+                expected_values.append((field.attname,
+                                        field.to_python(value)))
+
+            except ValidationError:
+                return None
+
+        return expected_values
+
+    def _get_candidates(self, ids_by_type, resource_type, properties):
+        """Return the indexed resources of a type matching the properties.
+
+        The candidates are taken from the smallest of the type's ids and the
+        ids having the expected value of each indexed field, so only them
+        are matched against the rest of the properties.
+
+        Args:
+            ids_by_type (dict): the type index to get the candidates from.
+            resource_type (type): resource data type to match.
+            properties (dict): the query's fields filter.
+
+        Returns:
+            list. the matching entries.
+        """
+        self._refresh_dirty()
+        type_ids = ids_by_type.get(resource_type, ())
+
+        expected_values = self._get_expected_values(resource_type,
+                                                    properties)
+        if expected_values is None:
+            # Fall back to querying the DB for the matching resources.
+            matching_ids = set(resource_type.objects.filter(
+                        **properties).values_list('pk', flat=True))
+            return [self._entries[resource_id] for resource_id in matching_ids
+                    if resource_id in type_ids]
+
+        ids = type_ids
+        for attname, value in expected_values:
+            ids_by_value = self._get_field_index(attname)
+            if ids_by_value is not None and isinstance(value, Hashable):
+                value_ids = ids_by_value.get(value, ())
+                if len(value_ids) < len(ids):
+                    ids = value_ids
+
+        entries = (self._entries[resource_id] for resource_id in ids
+                   if ids is type_ids or resource_id in type_ids)
+
+        return [entry for entry in entries
+                if all(entry.fields.get(attname) == value
+                       for attname, value in expected_values)]
+
+    def find_matching(self, resource_type, properties, group_ids=None):
+        """Return the ids of the usable resources matching the query.
+
+        Args:
+            resource_type (type): resource data type to match.
+            properties (dict): the query's fields filter.
+            group_ids (iterable): ids of the groups the resources may belong
+                to (in addition to having no group), None to ignore groups.
+
+        Returns:
+            list. ids of the matching resources.
+        """
+        return [entry.id for entry in self._get_candidates(self._ids_by_type,
+                                                           resource_type,
+                                                           properties)
+                if entry.is_usable and
+                (group_ids is None or entry.group_id is None or
+                 entry.group_id in group_ids)]
+
+    def find_available(self, resource_type, properties, user_name,
+                       group_ids, excluded_ids=frozenset()):
+        """Return the ids of the available resources matching the query.
+
+        Args:
+            resource_type (type): resource data type to match.
+            properties (dict): the query's fields filter.
+            user_name (str): name of the locking user.
+            group_ids (iterable): ids of the groups the resources may belong
+                to (in addition to having no group).
+            excluded_ids (set): ids of resources that shouldn't be used,
+                neither directly nor as sub-resources.
+
+        Returns:
+            list. ids of the available resources, the ones reserved for the
+                user first.
+        """
+        candidates = [entry for entry in
+                      self._get_candidates(self._free_ids_by_type,
+                                           resource_type, properties)
+                      if entry.group_id is None or entry.group_id in group_ids]
+
+        candidates.sort(key=lambda entry: (entry.reserved == "", entry.id))
+
+        return [entry.id for entry in candidates
+                if self.is_available(entry.id, user_name) and
+                excluded_ids.isdisjoint(self.get_tree_ids(entry.id))]
@@ -0,0 +1,368 @@
+"""Define the resource manager's result writer threads."""
+# pylint: disable=no-self-use,broad-except
+import time
+from threading import Thread
+from Queue import Queue, Empty as EmptyQueueError
+
+from django.db import transaction
+
+from rotest.management.server.stats import (DBTimer,
+                                            PathStats,
+                                            get_message_name)
+from rotest.management.server.request import Request, build_error_reply
+from rotest.management.common.messages import (StopTest,
+                                               StartTest,
+                                               AddResult,
+                                               ShouldSkip,
+                                               BatchEvents,
+                                               SuccessReply,
+                                               StartTestRun,
+                                               TestRunReply,
+                                               ResumeTestRun,
+                                               StopComposite,
+                                               UpdateRunData,
+                                               StartComposite,
+                                               UpdateResources,
+                                               ShouldSkipReply)
+
+
+class ResultWriterThread(Thread):
+    """Writes the results of the runs of some of the workers to the DB.
+
+    Results requests are handled separately from the resources requests, so
+    a burst of results writes won't delay the locking of resources.
+
+    Attributes:
+        request_queue (Queue): queue of results requests to handle.
+        stats (PathStats): statistics of the handled requests.
+        _db_timer (DBTimer): measures the time spent in DB queries.
+        daemon (bool): A boolean value indicating whether this thread is a
+            daemon thread (True) or not (False). Will be marked as True so
+            once the server listener dies this thread will also die.
+        REQUESTS_TIMEOUT (number): seconds to wait for new requests.
+    """
+    daemon = True
+
+    REQUESTS_TIMEOUT = 1
+
+    def __init__(self, reactor, logger):
+        """Construct the result writer.
+
+        Args:
+            reactor (PollReactor): The reactor to work with.
+            logger (logging.Logger): The logger of the resource manager.
+        """
+        super(ResultWriterThread, self).__init__()
+
+        self.logger = logger
+        self.stats = PathStats()
+        self.request_queue = Queue()
+        self._db_timer = DBTimer()
+
+        self._reactor = reactor
+        self._stop_flag = False
+        self._requests_handlers = {StopTest: self.stop_test,
+                                   StartTest: self.start_test,
+                                   ShouldSkip: self.should_skip,
+                                   AddResult: self.add_test_result,
+                                   BatchEvents: self.batch_events,
+                                   StartTestRun: self.start_test_run,
+                                   ResumeTestRun: self.resume_test_run,
+                                   StopComposite: self.stop_composite,
+                                   UpdateRunData: self.update_run_data,
+                                   StartComposite: self.start_composite,
+                                   UpdateResources: self.update_resources}
+
+    def run(self):
+        """Handle the requests in the queue one by one."""
+        self._db_timer.install()
+        while not self._stop_flag:
+            try:
+                request = self.request_queue.get(
+                                            timeout=self.REQUESTS_TIMEOUT)
+
+            except EmptyQueueError:
+                continue
+
+            self._handle_request(request)
+
+    def stop(self):
+        """Turn on the 'stop' flag."""
+        self._stop_flag = True
+
+    def _handle_request(self, request):
+        """Handle a results request and send the reply to its client.
+
+        Args:
+            request (Request): the request to handle.
+        """
+        self.logger.debug("Handling result request: %r", request)
+
+        failed = False
+        start_time = time.time()
+        db_start_time = self._db_timer.total_time
+        try:
+            request_handler = self._requests_handlers[type(request.message)]
+            reply = request_handler(request)
+
+        except Exception as ex:
+            self.logger.exception(str(ex))
+            reply = build_error_reply(ex)
+            failed = True
+
+        reply.request_id = request.message.msg_id
+        self._reactor.callFromThread(request.respond, reply)
+        self.stats.record(get_message_name(request.message),
+                          start_time - request.creation_time,
+                          time.time() - start_time,
+                          self._db_timer.total_time - db_start_time,
+                          failed)
+
+    def start_test_run(self, request):
+        """Build the tests tree and the run data of the new run.
+
+        Args:
+            request (Request): StartTestRun request.
+
+        Returns:
+            TestRunReply. a reply containing the identifier of the run.
+        """
+        request.worker.initialize_test_run(request.message.tests,
+                                           request.message.run_data)
+
+        return TestRunReply(run_id=request.worker.run_data.pk)
+
+    def resume_test_run(self, request):
+        """Load the tests tree and the run data of a started run.
+
+        Args:
+            request (Request): ResumeTestRun request.
+
+        Returns:
+            SuccessReply. a reply indicating on a successful operation.
+        """
+        request.worker.resume_test_run(request.message.tests,
+                                       request.message.run_id)
+
+        return SuccessReply()
+
+    def start_test(self, request):
+        """Start a test run.
+
+        Args:
+            request (Request): StartTest request.
+
+        Returns:
+            SuccessReply. a reply indicating on a successful operation.
+        """
+        request.worker.start_test(request.message.test_id)
+
+        return SuccessReply()
+
+    def should_skip(self, request):
+        """Check if the test previously passed in the results DB.
+
+        Args:
+            request (Request): ShouldSkip request.
+
+        Returns:
+            ShouldSkipReply. a reply containing the query result.
+        """
+        query_result = request.worker.should_skip(request.message.test_id)
+
+        return ShouldSkipReply(should_skip=query_result)
+
+    def stop_test(self, request):
+        """End a test run.
+
+        Args:
+            request (Request): StopTest request.
+
+        Returns:
+            SuccessReply. a reply indicating on a successful operation.
+        """
+        request.worker.stop_test(request.message.test_id)
+
+        return SuccessReply()
+
+    def update_resources(self, request):
+        """Update the resources list for a test data.
+
+        Args:
+            request (Request): UpdateResources request.
+
+        Returns:
+            SuccessReply. a reply indicating on a successful operation.
+        """
+        request.worker.update_resources(request.message.test_id,
+                                        request.message.resources)
+
+        return SuccessReply()
+
+    def update_run_data(self, request):
+        """Update the run data parameters for a run.
+
+        Args:
+            request (Request): UpdateRunData request.
+
+        Returns:
+            SuccessReply. a reply indicating on a successful operation.
+        """
+        request.worker.update_run_data(request.message.run_data)
+
+        return SuccessReply()
+
+    def start_composite(self, request):
+        """Start a composite test run.
+
+        Args:
+            request (Request): StartComposite request.
+
+        Returns:
+            SuccessReply. a reply indicating on a successful operation.
+        """
+        request.worker.start_composite(request.message.test_id)
+
+        return SuccessReply()
+
+    def stop_composite(self, request):
+        """End a composite test run.
+
+        Args:
+            request (Request): StopComposite request.
+
+        Returns:
+            SuccessReply. a reply indicating on a successful operation.
+        """
+        request.worker.stop_composite(request.message.test_id)
+
+        return SuccessReply()
+
+    def add_test_result(self, request):
+        """Add a result to a test.
+
+        Args:
+            request (Request): AddResult request.
+
+        Returns:
+            SuccessReply. a reply indicating on a successful operation.
+        """
+        request.worker.add_test_result(request.message.test_id,
+                                       request.message.code,
+                                       request.message.info)
+
+        return SuccessReply()
+
+    def batch_events(self, request):
+        """Apply a batch of test events in a single transaction.
+
+        Each event is applied in a savepoint of its own, so a failing event
+        doesn't roll back the rest of the batch, like when the events are
+        sent one by one.
+
+        Args:
+            request (Request): BatchEvents request.
+
+        Returns:
+            SuccessReply. a reply indicating on a successful operation.
+
+        Raises:
+            Exception: the error of the first event that failed.
+        """
+        errors = []
+        with transaction.atomic():
+            for message in request.message.get_messages():
+                request_handler = self._requests_handlers[type(message)]
+                try:
+                    with transaction.atomic():
+                        request_handler(Request(request.worker, message))
+
+                except Exception as ex:
+                    self.logger.exception("Failed applying event %r",
+                                          message)
+                    errors.append(ex)
+
+        if len(errors) > 0:
+            raise errors[0]
+
+        return SuccessReply()
+
+
+class ResultWritersPool(object):
+    """A pool of result writer threads.
+
+    The requests of each worker are always handled by the same writer, so
+    the results of each run are written in the order they were sent.
+
+    Attributes:
+        MESSAGE_TYPES (tuple): types of the messages handled by the writers.
+        WRITERS_AMOUNT (number): default amount of writer threads.
+    """
+    MESSAGE_TYPES = (StopTest,
+                     StartTest,
+                     AddResult,
+                     ShouldSkip,
+                     BatchEvents,
+                     StartTestRun,
+                     ResumeTestRun,
+                     StopComposite,
+                     UpdateRunData,
+                     StartComposite,
+                     UpdateResources)
+
+    WRITERS_AMOUNT = 4
+
+    def __init__(self, reactor, logger, writers_amount=WRITERS_AMOUNT):
+        """Construct the writers.
+
+        Args:
+            reactor (PollReactor): The reactor to work with.
+            logger (logging.Logger): The logger of the resource manager.
+            writers_amount (number): amount of writer threads.
+        """
+        self._writers = [ResultWriterThread(reactor, logger)
+                         for _ in xrange(writers_amount)]
+
+    def handles(self, message):
+        """Return whether the given message should be handled by the writers.
+
+        Args:
+            message (AbstractMessage): a message received from a client.
+
+        Returns:
+            bool. whether the message is a results message.
+        """
+        return isinstance(message, self.MESSAGE_TYPES)
+
+    def put(self, request):
+        """Queue a results request to the writer of its worker.
+
+        Args:
+            request (Request): results request.
+        """
+        writer = self._writers[hash(request.worker) % len(self._writers)]
+        writer.request_queue.put(request)
+
+    def start(self):
+        """Start the writer threads."""
+        for writer in self._writers:
+            writer.start()
+
+    def stop(self):
+        """Stop the writer threads."""
+        for writer in self._writers:
+            writer.stop()
+
+    def get_stats(self):
+        """Return the statistics of the results path.
+
+        Returns:
+            dict. the combined statistics of the writers.
+        """
+        stats = PathStats()
+        queue_depth = 0
+        for writer in self._writers:
+            stats.merge(writer.stats)
+            queue_depth += writer.request_queue.qsize()
+
+        return stats.to_dict(queue_depth)
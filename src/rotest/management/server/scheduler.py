@@ -0,0 +1,268 @@
+"""Define the resource manager's scheduling policy of lock requests."""
+# pylint: disable=too-many-instance-attributes
+from bisect import bisect_left, bisect_right
+
+from rotest.management.common.resource_descriptor import ResourceDescriptor
+
+
+class LockScheduler(object):
+    """Orders the lock requests that wait for resources.
+
+    Lock requests are handled in the order of their effective priority, and
+    requests of the same priority are handled in their arrival order (FIFO).
+    The effective priority of a request is the priority it was sent with,
+    increased by one for every AGING_INTERVAL seconds it waits, so requests
+    of low priority don't starve.
+
+    A request which is blocked on a resource type holds the resources it has
+    already found for its other descriptors, as long as it is the head of the
+    queue of that type. Lower ranked requests can use only the resources
+    that aren't held (backfilling), so a request for several resources isn't
+    starved by requests for single resources.
+
+    The queued requests are ranked once per handling pass (see rank_queue),
+    and requests queued during the pass are inserted into that ranking, so
+    finding the requests ranked before a request doesn't re-sort the queue.
+
+    Attributes:
+        _queued_types (dict): maps a queued request to the resource data
+            types it requested.
+        _blocked_types (dict): maps a queued request to the resource data
+            type it is blocked on.
+        _held_ids (dict): maps a queued request to the ids of the resources
+            held for it.
+        _resources_counts (dict): maps a queued request to the amount of
+            resources answering the descriptor it is blocked on.
+        _ranked_requests (list): the queued requests, sorted by their rank.
+        _ranks (list): the ranks of the requests in _ranked_requests.
+        _ranking_time (number): the time the queue was last ranked for.
+        _lock_times (dict): maps a locked resource id to its locking time.
+        _average_hold_times (dict): maps a resource data type to the average
+            time its resources were locked for.
+        AGING_INTERVAL (number): seconds of waiting that raise the effective
+            priority of a request by one.
+        HOLD_TIME_WEIGHT (number): weight of a new hold time sample in the
+            average hold time of a resource type.
+    """
+    AGING_INTERVAL = 60
+    HOLD_TIME_WEIGHT = 0.2
+
+    def __init__(self):
+        self._held_ids = {}
+        self._queued_types = {}
+        self._blocked_types = {}
+        self._resources_counts = {}
+
+        self._ranks = []
+        self._ranking_time = 0
+        self._ranked_requests = []
+
+        self._lock_times = {}
+        self._average_hold_times = {}
+
+    def __contains__(self, request):
+        return request in self._queued_types
+
+    def get_priority(self, request, now):
+        """Return the effective priority of a request.
+
+        Args:
+            request (Request): LockResources request.
+            now (number): the current time (as in time.time()).
+
+        Returns:
+            number. the request's priority, raised according to its age.
+        """
+        priority = request.message.priority or 0
+        waiting_time = max(now - request.creation_time, 0)
+        return priority + int(waiting_time / self.AGING_INTERVAL)
+
+    def get_rank(self, request, now):
+        """Return the sort key of a request, lower keys are handled first.
+
+        Args:
+            request (Request): LockResources request.
+            now (number): the current time (as in time.time()).
+
+        Returns:
+            tuple. the sort key of the request.
+        """
+        return (-self.get_priority(request, now), request.creation_time)
+
+    def sort(self, requests, now):
+        """Sort the given lock requests by the order they should be handled.
+
+        Args:
+            requests (iterable): LockResources requests.
+            now (number): the current time (as in time.time()).
+
+        Returns:
+            list. the requests, sorted by their rank.
+        """
+        return sorted(requests, key=lambda request: self.get_rank(request,
+                                                                  now))
+
+    def rank_queue(self, now):
+        """Rank the queued requests, according to their priority at a time.
+
+        Note:
+            Should be called once at the start of every handling pass, the
+            queries of the pass use this ranking.
+
+        Args:
+            now (number): the current time (as in time.time()).
+        """
+        self._ranking_time = now
+        self._ranked_requests = self.sort(self._queued_types, now)
+        self._ranks = [self.get_rank(request, now)
+                       for request in self._ranked_requests]
+
+    def queue(self, request, blocked_type, held_ids, resources_count):
+        """Queue a blocked lock request, or update its queued state.
+
+        Args:
+            request (Request): the blocked LockResources request.
+            blocked_type (type): the resource data type the request waits for.
+            held_ids (iterable): ids of the resources found for the request's
+                other descriptors, to be held for it.
+            resources_count (number): amount of resources answering the
+                descriptor the request is blocked on.
+        """
+        if request not in self._queued_types:
+            rank = self.get_rank(request, self._ranking_time)
+            index = bisect_right(self._ranks, rank)
+            self._ranks.insert(index, rank)
+            self._ranked_requests.insert(index, request)
+
+        self._queued_types[request] = frozenset(
+                            option.type
+                            for descriptor in request.message.descriptors
+                            for option in ResourceDescriptor.decode(
+                                                    descriptor).get_options())
+
+        self._blocked_types[request] = blocked_type
+        self._held_ids[request] = frozenset(held_ids)
+        self._resources_counts[request] = resources_count
+
+    def dequeue(self, request):
+        """Remove a request from the queue, if it is in it.
+
+        Args:
+            request (Request): the request to remove.
+        """
+        if request in self._queued_types:
+            index = self._ranked_requests.index(request)
+            del self._ranks[index]
+            del self._ranked_requests[index]
+
+        self._held_ids.pop(request, None)
+        self._queued_types.pop(request, None)
+        self._blocked_types.pop(request, None)
+        self._resources_counts.pop(request, None)
+
+    def _get_ranked_ahead(self, request):
+        """Return the queued requests that are ranked before the request.
+
+        Args:
+            request (Request): LockResources request.
+
+        Returns:
+            list. the queued requests ranked before the request, sorted.
+        """
+        rank = self.get_rank(request, self._ranking_time)
+        return self._ranked_requests[:bisect_left(self._ranks, rank)]
+
+    def get_held_ids(self, request):
+        """Return the ids of resources the request must not use.
+
+        These are the resources held for the heads of the queues, which are
+        ranked before the given request.
+
+        Args:
+            request (Request): LockResources request.
+
+        Returns:
+            set. ids of the resources held for other requests.
+        """
+        held_ids = set()
+        blocked_types = set()
+        for queued_request in self._get_ranked_ahead(request):
+            blocked_type = self._blocked_types[queued_request]
+            if blocked_type not in blocked_types:
+                blocked_types.add(blocked_type)
+                held_ids.update(self._held_ids[queued_request])
+
+        return held_ids
+
+    def get_position(self, request):
+        """Return the position of a queued request in the queue.
+
+        Args:
+            request (Request): queued LockResources request.
+
+        Returns:
+            number. amount of queued requests for any of the same resource
+                types, which are ranked before the request.
+        """
+        resource_types = self._queued_types[request]
+        return len([queued_request
+                    for queued_request in self._get_ranked_ahead(request)
+                    if not resource_types.isdisjoint(
+                                        self._queued_types[queued_request])])
+
+    def estimate_wait(self, request, position):
+        """Estimate the time a queued request would wait for its resources.
+
+        The estimation assumes the requests ahead of it in the queue hold the
+        resources of the type it is blocked on for the average hold time.
+
+        Args:
+            request (Request): queued LockResources request.
+            position (number): the request's position in the queue.
+
+        Returns:
+            number. estimated seconds to wait, None if unknown.
+        """
+        hold_time = self._average_hold_times.get(self._blocked_types[request])
+        if hold_time is None:
+            return None
+
+        return (hold_time * (position + 1) /
+                max(self._resources_counts[request], 1))
+
+    def record_lock(self, resource_ids, now):
+        """Record the locking time of resources, to estimate hold times.
+
+        Args:
+            resource_ids (iterable): ids of the locked resources.
+            now (number): the current time (as in time.time()).
+        """
+        for resource_id in resource_ids:
+            self._lock_times[resource_id] = now
+
+    def record_release(self, resource_id, resource_type, now):
+        """Update the average hold time of a type using a released resource.
+
+        Args:
+            resource_id (number): id of the released resource.
+            resource_type (type): the resource's data type.
+            now (number): the current time (as in time.time()).
+
+        Returns:
+            number. seconds the resource was held, None if its lock wasn't
+                recorded.
+        """
+        lock_time = self._lock_times.pop(resource_id, None)
+        if lock_time is None:
+            return None
+
+        hold_time = now - lock_time
+        average_hold_time = self._average_hold_times.get(resource_type)
+        if average_hold_time is None:
+            average_hold_time = hold_time
+
+        self._average_hold_times[resource_type] = (
+                        self.HOLD_TIME_WEIGHT * hold_time +
+                        (1 - self.HOLD_TIME_WEIGHT) * average_hold_time)
+
+        return hold_time
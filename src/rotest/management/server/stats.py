@@ -0,0 +1,327 @@
+"""Define the resource manager server's requests statistics."""
+# pylint: disable=protected-access,too-many-arguments
+import re
+import time
+
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+
+
+_MESSAGE_NAMES = {}
+
+
+def get_message_name(message):
+    """Return the name a message's type is counted by in the statistics.
+
+    Note:
+        The names are in snake_case, since the XML parser would validate a
+        dictionary key named like a message type as a message.
+
+    Args:
+        message (AbstractMessage): a request message.
+
+    Returns:
+        str. the message type's name, e.g. 'lock_resources'.
+    """
+    message_type = type(message)
+    name = _MESSAGE_NAMES.get(message_type)
+    if name is None:
+        name = _MESSAGE_NAMES[message_type] = \
+            re.sub("(?<!^)(?=[A-Z])", "_", message_type.__name__).lower()
+
+    return name
+
+
+class LatencyHistogram(object):
+    """A histogram of latencies, with a bounded relative error (HDR-style).
+
+    The latencies are counted in log-linear buckets: each power of 2 of
+    microseconds is split into SUB_BUCKETS linear buckets, so the error of
+    a percentile is at most 1 / SUB_BUCKETS of its value, while the amount
+    of buckets grows only logarithmically with the latencies' range.
+
+    Attributes:
+        count (number): amount of recorded latencies.
+        max_value (number): the highest recorded latency, in seconds.
+        _counts (dict): maps a bucket's index to the amount of latencies in
+            it.
+        SUB_BUCKET_BITS (number): log2 of the amount of buckets per power
+            of 2.
+    """
+    SUB_BUCKET_BITS = 4
+    SUB_BUCKETS = 2 ** SUB_BUCKET_BITS
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self):
+        self.count = 0
+        self.max_value = 0.0
+        self._counts = {}
+
+    @classmethod
+    def _get_index(cls, microseconds):
+        """Return the index of the bucket of the given latency.
+
+        Args:
+            microseconds (number): a latency, in microseconds.
+
+        Returns:
+            number. index of the latency's bucket.
+        """
+        if microseconds < cls.SUB_BUCKETS:
+            return microseconds
+
+        shift = microseconds.bit_length() - cls.SUB_BUCKET_BITS - 1
+        return (shift + 1) * cls.SUB_BUCKETS + (microseconds >> shift) - \
+            cls.SUB_BUCKETS
+
+    @classmethod
+    def _get_upper_bound(cls, index):
+        """Return the highest latency counted in the given bucket.
+
+        Args:
+            index (number): index of a bucket.
+
+        Returns:
+            number. the bucket's highest latency, in seconds.
+        """
+        if index < cls.SUB_BUCKETS:
+            return index / 1e6
+
+        shift = index // cls.SUB_BUCKETS - 1
+        sub_bucket = index % cls.SUB_BUCKETS + cls.SUB_BUCKETS
+        return (((sub_bucket + 1) << shift) - 1) / 1e6
+
+    def record(self, latency):
+        """Count a latency.
+
+        Args:
+            latency (number): the latency, in seconds.
+        """
+        index = self._get_index(int(max(latency, 0) * 1e6))
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.max_value = max(self.max_value, latency)
+
+    def merge(self, other):
+        """Add the latencies of another histogram to this one.
+
+        Args:
+            other (LatencyHistogram): histogram to add.
+        """
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+
+        self.count += other.count
+        self.max_value = max(self.max_value, other.max_value)
+
+    def get_percentile(self, percent):
+        """Return the latency below which the given percent of latencies are.
+
+        Args:
+            percent (number): the percentile, between 0 and 100.
+
+        Returns:
+            number. the percentile's latency in seconds, 0 if no latency was
+                recorded.
+        """
+        counts = sorted(self._counts.items())
+        threshold = self.count * percent / 100.0
+        seen_count = 0
+        for index, count in counts:
+            seen_count += count
+            if seen_count >= threshold:
+                return min(self._get_upper_bound(index), self.max_value)
+
+        return self.max_value
+
+    def to_dict(self):
+        """Return the histogram's summary as a dictionary.
+
+        Returns:
+            dict. the amount, the percentiles and the max of the latencies.
+        """
+        summary = {"count": self.count, "max": self.max_value}
+        for percent in self.PERCENTILES:
+            summary["p%d" % percent] = self.get_percentile(percent)
+
+        return summary
+
+
+class HandlerStats(object):
+    """Statistics of the requests of a single message type.
+
+    Attributes:
+        errors_count (number): amount of requests whose handling failed.
+        wait_times (LatencyHistogram): seconds from the requests' arrival
+            until they were handled.
+        handling_times (LatencyHistogram): seconds it took to handle the
+            requests.
+        db_time (number): total seconds spent in DB queries.
+    """
+    def __init__(self):
+        self.errors_count = 0
+        self.db_time = 0.0
+        self.wait_times = LatencyHistogram()
+        self.handling_times = LatencyHistogram()
+
+    def merge(self, other):
+        """Add the statistics of another handler to this one.
+
+        Args:
+            other (HandlerStats): statistics to add.
+        """
+        self.errors_count += other.errors_count
+        self.db_time += other.db_time
+        self.wait_times.merge(other.wait_times)
+        self.handling_times.merge(other.handling_times)
+
+    def to_dict(self):
+        """Return the statistics as a dictionary.
+
+        Returns:
+            dict. the statistics of the handler.
+        """
+        return {"errors_count": self.errors_count,
+                "db_time": self.db_time,
+                "wait_time": self.wait_times.to_dict(),
+                "handling_time": self.handling_times.to_dict()}
+
+
+class PathStats(object):
+    """Latency statistics of the requests handled by a path of the server.
+
+    The server handles resources requests and results requests in separate
+    paths (threads), each keeps its own statistics.
+
+    Attributes:
+        handled_count (number): amount of handled requests.
+        total_latency (number): sum of the handled requests' latencies.
+        max_latency (number): the highest latency of a handled request.
+        handlers (dict): maps a message type's name to its HandlerStats.
+    """
+    def __init__(self):
+        self.handled_count = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.handlers = {}
+
+    @property
+    def average_latency(self):
+        """Return the average latency of the handled requests.
+
+        Returns:
+            number. average latency in seconds, 0 if no request was handled.
+        """
+        if self.handled_count == 0:
+            return 0.0
+
+        return self.total_latency / self.handled_count
+
+    def record(self, message_type, wait_time, handling_time, db_time=0.0,
+               failed=False):
+        """Record a handled request.
+
+        Args:
+            message_type (str): name of the request's message type, as
+                returned by get_message_name.
+            wait_time (number): seconds from the request's arrival until its
+                handling started.
+            handling_time (number): seconds it took to handle the request.
+            db_time (number): seconds spent in DB queries while handling the
+                request.
+            failed (bool): whether the handling failed.
+        """
+        latency = wait_time + handling_time
+        self.handled_count += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+        handler = self.handlers.get(message_type)
+        if handler is None:
+            handler = self.handlers[message_type] = HandlerStats()
+
+        handler.wait_times.record(wait_time)
+        handler.handling_times.record(handling_time)
+        handler.db_time += db_time
+        if failed:
+            handler.errors_count += 1
+
+    def merge(self, other):
+        """Add the statistics of another path to this one.
+
+        Args:
+            other (PathStats): statistics to add.
+        """
+        self.handled_count += other.handled_count
+        self.total_latency += other.total_latency
+        self.max_latency = max(self.max_latency, other.max_latency)
+
+        for message_type, other_handler in other.handlers.items():
+            handler = self.handlers.get(message_type)
+            if handler is None:
+                handler = self.handlers[message_type] = HandlerStats()
+
+            handler.merge(other_handler)
+
+    def to_dict(self, queue_depth):
+        """Return the statistics as a dictionary.
+
+        Args:
+            queue_depth (number): amount of requests waiting to be handled
+                by the path.
+
+        Returns:
+            dict. the statistics of the path.
+        """
+        return {"queue_depth": queue_depth,
+                "handled_count": self.handled_count,
+                "average_latency": self.average_latency,
+                "max_latency": self.max_latency,
+                "handlers": {message_type: handler.to_dict()
+                             for message_type, handler
+                             in self.handlers.items()}}
+
+
+class _TimedCursorWrapper(CursorWrapper):
+    """A DB cursor which adds the duration of its queries to a DBTimer."""
+    def __init__(self, cursor, db, timer):
+        super(_TimedCursorWrapper, self).__init__(cursor, db)
+        self.timer = timer
+
+    def execute(self, sql, params=None):
+        start_time = time.time()
+        try:
+            return super(_TimedCursorWrapper, self).execute(sql, params)
+
+        finally:
+            self.timer.total_time += time.time() - start_time
+
+    def executemany(self, sql, param_list):
+        start_time = time.time()
+        try:
+            return super(_TimedCursorWrapper, self).executemany(sql,
+                                                                param_list)
+
+        finally:
+            self.timer.total_time += time.time() - start_time
+
+
+class DBTimer(object):
+    """Measures the time a thread spends in DB queries.
+
+    Attributes:
+        total_time (number): total seconds spent in the thread's queries.
+    """
+    def __init__(self):
+        self.total_time = 0.0
+
+    def install(self):
+        """Time the queries of the calling thread's DB connection.
+
+        Note:
+            Django creates a connection per thread, so this should be called
+            by the measured thread itself.
+        """
+        connection.use_debug_cursor = True
+        connection.make_debug_cursor = \
+            lambda cursor: _TimedCursorWrapper(cursor, connection, self)
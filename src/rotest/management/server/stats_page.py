@@ -0,0 +1,55 @@
+"""Define the resource manager server's plain-text statistics page."""
+from twisted.web.resource import Resource
+
+
+def flatten_stats(stats, prefix=""):
+    """Flatten nested statistics to a sorted list of named values.
+
+    Args:
+        stats (dict): nested statistics, as returned by the server.
+        prefix (str): prefix of the values' names.
+
+    Returns:
+        list. tuples of (dotted name, value).
+    """
+    values = []
+    for name, value in sorted(stats.items()):
+        if isinstance(value, dict):
+            values.extend(flatten_stats(value, prefix + name + "."))
+
+        else:
+            values.append((prefix + name, value))
+
+    return values
+
+
+class StatsPage(Resource):
+    """An HTTP page showing the server's statistics, one value per line.
+
+    For instance:
+        resources.handlers.LockResources.handling_time.p99 0.012287
+        resources.queue_depth 3
+    """
+    isLeaf = True
+
+    def __init__(self, get_stats):
+        """Initialize the page.
+
+        Args:
+            get_stats (callable): returns the server's statistics.
+        """
+        Resource.__init__(self)
+        self._get_stats = get_stats
+
+    def render_GET(self, request):
+        """Render the statistics as plain text.
+
+        Args:
+            request (twisted.web.server.Request): the HTTP request.
+
+        Returns:
+            str. the statistics' lines.
+        """
+        request.setHeader("Content-Type", "text/plain; charset=utf-8")
+        return "".join("%s %s\n" % (name, value)
+                       for name, value in flatten_stats(self._get_stats()))
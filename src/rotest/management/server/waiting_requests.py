@@ -0,0 +1,185 @@
+"""Define the resource manager's set of requests waiting for resources."""
+import heapq
+from itertools import count
+
+from rotest.management.models.resource_data import ResourceData
+
+
+class WaitingRequests(object):
+    """A set of lock requests that are blocked on unavailable resources.
+
+    Instead of re-evaluating every blocked request on every pass of the
+    resource manager's loop, the requests are indexed by the resource types
+    they wait for and are woken up only when a resource of a matching type
+    changes its state, or when their timeout expires (which is tracked using
+    a timer heap).
+
+    Attributes:
+        _types_by_request (dict): maps a waiting request to the resource
+            data types it waits for.
+        _requests_by_type (dict): maps a resource data type to the set of
+            requests waiting for it.
+        _sequence_by_request (dict): maps a waiting request to its arrival
+            sequence number, used to wake requests in their arrival order.
+        _timeouts (list): heap of (expiration time, sequence, request).
+    """
+    def __init__(self):
+        self._timeouts = []
+        self._types_by_request = {}
+        self._requests_by_type = {}
+        self._sequence_by_request = {}
+
+        self._sequence = count()
+
+    def __len__(self):
+        return len(self._types_by_request)
+
+    def __contains__(self, request):
+        return request in self._types_by_request
+
+    def __iter__(self):
+        return iter(self._sorted(self._types_by_request))
+
+    def add(self, request, resource_types, expiration_time=None):
+        """Add a blocked request to the waiting set.
+
+        Args:
+            request (Request): the blocked LockResources request.
+            resource_types (iterable): the resource data types (subclasses of
+                ResourceData) the request waits for.
+            expiration_time (number): time (as in time.time()) in which the
+                request should be woken up even if no resource was freed.
+                None means the request never expires.
+        """
+        self.remove(request)
+
+        resource_types = frozenset(resource_types)
+        sequence = self._sequence.next()
+
+        self._types_by_request[request] = resource_types
+        self._sequence_by_request[request] = sequence
+        for resource_type in resource_types:
+            self._requests_by_type.setdefault(resource_type,
+                                              set()).add(request)
+
+        if expiration_time is not None:
+            heapq.heappush(self._timeouts,
+                           (expiration_time, sequence, request))
+
+    def remove(self, request):
+        """Remove a request from the waiting set, if it is in it.
+
+        Args:
+            request (Request): the request to remove.
+        """
+        resource_types = self._types_by_request.pop(request, ())
+        self._sequence_by_request.pop(request, None)
+
+        for resource_type in resource_types:
+            waiting_requests = self._requests_by_type[resource_type]
+            waiting_requests.discard(request)
+            if len(waiting_requests) == 0:
+                del self._requests_by_type[resource_type]
+
+    def get_waiting_counts(self):
+        """Return the amount of requests waiting for each resource type.
+
+        Returns:
+            dict. maps a resource data type's name to the amount of requests
+                waiting for it.
+        """
+        return {resource_type.__name__: len(requests)
+                for resource_type, requests
+                in self._requests_by_type.items()}
+
+    def _sorted(self, requests):
+        """Return the given waiting requests sorted by their arrival order.
+
+        Args:
+            requests (iterable): waiting requests.
+
+        Returns:
+            list. the requests, sorted by their arrival order.
+        """
+        return sorted(requests, key=self._sequence_by_request.get)
+
+    def _pop_requests(self, requests):
+        """Remove the given requests from the set and return them sorted.
+
+        Args:
+            requests (iterable): waiting requests.
+
+        Returns:
+            list. the removed requests, sorted by their arrival order.
+        """
+        requests = self._sorted(requests)
+        for request in requests:
+            self.remove(request)
+
+        return requests
+
+    def wake(self, resource_types):
+        """Remove and return the requests that may use the given types.
+
+        A request waiting for a resource type is considered relevant to a
+        freed resource if the freed resource's type is the awaited type or
+        one of its subclasses.
+
+        Args:
+            resource_types (iterable): types of resource datas which changed
+                their state.
+
+        Returns:
+            list. the woken requests, sorted by their arrival order.
+        """
+        woken_requests = set()
+        for resource_type in resource_types:
+            for base_type in resource_type.__mro__:
+                if not issubclass(base_type, ResourceData):
+                    break
+
+                woken_requests.update(self._requests_by_type.get(base_type,
+                                                                 ()))
+
+        return self._pop_requests(woken_requests)
+
+    def wake_all(self):
+        """Remove and return all the waiting requests.
+
+        Returns:
+            list. the woken requests, sorted by their arrival order.
+        """
+        return self._pop_requests(self._types_by_request.keys())
+
+    def wake_expired(self, now):
+        """Remove and return the requests whose expiration time has passed.
+
+        Args:
+            now (number): the current time (as in time.time()).
+
+        Returns:
+            list. the woken requests, sorted by their arrival order.
+        """
+        expired_requests = []
+        while len(self._timeouts) > 0 and self._timeouts[0][0] <= now:
+            _, sequence, request = heapq.heappop(self._timeouts)
+            if self._sequence_by_request.get(request) == sequence:
+                expired_requests.append(request)
+
+        return self._pop_requests(expired_requests)
+
+    def next_expiration(self):
+        """Return the closest expiration time of a waiting request.
+
+        Returns:
+            number. closest expiration time, None if no request expires.
+        """
+        while len(self._timeouts) > 0:
+            expiration_time, sequence, request = self._timeouts[0]
+            if self._sequence_by_request.get(request) == sequence:
+                return expiration_time
+
+            # The request is no longer waiting, drop its stale timer.
+            heapq.heappop(self._timeouts)
+
+        return None
@@ -1,13 +1,26 @@
 """Worker - handle a session under the resource manager server."""
 # pylint: disable=abstract-method,invalid-name,signature-differs
-from itertools import count
+# pylint: disable=protected-access
+from itertools import izip
 
+from django.db import transaction, DEFAULT_DB_ALIAS
+from django.db.models.fields import AutoField
 from twisted.protocols.basic import LineReceiver
 
 from rotest.core.models.run_data import RunData
+from rotest.core.models.general_data import GeneralData
 from rotest.management.server.request import Request
-from rotest.management.common.utils import get_host_name
-from rotest.management.common.messages import CleanupUser, ParsingFailure
+from rotest.management.server.codec import MessagesCodec
+from rotest.management.common.parsers import PARSERS
+from rotest.management.common.compressors import COMPRESSORS
+from rotest.management.common.messages import (StatsReply,
+                                               CleanupUser,
+                                               ServerStats,
+                                               ParserReply,
+                                               ParsingFailure,
+                                               CompressorReply,
+                                               NegotiateParser,
+                                               NegotiateCompressor)
 from rotest.management.common.parsers.abstract_parser import ParsingError
 from rotest.management.common.resource_descriptor import ResourceDescriptor
 from rotest.management.common.utils import (TEST_ID_KEY,
@@ -24,10 +37,19 @@ class Worker(LineReceiver):
 
     An instance which serves one client and passes the requests from the
     client to the server via a queue. The worker can server either a resources
-    requesting client or a results updating client.
+    requesting client or a results updating client. Results requests are
+    passed to the result writers, and the other requests are passed to the
+    resource manager.
+
+    Messages are delimited by lines, until the client negotiates a faster
+    parser. From then on, the messages are sent in length-prefixed frames,
+    which aren't limited in size, and whose large messages are compressed
+    if the client negotiates a compressor.
 
     Attributes:
-        parser (AbstractParser): messages parser.
+        parser (AbstractParser): the initial messages parser.
+        codec (MessagesCodec): decodes the client's requests and encodes the
+            replies to it.
 
         name (str): worker name (unique for the connection).
         all_tests (dict): maps test identifier to test data.
@@ -48,23 +70,34 @@ class Worker(LineReceiver):
         self.is_alive = False
         self.main_test = None
         self.user_name = None
-
-        self._messages_counter = count()
+        self.codec = MessagesCodec(self.parser)
 
     def connectionMade(self):
         """Called when a connection is made.
 
-        Defines client resource container.
+        Resolves the client's host name, which identifies the client. Reading
+        from the client is paused until the name is resolved.
         """
         self.is_alive = True
 
         ip_address, port = self.transport.client
-        host = get_host_name(ip_address)
+        self.transport.pauseProducing()
+        resolving = self.factory.host_names.resolve(ip_address)
+        resolving.addCallback(self._on_host_resolved, port)
 
+    def _on_host_resolved(self, host, port):
+        """Define the client's name and start reading its requests.
+
+        Args:
+            host (str): the client's host name.
+            port (number): the client's port.
+        """
         self.user_name = host
         self.name = '%s%s%d' % (host, HOST_PORT_SEPARATOR, port)
 
         self.factory.logger.debug("Worker: Got new client %r", self.name)
+        if self.is_alive:
+            self.transport.resumeProducing()
 
     def connectionLost(self, reason):
         """Called when the connection is shut down.
@@ -76,6 +109,10 @@ class Worker(LineReceiver):
         self.is_alive = False
         self.factory.logger.debug("Worker: Lost a client %r, reason %r",
                                   self.name, reason.getErrorMessage())
+        if self.name is None:
+            # The client disconnected before it was named, it owns nothing.
+            return
+
         cleanup_message = CleanupUser(user_name=self.name)
 
         self.factory.logger.debug("Putting user cleanup request in queue")
@@ -84,23 +121,110 @@ class Worker(LineReceiver):
         self.factory.logger.debug("Successfully queued the request")
 
     def lineReceived(self, encoded_message):
+        """Handle a message received in a line.
+
+        Args:
+            encoded_message (str): The encoded message which was received with
+                the delimiter removed.
+        """
+        self.messageReceived(encoded_message)
+
+    def rawDataReceived(self, data):
+        """Handle data received after switching to length-prefixed frames.
+
+        Args:
+            data (str): the received data.
+        """
+        for encoded_message in self.codec.split_frames(data):
+            self.messageReceived(encoded_message)
+
+    def _negotiate_parser(self, message):
+        """Switch to the first parser the client supports, if there's one.
+
+        The reply is sent using the current parser, and the following
+        messages are sent in length-prefixed frames using the chosen parser.
+
+        Args:
+            message (NegotiateParser): the client's negotiation request.
+        """
+        parser_name = next((name for name in message.parsers
+                            if name in PARSERS), self.codec.parser.NAME)
+
+        reply = ParserReply(parser=parser_name)
+        reply.request_id = message.msg_id
+        self.respond(reply)
+
+        if parser_name != self.codec.parser.NAME:
+            self.factory.logger.debug("Worker: switching to the %r parser",
+                                      parser_name)
+            self.codec.parser = PARSERS[parser_name]()
+            self.setRawMode()
+
+    def _negotiate_compressor(self, message):
+        """Compress the large frames using the client's first known compressor.
+
+        The reply is sent uncompressed, and the following messages are sent
+        and received using the chosen compressor. Messages sent in lines
+        aren't compressed.
+
+        Args:
+            message (NegotiateCompressor): the client's negotiation request.
+        """
+        compressor_name = None
+        if not self.line_mode:
+            compressor_name = next((name for name in message.compressors
+                                    if name in COMPRESSORS), None)
+
+        reply = CompressorReply(compressor=compressor_name)
+        reply.request_id = message.msg_id
+        self.respond(reply)
+
+        if compressor_name is not None:
+            self.factory.logger.debug("Worker: compressing using %r",
+                                      compressor_name)
+            self.codec.compressor = COMPRESSORS[compressor_name]()
+
+    def messageReceived(self, encoded_message):
         """Handle data received.
 
-        * Decodes the received data to a valid request.
-        * Put the request in the server request queue.
+        * Decompresses and decodes the received data to a valid request.
+        * Put the request in the server request queue. Statistics queries
+          and negotiations are answered immediately, so they won't wait
+          behind the requests they measure.
         * If the received data fails to parse, a ParsingFailure reply message
           will be sent to the client.
 
         Args:
-            encoded_message (str): The encoded message which was received with
-                the delimiter removed.
+            encoded_message (str): The encoded message which was received,
+                without its delimiter or frame header.
         """
         self.factory.logger.debug("Worker received: %r", encoded_message)
         try:
+            encoded_message = self.codec.decompress(encoded_message)
             self.factory.logger.debug("Parsing message: %r", encoded_message)
-            message = self.parser.decode(encoded_message)
+            message = self.codec.parser.decode(encoded_message)
+
+            if isinstance(message, ServerStats):
+                reply = StatsReply(stats=self.factory.get_stats())
+                reply.request_id = message.msg_id
+                self.respond(reply)
+                return
+
+            if isinstance(message, NegotiateParser):
+                self._negotiate_parser(message)
+                return
+
+            if isinstance(message, NegotiateCompressor):
+                self._negotiate_compressor(message)
+                return
+
+            request = Request(self, message)
+            if self.factory.result_writers.handles(message):
+                self.factory.result_writers.put(request)
+
+            else:
+                self.factory.request_queue.put(request)
 
-            self.factory.request_queue.put(Request(self, message))
             self.factory.logger.debug("Successfully queued the request")
 
         except ParsingError as err:
@@ -109,28 +233,99 @@ class Worker(LineReceiver):
             reply_message = ParsingFailure(reason=str(err))
             self.respond(reply_message)
 
-    def _create_test_data(self, test_dict):
-        """Recursively create the test's datas and add them to 'all_tests'.
+    def _insert_tests_data(self, tests_data, last_id):
+        """Insert the datas of a level of the tests tree to the DB in bulk.
+
+        Django can't bulk create inherited models, so the rows of the
+        GeneralData table are inserted first, their ids are read back, and
+        then the rows of the sub models' tables are inserted using those ids.
+
+        Args:
+            tests_data (list): test datas to insert, which are not saved yet.
+            last_id (number): the highest id of a test data of the run which
+                was already inserted.
+
+        Returns:
+            number. the highest id of the inserted test datas.
+        """
+        base_fields = [field
+                       for field in GeneralData._meta.local_concrete_fields
+                       if not isinstance(field, AutoField)]
+
+        GeneralData.objects.all()._batched_insert(tests_data, base_fields,
+                                                  batch_size=None)
+
+        created_ids = list(GeneralData.objects.filter(
+                                run_data=self.run_data,
+                                pk__gt=last_id).order_by('pk').values_list(
+                                                            'pk', flat=True))
+
+        if len(created_ids) != len(tests_data):
+            raise RuntimeError("Expected to create %d test datas, but found "
+                               "%d" % (len(tests_data), len(created_ids)))
+
+        datas_by_model = {}
+        for test_data, test_data_id in izip(tests_data, created_ids):
+            sub_models = [model for model in reversed(type(test_data).mro())
+                          if issubclass(model, GeneralData) and
+                          model is not GeneralData and
+                          not model._meta.abstract and
+                          not model._meta.proxy]
+
+            test_data.id = test_data_id
+            for model in sub_models:
+                setattr(test_data, model._meta.pk.attname, test_data_id)
+                datas_by_model.setdefault(model, []).append(test_data)
+
+            test_data._state.adding = False
+            test_data._state.db = DEFAULT_DB_ALIAS
+
+        # Parent models are first in the MRO, their tables are filled first.
+        for model in sorted(datas_by_model,
+                            key=lambda model: len(model.mro())):
+            model.objects.all()._batched_insert(
+                                            datas_by_model[model],
+                                            model._meta.local_concrete_fields,
+                                            batch_size=None)
+
+        return created_ids[-1]
+
+    def _create_tests_data(self, tests_tree):
+        """Create the datas of the tests tree in the DB, level by level.
+
+        Each level of the tree is inserted in bulk, after its parents level.
 
         Args:
             tests_tree (dict): containts the hierarchy of the tests in the run.
 
         Returns:
-            GeneralData. the created test data object.
+            dict. maps test identifier to the created test data object.
         """
-        data_type = test_dict[TEST_CLASS_CODE_KEY]
-        test_data = data_type(name=test_dict[TEST_NAME_KEY])
-        test_data.run_data = self.run_data
-        test_data.save()
-        self.all_tests[test_dict[TEST_ID_KEY]] = test_data
+        all_tests = {}
+        last_id = 0
+        level = [(tests_tree, None)]
+
+        while len(level) > 0:
+            tests_data = []
+            for test_dict, parent_data in level:
+                data_type = test_dict[TEST_CLASS_CODE_KEY]
+                test_data = data_type(name=test_dict[TEST_NAME_KEY])
+                test_data.run_data = self.run_data
+                if parent_data is not None:
+                    parent_data.add_sub_test_data(test_data)
+
+                all_tests[test_dict[TEST_ID_KEY]] = test_data
+                tests_data.append(test_data)
 
-        if TEST_SUBTESTS_KEY in test_dict:
-            for sub_test_dict in test_dict[TEST_SUBTESTS_KEY]:
-                sub_test = self._create_test_data(sub_test_dict)
-                test_data.add_sub_test_data(sub_test)
-                sub_test.save()
+            last_id = self._insert_tests_data(tests_data, last_id)
 
-        return test_data
+            level = [(sub_test_dict, level_data)
+                     for (level_dict, _), level_data in izip(level,
+                                                             tests_data)
+                     for sub_test_dict in level_dict.get(TEST_SUBTESTS_KEY,
+                                                         ())]
+
+        return all_tests
 
     def initialize_test_run(self, tests_tree, run_data):
         """Initialize the tests run data.
@@ -139,12 +334,68 @@ class Worker(LineReceiver):
             tests_tree (dict): containts the hierarchy of the tests in the run.
             run_data (dict): containts additional data about the run.
         """
-        self.run_data = RunData.objects.create(**run_data)
-        self.factory.logger.debug("Creating tests data tree")
-        self.main_test = self._create_test_data(tests_tree)
-        self.run_data.main_test = self.main_test
-        self.run_data.user_name = self.user_name
-        self.run_data.save()
+        with transaction.atomic():
+            self.run_data = RunData.objects.create(**run_data)
+            self.factory.logger.debug("Creating tests data tree")
+            self.all_tests = self._create_tests_data(tests_tree)
+            self.main_test = self.all_tests[tests_tree[TEST_ID_KEY]]
+            self.run_data.main_test = self.main_test
+            self.run_data.user_name = self.user_name
+            self.run_data.save()
+
+    def resume_test_run(self, tests_tree, run_id):
+        """Load the tests run data, which was initialized by another worker.
+
+        The tests datas are created level by level in the tree's order, so
+        the order of their primary keys matches the order of the tree's
+        levels.
+
+        Args:
+            tests_tree (dict): containts the hierarchy of the tests in the run.
+            run_id (number): primary key of the run's data.
+
+        Raises:
+            ValueError: the run's tests datas don't match the tests tree.
+        """
+        run_data = RunData.objects.get(pk=run_id)
+
+        tests_dicts = []
+        level = [tests_tree]
+        while len(level) > 0:
+            tests_dicts.extend(level)
+            level = [sub_test_dict
+                     for test_dict in level
+                     for sub_test_dict in test_dict.get(TEST_SUBTESTS_KEY, ())]
+
+        data_pks = list(GeneralData.objects.filter(
+                    run_data=run_data).order_by('pk').values_list('pk',
+                                                                  flat=True))
+        if len(data_pks) != len(tests_dicts):
+            raise ValueError("Run %d has %d tests datas, while its tests tree "
+                             "has %d tests" % (run_id, len(data_pks),
+                                               len(tests_dicts)))
+
+        pks_by_type = {}
+        for test_dict, data_pk in izip(tests_dicts, data_pks):
+            pks_by_type.setdefault(test_dict[TEST_CLASS_CODE_KEY],
+                                   []).append(data_pk)
+
+        datas = {}
+        for data_type, type_pks in pks_by_type.iteritems():
+            datas.update(data_type.objects.in_bulk(type_pks))
+
+        all_tests = {}
+        for test_dict, data_pk in izip(tests_dicts, data_pks):
+            if data_pk not in datas:
+                raise ValueError("Test data %d of run %d isn't of type %r" %
+                                 (data_pk, run_id,
+                                  test_dict[TEST_CLASS_CODE_KEY]))
+
+            all_tests[test_dict[TEST_ID_KEY]] = datas[data_pk]
+
+        self.run_data = run_data
+        self.all_tests = all_tests
+        self.main_test = self.all_tests[tests_tree[TEST_ID_KEY]]
 
     def update_run_data(self, run_data):
         """Initialize the tests run data.
@@ -247,11 +498,14 @@ class Worker(LineReceiver):
         """Respond to the client's request.
 
         * Set a msg_id.
-        * Encodes the reply message.
+        * Encodes the reply message, and compresses it if it's large.
         * Sends the reply to the client.
         """
-        reply.msg_id = self._messages_counter.next()
-        encoded_reply = self.parser.encode(reply)
+        encoded_reply = self.codec.encode(reply)
 
         self.factory.logger.debug("Worker reply: %r", encoded_reply)
-        self.sendLine(encoded_reply)
+        if self.line_mode:
+            self.sendLine(encoded_reply)
+
+        else:
+            self.transport.write(self.codec.build_frame(encoded_reply))
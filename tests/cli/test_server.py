@@ -4,6 +4,7 @@ import mock
 import pytest
 
 from rotest.cli.main import main
+from rotest.common.config import SERVER_STATE_DIR
 
 
 @mock.patch("rotest.cli.server.ResourceManagerServer")
@@ -11,7 +12,8 @@ def test_using_default_port(resource_manager, capsys):
     sys.argv = ["rotest", "server"]
     main()
 
-    resource_manager.assert_called_once_with(port=7777)
+    resource_manager.assert_called_once_with(
+        port=7777, stats_port=None, state_dir=SERVER_STATE_DIR)
     out, _ = capsys.readouterr()
     assert "Running in attached mode" in out
 
@@ -36,7 +38,8 @@ def test_using_custom_port(resource_manager, capsys):
     sys.argv = ["rotest", "server", "--port", "8888"]
     main()
 
-    resource_manager.assert_called_once_with(port=8888)
+    resource_manager.assert_called_once_with(
+        port=8888, stats_port=None, state_dir=SERVER_STATE_DIR)
 
     out, _ = capsys.readouterr()
     assert "Running in attached mode" in out
@@ -63,7 +66,8 @@ def test_using_daemon_mode(resource_manager, daemon_context, capsys):
     sys.argv = ["rotest", "server", "--daemon"]
     main()
 
-    resource_manager.assert_called_once_with(port=7777)
+    resource_manager.assert_called_once_with(
+        port=7777, stats_port=None, state_dir=SERVER_STATE_DIR)
     daemon_context.assert_called_once()
 
     out, _ = capsys.readouterr()
@@ -0,0 +1,80 @@
+"""Test Rotest's common utils."""
+# pylint: disable=invalid-name,too-many-public-methods
+import time
+import unittest
+from threading import Lock
+
+from rotest.common.utils import run_in_threads
+
+
+class TestRunInThreads(unittest.TestCase):
+    """Test calling a function on items in parallel threads."""
+    CALL_TIME = 0.2
+
+    def setUp(self):
+        """Reset the record of the called items."""
+        self.called_items = []
+        self.calls_lock = Lock()
+
+    def call(self, item):
+        """Wait for a while, and fail on negative items.
+
+        Args:
+            item (number): the item the function is called on.
+
+        Returns:
+            number. the item, doubled.
+        """
+        with self.calls_lock:
+            self.called_items.append(item)
+
+        time.sleep(self.CALL_TIME)
+        if item < 0:
+            raise ValueError(item)
+
+        return item * 2
+
+    def test_serial(self):
+        """Validate a single worker calls the function by the items order."""
+        results = list(run_in_threads(self.call, [1, 2, 3], max_workers=1))
+
+        self.assertEqual([(item, result) for item, result, _ in results],
+                         [(1, 2), (2, 4), (3, 6)])
+        self.assertEqual([exc_info for _, _, exc_info in results],
+                         [None, None, None])
+
+    def test_parallel(self):
+        """Validate the workers call the function at the same time."""
+        start_time = time.time()
+        results = list(run_in_threads(self.call, [1, 2, 3, 4],
+                                      max_workers=4))
+
+        self.assertLess(time.time() - start_time, 2 * self.CALL_TIME)
+        self.assertEqual(sorted((item, result)
+                                for item, result, _ in results),
+                         [(1, 2), (2, 4), (3, 6), (4, 8)])
+
+    def test_errors(self):
+        """Validate failed calls are yielded with their exception info."""
+        results = list(run_in_threads(self.call, [1, -1, 2], max_workers=2))
+
+        self.assertEqual(len(results), 3)
+        for item, result, exc_info in results:
+            if item < 0:
+                self.assertIsNone(result)
+                self.assertIs(exc_info[0], ValueError)
+
+            else:
+                self.assertIsNone(exc_info)
+
+    def test_stop_on_error(self):
+        """Validate items aren't started once a call failed, if requested."""
+        for max_workers in (1, 2):
+            self.setUp()
+            results = list(run_in_threads(self.call, [-1, -2, 1, 2, 3],
+                                          max_workers=max_workers,
+                                          stop_on_error=True))
+
+            self.assertEqual(sorted(item for item, _, _ in results),
+                             sorted(self.called_items))
+            self.assertLess(len(self.called_items), 5)
@@ -8,11 +8,14 @@ import unittest
 from Queue import Empty
 from multiprocessing import Queue, Event
 
+import mock
 import psutil
 import pytest
+from rotest.core.runners.base_runner import BaseTestRunner
 from rotest.core.runners.multiprocess.manager.runner import MultiprocessRunner
 
-from tests.core.utils import MockSuite1, BasicRotestUnitTest
+from tests.core.utils import (MockSuite1, MockResourceClient,
+                              BasicRotestUnitTest)
 from tests.core.multiprocess.utils import (RegisterInSetupFlow,
                                            BasicMultiprocessCase,
                                            SubprocessCreationCase,
@@ -170,6 +173,18 @@ class TestMultiprocessRunner(AbstractMultiprocessRunnerTest):
                          "Number of resource locks was %d instead of 1" %
                          resources_locked)
 
+    def test_no_prefetch_in_worker(self):
+        """Test that the workers' clients don't prefetch resources.
+
+        * Creates the client of a worker, while prefetching is configured.
+        * Validates that the worker's client doesn't prefetch resources.
+        """
+        with mock.patch.object(BaseTestRunner, "create_resource_manager",
+                               lambda _: MockResourceClient(prefetch=True)):
+            resource_manager = self.runner.create_worker_resource_manager()
+
+        self.assertFalse(resource_manager.prefetch)
+
 
 @pytest.mark.skip(reason="known bug")
 class TestMultipleWorkers(AbstractMultiprocessRunnerTest):
@@ -6,7 +6,8 @@ import re
 
 from rotest.core.case import request
 from rotest.core.models.case_data import TestOutcome, CaseData
-from rotest.management.client.manager import ClientResourceManager
+from rotest.management.client.manager import (ResourcesRequest,
+                                              ClientResourceManager)
 from rotest.management.models.ut_models import (DemoResource,
                                                 DemoResourceData,
                                                 NonExistingResource)
@@ -37,6 +38,14 @@ class TempComplexRequestCase(SuccessCase):
     res2 = DemoResource(name='available_resource2')
 
 
+class TempMultipleRequestCase(SuccessCase):
+    """Inherit class and request several interchangeable resources."""
+    __test__ = False
+
+    resources = (ResourcesRequest('devices', DemoResource, count=2,
+                                  ip_address='1.1.1.1'),)
+
+
 class TempInheritRequestCase(TempComplexRequestCase):
     """Inherit one resource requests from the parent class."""
     __test__ = False
@@ -226,6 +235,30 @@ class TestTestCase(BasicRotestUnitTest):
         self.assertIn('available_resource2', locked_names,
                       "Resource request using class field ignored kwargs")
 
+    def test_multiple_resources_request(self):
+        """Test a TestCase that requests several interchangeable resources.
+
+        * Validate the resources are assigned to the test as a list.
+        * Validate each resource is also registered by its item name.
+        """
+        case = self._run_case(TempMultipleRequestCase)
+
+        self.assertTrue(self.result.wasSuccessful(),
+                        'Case failed when it should have succeeded')
+
+        self.assertEqual(len(case.devices), 2)
+        self.assertEqual(set(device.name for device in case.devices),
+                         set(['available_resource1', 'available_resource2']))
+
+        self.assertEqual(sorted(case.locked_resources.keys()),
+                         ['devices_0', 'devices_1'])
+        self.assertEqual(case.devices, [case.locked_resources.devices_0,
+                                        case.locked_resources.devices_1])
+
+        for device in case.devices:
+            self.validate_resource(
+                        DemoResourceData.objects.get(name=device.name))
+
     def test_inherit_resource_request(self):
         """Test a TestCase that inherits its resource request."""
         case = self._run_case(TempInheritRequestCase)
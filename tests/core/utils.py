@@ -220,6 +220,10 @@ class MockResourceClient(ClientResourceManager):
             db_connection['NAME'] = test_db_name
 
         resources = []
+        # Lock a resource for every resource counted by the descriptors
+        descriptors = [descriptor for descriptor in descriptors
+                       for _ in xrange(descriptor.count)]
+
         for descriptor in descriptors:
             data_type = descriptor.type.DATA_CLASS
             if data_type is None:
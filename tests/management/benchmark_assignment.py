@@ -0,0 +1,159 @@
+"""Benchmark assigning resources to the descriptors of lock requests.
+
+Builds a synthetic lab of devices, most of them busy, and requests of
+several descriptors with overlapping filters (a broad filter matches a
+family of models, a narrow one a model of a site and a version). Compares
+the rate of requests which get a complete assignment, and the time an
+assignment takes, of choosing a resource for every descriptor in turn
+(greedy) and of matching all the descriptors together.
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_assignment.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods
+from __future__ import print_function
+import time
+import random
+import unittest
+
+from rotest.management.server.assignment import find_assignment
+
+
+SEED = 1
+DEVICES_COUNT = 2000
+REQUESTS_COUNT = 2000
+MIN_DESCRIPTORS = 2
+MAX_DESCRIPTORS = 6
+REPEATS = 5
+
+FAMILIES = 4
+MODELS_PER_FAMILY = 5
+SITES = 3
+VERSIONS = 4
+
+
+def find_greedy_assignment(candidates):
+    """Assign every descriptor in turn its first candidate which is free.
+
+    Args:
+        candidates (list): list of the candidate resource ids of every
+            descriptor, each in the order of preference.
+
+    Returns:
+        dict. maps the index of every assigned descriptor to its resource id.
+    """
+    assignment = {}
+    assigned_ids = set()
+    for index, descriptor_candidates in enumerate(candidates):
+        for resource_id in descriptor_candidates:
+            if resource_id not in assigned_ids:
+                assigned_ids.add(resource_id)
+                assignment[index] = resource_id
+                break
+
+    return assignment
+
+
+class BenchmarkAssignment(unittest.TestCase):
+    """Compare the success rate and time of greedy and matched assignment."""
+    def setUp(self):
+        """Build the synthetic lab."""
+        self.random = random.Random(SEED)
+        self.devices = [{"family": model / MODELS_PER_FAMILY,
+                         "model": model,
+                         "site": self.random.randrange(SITES),
+                         "version": self.random.randrange(VERSIONS)}
+                        for model in (self.random.randrange(
+                                            FAMILIES * MODELS_PER_FAMILY)
+                                      for _ in xrange(DEVICES_COUNT))]
+
+    def get_filter(self):
+        """Return the filter of a random descriptor.
+
+        Returns:
+            dict. the properties the descriptor's resources must have.
+        """
+        device = self.random.choice(self.devices)
+        fields = self.random.choice([("family",),
+                                     ("model",),
+                                     ("family", "site"),
+                                     ("model", "site", "version")])
+
+        return dict((field, device[field]) for field in fields)
+
+    def get_requests(self, busy_ratio, broad_first):
+        """Return the candidates of random requests.
+
+        Args:
+            busy_ratio (number): ratio of the devices which are locked.
+            broad_first (bool): whether to order the descriptors of every
+                request from the broadest filter to the narrowest one.
+
+        Returns:
+            list. the candidate device ids of every descriptor, for every
+                request.
+        """
+        free_ids = sorted(self.random.sample(
+                            xrange(DEVICES_COUNT),
+                            int(DEVICES_COUNT * (1 - busy_ratio))))
+
+        requests = []
+        for _ in xrange(REQUESTS_COUNT):
+            candidates = []
+            for _ in xrange(self.random.randint(MIN_DESCRIPTORS,
+                                                MAX_DESCRIPTORS)):
+                device_filter = self.get_filter()
+                candidates.append(
+                    [device_id for device_id in free_ids
+                     if all(self.devices[device_id][field] == value
+                            for field, value in device_filter.iteritems())])
+
+            if broad_first:
+                candidates.sort(key=len, reverse=True)
+
+            requests.append(candidates)
+
+        return requests
+
+    @staticmethod
+    def measure(assign, requests):
+        """Assign resources to the requests.
+
+        Args:
+            assign (function): the assignment function to measure.
+            requests (list): the candidates of every request.
+
+        Returns:
+            tuple. percent of the requests which were assigned completely,
+                and the average microseconds an assignment took.
+        """
+        best_time = None
+        for _ in xrange(REPEATS):
+            start_time = time.time()
+            assignments = [assign(candidates) for candidates in requests]
+            total_time = time.time() - start_time
+            if best_time is None or total_time < best_time:
+                best_time = total_time
+
+        assigned_count = sum(
+                        1 for candidates, assignment in zip(requests,
+                                                            assignments)
+                        if len(assignment) == len(candidates))
+
+        return (100.0 * assigned_count / len(requests),
+                best_time * 1e6 / len(requests))
+
+    def test_benchmark(self):
+        """Print the success rate and time of every assignment method."""
+        print("\n%-28s %16s %16s" % ("lab state", "greedy", "matching"))
+        for name, busy_ratio, broad_first in [("97% busy", 0.97, False),
+                                              ("99% busy", 0.99, False),
+                                              ("99% busy, broad first", 0.99,
+                                               True)]:
+
+            requests = self.get_requests(busy_ratio, broad_first)
+            line = "%-28s" % name
+            for assign in (find_greedy_assignment, find_assignment):
+                line += " %6.1f%% %6.1fus" % self.measure(assign, requests)
+
+            print(line)
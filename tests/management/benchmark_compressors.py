@@ -0,0 +1,120 @@
+"""Benchmark compressing large frames with every compressor.
+
+Measures the CPU time spent compressing & decompressing realistic large
+messages, against the bytes it saves, to tune the compressors' defaults.
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_compressors.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods
+from __future__ import print_function
+import time
+
+from django.test.testcases import TransactionTestCase
+
+from rotest.core.models import CaseData, SuiteData
+from rotest.management.common import messages
+from rotest.management.common.compressors import COMPRESSORS, ZlibCompressor
+from rotest.management.common.parsers.binary_parser import BinaryParser
+from rotest.management.models.ut_models import (DemoResourceData,
+                                                DemoComplexResourceData)
+
+
+class Zlib6Compressor(ZlibCompressor):
+    """zlib compressor, using the default compression level."""
+    LEVEL = 6
+
+
+class BenchmarkCompressors(TransactionTestCase):
+    """Compare the compressors' times and ratios on large messages."""
+    ITERATIONS = 20
+    RESOURCES_COUNT = 200
+    CASES_COUNT = 3000
+
+    def get_messages(self):
+        """Return samples of large messages.
+
+        Returns:
+            list. tuples of each sample's name and its encoded message.
+        """
+        datas = []
+        for index in xrange(self.RESOURCES_COUNT):
+            demo1 = DemoResourceData.objects.create(
+                            name='demo%d_1' % index, ip_address="1.2.3.4")
+            demo2 = DemoResourceData.objects.create(
+                            name='demo%d_2' % index, ip_address="1.2.3.5")
+            datas.append(DemoComplexResourceData.objects.create(
+                            name='complex%d' % index, demo1=demo1,
+                            demo2=demo2))
+
+        tests = {'id': 0, 'name': 'suite', 'class': SuiteData,
+                 'subtests': [{'id': index,
+                               'name': 'TestLinkFailover.test_case%d' % index,
+                               'class': CaseData}
+                              for index in xrange(1, self.CASES_COUNT + 1)]}
+
+        samples = [
+            ("ResourcesReply x10",
+             messages.ResourcesReply(request_id=1, resources=datas[:10])),
+            ("ResourcesReply x%d" % self.RESOURCES_COUNT,
+             messages.ResourcesReply(request_id=1, resources=datas)),
+            ("StartTestRun x%d" % self.CASES_COUNT,
+             messages.StartTestRun(tests=tests,
+                                   run_data={'run_name': 'benchmark'}))]
+
+        parser = BinaryParser()
+        encoded_samples = []
+        for name, message in samples:
+            message.msg_id = 1
+            encoded_samples.append((name, parser.encode(message)))
+
+        return encoded_samples
+
+    def measure(self, compressor, message):
+        """Measure the compression & decompression times of a message.
+
+        Args:
+            compressor (AbstractCompressor): the measured compressor.
+            message (str): the encoded message.
+
+        Returns:
+            tuple. microseconds to compress and to decompress the message,
+                and the length of the compressed message.
+        """
+        start_time = time.time()
+        for _ in xrange(self.ITERATIONS):
+            compressed_message = compressor.compress(message)
+
+        compress_time = time.time() - start_time
+
+        start_time = time.time()
+        for _ in xrange(self.ITERATIONS):
+            compressor.decompress(compressed_message)
+
+        decompress_time = time.time() - start_time
+
+        return (compress_time * 1e6 / self.ITERATIONS,
+                decompress_time * 1e6 / self.ITERATIONS,
+                len(compressed_message))
+
+    def test_benchmark(self):
+        """Print the compression times and lengths of every message."""
+        compressors = [("%s%d" % (Zlib6Compressor.NAME,
+                                  Zlib6Compressor.LEVEL),
+                        Zlib6Compressor())]
+        compressors.extend((name, compressor_class())
+                           for name, compressor_class in
+                           sorted(COMPRESSORS.iteritems()))
+
+        header = "%-24s %10s" % ("message (us, bytes)", "raw-len")
+        for name, _ in compressors:
+            header += " %10s-cmp %10s-dec %10s-len" % (name, name, name)
+
+        print("\n" + header)
+        for name, message in self.get_messages():
+            line = "%-24s %10d" % (name, len(message))
+            for _, compressor in compressors:
+                line += " %14.1f %14.1f %14d" % self.measure(compressor,
+                                                             message)
+
+            print(line)
@@ -0,0 +1,81 @@
+"""Benchmark the server with many concurrent clients.
+
+Runs the load generator (in another process) with growing amounts of
+clients, each connecting to the server and locking and releasing a demo
+resource, and prints the connections rate, the requests rate and the
+requests latencies. There are as many resources as clients, so the
+requests don't wait for each other's resources.
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_connections.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods,no-self-use
+from __future__ import print_function
+from multiprocessing import Process, Queue
+
+from django.db import transaction
+
+from rotest.management.common.utils import LOCALHOST
+from rotest.management.client.load_generator import run_load
+from rotest.management.models.ut_models import (DemoResource,
+                                                DemoResourceData)
+
+from tests.management.resource_base_test import BaseResourceManagementTest
+
+
+CLIENTS_AMOUNTS = (100, 1000, 2000)
+CYCLES = 1
+LOCK_TIMEOUT = 120
+RUN_TIMEOUT = 1200
+
+
+def generate_load(clients_amount, stats_queue):
+    """Run the load clients and put their statistics in the queue.
+
+    Args:
+        clients_amount (number): amount of concurrent clients.
+        stats_queue (Queue): queue to put the run's statistics in.
+    """
+    stats_queue.put(run_load(host=LOCALHOST,
+                             resource_type=DemoResource,
+                             clients_amount=clients_amount,
+                             cycles=CYCLES,
+                             timeout=LOCK_TIMEOUT))
+
+
+class BenchmarkConnections(BaseResourceManagementTest):
+    """Measure the server's rates and latencies with many clients."""
+    def setUp(self):
+        """Create a resource for every client, then start the server."""
+        with transaction.atomic():
+            for index in xrange(max(CLIENTS_AMOUNTS)):
+                DemoResourceData.objects.create(name="load_resource%d" % index,
+                                                version=1,
+                                                ip_address="1.1.1.1")
+
+        super(BenchmarkConnections, self).setUp()
+
+    def test_benchmark(self):
+        """Print the load generator's report for every amount of clients."""
+        print("\n%-8s %11s %8s %11s %7s %7s %7s %6s" %
+              ("clients", "connects/s", "requests", "requests/s",
+               "p50", "p90", "p99", "errors"))
+
+        for clients_amount in CLIENTS_AMOUNTS:
+            stats_queue = Queue()
+            load_process = Process(target=generate_load,
+                                   args=(clients_amount, stats_queue))
+            load_process.start()
+            try:
+                stats = stats_queue.get(timeout=RUN_TIMEOUT)
+
+            finally:
+                load_process.join(RUN_TIMEOUT)
+                if load_process.is_alive():
+                    load_process.terminate()
+
+            print("%-8d %11.0f %8d %11.1f %7.3f %7.3f %7.3f %6d" %
+                  (clients_amount, stats["connections_per_second"],
+                   stats["requests"], stats["requests_per_second"],
+                   stats["p50_latency"] or 0, stats["p90_latency"] or 0,
+                   stats["p99_latency"] or 0, stats["errors"]))
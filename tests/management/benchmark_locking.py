@@ -0,0 +1,97 @@
+"""Benchmark locking and releasing resources through the resource manager.
+
+Measures lock/release cycles per second of a single resource, of a complex
+resource (a resource and its two sub-resources) and of many resources in a
+single request, using the tests' DB (a sqlite file).
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_locking.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods,protected-access
+from __future__ import print_function
+import time
+
+from rotest.management.common.utils import LOCALHOST
+from rotest.management.client.manager import ClientResourceManager
+from rotest.management.common.resource_descriptor import \
+                                            ResourceDescriptor as Descriptor
+from rotest.management.models.ut_models import (DemoResource,
+                                                DemoResourceData,
+                                                DemoComplexResource,
+                                                DemoComplexResourceData)
+
+from tests.management.resource_base_test import BaseResourceManagementTest
+
+
+CYCLES = 200
+RESOURCES_COUNT = 10
+LOCK_TIMEOUT = 10
+
+
+class BenchmarkLocking(BaseResourceManagementTest):
+    """Measure the lock/release cycles rate of several kinds of requests."""
+    SIMPLE_NAME = "bench_simple"
+    COMPLEX_NAME = "bench_complex"
+    RESOURCE_NAME = "bench_resource%d"
+
+    def setUp(self):
+        """Create the resources, then start the server."""
+        DemoResourceData.objects.create(name=self.SIMPLE_NAME, version=1,
+                                        ip_address="1.1.1.1")
+
+        DemoComplexResourceData.objects.create(
+                name=self.COMPLEX_NAME,
+                demo1=DemoResourceData.objects.create(name="bench_sub1",
+                                                      version=1,
+                                                      ip_address="1.1.2.1"),
+                demo2=DemoResourceData.objects.create(name="bench_sub2",
+                                                      version=1,
+                                                      ip_address="1.1.2.2"))
+
+        for index in xrange(RESOURCES_COUNT):
+            DemoResourceData.objects.create(name=self.RESOURCE_NAME % index,
+                                            version=1,
+                                            ip_address="1.1.3.%d" % index)
+
+        super(BenchmarkLocking, self).setUp()
+
+    @staticmethod
+    def measure(client, descriptors):
+        """Lock and release the described resources repeatedly.
+
+        Args:
+            client (ClientResourceManager): connected client to lock with.
+            descriptors (list): descriptors of the resources to lock.
+
+        Returns:
+            number. lock/release cycles per second.
+        """
+        start_time = time.time()
+        for _ in xrange(CYCLES):
+            resources = client._lock_resources(descriptors=descriptors,
+                                               timeout=LOCK_TIMEOUT)
+            client._release_resources(resources)
+
+        return CYCLES / (time.time() - start_time)
+
+    def test_benchmark(self):
+        """Print the lock/release cycles rate of every kind of request."""
+        samples = [("1 resource",
+                    [Descriptor(DemoResource, name=self.SIMPLE_NAME)]),
+                   ("1 complex resource (3 rows)",
+                    [Descriptor(DemoComplexResource,
+                                name=self.COMPLEX_NAME)]),
+                   ("%d resources" % RESOURCES_COUNT,
+                    [Descriptor(DemoResource, name=self.RESOURCE_NAME % index)
+                     for index in xrange(RESOURCES_COUNT)])]
+
+        client = ClientResourceManager(LOCALHOST)
+        client.connect()
+        try:
+            print()
+            for name, descriptors in samples:
+                print("%-30s %7.1f cycles/s" %
+                      (name, self.measure(client, descriptors)))
+
+        finally:
+            client.disconnect()
@@ -0,0 +1,149 @@
+"""Benchmark encoding & decoding every message type with every parser.
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_parsers.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods
+from __future__ import print_function
+import time
+
+from django.test.testcases import TransactionTestCase
+
+from rotest.management.common import messages
+from rotest.management.common.parsers import PARSERS
+from rotest.management.common.resource_descriptor import ResourceDescriptor
+from rotest.management.models.ut_models import (DemoResource,
+                                                DemoResourceData,
+                                                DemoComplexResourceData)
+
+
+class BenchmarkParsers(TransactionTestCase):
+    """Compare the parsers' encoding & decoding times of every message."""
+    ITERATIONS = 200
+    RESOURCES_COUNT = 16
+
+    def get_messages(self):
+        """Return a sample of every message type.
+
+        Returns:
+            list. sample messages, with their msg_id set.
+        """
+        datas = []
+        for index in xrange(self.RESOURCES_COUNT):
+            demo1 = DemoResourceData.objects.create(
+                            name='demo%d_1' % index, version=1,
+                            ip_address="1.2.3.4")
+            demo2 = DemoResourceData.objects.create(
+                            name='demo%d_2' % index, version=1,
+                            ip_address="1.2.3.5")
+            datas.append(DemoComplexResourceData.objects.create(
+                            name='complex%d' % index, demo1=demo1,
+                            demo2=demo2))
+
+        descriptors = [ResourceDescriptor(DemoResource, name=data.name,
+                                          version=1).encode()
+                       for data in datas]
+        names = [data.name for data in datas]
+        tests = {'id': 1, 'name': 'suite', 'class': DemoResourceData,
+                 'subtests': [{'id': index, 'name': 'case%d' % index,
+                               'class': DemoResourceData}
+                              for index in xrange(2, 100)]}
+
+        samples = [
+            messages.ParsingFailure(reason="exception: bla bla."),
+            messages.SuccessReply(request_id=1),
+            messages.ShouldSkipReply(request_id=1, should_skip=None),
+            messages.ErrorReply(request_id=1, code="SystemError",
+                                content="error occurred"),
+            messages.ResourcesReply(request_id=1, resources=datas),
+            messages.QueryReply(request_id=1, resources=datas,
+                                generation=3),
+            messages.WaitingReply(request_id=1, queue_position=2,
+                                  estimated_wait=12.5),
+            messages.LeaseReply(request_id=1, lease_period=60),
+            messages.ParserReply(request_id=1, parser="binary"),
+            messages.CompressorReply(request_id=1, compressor="zlib"),
+            messages.TestRunReply(request_id=1, run_id=5),
+            messages.StatsReply(request_id=1,
+                                stats={'queue_depth': 3,
+                                       'handlers': {'lock_resources':
+                                                    {'count': 5}}}),
+            messages.QueryResources(descriptors=descriptors[0],
+                                    generation=None),
+            messages.LockResources(descriptors=descriptors, timeout=10,
+                                   priority=0),
+            messages.ReleaseResources(requests=names),
+            messages.ReclaimResources(resources=names),
+            messages.RenewLeases(),
+            messages.ServerStats(),
+            messages.NegotiateParser(parsers=["binary"]),
+            messages.NegotiateCompressor(compressors=["lz4", "zlib"]),
+            messages.StartTestRun(tests=tests,
+                                  run_data={'run_name': 'benchmark'}),
+            messages.ResumeTestRun(tests=tests, run_id=5),
+            messages.RunFinished(),
+            messages.UpdateRunData(run_data={'run_name': 'benchmark'}),
+            messages.UpdateFields(model=DemoResourceData,
+                                  filter={'name': 'demo0_1'},
+                                  kwargs={'version': 2}),
+            messages.StartTest(test_id=1),
+            messages.SetupFinished(test_id=1),
+            messages.StartTeardown(test_id=1),
+            messages.ShouldSkip(test_id=1),
+            messages.StopTest(test_id=1),
+            messages.UpdateResources(test_id=1, resources=descriptors),
+            messages.CloneResources(test_id=1,
+                                    resources={'res1': DemoResource(
+                                                        data=datas[0])}),
+            messages.StartComposite(test_id=1),
+            messages.StopComposite(test_id=1),
+            messages.AddResult(test_id=1, code=0, info=None)]
+
+        for message in samples:
+            message.msg_id = 1
+
+        return samples
+
+    def measure(self, parser, message):
+        """Measure the encoding & decoding times of a message.
+
+        Args:
+            parser (AbstractParser): the measured parser.
+            message (AbstractMessage): the measured message.
+
+        Returns:
+            tuple. microseconds to encode and to decode the message, and the
+                length of the encoded message.
+        """
+        start_time = time.time()
+        for _ in xrange(self.ITERATIONS):
+            encoded_message = parser.encode(message)
+
+        encode_time = time.time() - start_time
+
+        start_time = time.time()
+        for _ in xrange(self.ITERATIONS):
+            parser.decode(encoded_message)
+
+        decode_time = time.time() - start_time
+
+        return (encode_time * 1e6 / self.ITERATIONS,
+                decode_time * 1e6 / self.ITERATIONS,
+                len(encoded_message))
+
+    def test_benchmark(self):
+        """Print the encoding & decoding times of every message."""
+        parsers = [(name, parser_class())
+                   for name, parser_class in sorted(PARSERS.iteritems())]
+
+        header = "%-20s" % "message (us, bytes)"
+        for name, _ in parsers:
+            header += " %10s-enc %10s-dec %10s-len" % (name, name, name)
+
+        print("\n" + header)
+        for message in self.get_messages():
+            line = "%-20s" % type(message).__name__
+            for _, parser in parsers:
+                line += " %14.1f %14.1f %14d" % self.measure(parser, message)
+
+            print(line)
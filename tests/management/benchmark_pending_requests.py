@@ -0,0 +1,84 @@
+"""Benchmark the bookkeeping of the resource manager's pending requests.
+
+Measures admitting a burst of queued requests, cleaning up after half of
+their clients and handling the rest, with the requests' handlers replaced
+by a trivial one and the logs and replies dropped (so only the
+bookkeeping is measured).
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_pending_requests.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods,protected-access
+# pylint: disable=no-self-use,too-few-public-methods
+from __future__ import print_function
+import time
+import logging
+
+import mock
+from django.test.testcases import TransactionTestCase
+
+from rotest.management.server.request import Request
+from rotest.management.server.manager import ManagerThread
+from rotest.management.common.messages import (CleanupUser,
+                                               SuccessReply,
+                                               ReleaseResources)
+
+
+REQUESTS_COUNT = 10000
+CLIENTS_COUNT = 100
+
+
+class FakeReactor(object):
+    """Drops the replies instead of sending them to the clients."""
+    def callFromThread(self, function, *args, **kwargs):
+        """Ignore the scheduled call."""
+
+
+class FakeWorker(object):
+    """Stands for the server's worker of a connected client."""
+    def __init__(self, name):
+        self.name = name
+        self.is_alive = True
+
+
+class BenchmarkPendingRequests(TransactionTestCase):
+    """Measure admitting, cleaning up and handling many requests."""
+    def test_benchmark(self):
+        """Print the times of the bookkeeping stages."""
+        logger = logging.getLogger("benchmark_pending_requests")
+        logger.disabled = True
+        manager = ManagerThread(reactor=FakeReactor(), logger=logger)
+
+        workers = [FakeWorker("client%d:1" % index)
+                   for index in xrange(CLIENTS_COUNT)]
+        for index in xrange(REQUESTS_COUNT):
+            manager.request_queue.put(
+                        Request(workers[index % CLIENTS_COUNT],
+                                ReleaseResources(msg_id=index, requests=[])))
+
+        start_time = time.time()
+        while not manager.request_queue.empty():
+            manager._accept_requests(timeout=0)
+
+        admit_time = time.time() - start_time
+
+        start_time = time.time()
+        for worker in workers[:CLIENTS_COUNT / 2]:
+            worker.is_alive = False
+            manager.cleanup_user(Request(worker,
+                                         CleanupUser(user_name=worker.name),
+                                         is_server_request=True))
+
+        cleanup_time = time.time() - start_time
+
+        start_time = time.time()
+        with mock.patch.object(ManagerThread, "_get_request_handler",
+                               return_value=lambda request: SuccessReply()):
+            manager._handle_requests()
+
+        handle_time = time.time() - start_time
+
+        print("\n%d requests of %d clients: admission %.3fs, cleanup of %d "
+              "clients %.3fs, handling the rest %.3fs" %
+              (REQUESTS_COUNT, CLIENTS_COUNT, admit_time, CLIENTS_COUNT / 2,
+               cleanup_time, handle_time))
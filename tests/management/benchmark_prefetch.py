@@ -0,0 +1,97 @@
+"""Benchmark running a suite whose tests spend a while setting up resources.
+
+Compares the end-to-end time of the suite with and without prefetching the
+resources of the next test while a test runs.
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_prefetch.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods
+from __future__ import print_function
+import time
+
+from rotest.core.case import TestCase
+from rotest.core.suite import TestSuite
+from rotest.core.abstract_test import request
+from rotest.management.common.utils import LOCALHOST
+from rotest.management.models.ut_models import DemoResource
+from rotest.management.client.manager import ClientResourceManager
+
+from tests.management.resource_base_test import BaseResourceManagementTest
+
+
+INITIALIZE_TIME = 1
+TEST_TIME = 1
+TESTS_COUNT = 10
+
+
+class SlowSetupResource(DemoResource):
+    """Fake resource, which takes a while to initialize."""
+    def initialize(self):
+        """Wait for a while, then initialize the resource."""
+        time.sleep(INITIALIZE_TIME)
+        super(SlowSetupResource, self).initialize()
+
+
+class BenchmarkCase1(TestCase):
+    """Case which uses the first resource for a while."""
+    __test__ = False
+
+    resources = (request('res', SlowSetupResource,
+                         name='available_resource1'),)
+
+    def test_method(self):
+        """Pretend to test the resource."""
+        time.sleep(TEST_TIME)
+
+
+class BenchmarkCase2(BenchmarkCase1):
+    """Case which uses the second resource for a while."""
+    __test__ = False
+
+    resources = (request('res', SlowSetupResource,
+                         name='available_resource2'),)
+
+
+class BenchmarkSuite(TestSuite):
+    """Suite whose consecutive tests use different resources."""
+    __test__ = False
+
+    components = (BenchmarkCase1, BenchmarkCase2) * (TESTS_COUNT / 2)
+
+
+class BenchmarkPrefetch(BaseResourceManagementTest):
+    """Compare the suite's run time with and without prefetching."""
+    fixtures = ['resource_ut.json']
+
+    def run_suite(self, prefetch):
+        """Run the benchmark suite.
+
+        Args:
+            prefetch (bool): whether to prefetch the next tests' resources.
+
+        Returns:
+            number. seconds it took to run the suite.
+        """
+        client = ClientResourceManager(LOCALHOST, prefetch=prefetch)
+        client.connect()
+        try:
+            suite = BenchmarkSuite(resource_manager=client)
+            result = self.create_result(suite)
+
+            start_time = time.time()
+            suite.run(result)
+            run_time = time.time() - start_time
+
+            self.assertTrue(result.wasSuccessful())
+            return run_time
+
+        finally:
+            client.disconnect()
+
+    def test_benchmark(self):
+        """Print the suite's run time with and without prefetching."""
+        print("\n%d tests, %.1fs setup & %.1fs test each: serial %.1fs, "
+              "prefetched %.1fs" % (TESTS_COUNT, INITIALIZE_TIME, TEST_TIME,
+                                    self.run_suite(prefetch=False),
+                                    self.run_suite(prefetch=True)))
@@ -0,0 +1,183 @@
+"""Benchmark reporting a run's events to a remote result server.
+
+The server is reached through a proxy which delays the data in both ways,
+like a server across the network does.
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_result_client.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods,protected-access
+from __future__ import print_function
+import time
+import shutil
+import socket
+import tempfile
+from Queue import Queue
+from threading import Thread
+
+from rotest.core.models.run_data import RunData
+from rotest.core.models import CaseData, SuiteData
+from rotest.core.models.case_data import TestOutcome
+from rotest.management.common.utils import LOCALHOST
+from rotest.common.config import RESOURCE_MANAGER_PORT
+from rotest.management.client.client import AbstractClient
+from rotest.management.client.result_client import ClientResultManager
+
+from tests.management.resource_base_test import BaseResourceManagementTest
+
+
+class DelayingProxy(object):
+    """Forward a single connection to the server, delaying its data.
+
+    Attributes:
+        port (number): the port the proxy listens on.
+        delay (number): seconds to delay the data in each direction.
+    """
+    def __init__(self, delay, server_port=RESOURCE_MANAGER_PORT):
+        self.delay = delay
+        self._server_port = server_port
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.bind((LOCALHOST, 0))
+        self._listener.listen(1)
+        self.port = self._listener.getsockname()[1]
+
+        accepting = Thread(target=self._accept)
+        accepting.daemon = True
+        accepting.start()
+
+    def _accept(self):
+        """Connect the accepted client to the server."""
+        client, _ = self._listener.accept()
+        server = socket.create_connection((LOCALHOST, self._server_port))
+        for source, destination in ((client, server), (server, client)):
+            chunks = Queue()
+            for target, args in ((self._receive, (source, chunks)),
+                                 (self._send, (destination, chunks))):
+                thread = Thread(target=target, args=args)
+                thread.daemon = True
+                thread.start()
+
+    def _receive(self, source, chunks):
+        """Receive data and time its forwarding."""
+        while True:
+            data = source.recv(65536)
+            chunks.put((time.time() + self.delay, data))
+            if len(data) == 0:
+                return
+
+    def _send(self, destination, chunks):
+        """Forward the received data when its time comes."""
+        while True:
+            send_time, data = chunks.get()
+            time.sleep(max(send_time - time.time(), 0))
+            if len(data) == 0:
+                destination.shutdown(socket.SHUT_WR)
+                return
+
+            destination.sendall(data)
+
+
+class BlockingResultClient(ClientResultManager):
+    """Result client which sends every report and waits for its reply."""
+    def connect(self, timeout=AbstractClient._DEFAULT_REPLY_TIMEOUT):
+        AbstractClient.connect(self, timeout)
+
+    def disconnect(self):
+        AbstractClient.disconnect(self)
+
+    def _report(self, msg):
+        self._request(msg)
+
+    def flush(self, timeout=None):
+        pass
+
+
+class BenchmarkItem(object):
+    """Minimal test item, as used by the result client."""
+    locked_resources = None
+
+    def __init__(self, identifier, data, sub_tests=()):
+        self.identifier = identifier
+        self.data = data
+        self.sub_tests = list(sub_tests)
+        self.IS_COMPLEX = len(self.sub_tests) > 0
+
+    def __iter__(self):
+        return iter(self.sub_tests)
+
+
+class BenchmarkResultClient(BaseResourceManagementTest):
+    """Compare reporting with and without spooling and batching."""
+    CASES_COUNT = 5000
+    ONE_WAY_DELAY = 0.001
+
+    def get_handled_count(self):
+        """Return the amount of results requests the server handled.
+
+        Note:
+            Every results request is written to the DB in a transaction of
+            its own, a batch of events in a single transaction.
+
+        Returns:
+            number. the amount of handled results messages.
+        """
+        handlers = self.server.get_stats()["results"]["handlers"]
+        return sum(handler["handling_time"]["count"]
+                   for handler in handlers.itervalues())
+
+    def report_run(self, client_class):
+        """Report the events of a run of successful cases.
+
+        Args:
+            client_class (type): the result client class to report with.
+
+        Returns:
+            tuple. seconds the run spent reporting its events, seconds until
+                the server handled them, and the amount of results messages
+                (and transactions) the server handled.
+        """
+        run_data = RunData(run_name=client_class.__name__)
+        cases = [BenchmarkItem(index, CaseData(name="case%d" % index))
+                 for index in xrange(1, self.CASES_COUNT + 1)]
+        main_test = BenchmarkItem(0, SuiteData(name="suite",
+                                               run_data=run_data),
+                                  cases)
+
+        start_count = self.get_handled_count()
+        proxy = DelayingProxy(self.ONE_WAY_DELAY)
+        spool_dir = tempfile.mkdtemp()
+        client = client_class(LOCALHOST, spool_dir=spool_dir)
+        client._port = proxy.port
+        client.connect()
+        try:
+            start_time = time.time()
+            client.start_test_run(main_test)
+            client.start_composite(main_test)
+            for case in cases:
+                client.start_test(case)
+                client.update_resources(case)
+                client.add_result(case, TestOutcome.SUCCESS)
+                client.stop_test(case)
+
+            client.stop_composite(main_test)
+            report_time = time.time() - start_time
+
+            client.stop_test_run(run_data)
+            run_time = time.time() - start_time
+
+        finally:
+            client.disconnect()
+            shutil.rmtree(spool_dir)
+
+        return (report_time, run_time,
+                self.get_handled_count() - start_count)
+
+    def test_benchmark(self):
+        """Print the reporting times and messages counts of a run."""
+        print("\n%d cases, %.1fms round trip:" % (self.CASES_COUNT,
+                                                 self.ONE_WAY_DELAY * 2e3))
+        print("%-22s %10s %10s %14s" % ("client", "reporting", "total",
+                                        "messages"))
+        for client_class in (BlockingResultClient, ClientResultManager):
+            print("%-22s %10.2f %10.2f %14d" %
+                  ((client_class.__name__,) + self.report_run(client_class)))
@@ -0,0 +1,120 @@
+"""Benchmark reading large and small replies from a socket.
+
+Compares the buffered socket reader with accumulating the received data
+in a string, as the client used to do.
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_socket_reader.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods
+from __future__ import print_function
+import time
+import socket
+import unittest
+from threading import Thread
+
+from rotest.management.client.socket_reader import SocketReader
+from rotest.management.common.utils import (FRAME_HEADER,
+                                            MESSAGE_DELIMITER,
+                                            MESSAGE_MAX_LENGTH)
+
+
+class StringReader(object):
+    """Reader which accumulates the received data in a string."""
+    def __init__(self, sock):
+        self._socket = sock
+        self._received_data = ""
+
+    def _receive_data(self):
+        data = self._socket.recv(MESSAGE_MAX_LENGTH)
+        if len(data) == 0:
+            raise socket.error("The server closed the connection")
+
+        self._received_data += data
+
+    def read_line(self):
+        while MESSAGE_DELIMITER not in self._received_data:
+            self._receive_data()
+
+        message, self._received_data = \
+            self._received_data.split(MESSAGE_DELIMITER, 1)
+        return message
+
+    def read_frame(self):
+        while len(self._received_data) < FRAME_HEADER.size:
+            self._receive_data()
+
+        length, = FRAME_HEADER.unpack_from(self._received_data)
+        frame_end = FRAME_HEADER.size + length
+        while len(self._received_data) < frame_end:
+            self._receive_data()
+
+        message = self._received_data[FRAME_HEADER.size:frame_end]
+        self._received_data = self._received_data[frame_end:]
+        return message
+
+
+class BenchmarkSocketReader(unittest.TestCase):
+    """Compare the readers' times on large and on many small replies."""
+    LARGE_SIZE = 10 * 1024 * 1024
+    LARGE_COUNT = 5
+    SMALL_SIZE = 100
+    SMALL_COUNT = 20000
+
+    def measure(self, reader_class, message, count, framed):
+        """Measure reading messages sent by another thread.
+
+        Args:
+            reader_class (type): the reader class to read with.
+            message (str): the message to send.
+            count (number): how many times to send the message.
+            framed (bool): whether to send the messages in frames, rather
+                than delimited by lines.
+
+        Returns:
+            number. seconds it took to read the messages.
+        """
+        sender, receiver = socket.socketpair()
+        if framed:
+            data = (FRAME_HEADER.pack(len(message)) + message) * count
+
+        else:
+            data = (message + MESSAGE_DELIMITER) * count
+
+        sending = Thread(target=sender.sendall, args=(data,))
+        sending.daemon = True
+
+        reader = reader_class(receiver)
+        read = reader.read_frame if framed else reader.read_line
+        try:
+            start_time = time.time()
+            sending.start()
+            for _ in xrange(count):
+                read()
+
+            return time.time() - start_time
+
+        finally:
+            sending.join()
+            sender.close()
+            receiver.close()
+
+    def test_benchmark(self):
+        """Print the reading times of every reader."""
+        samples = [("%dx10MB frames" % self.LARGE_COUNT,
+                    "x" * self.LARGE_SIZE, self.LARGE_COUNT, True),
+                   ("%dx10MB lines" % self.LARGE_COUNT,
+                    "x" * self.LARGE_SIZE, self.LARGE_COUNT, False),
+                   ("%dx100B frames" % self.SMALL_COUNT,
+                    "x" * self.SMALL_SIZE, self.SMALL_COUNT, True),
+                   ("%dx100B lines" % self.SMALL_COUNT,
+                    "x" * self.SMALL_SIZE, self.SMALL_COUNT, False)]
+
+        readers = (StringReader, SocketReader)
+        print("\n%-20s" % "replies (seconds)" +
+              "".join(" %14s" % reader.__name__ for reader in readers))
+        for name, message, count, framed in samples:
+            print("%-20s" % name +
+                  "".join(" %14.3f" % self.measure(reader, message, count,
+                                                   framed)
+                          for reader in readers))
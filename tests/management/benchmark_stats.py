@@ -0,0 +1,92 @@
+"""Benchmark the overhead of the resource manager server's statistics.
+
+Measures lock/release cycles per second of a single resource (the request
+whose handling is the shortest, so the statistics' share of it is the
+largest), with the statistics recorded and with their recording disabled.
+The two modes are measured alternately, and the best round of each is
+compared.
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_stats.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods,protected-access
+from __future__ import print_function
+import time
+
+import mock
+
+from rotest.management.common.utils import LOCALHOST
+from rotest.management.server.stats import DBTimer, PathStats
+from rotest.management.client.manager import ClientResourceManager
+from rotest.management.models.ut_models import DemoResource, DemoResourceData
+from rotest.management.common.resource_descriptor import \
+                                            ResourceDescriptor as Descriptor
+
+from tests.management.resource_base_test import BaseResourceManagementTest
+
+
+ROUNDS = 3
+CYCLES = 500
+LOCK_TIMEOUT = 10
+
+
+class BenchmarkStats(BaseResourceManagementTest):
+    """Compare the locking rate with and without recording statistics."""
+    RESOURCE_NAME = "bench_resource"
+
+    def setUp(self):
+        """Create the resource, the server is started by every round."""
+        DemoResourceData.objects.create(name=self.RESOURCE_NAME, version=1,
+                                        ip_address="1.1.1.1")
+
+    def tearDown(self):
+        """The server is stopped by every round."""
+
+    def measure(self):
+        """Start a server, and lock and release the resource repeatedly.
+
+        Returns:
+            number. lock/release cycles per second.
+        """
+        super(BenchmarkStats, self).setUp()
+        try:
+            client = ClientResourceManager(LOCALHOST)
+            client.connect()
+            try:
+                descriptors = [Descriptor(DemoResource,
+                                          name=self.RESOURCE_NAME)]
+                start_time = time.time()
+                for _ in xrange(CYCLES):
+                    resources = client._lock_resources(
+                                                    descriptors=descriptors,
+                                                    timeout=LOCK_TIMEOUT)
+                    client._release_resources(resources)
+
+                return CYCLES / (time.time() - start_time)
+
+            finally:
+                client.disconnect()
+
+        finally:
+            super(BenchmarkStats, self).tearDown()
+
+    def test_benchmark(self):
+        """Print the locking rate with and without recording statistics."""
+        enabled_rates = []
+        disabled_rates = []
+        for _ in xrange(ROUNDS):
+            enabled_rates.append(self.measure())
+
+            with mock.patch.object(PathStats, "record",
+                                   lambda *args, **kwargs: None), \
+                    mock.patch.object(DBTimer, "install",
+                                      lambda timer: None):
+
+                disabled_rates.append(self.measure())
+
+        enabled_rate = max(enabled_rates)
+        disabled_rate = max(disabled_rates)
+        print("\nstats recorded %7.1f cycles/s" % enabled_rate)
+        print("stats disabled %7.1f cycles/s" % disabled_rate)
+        print("overhead       %7.1f%%" %
+              (100.0 * (disabled_rate - enabled_rate) / disabled_rate))
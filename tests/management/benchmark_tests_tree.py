@@ -0,0 +1,86 @@
+"""Benchmark creating the tests data tree of a run in the server.
+
+Measures the time a worker of the server takes to initialize a run of
+suites of cases, for trees of several sizes.
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_tests_tree.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods,no-self-use
+from __future__ import print_function
+import time
+
+import mock
+from django.test.testcases import TransactionTestCase
+
+from rotest.core.models import CaseData, SuiteData
+from rotest.core.models.general_data import GeneralData
+from rotest.management.server.worker import Worker
+from rotest.management.common.utils import (TEST_ID_KEY,
+                                            TEST_NAME_KEY,
+                                            TEST_SUBTESTS_KEY,
+                                            TEST_CLASS_CODE_KEY)
+
+
+TREES_SIZES = (1000, 10000, 50000)
+CASES_PER_SUITE = 99
+
+
+class BenchmarkTestsTree(TransactionTestCase):
+    """Measure the creation time of trees of several sizes."""
+    @staticmethod
+    def create_tree(size):
+        """Create a tree of a main suite, of suites of cases.
+
+        Args:
+            size (number): approximate amount of tests in the tree.
+
+        Returns:
+            dict. the tests tree, as sent in StartTestRun messages.
+        """
+        identifiers = iter(xrange(size + CASES_PER_SUITE + 1))
+        suites = []
+        for suite_index in xrange(size / (CASES_PER_SUITE + 1)):
+            suites.append({TEST_ID_KEY: next(identifiers),
+                           TEST_NAME_KEY: "Suite%d" % suite_index,
+                           TEST_CLASS_CODE_KEY: SuiteData,
+                           TEST_SUBTESTS_KEY: [
+                                    {TEST_ID_KEY: next(identifiers),
+                                     TEST_NAME_KEY: "Case%d.test_method" %
+                                     case_index,
+                                     TEST_CLASS_CODE_KEY: CaseData}
+                                    for case_index in
+                                    xrange(CASES_PER_SUITE)]})
+
+        return {TEST_ID_KEY: next(identifiers),
+                TEST_NAME_KEY: "MainSuite",
+                TEST_CLASS_CODE_KEY: SuiteData,
+                TEST_SUBTESTS_KEY: suites}
+
+    def measure(self, tree):
+        """Measure the initialization of a run of the tests tree.
+
+        Args:
+            tree (dict): the tests tree.
+
+        Returns:
+            number. seconds it took to initialize the run.
+        """
+        worker = Worker()
+        worker.factory = mock.MagicMock()
+
+        start_time = time.time()
+        worker.initialize_test_run(tree, {'run_name': 'benchmark'})
+        return time.time() - start_time
+
+    def test_benchmark(self):
+        """Print the creation time of every tree size."""
+        print("\n%-10s %10s %12s" % ("tests", "seconds", "tests/s"))
+        for size in TREES_SIZES:
+            tree = self.create_tree(size)
+            initialize_time = self.measure(tree)
+            tests_count = GeneralData.objects.count()
+            print("%-10d %10.2f %12.0f" % (tests_count, initialize_time,
+                                           tests_count / initialize_time))
+
+            GeneralData.objects.all().delete()
@@ -0,0 +1,135 @@
+"""Benchmark the server while many lock requests wait for a resource.
+
+A client holds a resource, which many other clients (in another process)
+wait for. Measures the CPU the server spends while the requests wait, and
+the latency of handing the resource over from one waiting client to the
+next, once the holding client disconnects.
+
+Run explicitly (it isn't collected with the tests):
+    pytest tests/management/benchmark_waiting_requests.py -s
+"""
+# pylint: disable=invalid-name,too-many-public-methods,protected-access
+# pylint: disable=no-self-use
+from __future__ import print_function
+import os
+import time
+from threading import Thread
+from multiprocessing import Event, Process, Queue
+
+from rotest.management.common.utils import LOCALHOST
+from rotest.management.models.ut_models import DemoResource
+from rotest.management.client.manager import ClientResourceManager
+from rotest.management.common.resource_descriptor import \
+                                            ResourceDescriptor as Descriptor
+
+from tests.management.resource_base_test import BaseResourceManagementTest
+
+
+WAITING_CLIENTS = 500
+SETTLE_TIME = 2
+WAITING_TIME = 5
+HANDOVERS = 20
+LOCK_TIMEOUT = 600
+RESOURCE_NAME = 'available_resource1'
+
+
+def lock_and_release(ready_queue, locks_queue):
+    """Wait for the resource, then release it and report the locking time.
+
+    Args:
+        ready_queue (Queue): queue to notify once connected to the server.
+        locks_queue (Queue): queue to put the resource's locking time in.
+    """
+    client = ClientResourceManager(LOCALHOST)
+    client.connect()
+    ready_queue.put(None)
+
+    descriptor = Descriptor(DemoResource, name=RESOURCE_NAME)
+    resources = client._lock_resources(descriptors=[descriptor],
+                                       timeout=LOCK_TIMEOUT)
+    locks_queue.put(time.time())
+    client._release_resources(resources)
+    client.disconnect()
+
+
+def run_waiting_clients(start_event, ready_queue, locks_queue):
+    """Run the waiting clients, each in its own thread.
+
+    Args:
+        start_event (Event): event to wait for before starting the clients.
+        ready_queue (Queue): queue to notify once connected to the server.
+        locks_queue (Queue): queue to put the resource's locking times in.
+    """
+    start_event.wait()
+    threads = [Thread(target=lock_and_release,
+                      args=(ready_queue, locks_queue))
+               for _ in xrange(WAITING_CLIENTS)]
+
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+
+class BenchmarkWaitingRequests(BaseResourceManagementTest):
+    """Measure the server's CPU and hand over latency with many waiters."""
+    fixtures = ['resource_ut.json']
+
+    def measure_cpu(self, duration):
+        """Measure the CPU time the process spends in a period of time.
+
+        Args:
+            duration (number): seconds to measure for.
+
+        Returns:
+            number. CPU seconds (user and system) spent in the period.
+        """
+        start_times = os.times()
+        time.sleep(duration)
+        end_times = os.times()
+        return sum(end_times[:2]) - sum(start_times[:2])
+
+    def test_benchmark(self):
+        """Print the server's CPU usage and the resource's hand over times.
+
+        The waiting clients' process is started before the holding client
+        connects, so it won't inherit (and keep open) the holder's socket.
+        """
+        start_event = Event()
+        ready_queue = Queue()
+        locks_queue = Queue()
+        waiting_process = Process(target=run_waiting_clients,
+                                  args=(start_event, ready_queue, locks_queue))
+        waiting_process.start()
+        try:
+            holder = ClientResourceManager(LOCALHOST)
+            holder.connect()
+            descriptor = Descriptor(DemoResource, name=RESOURCE_NAME)
+            holder._lock_resources(descriptors=[descriptor],
+                                   timeout=LOCK_TIMEOUT)
+
+            start_event.set()
+            for _ in xrange(WAITING_CLIENTS):
+                ready_queue.get(timeout=LOCK_TIMEOUT)
+
+            time.sleep(SETTLE_TIME)
+            cpu_time = self.measure_cpu(WAITING_TIME)
+
+            release_time = time.time()
+            holder.disconnect()
+            lock_times = [locks_queue.get(timeout=LOCK_TIMEOUT)
+                          for _ in xrange(HANDOVERS)]
+
+        finally:
+            waiting_process.terminate()
+            waiting_process.join()
+
+        handover_times = [later - earlier for earlier, later in
+                          zip([release_time] + lock_times, lock_times)]
+        print("\n%d waiting requests: server CPU %.0f%%, hand over latency "
+              "mean %.3fs max %.3fs (%d hand overs)" %
+              (WAITING_CLIENTS, 100 * cpu_time / WAITING_TIME,
+               sum(handover_times) / len(handover_times),
+               max(handover_times), HANDOVERS))
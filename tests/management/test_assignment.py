@@ -0,0 +1,26 @@
+"""Test the assignment of resources to the descriptors of lock requests."""
+# pylint: disable=invalid-name,too-many-public-methods
+import unittest
+
+from rotest.management.server.assignment import find_assignment
+
+
+class TestFindAssignment(unittest.TestCase):
+    """Test assigning distinct candidates to the descriptors."""
+    def test_preferred_candidates(self):
+        """Validate the first free candidate of every descriptor is used."""
+        self.assertEqual(find_assignment([[1, 2], [3, 1], [2, 4]]),
+                         {0: 1, 1: 3, 2: 2})
+
+    def test_overlapping_candidates(self):
+        """Validate earlier descriptors are moved to free a candidate."""
+        self.assertEqual(find_assignment([[1, 2], [2, 3], [1]]),
+                         {0: 2, 1: 3, 2: 1})
+
+    def test_partial_assignment(self):
+        """Validate as many descriptors as possible are assigned."""
+        assignment = find_assignment([[1], [1], [2], []])
+
+        self.assertEqual(len(assignment), 2)
+        self.assertEqual(assignment[2], 2)
+        self.assertNotIn(3, assignment)
@@ -0,0 +1,44 @@
+"""Test the compressors of the frames sent between clients and server."""
+# pylint: disable=invalid-name,too-many-public-methods
+import unittest
+
+from rotest.management.common.compressors import COMPRESSORS
+from rotest.management.common.parsers.abstract_parser import ParsingError
+
+
+class TestCompressors(unittest.TestCase):
+    """Test packing & unpacking frames with every installed compressor."""
+    LARGE_MESSAGE = "resource data " * 10000
+
+    def test_large_message(self):
+        """Validate large messages are compressed, and restored."""
+        for compressor_class in COMPRESSORS.itervalues():
+            compressor = compressor_class()
+            frame = compressor.pack(self.LARGE_MESSAGE)
+
+            self.assertLess(len(frame), len(self.LARGE_MESSAGE) / 10,
+                            compressor.NAME)
+            self.assertEqual(compressor.unpack(frame), self.LARGE_MESSAGE)
+
+    def test_small_message(self):
+        """Validate messages below the threshold aren't compressed."""
+        for compressor_class in COMPRESSORS.itervalues():
+            compressor = compressor_class()
+            message = "x" * (compressor.THRESHOLD - 1)
+            frame = compressor.pack(message)
+
+            self.assertEqual(len(frame), len(message) + 1, compressor.NAME)
+            self.assertEqual(compressor.unpack(frame), message)
+            self.assertEqual(compressor.unpack(compressor.pack("")), "")
+
+    def test_malformed_frame(self):
+        """Validate malformed frames fail to unpack with ParsingError."""
+        for compressor_class in COMPRESSORS.itervalues():
+            compressor = compressor_class()
+            frame = compressor.pack(self.LARGE_MESSAGE)
+
+            self.assertRaises(ParsingError, compressor.unpack, "")
+            self.assertRaises(ParsingError, compressor.unpack,
+                              "\x07" + frame[1:])
+            self.assertRaises(ParsingError, compressor.unpack,
+                              frame[:len(frame) / 2])
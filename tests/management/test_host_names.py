@@ -0,0 +1,81 @@
+"""Test the resource manager's clients host names resolver."""
+# pylint: disable=invalid-name,too-many-public-methods
+import logging
+import unittest
+
+import mock
+from twisted.internet import defer
+
+from rotest.management.server.host_names import HostNameResolver
+
+
+class TestHostNameResolver(unittest.TestCase):
+    """Test resolving host names in the background and caching them."""
+    IP_ADDRESS = "1.2.3.4"
+
+    def setUp(self):
+        """Create a resolver whose lookups are controlled by the test."""
+        self.lookups = []
+        patcher = mock.patch("rotest.management.server.host_names.threads."
+                             "deferToThreadPool", self.start_lookup)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.resolver = HostNameResolver(reactor=mock.MagicMock(),
+                                         logger=logging.getLogger())
+
+    def start_lookup(self, *_):
+        """Start a lookup which is resolved by the test.
+
+        Returns:
+            Deferred. the lookup's result.
+        """
+        lookup = defer.Deferred()
+        self.lookups.append(lookup)
+        return lookup
+
+    def resolve(self):
+        """Resolve the test's address and return the results list.
+
+        Returns:
+            list. filled with the host name once it's resolved.
+        """
+        results = []
+        self.resolver.resolve(self.IP_ADDRESS).addCallback(results.append)
+        return results
+
+    def test_concurrent_lookups(self):
+        """Validate concurrent resolves of an address do a single lookup."""
+        first = self.resolve()
+        second = self.resolve()
+        self.assertEqual(len(self.lookups), 1)
+        self.assertEqual(first, [])
+
+        self.lookups[0].callback("host")
+        self.assertEqual(first, ["host"])
+        self.assertEqual(second, ["host"])
+
+    def test_cache(self):
+        """Validate resolved names are cached until their TTL expires."""
+        self.resolve()
+        self.lookups[0].callback("host")
+
+        self.assertEqual(self.resolve(), ["host"])
+        self.assertEqual(len(self.lookups), 1)
+
+    def test_cache_expiration(self):
+        """Validate addresses are looked up again once their TTL expires."""
+        self.resolver = HostNameResolver(reactor=mock.MagicMock(),
+                                         logger=logging.getLogger(), ttl=0)
+        self.resolve()
+        self.lookups[0].callback("host")
+
+        self.resolve()
+        self.assertEqual(len(self.lookups), 2)
+
+    def test_failed_lookup(self):
+        """Validate addresses which can't be resolved name themselves."""
+        results = self.resolve()
+        self.lookups[0].errback(ValueError("unknown host"))
+
+        self.assertEqual(results, [self.IP_ADDRESS])
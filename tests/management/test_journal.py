@@ -0,0 +1,94 @@
+"""Test the resource manager's state journal."""
+# pylint: disable=invalid-name,too-many-public-methods,protected-access
+import os
+import shutil
+import logging
+import tempfile
+
+from django.test.testcases import TransactionTestCase
+
+from rotest.management.server.journal import StateJournal
+from rotest.management.models.resource_data import ResourceData
+from rotest.management.server.resources_index import ResourcesIndex
+
+
+class TestStateJournal(TransactionTestCase):
+    """Test restoring the resources index from snapshots and journals."""
+    fixtures = ['resource_ut.json']
+
+    OWNER = 'localhost:1234'
+
+    def setUp(self):
+        """Index the fixture's resources and journal the index's changes."""
+        self.state_dir = tempfile.mkdtemp()
+        self.logger = logging.getLogger(__name__)
+
+        self.index = ResourcesIndex()
+        self.index.load()
+        self.journal = StateJournal(self.state_dir, self.logger)
+        self.journal.write_snapshot(self.index.get_snapshot())
+        self.index.journal = self.journal
+
+    def tearDown(self):
+        """Remove the state directory."""
+        self.journal.close()
+        shutil.rmtree(self.state_dir)
+
+    def restore(self):
+        """Restore an index from the state directory.
+
+        Returns:
+            ResourcesIndex. the restored index, None if it wasn't restored.
+        """
+        snapshot, events = StateJournal(self.state_dir, self.logger).load()
+        if snapshot is None:
+            return None
+
+        index = ResourcesIndex()
+        index.restore(snapshot, events)
+        return index
+
+    @staticmethod
+    def get_id(name):
+        """Return the id of the resource with the given name."""
+        return ResourceData.objects.get(name=name).pk
+
+    def test_restore(self):
+        """Validate the journaled changes are replayed on the snapshot."""
+        resource_id = self.get_id('available_resource1')
+        self.index.set_owner([resource_id], self.OWNER)
+
+        index = self.restore()
+
+        self.assertEqual(len(index), len(self.index))
+        self.assertEqual(index.get_entry(resource_id).owner, self.OWNER)
+        self.assertEqual(index.get_owned_ids(self.OWNER), [resource_id])
+        self.assertEqual(index.get_entry(resource_id), self.index.get_entry(
+                                                                resource_id))
+
+    def test_partially_written_event(self):
+        """Validate a partially written last event is ignored."""
+        resource_id = self.get_id('available_resource1')
+        self.index.set_owner([resource_id], self.OWNER)
+        self.journal._journal_file.write('["owner", [')
+        self.journal._journal_file.flush()
+
+        index = self.restore()
+
+        self.assertEqual(index.get_entry(resource_id).owner, self.OWNER)
+
+    def test_new_generation(self):
+        """Validate a snapshot replaces the previous journal."""
+        resource_id = self.get_id('available_resource1')
+        self.index.set_owner([resource_id], self.OWNER)
+        self.journal.write_snapshot(self.index.get_snapshot())
+        self.index.set_owner([resource_id], "")
+
+        self.assertEqual(len(os.listdir(self.state_dir)), 2)
+        self.assertEqual(self.restore().get_entry(resource_id).owner, "")
+
+    def test_mismatching_db(self):
+        """Validate a snapshot isn't used after resources were added."""
+        ResourceData.objects.create(name='new_resource')
+
+        self.assertIsNone(self.restore())
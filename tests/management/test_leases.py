@@ -0,0 +1,42 @@
+"""Test the resource manager's clients' leases."""
+# pylint: disable=invalid-name,too-many-public-methods
+import unittest
+
+from rotest.management.server.leases import Leases
+
+
+class TestLeases(unittest.TestCase):
+    """Test renewing leases and finding the expired ones."""
+    def setUp(self):
+        """Create an empty leases container."""
+        self.leases = Leases()
+
+    def test_pop_expired(self):
+        """Validate only the expired leases are popped, by expiration."""
+        self.leases.renew("late", 3)
+        self.leases.renew("early", 1)
+        self.leases.renew("alive", 10)
+
+        self.assertEqual(self.leases.pop_expired(now=5), ["early", "late"])
+        self.assertEqual(len(self.leases), 1)
+        self.assertIn("alive", self.leases)
+        self.assertEqual(self.leases.next_expiration(), 10)
+
+    def test_renew(self):
+        """Validate renewing a lease postpones its expiration."""
+        self.leases.renew("client", 1)
+        self.leases.renew("client", 5)
+
+        self.assertEqual(self.leases.next_expiration(), 5)
+        self.assertEqual(self.leases.pop_expired(now=3), [])
+        self.assertEqual(self.leases.pop_expired(now=5), ["client"])
+        self.assertIsNone(self.leases.next_expiration())
+
+    def test_remove(self):
+        """Validate removed leases never expire."""
+        self.leases.renew("client", 1)
+        self.leases.remove("client")
+        self.leases.remove("unknown")
+
+        self.assertNotIn("client", self.leases)
+        self.assertEqual(self.leases.pop_expired(now=5), [])
@@ -4,16 +4,36 @@ from abc import ABCMeta, abstractmethod
 from django.test.testcases import TransactionTestCase
 
 from rotest.management.common.parsers.xml_parser import XMLParser
+from rotest.management.common.parsers.abstract_parser import ParsingError
+from rotest.management.common.parsers.binary_parser import BinaryParser
 from rotest.management.common.resource_descriptor import ResourceDescriptor
 from rotest.management.models.ut_models import (DemoResource,
                                                 DemoResourceData,
                                                 DemoComplexResourceData)
-from rotest.management.common.messages import (ErrorReply,
+from rotest.management.common.messages import (StopTest,
+                                               AddResult,
+                                               StartTest,
+                                               LeaseReply,
+                                               ErrorReply,
+                                               StatsReply,
+                                               ParserReply,
+                                               CompressorReply,
+                                               BatchEvents,
+                                               RenewLeases,
+                                               ServerStats,
+                                               QueryReply,
                                                SuccessReply,
+                                               TestRunReply,
                                                LockResources,
+                                               ResumeTestRun,
                                                ResourcesReply,
                                                ParsingFailure,
-                                               ReleaseResources)
+                                               ReclaimResources,
+                                               NegotiateParser,
+                                               NegotiateCompressor,
+                                               ReleaseResources,
+                                               UpdateRunData,
+                                               WaitingReply)
 
 
 class AbstractTestParser(TransactionTestCase):
@@ -82,6 +102,17 @@ class AbstractTestParser(TransactionTestCase):
         msg = ResourcesReply(request_id=0, resources=[data])
         self.validate(msg)
 
+    def test_query_reply_message(self):
+        """Test encoding & decoding of QueryReply message."""
+        data = DemoResourceData(name='demo1', version=1, ip_address="1.2.3.4")
+        data.save()
+
+        msg = QueryReply(request_id=0, resources=[data], generation=3)
+        self.validate(msg)
+
+        msg = QueryReply(request_id=0, resources=None, generation=3)
+        self.validate(msg)
+
     def test_complex_resources_reply_message(self):
         """Test encoding & decoding of ResourcesReply message."""
         data1 = DemoResourceData(name='demo1', version=1, ip_address="1.2.3.4")
@@ -110,6 +141,50 @@ class AbstractTestParser(TransactionTestCase):
                             timeout=self.LOCK_RESOURCES_TIMEOUT)
         self.validate(msg)
 
+        msg = LockResources(descriptors=descriptors,
+                            timeout=self.LOCK_RESOURCES_TIMEOUT,
+                            priority=-1,
+                            notify_position=True)
+        self.validate(msg)
+
+    def test_lock_multiple_resources_message(self):
+        """Test encoding & decoding of count and alternatives descriptors."""
+        descriptor = ResourceDescriptor(DemoResource, ip_address="1.2.3.4")
+        descriptor.count = 16
+        descriptor.alternatives = [ResourceDescriptor(DemoResource,
+                                                      name="my_resource1")]
+
+        msg = LockResources(descriptors=[descriptor.encode()],
+                            timeout=self.LOCK_RESOURCES_TIMEOUT)
+        self.validate(msg)
+
+    def test_waiting_reply_message(self):
+        """Test encoding & decoding of WaitingReply message."""
+        msg = WaitingReply(request_id=0, queue_position=2,
+                           estimated_wait=None)
+        self.validate(msg)
+
+        msg = WaitingReply(request_id=0, queue_position=0,
+                           estimated_wait=12.5)
+        self.validate(msg)
+
+    def test_lease_messages(self):
+        """Test encoding & decoding of RenewLeases and LeaseReply messages."""
+        self.validate(RenewLeases())
+        self.validate(LeaseReply(request_id=0, lease_period=300))
+
+    def test_reclaim_resources_message(self):
+        """Test encoding & decoding of ReclaimResources message."""
+        self.validate(ReclaimResources(resources=["resource1", "resource2"]))
+
+    def test_stats_messages(self):
+        """Test encoding & decoding of ServerStats and StatsReply messages."""
+        self.validate(ServerStats())
+        self.validate(StatsReply(request_id=0,
+                                 stats={"resources": {"queue_depth": 2,
+                                                      "max_latency": 0.5},
+                                        "results": {"queue_depth": 0}}))
+
     def test_release_resource_message(self):
         """Test encoding & decoding of ReleaseResources message."""
         request1 = "resource1"
@@ -117,6 +192,47 @@ class AbstractTestParser(TransactionTestCase):
         msg = ReleaseResources(requests=[request1, request2])
         self.validate(msg)
 
+    def test_negotiate_parser_message(self):
+        """Test encoding & decoding of NegotiateParser message."""
+        msg = NegotiateParser(parsers=[BinaryParser.NAME, XMLParser.NAME])
+        self.validate(msg)
+
+    def test_parser_reply_message(self):
+        """Test encoding & decoding of ParserReply message."""
+        msg = ParserReply(request_id=0, parser=BinaryParser.NAME)
+        self.validate(msg)
+
+    def test_test_run_messages(self):
+        """Test encoding & decoding of TestRunReply and ResumeTestRun."""
+        self.validate(TestRunReply(request_id=0, run_id=3))
+        self.validate(ResumeTestRun(tests={'id': 1, 'name': 'suite',
+                                           'class': DemoResourceData,
+                                           'subtests': [{'id': 2,
+                                                         'name': 'case',
+                                                         'class':
+                                                         DemoResourceData}]},
+                                    run_id=3))
+
+    def test_compressor_messages(self):
+        """Test encoding & decoding of the compressor negotiation messages."""
+        self.validate(NegotiateCompressor(compressors=["lz4", "zlib"]))
+        self.validate(CompressorReply(request_id=0, compressor="zlib"))
+        self.validate(CompressorReply(request_id=0, compressor=None))
+
+    def test_batch_events_message(self):
+        """Test encoding & decoding of BatchEvents message."""
+        events = [StartTest(test_id=2),
+                  AddResult(test_id=2, code=1, info=None),
+                  StopTest(test_id=2),
+                  UpdateRunData(run_data={'run_name': 'batched'})]
+
+        msg = BatchEvents(events=[BatchEvents.encode_event(event)
+                                  for event in events])
+        self.validate(msg)
+
+        decoded_msg = self.PARSER.decode(self.PARSER.encode(msg))
+        self.assertEqual(decoded_msg.get_messages(), events)
+
 
 class TestXMLParser(AbstractTestParser):
     """Test the XML parser module."""
@@ -126,3 +242,41 @@ class TestXMLParser(AbstractTestParser):
     def setUpClass(cls):
         """Initialize the parser."""
         cls.PARSER = XMLParser()
+
+
+class TestBinaryParser(AbstractTestParser):
+    """Test the binary parser module."""
+    __test__ = True
+
+    @classmethod
+    def setUpClass(cls):
+        """Initialize the parser."""
+        cls.PARSER = BinaryParser()
+
+    def test_basic_types(self):
+        """Test encoding & decoding of the basic types and their types."""
+        run_data = {'big': 2 ** 70, 'negative': -5, 'ratio': 0.25,
+                    'text': u'\u05e9\u05dc\u05d5\u05dd', 'flag': False,
+                    'nothing': None, 'items': [1, 'a', [2.5]]}
+
+        msg = UpdateRunData(run_data=run_data)
+        self.validate(msg)
+
+        decoded_data = self.PARSER.decode(self.PARSER.encode(msg)).run_data
+        self.assertIsInstance(decoded_data['text'], unicode)
+        self.assertIsInstance(decoded_data['flag'], bool)
+
+    def test_illegal_data(self):
+        """Test decoding truncated and unknown data fails."""
+        encoded_data = self.PARSER.encode(SuccessReply(request_id=0,
+                                                       msg_id=1))
+
+        with self.assertRaises(ParsingError):
+            self.PARSER.decode(encoded_data[:-1])
+
+        with self.assertRaises(ParsingError):
+            self.PARSER.decode(encoded_data + "N")
+
+        with self.assertRaises(ParsingError):
+            self.PARSER.decode(encoded_data.replace("SuccessReply",
+                                                    "ParsingError"))
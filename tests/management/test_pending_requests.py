@@ -0,0 +1,72 @@
+"""Test the resource manager's pool of pending requests."""
+# pylint: disable=invalid-name,too-many-public-methods
+import unittest
+from collections import namedtuple
+
+from rotest.management.server.request import Request
+from rotest.management.models.ut_models import DemoResourceData
+from rotest.management.server.pending_requests import PendingRequests
+from rotest.management.common.messages import CleanupUser, LockResources
+
+FakeWorker = namedtuple("FakeWorker", ("name",))
+
+
+class TestPendingRequests(unittest.TestCase):
+    """Test moving requests between the ready queue and the waiting set."""
+    def setUp(self):
+        """Create an empty pool."""
+        self.pending = PendingRequests()
+
+    def create_request(self, worker_name):
+        """Create a lock request of the given worker and add it to the pool.
+
+        Args:
+            worker_name (str): name of the requesting worker.
+
+        Returns:
+            Request. the added request.
+        """
+        request = Request(FakeWorker(worker_name),
+                          LockResources(descriptors=[], timeout=None))
+        self.pending.add(request)
+        return request
+
+    def test_wait_and_wake(self):
+        """Validate blocked requests are ready again once woken."""
+        first = self.create_request("client1")
+        second = self.create_request("client2")
+
+        self.pending.wait(first, [DemoResourceData])
+        self.assertEqual(self.pending.get_ready(), [second])
+        self.assertEqual(len(self.pending), 2)
+
+        self.assertEqual(self.pending.wake([DemoResourceData]), [first])
+        self.assertEqual(self.pending.get_ready(), [second, first])
+        self.assertEqual(self.pending.waiting_count, 0)
+
+    def test_pop_worker_requests(self):
+        """Validate a worker's ready and waiting requests are removed."""
+        ready = self.create_request("client1")
+        waiting = self.create_request("client1")
+        other = self.create_request("client2")
+        self.pending.wait(waiting, [DemoResourceData])
+
+        cleanup = Request(FakeWorker("client1"),
+                          CleanupUser(user_name="client1"),
+                          is_server_request=True)
+        self.pending.add(cleanup)
+
+        self.assertEqual(self.pending.pop_worker_requests("client1"),
+                         [ready, waiting])
+        self.assertFalse(self.pending.has_worker_requests("client1"))
+        self.assertEqual(self.pending.get_ready(), [other, cleanup])
+        self.assertEqual(self.pending.waiting_count, 0)
+
+    def test_remove(self):
+        """Validate removing requests updates the workers index."""
+        request = self.create_request("client1")
+        self.assertTrue(self.pending.has_worker_requests("client1"))
+
+        self.pending.remove(request)
+        self.assertNotIn(request, self.pending)
+        self.assertFalse(self.pending.has_worker_requests("client1"))
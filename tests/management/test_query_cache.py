@@ -0,0 +1,73 @@
+"""Test the resource manager's cache of resources queries results."""
+# pylint: disable=invalid-name,too-many-public-methods
+from django.test.testcases import TransactionTestCase
+
+from rotest.management.server.query_cache import QueryCache
+from rotest.management.models.ut_models import (DemoResourceData,
+                                                DemoComplexResourceData)
+
+
+class TestQueryCache(TransactionTestCase):
+    """Test caching the queries results and invalidating them."""
+    fixtures = ['resource_ut.json']
+
+    def setUp(self):
+        """Create an empty cache following the resources changes."""
+        self.cache = QueryCache()
+        self.cache.connect_signals()
+
+    def tearDown(self):
+        """Stop following the resources changes."""
+        self.cache.disconnect_signals()
+
+    def test_get_cached_result(self):
+        """Validate a cached result is returned only for the same query."""
+        self.assertIsNone(self.cache.get(DemoResourceData, {'version': 1}))
+
+        generation = self.cache.add(DemoResourceData, {'version': 1},
+                                    ["result"])
+
+        self.assertEqual(self.cache.get(DemoResourceData, {'version': 1}),
+                         (generation, ["result"]))
+        self.assertIsNone(self.cache.get(DemoResourceData, {'version': 2}))
+
+        stats = self.cache.to_dict()
+        self.assertEqual(stats["hits_count"], 1)
+        self.assertEqual(stats["misses_count"], 2)
+
+    def test_get_not_modified(self):
+        """Validate the resources aren't returned for the cached generation."""
+        generation = self.cache.add(DemoResourceData, {}, ["result"])
+
+        self.assertEqual(self.cache.get(DemoResourceData, {}, generation),
+                         (generation, None))
+        self.assertEqual(self.cache.to_dict()["not_modified_count"], 1)
+
+    def test_ownership_queries_not_cached(self):
+        """Validate queries filtering by the owner aren't cached."""
+        self.assertIsNone(self.cache.add(DemoResourceData, {'owner': ""},
+                                         ["result"]))
+        self.assertIsNone(self.cache.add(DemoResourceData,
+                                         {'owner__in': [""]}, ["result"]))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_invalidate_on_save(self):
+        """Validate saving a resource invalidates the related queries only."""
+        self.cache.add(DemoResourceData, {}, ["demo"])
+        self.cache.add(DemoComplexResourceData, {}, ["complex"])
+
+        resource = DemoResourceData.objects.get(name='available_resource1')
+        resource.version += 1
+        resource.save()
+
+        self.assertIsNone(self.cache.get(DemoResourceData, {}))
+        self.assertIsNotNone(self.cache.get(DemoComplexResourceData, {}))
+
+    def test_new_generation_after_invalidation(self):
+        """Validate a result cached again gets a new generation."""
+        generation = self.cache.add(DemoResourceData, {}, ["result"])
+
+        DemoResourceData.objects.get(name='fail_finalize_resource').delete()
+
+        self.assertNotEqual(self.cache.add(DemoResourceData, {}, ["result"]),
+                            generation)
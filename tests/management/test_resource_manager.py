@@ -9,16 +9,28 @@ TODO: add tests for complex resources.
 """
 # pylint: disable=too-many-lines
 # pylint: disable=invalid-name,too-many-public-methods,protected-access
+import os
 import time
+import shutil
+import tempfile
 from itertools import izip
 from threading import Thread
 
 from django.db.models.query_utils import Q
 from django.contrib.auth.models import User
+from rotest.management.common import messages
+from rotest.management.base_resource import BaseResource
 from rotest.management.common.utils import LOCALHOST
 from rotest.management.common.utils import HOST_PORT_SEPARATOR
+from rotest.management.common.utils import MESSAGE_MAX_LENGTH
+from rotest.management.common.parsers.xml_parser import XMLParser
+from rotest.management.common.parsers.binary_parser import BinaryParser
+from rotest.management.common.compressors import (COMPRESSORS,
+                                                  ZlibCompressor)
+from rotest.management.server.main import ResourceManagerServer
 from rotest.management.client.manager import (ClientResourceManager,
                                               ResourceRequest)
+from rotest.management.client.validation_cache import ValidationCache
 from rotest.management.common.resource_descriptor import \
                                             ResourceDescriptor as Descriptor
 from rotest.management.models.ut_models import (DemoService,
@@ -37,6 +49,60 @@ from rotest.management.common.errors import (ServerError,
 from tests.management.resource_base_test import BaseResourceManagementTest
 
 
+class SlowDemoResource(DemoResource):
+    """Fake resource, which takes a while to initialize."""
+    INITIALIZE_TIME = 1
+
+    def initialize(self):
+        """Wait for a while, then initialize the resource."""
+        time.sleep(self.INITIALIZE_TIME)
+        super(SlowDemoResource, self).initialize()
+
+
+class SlowCleanupDemoResource(DemoResource):
+    """Fake resource, which takes a while to finalize."""
+    FINALIZE_TIME = 1
+
+    def finalize(self):
+        """Wait for a while, then finalize the resource."""
+        time.sleep(self.FINALIZE_TIME)
+        super(SlowCleanupDemoResource, self).finalize()
+
+
+class FingerprintDemoResource(DemoResource):
+    """Fake resource, which declares a fingerprint of its state.
+
+    Attributes:
+        VALIDATIONS_COUNT (number): amount of validations of such resources.
+    """
+    VALIDATIONS_COUNT = 0
+
+    def validate(self):
+        """Count the validation, then validate the resource."""
+        FingerprintDemoResource.VALIDATIONS_COUNT += 1
+        return super(FingerprintDemoResource, self).validate()
+
+    def get_state_fingerprint(self):
+        """Return the version of the resource as its state's fingerprint."""
+        return str(self.data.version)
+
+
+class ParallelDemoComplexResource(BaseResource):
+    """Fake complex resource, whose sub-resources are brought up in parallel.
+
+    Unlike :class:`DemoComplexResource`, it doesn't save its own data, since
+    the client-side data of a complex resource holds its sub-resources' data
+    rather than their keys.
+    """
+    DATA_CLASS = DemoComplexResourceData
+    SUB_RESOURCES_WORKERS = 2
+
+    def create_sub_resources(self):
+        """Return an iterable to the complex resource's sub-resources."""
+        return (SlowDemoResource(data=self.data.demo1),
+                SlowDemoResource(data=self.data.demo2))
+
+
 class TestResourceManagement(BaseResourceManagementTest):
     """Resource management tests."""
     fixtures = ['resource_ut.json']
@@ -54,6 +120,7 @@ class TestResourceManagement(BaseResourceManagementTest):
 
     LOCK_TIMEOUT = 4
     CLEANUP_TIME = 1.5
+    LEASE_EXPIRATION_TIME = 2.5
 
     def setUp(self):
         """Initialize and connect a client to the resource manager."""
@@ -336,6 +403,43 @@ class TestResourceManagement(BaseResourceManagementTest):
                           descriptors=[descriptor],
                           timeout=self.LOCK_TIMEOUT)
 
+    def test_lock_resource_locked_outside_of_server(self):
+        """Lock a resource which was locked directly in the DB.
+
+        * Locks one of the matching resources directly in the DB.
+        * Requests a resource using resource client.
+        * Validates the other matching resource was locked.
+        """
+        self.get_resource(self.FREE1_NAME).update(owner="other:1234")
+
+        descriptor = Descriptor(DemoResource, ip_address="1.1.1.1")
+        resources = self.client._lock_resources(descriptors=[descriptor],
+                                                timeout=self.LOCK_TIMEOUT)
+
+        self.assertEqual(resources[0].name, self.FREE2_NAME)
+        self.get_resource(self.FREE1_NAME, owner="other:1234")
+        self.assertNotEqual(self.get_resource(self.FREE2_NAME).get().owner, "")
+
+    def test_release_resource_released_outside_of_server(self):
+        """Release a resource which was released directly in the DB.
+
+        * Locks a resource using resource client.
+        * Releases the resource directly in the DB.
+        * Releases the resource using resource client.
+        * Validates a ResourceAlreadyAvailableError is raised.
+        """
+        descriptor = Descriptor(DemoResource, name=self.FREE1_NAME)
+        resources = self.client._lock_resources(descriptors=[descriptor],
+                                                timeout=self.LOCK_TIMEOUT)
+
+        self.get_resource(self.FREE1_NAME).update(owner="")
+
+        with self.assertRaises(ResourceReleaseError) as cm:
+            self.client._release_resources(resources=resources)
+
+        self.assertEqual(cm.exception.errors[self.FREE1_NAME][0],
+                         ResourceAlreadyAvailableError.ERROR_CODE)
+
     def test_lock_unavailable_resource_timeout(self):
         """Lock an already locked resource & validate failure after timeout.
 
@@ -479,6 +583,26 @@ class TestResourceManagement(BaseResourceManagementTest):
                                 "available resource with the same parameters "
                                 "in DB found %d" % resources_num)
 
+    def test_lock_overlapping_descriptors(self):
+        """Lock resources using descriptors with overlapping matches.
+
+        * Locks two resources, the first descriptor matches both available
+          resources and the second matches only one of them.
+        * Validates every descriptor got a distinct matching resource.
+        """
+        descriptors = [Descriptor(DemoResource, ip_address="1.1.1.1"),
+                       Descriptor(DemoResource, name=self.FREE1_NAME)]
+
+        resources = self.client._lock_resources(descriptors=descriptors,
+                                                timeout=0)
+
+        self.assertEqual([resource.name for resource in resources],
+                         [self.FREE2_NAME, self.FREE1_NAME])
+
+        self.assertEqual(DemoResourceData.objects.filter(
+                name__in=(self.FREE1_NAME, self.FREE2_NAME),
+                owner="").count(), 0)
+
     def test_lock_available_and_locked_resources(self):
         """Lock both available and locked resources & validate failure.
 
@@ -892,6 +1016,275 @@ class TestResourceManagement(BaseResourceManagementTest):
                         "complex resource with name %r in DB, found %d"
                         % (self.COMPLEX_NAME, resources_num))
 
+    def test_reclaiming_resources_of_expired_lease(self):
+        """Validate the resources of a client which stopped renewing its lease
+        are reclaimed by the server.
+
+        * Shortens the server's lease period.
+        * Sends a heartbeat, so the client's resources are leased.
+        * Locks an available resource using a client which doesn't renew its
+          lease in time.
+        * Waits for the lease to expire.
+        * Validates the resource is available again.
+        """
+        self.server._resource_manager._lease_period = 1
+        self.client._request(messages.RenewLeases())
+
+        descriptor = Descriptor(DemoResource, name=self.FREE1_NAME)
+        self.client._lock_resources(descriptors=[descriptor],
+                                    timeout=self.LOCK_TIMEOUT)
+        self.assertIsNotNone(
+                    self.get_resource(self.FREE1_NAME).get().lease_expiration)
+
+        time.sleep(self.LEASE_EXPIRATION_TIME)
+
+        resource = self.get_resource(self.FREE1_NAME, owner="").get()
+        self.assertIsNone(resource.lease_expiration)
+        self.assertEqual(self.server.get_stats()["resources"]
+                         ["reclaimed_count"], 1)
+
+    def test_no_lease_without_heartbeats(self):
+        """Validate the resources of a client which never sent a heartbeat
+        aren't leased.
+
+        * Shortens the server's lease period.
+        * Locks an available resource using a client which didn't send a
+          heartbeat yet.
+        * Waits longer than the lease period.
+        * Validates the resource is still locked.
+        """
+        self.server._resource_manager._lease_period = 1
+
+        descriptor = Descriptor(DemoResource, name=self.FREE1_NAME)
+        self.client._lock_resources(descriptors=[descriptor],
+                                    timeout=self.LOCK_TIMEOUT)
+        self.assertIsNone(
+                    self.get_resource(self.FREE1_NAME).get().lease_expiration)
+
+        time.sleep(self.LEASE_EXPIRATION_TIME)
+
+        self.assertNotEqual(self.get_resource(self.FREE1_NAME).get().owner,
+                            "")
+
+    def test_heartbeats_keep_lease(self):
+        """Validate the resources of a connected client are not reclaimed.
+
+        * Shortens the server's lease period.
+        * Locks an available resource using a newly connected client.
+        * Waits longer than the lease period.
+        * Validates the resource is still locked.
+        """
+        self.server._resource_manager._lease_period = 3
+
+        client = ClientResourceManager(LOCALHOST)
+        client.lease_period = 3
+        client.connect()
+        try:
+            descriptor = Descriptor(DemoResource, name=self.FREE1_NAME)
+            client._lock_resources(descriptors=[descriptor],
+                                   timeout=self.LOCK_TIMEOUT)
+
+            time.sleep(self.LEASE_EXPIRATION_TIME * 2)
+
+            self.assertNotEqual(self.get_resource(self.FREE1_NAME).get().owner,
+                                "")
+
+        finally:
+            client.disconnect()
+
+    def restart_server(self, grace_period):
+        """Crash the server and start a new one.
+
+        The resource manager thread is stopped first, so the connections lost
+        when the server stops aren't cleaned up, as in a crash.
+
+        Args:
+            grace_period (number): seconds the clients of the crashed server
+                have to reclaim their resources.
+        """
+        self.server._resource_manager.stop()
+        self.server._resource_manager.join()
+        super(TestResourceManagement, self).tearDown()
+
+        self.server = ResourceManagerServer(log_to_screen=False)
+        self.server._resource_manager._grace_period = grace_period
+        self._server_thread = Thread(target=self.server.start)
+        self._server_thread.start()
+        time.sleep(self.SERVER_STARTUP_TIME)
+
+    def test_reclaim_resources_after_restart(self):
+        """Validate a client reclaims its resources when the server restarts.
+
+        * Locks an available resource using a client with short heartbeats.
+        * Restarts the server.
+        * Waits longer than the grace period.
+        * Validates the resource is still locked, by the reconnected client.
+        """
+        client = ClientResourceManager(LOCALHOST)
+        client.lease_period = 3
+        client.connect()
+        try:
+            descriptor = Descriptor(DemoResource, name=self.FREE1_NAME)
+            client.locked_resources = client._lock_resources(
+                                                descriptors=[descriptor],
+                                                timeout=self.LOCK_TIMEOUT)
+            previous_owner = self.get_resource(self.FREE1_NAME).get().owner
+
+            self.restart_server(grace_period=self.LEASE_EXPIRATION_TIME)
+            time.sleep(self.LEASE_EXPIRATION_TIME * 2)
+
+            owner = self.get_resource(self.FREE1_NAME).get().owner
+            self.assertNotIn(owner, ("", previous_owner))
+
+        finally:
+            # The demo resource saves its (now stale) data when finalized
+            client.locked_resources = []
+            client.disconnect()
+
+    def test_release_unclaimed_resources_after_restart(self):
+        """Validate resources not reclaimed in the grace period are released.
+
+        * Locks an available resource.
+        * Stops the client's heartbeats, so it won't reconnect.
+        * Restarts the server.
+        * Validates the resource is released after the grace period.
+        """
+        descriptor = Descriptor(DemoResource, name=self.FREE1_NAME)
+        self.client._lock_resources(descriptors=[descriptor],
+                                    timeout=self.LOCK_TIMEOUT)
+        self.client._stop_heartbeat()
+
+        self.restart_server(grace_period=1)
+        self.assertNotEqual(self.get_resource(self.FREE1_NAME).get().owner,
+                            "")
+
+        time.sleep(self.LEASE_EXPIRATION_TIME)
+
+        self.get_resource(self.FREE1_NAME, owner="")
+        self.get_resource(self.LOCKED1_NAME, owner="user1")
+
+    def test_query_server_stats(self):
+        """Validate the server's statistics count the handled requests.
+
+        * Locks an available resource.
+        * Queries the server's statistics.
+        * Validates the lock request was counted.
+        """
+        descriptor = Descriptor(DemoResource, name=self.FREE1_NAME)
+        self.client._lock_resources(descriptors=[descriptor],
+                                    timeout=self.LOCK_TIMEOUT)
+
+        stats = self.client.get_server_stats()
+
+        handler = stats["resources"]["handlers"]["lock_resources"]
+        self.assertEqual(handler["handling_time"]["count"], 1)
+        self.assertEqual(handler["errors_count"], 0)
+
+    def test_query_resources_cache(self):
+        """Validate repeated queries are answered from the caches.
+
+        * Queries the same resources three times, without a client TTL.
+        * Validates the server cached the result, and sent it only once.
+        * Validates a changed resource invalidates the cached result.
+        """
+        self.client.QUERY_CACHE_TTL = 0
+        descriptor = Descriptor(DemoResource, name=self.FREE1_NAME)
+
+        for _ in xrange(3):
+            resources = self.client.query_resources(descriptor)
+            self.assertEqual([resource.name for resource in resources],
+                             [self.FREE1_NAME])
+
+        self.assertEqual(self.client.query_misses_count, 1)
+        self.assertEqual(self.client.query_revalidations_count, 2)
+
+        cache_stats = self.client.get_server_stats()["resources"][
+                                                            "query_cache"]
+        self.assertEqual(cache_stats["hits_count"], 2)
+        self.assertEqual(cache_stats["not_modified_count"], 2)
+
+        resource, = self.get_resource(self.FREE1_NAME)
+        resource.is_usable = False
+        resource.save()
+
+        self.assertEqual(self.client.query_resources(descriptor), [])
+
+    def test_negotiated_parser(self):
+        """Validate the client negotiates the binary parser and its framing.
+
+        * Validates the client switched to the binary parser.
+        * Queries resources using a message longer than a line may be.
+        * Validates a client that prefers no parser keeps using XML.
+        """
+        self.assertEqual(self.client._parser.NAME, BinaryParser.NAME)
+
+        descriptor = Descriptor(DemoResource,
+                                name="x" * (MESSAGE_MAX_LENGTH + 1))
+        self.assertEqual(self.client.query_resources(descriptor), [])
+
+        xml_client = ClientResourceManager(LOCALHOST)
+        xml_client.PREFERRED_PARSERS = ()
+        xml_client.connect()
+        try:
+            self.assertEqual(xml_client._parser.NAME, XMLParser.NAME)
+            descriptor = Descriptor(DemoResource, name=self.FREE1_NAME)
+            self.assertEqual(len(xml_client.query_resources(descriptor)), 1)
+
+        finally:
+            xml_client.disconnect()
+
+    def test_negotiated_compressor(self):
+        """Validate the client negotiates compressing the large frames.
+
+        * Validates the client compresses using a supported compressor.
+        * Queries resources using a message larger than the threshold.
+        * Validates a client that prefers zlib compresses using zlib.
+        * Validates a client that prefers no compressor doesn't compress.
+        """
+        self.assertIn(self.client._compressor.NAME, COMPRESSORS)
+
+        descriptor = Descriptor(DemoResource,
+                                name="x" * (2 * ZlibCompressor.THRESHOLD))
+        self.assertEqual(self.client.query_resources(descriptor), [])
+
+        for preferred_compressors, compressor_name in (
+                                    ((ZlibCompressor.NAME,), "zlib"),
+                                    ((), None)):
+
+            client = ClientResourceManager(LOCALHOST)
+            client.PREFERRED_COMPRESSORS = preferred_compressors
+            client.connect()
+            try:
+                self.assertEqual(getattr(client._compressor, "NAME", None),
+                                 compressor_name)
+                descriptor = Descriptor(DemoResource, name=self.FREE1_NAME)
+                self.assertEqual(len(client.query_resources(descriptor)), 1)
+
+            finally:
+                client.disconnect()
+
+    def test_multiplexed_requests(self):
+        """Validate a waiting request doesn't block the client's requests.
+
+        * Sends a request to lock an already locked resource.
+        * Validates other requests are answered while it waits.
+        * Validates the lock request fails once its timeout expires.
+        """
+        descriptor = Descriptor(DemoResource, name=self.LOCKED1_NAME)
+        lock_request = self.client._send_request(
+                            messages.LockResources(
+                                        descriptors=[descriptor.encode()],
+                                        timeout=self.LOCK_TIMEOUT,
+                                        priority=0),
+                            timeout=self.LOCK_TIMEOUT)
+
+        descriptor = Descriptor(DemoResource, name=self.FREE1_NAME)
+        self.assertEqual(len(self.client.query_resources(descriptor)), 1)
+        self.assertIsInstance(self.client.get_server_stats(), dict)
+        self.assertFalse(lock_request.done())
+
+        self.assertRaises(ResourceUnavailableError, lock_request.get_reply)
+
     def test_encounter_unknown_user(self):
         """Lock resource by a non identified user & validate failure.
 
@@ -1246,3 +1639,228 @@ class TestResourceManagement(BaseResourceManagementTest):
 
         self.client.disconnect()
         self.assertEqual(self.client.locked_resources, [])
+
+    def test_parallel_setup(self):
+        """Validate the resources are set up in parallel, if configured to.
+
+        * Requests two resources which take a while to initialize.
+        * Checks that both were initialized at the same time.
+        """
+        self.client.setup_workers = 2
+
+        requests = [ResourceRequest('res1', SlowDemoResource,
+                                    name=self.FREE1_NAME),
+                    ResourceRequest('res2', SlowDemoResource,
+                                    name=self.FREE2_NAME)]
+
+        start_time = time.time()
+        resources = self.client.request_resources(requests)
+        setup_time = time.time() - start_time
+
+        self.assertEqual(sorted(resources.keys()), ['res1', 'res2'])
+        self.assertLess(setup_time, 2 * SlowDemoResource.INITIALIZE_TIME)
+        for name in (self.FREE1_NAME, self.FREE2_NAME):
+            self.assertTrue(self.get_resource(name)[0].initialization_flag)
+
+    def test_parallel_setup_failure(self):
+        """Validate a failure in a parallel setup cleans up all the resources.
+
+        * Requests two resources, one of which fails to initialize.
+        * Checks that the other resource was finalized.
+        * Checks that both resources were released.
+        """
+        self.client.setup_workers = 2
+        db_res = self.get_resource(self.FREE2_NAME)[0]
+        db_res.fails_on_initialize = True
+        db_res.save()
+
+        requests = [ResourceRequest('res1', DemoResource,
+                                    name=self.FREE1_NAME),
+                    ResourceRequest('res2', DemoResource,
+                                    name=self.FREE2_NAME)]
+
+        self.assertRaises(RuntimeError, self.client.request_resources,
+                          requests)
+
+        self.assertEqual(self.client.locked_resources, [])
+        db_res = self.get_resource(self.FREE1_NAME, owner="")[0]
+        self.assertTrue(db_res.initialization_flag)
+        self.assertTrue(db_res.finalization_flag)
+        self.get_resource(self.FREE2_NAME, owner="")
+
+    def test_parallel_sub_resources_setup(self):
+        """Validate sub-resources are set up in parallel, if declared so.
+
+        * Requests a complex resource whose sub-resources take a while to
+          initialize, and can be brought up in parallel.
+        * Checks that the sub-resources were initialized at the same time.
+        """
+        requests = [ResourceRequest('res1', ParallelDemoComplexResource,
+                                    name=self.COMPLEX_NAME)]
+
+        start_time = time.time()
+        resources = self.client.request_resources(requests)
+        setup_time = time.time() - start_time
+
+        self.assertLess(setup_time, 2 * SlowDemoResource.INITIALIZE_TIME)
+        for sub_resource in resources.res1.get_sub_resources():
+            self.assertTrue(self.get_resource(
+                                sub_resource.name)[0].initialization_flag)
+
+    def test_parallel_sub_resources_failure(self):
+        """Validate a failing sub-resource fails its parallel setup.
+
+        * Requests a complex resource, one of whose sub-resources fails to
+          initialize.
+        * Checks that the other sub-resource was initialized regardless.
+        * Checks that the complex resource was released.
+        """
+        complex_data = DemoComplexResourceData.objects.get(
+                                                    name=self.COMPLEX_NAME)
+        complex_data.demo2.fails_on_initialize = True
+        complex_data.demo2.save()
+
+        requests = [ResourceRequest('res1', ParallelDemoComplexResource,
+                                    name=self.COMPLEX_NAME)]
+
+        self.assertRaises(RuntimeError, self.client.request_resources,
+                          requests)
+
+        self.assertTrue(self.get_resource(
+                        complex_data.demo1.name)[0].initialization_flag)
+        complex_data = DemoComplexResourceData.objects.get(
+                                                    name=self.COMPLEX_NAME)
+        self.assertTrue(complex_data.is_available())
+
+    def test_parallel_cleanup(self):
+        """Validate the resources are cleaned up in parallel, if configured to.
+
+        * Locks two resources which take a while to finalize.
+        * Checks that both were finalized at the same time, and released.
+        """
+        self.client.keep_resources = False
+        self.client.cleanup_workers = 2
+
+        requests = [ResourceRequest('res1', SlowCleanupDemoResource,
+                                    name=self.FREE1_NAME),
+                    ResourceRequest('res2', SlowCleanupDemoResource,
+                                    name=self.FREE2_NAME)]
+
+        resources = self.client.request_resources(requests)
+
+        start_time = time.time()
+        self.client.release_resources(resources)
+        cleanup_time = time.time() - start_time
+
+        self.assertLess(cleanup_time,
+                        2 * SlowCleanupDemoResource.FINALIZE_TIME)
+        for name in (self.FREE1_NAME, self.FREE2_NAME):
+            self.assertTrue(self.get_resource(
+                                    name, owner="")[0].finalization_flag)
+
+    def test_early_release(self):
+        """Validate resources are released once cleaned up, if configured to.
+
+        * Locks a resource which takes a while to finalize, and another one.
+        * Checks that the other resource is released while the first one
+          is still being finalized.
+        """
+        self.client.keep_resources = False
+        self.client.cleanup_workers = 2
+        self.client.early_release = True
+
+        requests = [ResourceRequest('res1', DemoResource,
+                                    name=self.FREE1_NAME),
+                    ResourceRequest('res2', SlowCleanupDemoResource,
+                                    name=self.FREE2_NAME)]
+
+        resources = self.client.request_resources(requests)
+
+        release_thread = Thread(target=self.client.release_resources,
+                                args=(resources,))
+        release_thread.start()
+        time.sleep(SlowCleanupDemoResource.FINALIZE_TIME / 2.0)
+
+        self.get_resource(self.FREE1_NAME, owner="")
+        self.assertNotEqual(self.get_resource(self.FREE2_NAME)[0].owner, "")
+
+        release_thread.join()
+        self.get_resource(self.FREE2_NAME, owner="")
+        self.assertEqual(self.client.locked_resources, [])
+
+    def test_validation_cache(self):
+        """Validate recently validated resources aren't validated again.
+
+        * Locks a resource which declares a fingerprint, and validates it.
+        * Checks that locking it again skips its validation.
+        * Checks that releasing it dirty drops its cached validation.
+        """
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.client.keep_resources = False
+        self.client.validation_cache = ValidationCache(
+                            os.path.join(cache_dir, "cache.json"), ttl=60)
+
+        requests = [ResourceRequest('res1', FingerprintDemoResource,
+                                    name=self.FREE1_NAME)]
+
+        FingerprintDemoResource.VALIDATIONS_COUNT = 0
+        for dirty, expected_count in ((False, 1), (True, 1), (False, 2)):
+            resources = self.client.request_resources(requests)
+            self.assertEqual(FingerprintDemoResource.VALIDATIONS_COUNT,
+                             expected_count)
+
+            self.client.release_resources(resources, dirty=dirty)
+
+        self.assertEqual(self.client.validation_cache.hits_count, 1)
+        self.assertEqual(self.client.validation_cache.misses_count, 2)
+
+    def test_prefetch_resources(self):
+        """Validate prefetched resources are handed over to the next request.
+
+        * Locks a resource, and prefetches it with another resource which
+          takes a while to initialize.
+        * Checks that only the other resource was prefetched.
+        * Checks that the next request gets the prefetched resources, without
+          initializing them again.
+        """
+        requests = [ResourceRequest('res1', DemoResource,
+                                    name=self.FREE1_NAME)]
+        resources = self.client.request_resources(requests)
+        resource1 = resources.res1
+
+        requests.append(ResourceRequest('res2', SlowDemoResource,
+                                        name=self.FREE2_NAME))
+        self.client.prefetch_resources(requests)
+        self.client.release_resources(resources)
+        time.sleep(SlowDemoResource.INITIALIZE_TIME * 1.5)
+
+        start_time = time.time()
+        resources = self.client.request_resources(requests)
+        request_time = time.time() - start_time
+
+        self.assertLess(request_time, SlowDemoResource.INITIALIZE_TIME)
+        self.assertIs(resources.res1, resource1)
+        self.assertEqual(resources.res2.name, self.FREE2_NAME)
+        self.assertItemsEqual(self.client.locked_resources,
+                              resources.values())
+
+    def test_release_unused_prefetched_resources(self):
+        """Validate prefetched resources which aren't used are released.
+
+        * Prefetches a resource, then requests another resource.
+        * Checks that the prefetched resource was finalized and released.
+        """
+        self.client.prefetch_resources([ResourceRequest(
+                                            'res1', DemoResource,
+                                            name=self.FREE2_NAME)])
+
+        resources = self.client.request_resources([ResourceRequest(
+                                            'res1', DemoResource,
+                                            name=self.FREE1_NAME)])
+
+        self.assertEqual(resources.res1.name, self.FREE1_NAME)
+        self.assertEqual(self.client.locked_resources, [resources.res1])
+        db_res = self.get_resource(self.FREE2_NAME, owner="")[0]
+        self.assertTrue(db_res.initialization_flag)
+        self.assertTrue(db_res.finalization_flag)
@@ -0,0 +1,174 @@
+"""Test the resource manager's in-memory resources index."""
+# pylint: disable=invalid-name,too-many-public-methods,no-self-use
+from django.test.testcases import TransactionTestCase
+
+from rotest.management.models.resource_data import ResourceData
+from rotest.management.server.resources_index import ResourcesIndex
+from rotest.management.models.ut_models import (DemoResourceData,
+                                                DemoComplexResourceData)
+
+
+class TestResourcesIndex(TransactionTestCase):
+    """Test looking up resources in the index and keeping it consistent."""
+    fixtures = ['resource_ut.json']
+
+    USER_NAME = 'localhost:1234'
+    GROUP_IDS = set([1])
+
+    def setUp(self):
+        """Build the index from the fixture's resources."""
+        self.index = ResourcesIndex()
+        self.index.load()
+
+    def get_id(self, name):
+        """Return the id of the resource with the given name."""
+        return ResourceData.objects.get(name=name).pk
+
+    def test_load(self):
+        """Validate all the resources are indexed with their leaf types."""
+        self.assertEqual(len(self.index), ResourceData.objects.count())
+
+        complex_id = self.get_id('complex_resource1')
+        self.assertEqual(self.index.get_entry(complex_id).type,
+                         DemoComplexResourceData)
+        self.assertEqual(self.index.get_tree_ids(complex_id),
+                         [complex_id,
+                          self.get_id('available_resource1'),
+                          self.get_id('available_resource2')])
+
+    def test_find_available(self):
+        """Validate only free, usable resources of the group are found."""
+        available_ids = self.index.find_available(DemoResourceData,
+                                                  {'ip_address': '1.1.1.1'},
+                                                  self.USER_NAME,
+                                                  self.GROUP_IDS)
+
+        self.assertEqual(available_ids,
+                         [self.get_id('available_resource1'),
+                          self.get_id('available_resource2')])
+
+        available_ids = self.index.find_available(ResourceData,
+                                                  {'name': 'locked_resource1'},
+                                                  self.USER_NAME,
+                                                  self.GROUP_IDS)
+        self.assertEqual(available_ids, [])
+
+        available_ids = self.index.find_available(
+                                            DemoResourceData,
+                                            {'name': 'other_group_resource'},
+                                            self.USER_NAME,
+                                            self.GROUP_IDS)
+        self.assertEqual(available_ids, [])
+
+    def test_find_available_with_db_lookups(self):
+        """Validate properties that can't be matched in-memory are queried."""
+        available_ids = self.index.find_available(DemoResourceData,
+                                                  {'version__gte': 2,
+                                                   'ip_address': '1.1.1.1'},
+                                                  self.USER_NAME,
+                                                  self.GROUP_IDS)
+
+        self.assertEqual(available_ids, [self.get_id('available_resource2')])
+
+    def test_complex_resource_availability(self):
+        """Validate a complex resource is unavailable if a sub is locked."""
+        complex_id = self.get_id('complex_resource1')
+        sub_resource_id = self.get_id('available_resource2')
+        self.assertTrue(self.index.is_available(complex_id, self.USER_NAME))
+
+        self.index.set_owner([sub_resource_id], 'other:1234')
+        self.assertFalse(self.index.is_available(complex_id, self.USER_NAME))
+        self.assertEqual(self.index.get_owned_ids('other:1234'),
+                         [sub_resource_id])
+
+    def test_reserved_resources_first(self):
+        """Validate resources reserved for the user are found first."""
+        reserved_id = self.get_id('available_resource2')
+        ResourceData.objects.filter(pk=reserved_id).update(
+                                                        reserved='localhost')
+        self.index.sync_states([reserved_id])
+
+        available_ids = self.index.find_available(DemoResourceData,
+                                                  {'ip_address': '1.1.1.1'},
+                                                  self.USER_NAME,
+                                                  self.GROUP_IDS)
+
+        self.assertEqual(available_ids[0], reserved_id)
+
+    def test_saved_resources_are_reloaded(self):
+        """Validate resources saved in-process are reloaded on lookup."""
+        self.index.connect_signals()
+        try:
+            resource = DemoResourceData.objects.get(name='available_resource1')
+            resource.ip_address = '2.2.2.2'
+            resource.save()
+
+            new_resource = DemoResourceData(name='new_resource', version=1,
+                                            ip_address='2.2.2.2')
+            new_resource.save()
+
+        finally:
+            self.index.disconnect_signals()
+
+        available_ids = self.index.find_available(DemoResourceData,
+                                                  {'ip_address': '2.2.2.2'},
+                                                  self.USER_NAME,
+                                                  self.GROUP_IDS)
+
+        self.assertEqual(available_ids, [resource.pk, new_resource.pk])
+
+    def test_check_consistency(self):
+        """Validate changes made directly in the DB are detected."""
+        self.assertEqual(self.index.check_consistency(), [])
+
+        ResourceData.objects.filter(name='locked_resource1').update(owner='')
+        DemoResourceData.objects.filter(name='fail_finalize_resource').delete()
+
+        self.assertItemsEqual(self.index.check_consistency(repair=True),
+                              ['locked_resource1', 'fail_finalize_resource'])
+        self.assertEqual(self.index.check_consistency(), [])
+        self.assertIsNone(self.index.get_id('fail_finalize_resource'))
+
+    def test_field_index_follows_changes(self):
+        """Validate the indexed fields are updated when resources change."""
+        self.assertEqual(self.index.find_available(DemoResourceData,
+                                                   {'ip_address': '2.2.2.2'},
+                                                   self.USER_NAME,
+                                                   self.GROUP_IDS), [])
+
+        resource_id = self.get_id('available_resource1')
+        DemoResourceData.objects.filter(pk=resource_id).update(
+                                                    ip_address='2.2.2.2')
+        self.index.mark_dirty([resource_id])
+
+        self.assertEqual(self.index.find_available(DemoResourceData,
+                                                   {'ip_address': '2.2.2.2'},
+                                                   self.USER_NAME,
+                                                   self.GROUP_IDS),
+                         [resource_id])
+        self.assertEqual(self.index.find_available(DemoResourceData,
+                                                   {'ip_address': '1.1.1.1'},
+                                                   self.USER_NAME,
+                                                   self.GROUP_IDS),
+                         [self.get_id('available_resource2')])
+
+        ResourceData.objects.filter(pk=resource_id).update(is_usable=False)
+        self.index.sync_states([resource_id])
+        self.assertEqual(self.index.find_available(DemoResourceData,
+                                                   {'ip_address': '2.2.2.2'},
+                                                   self.USER_NAME,
+                                                   self.GROUP_IDS), [])
+
+    def test_check_consistency_in_batches(self):
+        """Validate consecutive checks of batches cover all the resources."""
+        ResourceData.objects.filter(name='locked_resource1').update(owner='')
+        DemoResourceData.objects.filter(name='fail_finalize_resource').delete()
+
+        inconsistent_names = []
+        for _ in xrange(len(self.index)):
+            inconsistent_names.extend(
+                    self.index.check_consistency(repair=True, batch_size=3))
+
+        self.assertItemsEqual(inconsistent_names,
+                              ['locked_resource1', 'fail_finalize_resource'])
+        self.assertEqual(self.index.check_consistency(), [])
@@ -1,10 +1,19 @@
 """Tests for the result client-server mechanism."""
 # pylint: disable=invalid-name,too-many-public-methods,protected-access
+import os
+import time
+import shutil
+import socket
+import tempfile
+from glob import glob
+
 from rotest.core.models import GeneralData
 from rotest.core.models.run_data import RunData
 from rotest.management.common.utils import LOCALHOST
+from rotest.management.common.errors import ServerError
 from rotest.common.django_utils.common import get_sub_model
 from rotest.core.models.case_data import TestOutcome, CaseData
+from rotest.management.client.result_spool import ResultSpool
 from rotest.management.client.result_client import ClientResultManager
 from rotest.management.models.ut_models import DemoResource, DemoResourceData
 
@@ -21,12 +30,14 @@ class TestResultManagement(BaseResourceManagementTest):
         """Initialize and connect a client to the server."""
         super(TestResultManagement, self).setUp()
 
-        self.client = ClientResultManager(LOCALHOST)
+        self.spool_dir = tempfile.mkdtemp()
+        self.client = ClientResultManager(LOCALHOST, spool_dir=self.spool_dir)
         self.client.connect()
 
     def tearDown(self):
         """Disconnect the client from the server."""
         self.client.disconnect()
+        shutil.rmtree(self.spool_dir)
 
         super(TestResultManagement, self).tearDown()
 
@@ -119,6 +130,7 @@ class TestResultManagement(BaseResourceManagementTest):
         main_test = MockSuite1(run_data=run_data)
 
         self.client.start_test_run(main_test)
+        self.client.flush()
 
         self._validate_tests_tree(main_test)
 
@@ -139,9 +151,11 @@ class TestResultManagement(BaseResourceManagementTest):
         test_case = next(iter(main_test))
 
         self.client.start_test_run(main_test)
+        self.client.flush()
         self._validate_has_times(test_case, start_time=False)
 
         self.client.start_test(test_case)
+        self.client.flush()
         self._validate_has_times(test_case, start_time=True)
 
     def test_stop_test(self):
@@ -153,12 +167,15 @@ class TestResultManagement(BaseResourceManagementTest):
         test_case = next(iter(main_test))
 
         self.client.start_test_run(main_test)
+        self.client.flush()
         self._validate_has_times(test_case, start_time=False, end_time=False)
 
         self.client.start_test(test_case)
+        self.client.flush()
         self._validate_has_times(test_case, start_time=True, end_time=False)
 
         self.client.stop_test(test_case)
+        self.client.flush()
         self._validate_has_times(test_case, start_time=True, end_time=True)
 
     def test_update_resources(self):
@@ -175,6 +192,7 @@ class TestResultManagement(BaseResourceManagementTest):
         self.client.start_test_run(main_test)
         self.client.start_test(test_case)
         self.client.update_resources(test_case)
+        self.client.flush()
 
         test_data = CaseData.objects.get(name=test_case.data.name)
 
@@ -199,9 +217,11 @@ class TestResultManagement(BaseResourceManagementTest):
         main_test = MockTestSuite(run_data=run_data)
 
         self.client.start_test_run(main_test)
+        self.client.flush()
         self._validate_has_times(main_test, start_time=False)
 
         self.client.start_composite(main_test)
+        self.client.flush()
         self._validate_has_times(main_test, start_time=True)
 
     def test_stop_composite(self):
@@ -212,12 +232,15 @@ class TestResultManagement(BaseResourceManagementTest):
         main_test = MockTestSuite(run_data=run_data)
 
         self.client.start_test_run(main_test)
+        self.client.flush()
         self._validate_has_times(main_test, start_time=False, end_time=False)
 
         self.client.start_composite(main_test)
+        self.client.flush()
         self._validate_has_times(main_test, start_time=True, end_time=False)
 
         self.client.stop_composite(main_test)
+        self.client.flush()
         self._validate_has_times(main_test, start_time=True, end_time=True)
 
     def test_add_result(self):
@@ -239,6 +262,7 @@ class TestResultManagement(BaseResourceManagementTest):
         self.client.start_test_run(main_test)
         self.client.start_composite(main_test)
         self.client.start_test(test_case)
+        self.client.flush()
 
         # Check that the results are still None.
         self._validate_test_result(main_test, success=None)
@@ -250,8 +274,183 @@ class TestResultManagement(BaseResourceManagementTest):
         ERROR_STRING = 'test error'
         self.client.add_result(test_case, TestOutcome.ERROR, ERROR_STRING)
         self.client.stop_composite(main_test)
+        self.client.flush()
 
         # Check that the results are updated.
         self._validate_test_result(test_case, success=False,
                                error_tuple=(TestOutcome.ERROR, ERROR_STRING))
         self._validate_test_result(main_test, success=False)
+
+    def test_stop_test_run(self):
+        """Test that stop_test_run waits for the reports of the run.
+
+        * Reports the events of a run without waiting for the replies.
+        * Stops the run and validates all the reports were handled.
+        """
+        MockTestSuite.components = (SuccessCase,)
+
+        run_data = RunData(run_name=None)
+        main_test = MockTestSuite(run_data=run_data)
+        test_case = next(iter(main_test))
+
+        self.client.start_test_run(main_test)
+        self.client.start_composite(main_test)
+        self.client.start_test(test_case)
+        self.client.add_result(test_case, TestOutcome.SUCCESS)
+        self.client.stop_test(test_case)
+        self.client.stop_composite(main_test)
+
+        run_data.run_name = 'stopped_run'
+        self.client.stop_test_run(run_data)
+
+        self._validate_has_times(test_case, start_time=True, end_time=True)
+        self._validate_test_result(test_case, success=True)
+        self._validate_test_result(main_test, success=True)
+        self.assertEqual(RunData.objects.get().run_name, 'stopped_run')
+
+    def test_report_error(self):
+        """Test that a failed report raises its error when flushing.
+
+        * Reports the start of a test which isn't in the run.
+        * Validates the server's error is raised by flush, and only once.
+        * Validates the failed report was moved to the rejected records.
+        """
+        MockTestSuite.components = (SuccessCase,)
+
+        main_test = MockTestSuite(run_data=RunData(run_name=None))
+        self.client.start_test_run(main_test)
+
+        test_case = next(iter(main_test))
+        test_case.identifier = -1
+        self.client.start_test(test_case)
+
+        self.assertRaises(ServerError, self.client.flush)
+        self.client.flush()
+
+        self.assertTrue(os.path.getsize(self.client._spool.path +
+                                        ResultSpool.REJECTED_EXTENSION) > 0)
+
+    def get_batches_count(self):
+        """Return the amount of event batches the server handled.
+
+        Returns:
+            number. the amount of handled BatchEvents requests.
+        """
+        handlers = self.client.get_server_stats()["results"]["handlers"]
+        if "batch_events" not in handlers:
+            return 0
+
+        return handlers["batch_events"]["handling_time"]["count"]
+
+    def test_batched_events(self):
+        """Test that the spooled events are sent in batches.
+
+        * Reports more events than fit in a batch, within the batch window.
+        * Validates the events were sent in two batches.
+        """
+        self.client.BATCH_WINDOW = 0.5
+        self.client.BATCH_MAX_EVENTS = 3
+        MockTestSuite.components = (MockCase1, MockCase2)
+
+        main_test = MockTestSuite(run_data=RunData(run_name=None))
+        self.client.start_test_run(main_test)
+
+        for test_case in main_test:
+            self.client.start_test(test_case)
+            self.client.stop_test(test_case)
+
+        self.client.stop_composite(main_test)
+
+        self.client.flush()
+        self.assertEqual(self.get_batches_count(), 2)
+        for test_case in main_test:
+            self._validate_has_times(test_case, start_time=True,
+                                     end_time=True)
+
+    def test_batch_window(self):
+        """Test that queued events are sent once the batch window passes."""
+        MockTestSuite.components = (SuccessCase,)
+
+        main_test = MockTestSuite(run_data=RunData(run_name=None))
+        test_case = next(iter(main_test))
+        self.client.start_test_run(main_test)
+
+        self.client.start_test(test_case)
+        self.client.stop_test(test_case)
+
+        time.sleep(self.client.BATCH_WINDOW * 10)
+        self.assertEqual(self.get_batches_count(), 1)
+        self._validate_has_times(test_case, start_time=True, end_time=True)
+
+    def test_resume_run(self):
+        """Test that the run is resumed after reconnecting to the server.
+
+        * Starts a run and drops the connection to the server.
+        * Validates the following events are sent over a new connection.
+        """
+        MockTestSuite.components = (SuccessCase,)
+
+        main_test = MockTestSuite(run_data=RunData(run_name=None))
+        test_case = next(iter(main_test))
+        self.client.start_test_run(main_test)
+        self.client.flush()
+
+        with self.client._request_lock:
+            self.client._drop_connection()
+
+        self.client.start_test(test_case)
+        self.client.stop_test(test_case)
+        self.client.flush()
+
+        self._validate_has_times(test_case, start_time=True, end_time=True)
+
+    def test_unreachable_server(self):
+        """Test that results which weren't sent are sent by the next run.
+
+        * Reports a run while the server is unreachable.
+        * Validates the run isn't delayed, and the results are spooled.
+        * Connects another client, and validates it sends the results.
+        """
+        MockTestSuite.components = (SuccessCase,)
+
+        run_data = RunData(run_name='unreachable_run')
+        main_test = MockTestSuite(run_data=run_data)
+        test_case = next(iter(main_test))
+
+        unused_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        unused_socket.bind((LOCALHOST, 0))
+        client = ClientResultManager(LOCALHOST, spool_dir=self.spool_dir)
+        client._port = unused_socket.getsockname()[1]
+        client.FLUSH_TIMEOUT = 0.5
+        unused_socket.close()
+
+        client.connect()
+        try:
+            client.start_test_run(main_test)
+            client.start_composite(main_test)
+            client.start_test(test_case)
+            client.add_result(test_case, TestOutcome.SUCCESS)
+            client.stop_test(test_case)
+            client.stop_composite(main_test)
+            client.stop_test_run(run_data)
+
+        finally:
+            client.disconnect()
+
+        self.assertFalse(RunData.objects.exists())
+        self.assertEqual(len(glob(os.path.join(self.spool_dir, "*.spool"))),
+                         2)
+
+        client = ClientResultManager(LOCALHOST, spool_dir=self.spool_dir)
+        client.connect()
+        try:
+            client.flush()
+
+        finally:
+            client.disconnect()
+
+        self.assertEqual(RunData.objects.get().run_name, 'unreachable_run')
+        self._validate_has_times(test_case, start_time=True, end_time=True)
+        self._validate_test_result(test_case, success=True)
+        self.assertEqual(len(glob(os.path.join(self.spool_dir, "*.spool"))),
+                         1)
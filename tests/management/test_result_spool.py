@@ -0,0 +1,120 @@
+"""Test the local spool of the results reported to the server."""
+# pylint: disable=invalid-name,too-many-public-methods,protected-access
+import os
+import shutil
+import tempfile
+import unittest
+
+from rotest.management.common.utils import FRAME_HEADER
+from rotest.management.client.result_spool import ResultSpool
+
+
+class TestResultSpool(unittest.TestCase):
+    """Test appending, acknowledging and recovering spooled records."""
+    def setUp(self):
+        """Create a spool in a temporary directory."""
+        self.spool_dir = tempfile.mkdtemp()
+        self.spool = ResultSpool.create(self.spool_dir)
+
+    def tearDown(self):
+        """Remove the spools' directory."""
+        self.spool.close()
+        shutil.rmtree(self.spool_dir)
+
+    def reopen(self):
+        """Close the spool and open it again, like the next run does.
+
+        Returns:
+            ResultSpool. the reopened spool.
+        """
+        self.spool.close()
+        self.spool = ResultSpool(self.spool.path)
+        return self.spool
+
+    def test_acknowledge(self):
+        """Validate acknowledged records aren't read again."""
+        for record in ("first", "", "third"):
+            self.spool.append(record)
+
+        records = self.spool.read(2)
+        self.assertEqual([record for record, _ in records], ["first", ""])
+
+        self.spool.acknowledge(records[0][1])
+        self.assertEqual([record for record, _ in self.spool.read(10)],
+                         ["", "third"])
+        self.assertTrue(self.spool.has_pending())
+
+    def test_truncate_when_shipped(self):
+        """Validate the spool is truncated once all its records were acked."""
+        self.spool.append("first")
+        self.spool.append("second")
+        records = self.spool.read(10)
+
+        self.spool.acknowledge(records[-1][1])
+        self.assertFalse(self.spool.has_pending())
+        self.assertEqual(os.path.getsize(self.spool.path), 0)
+
+        self.spool.append("third")
+        self.assertEqual(self.spool.read(10), [("third", records[0][1])])
+
+    def test_recover_acknowledged_offset(self):
+        """Validate a reopened spool resumes after the acknowledged records."""
+        for record in ("first", "second", "third"):
+            self.spool.append(record)
+
+        self.spool.acknowledge(self.spool.read(1)[0][1])
+        self.spool.set_run("run")
+
+        spool = self.reopen()
+        self.assertEqual([record for record, _ in spool.read(10)],
+                         ["second", "third"])
+        self.assertEqual(spool.get_run(), "run")
+
+    def test_partially_written_record(self):
+        """Validate a partially written record is dropped on reopening."""
+        self.spool.append("first")
+        with open(self.spool.path, "ab") as spool_file:
+            spool_file.write(FRAME_HEADER.pack(16) + "part")
+
+        spool = self.reopen()
+        self.assertEqual([record for record, _ in spool.read(10)], ["first"])
+
+    def test_reject(self):
+        """Validate rejected records are moved aside, and aren't read again."""
+        for record in ("first", "second", "third"):
+            self.spool.append(record)
+
+        self.spool.reject(self.spool.read(2))
+        self.assertEqual([record for record, _ in self.spool.read(10)],
+                         ["third"])
+
+        with open(self.spool.path + ResultSpool.REJECTED_EXTENSION,
+                  "rb") as rejected_file:
+            self.assertEqual(rejected_file.read(),
+                             FRAME_HEADER.pack(5) + "first" +
+                             FRAME_HEADER.pack(6) + "second")
+
+    def test_orphans(self):
+        """Validate only spools which aren't open are found as orphans."""
+        self.assertRaises(IOError, ResultSpool, self.spool.path)
+        self.assertEqual(ResultSpool.find_orphans(self.spool_dir), [])
+
+        self.spool.append("record")
+        self.spool.close()
+        orphans = ResultSpool.find_orphans(self.spool_dir)
+        self.assertEqual([orphan.path for orphan in orphans],
+                         [self.spool.path])
+        self.assertEqual(orphans[0].read(10)[0][0], "record")
+
+        self.spool = orphans[0]
+
+    def test_remove_shipped_spool(self):
+        """Validate closing a shipped spool removes its files."""
+        self.spool.append("record")
+        self.spool.set_run("run")
+        self.spool.acknowledge(self.spool.read(1)[0][1])
+
+        self.spool.close()
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+        self.spool = ResultSpool.create(self.spool_dir)
@@ -0,0 +1,40 @@
+"""Test the resource manager's result writers pool."""
+# pylint: disable=invalid-name,too-many-public-methods,protected-access
+import unittest
+
+from rotest.management.server.request import Request
+from rotest.management.server.result_writers import ResultWritersPool
+from rotest.management.common.messages import (StartTest,
+                                               AddResult,
+                                               LockResources)
+
+
+class TestResultWritersPool(unittest.TestCase):
+    """Test routing results requests to the writers."""
+    WRITERS_AMOUNT = 3
+
+    def setUp(self):
+        """Create a pool of writers, without starting them."""
+        self.pool = ResultWritersPool(reactor=None, logger=None,
+                                      writers_amount=self.WRITERS_AMOUNT)
+
+    def test_handles(self):
+        """Validate only results messages are handled by the writers."""
+        self.assertTrue(self.pool.handles(StartTest(test_id=1)))
+        self.assertFalse(self.pool.handles(LockResources(descriptors=[])))
+
+    def test_worker_requests_order(self):
+        """Validate a worker's requests are queued in order to one writer."""
+        worker = object()
+        requests = [Request(worker, StartTest(test_id=1)),
+                    Request(worker, AddResult(test_id=1, code=0, info="")),
+                    Request(worker, StartTest(test_id=2))]
+
+        for request in requests:
+            self.pool.put(request)
+
+        queued_requests = [list(writer.request_queue.queue)
+                           for writer in self.pool._writers]
+
+        self.assertIn(requests, queued_requests)
+        self.assertEqual(self.pool.get_stats()["queue_depth"], len(requests))
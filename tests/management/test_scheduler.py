@@ -0,0 +1,99 @@
+"""Test the resource manager's lock requests scheduler."""
+# pylint: disable=invalid-name,too-many-public-methods,no-self-use
+import unittest
+
+from rotest.management.server.request import Request
+from rotest.management.common.messages import LockResources
+from rotest.management.server.scheduler import LockScheduler
+from rotest.management.common.resource_descriptor import ResourceDescriptor
+from rotest.management.models.ut_models import (DemoResource,
+                                                DemoResourceData,
+                                                DemoComplexResource,
+                                                DemoComplexResourceData)
+
+
+class TestLockScheduler(unittest.TestCase):
+    """Test ordering lock requests and holding resources for them."""
+    def setUp(self):
+        """Create an empty scheduler."""
+        self.scheduler = LockScheduler()
+
+    def create_request(self, creation_time, priority=None,
+                       resource_types=(DemoResource,)):
+        """Create a lock request for resources of the given types.
+
+        Args:
+            creation_time (number): arrival time of the request.
+            priority (number): priority of the request.
+            resource_types (tuple): types of the requested resources.
+
+        Returns:
+            Request. the lock request.
+        """
+        descriptors = [ResourceDescriptor(resource_type).encode()
+                       for resource_type in resource_types]
+
+        request = Request(None, LockResources(descriptors=descriptors,
+                                              timeout=None,
+                                              priority=priority))
+        request.creation_time = creation_time
+        return request
+
+    def test_sort(self):
+        """Validate requests are sorted by priority, then by arrival."""
+        first = self.create_request(1)
+        second = self.create_request(2)
+        urgent = self.create_request(3, priority=1)
+
+        self.assertEqual(self.scheduler.sort([second, urgent, first], now=3),
+                         [urgent, first, second])
+
+    def test_aging(self):
+        """Validate waiting requests gain priority over time."""
+        old = self.create_request(0)
+        urgent = self.create_request(LockScheduler.AGING_INTERVAL * 2,
+                                     priority=1)
+
+        now = LockScheduler.AGING_INTERVAL * 2
+        self.assertEqual(self.scheduler.get_priority(old, now), 2)
+        self.assertEqual(self.scheduler.sort([urgent, old], now),
+                         [old, urgent])
+
+    def test_held_resources(self):
+        """Validate only the head of the queue holds resources."""
+        head = self.create_request(1, resource_types=(DemoResource,
+                                                      DemoComplexResource))
+        second = self.create_request(2, resource_types=(DemoResource,
+                                                        DemoComplexResource))
+        self.scheduler.queue(second, DemoComplexResourceData, [2], 1)
+        self.scheduler.rank_queue(now=3)
+        self.scheduler.queue(head, DemoComplexResourceData, [1], 1)
+
+        later = self.create_request(3)
+        self.assertEqual(self.scheduler.get_held_ids(later), set([1]))
+        self.assertEqual(self.scheduler.get_held_ids(second), set([1]))
+        self.assertEqual(self.scheduler.get_held_ids(head), set())
+
+        urgent = self.create_request(3, priority=1)
+        self.assertEqual(self.scheduler.get_held_ids(urgent), set())
+
+        self.scheduler.dequeue(head)
+        self.assertEqual(self.scheduler.get_held_ids(later), set([2]))
+
+    def test_position_and_estimated_wait(self):
+        """Validate the queue position and wait estimation of requests."""
+        first = self.create_request(1)
+        complex_request = self.create_request(
+                                    2, resource_types=(DemoComplexResource,))
+        second = self.create_request(3)
+        for request in (first, complex_request, second):
+            self.scheduler.queue(request, DemoResourceData, [], 2)
+
+        self.scheduler.rank_queue(now=3)
+        self.assertEqual(self.scheduler.get_position(first), 0)
+        self.assertEqual(self.scheduler.get_position(second), 1)
+        self.assertIsNone(self.scheduler.estimate_wait(second, 1))
+
+        self.scheduler.record_lock([1], now=0)
+        self.scheduler.record_release(1, DemoResourceData, now=10)
+        self.assertEqual(self.scheduler.estimate_wait(second, 1), 10)
@@ -0,0 +1,105 @@
+"""Test the client's buffered socket reader."""
+# pylint: disable=invalid-name,too-many-public-methods,protected-access
+import socket
+import unittest
+from threading import Thread
+
+from rotest.management.client.socket_reader import SocketReader
+from rotest.management.common.utils import FRAME_HEADER, MESSAGE_DELIMITER
+
+
+class TestSocketReader(unittest.TestCase):
+    """Test reading delimited and length-prefixed messages from a socket."""
+    def setUp(self):
+        """Create a connected pair of sockets."""
+        self.sender, self.receiver = socket.socketpair()
+        self.reader = SocketReader(self.receiver)
+
+    def tearDown(self):
+        """Close the sockets."""
+        self.sender.close()
+        self.receiver.close()
+
+    @staticmethod
+    def frame(message):
+        """Prefix a message by its length."""
+        return FRAME_HEADER.pack(len(message)) + message
+
+    def send_in_background(self, data):
+        """Send data which may be bigger than the socket's buffer.
+
+        Args:
+            data (str): the data to send.
+
+        Returns:
+            Thread. the sending thread.
+        """
+        sending = Thread(target=self.sender.sendall, args=(data,))
+        sending.daemon = True
+        sending.start()
+        return sending
+
+    def test_queued_lines(self):
+        """Validate lines received together are read one by one."""
+        self.sender.sendall("first" + MESSAGE_DELIMITER +
+                            "second" + MESSAGE_DELIMITER + "thi")
+
+        self.assertEqual(self.reader.read_line(), "first")
+        self.assertEqual(self.reader.read_line(), "second")
+        self.assertEqual(len(self.reader), len("thi"))
+
+        self.sender.sendall("rd" + MESSAGE_DELIMITER)
+        self.assertEqual(self.reader.read_line(), "third")
+        self.assertEqual(len(self.reader), 0)
+
+    def test_split_delimiter(self):
+        """Validate a delimiter split between the received chunks is found."""
+        self.sender.settimeout(1)
+        self.receiver.settimeout(0.1)
+        self.sender.sendall("message" + MESSAGE_DELIMITER[0])
+        self.assertRaises(socket.timeout, self.reader.read_line)
+
+        self.sender.sendall(MESSAGE_DELIMITER[1:])
+        self.assertEqual(self.reader.read_line(), "message")
+
+    def test_queued_frames(self):
+        """Validate frames received together are read one by one."""
+        self.sender.sendall(self.frame("first") + self.frame("") +
+                            self.frame("third"))
+
+        self.assertEqual(self.reader.read_frame(), "first")
+        self.assertEqual(self.reader.read_frame(), "")
+        self.assertEqual(self.reader.read_frame(), "third")
+
+    def test_partial_frame(self):
+        """Validate reading a frame is resumed after a timeout."""
+        self.receiver.settimeout(0.1)
+        frame = self.frame("x" * 100)
+
+        self.sender.sendall(frame[:2])
+        self.assertRaises(socket.timeout, self.reader.read_frame)
+
+        self.sender.sendall(frame[2:50])
+        self.assertRaises(socket.timeout, self.reader.read_frame)
+
+        self.sender.sendall(frame[50:])
+        self.assertEqual(self.reader.read_frame(), "x" * 100)
+
+    def test_large_frames(self):
+        """Validate frames bigger than the buffer grow it."""
+        messages = ["a" * (3 * SocketReader.RECEIVE_SIZE + 1), "b",
+                    "c" * (5 * SocketReader.RECEIVE_SIZE)]
+        sending = self.send_in_background("".join(self.frame(message)
+                                                  for message in messages))
+
+        for message in messages:
+            self.assertEqual(self.reader.read_frame(), message)
+
+        sending.join()
+
+    def test_closed_connection(self):
+        """Validate reading from a closed connection raises socket.error."""
+        self.sender.sendall(self.frame("message")[:-1])
+        self.sender.close()
+
+        self.assertRaises(socket.error, self.reader.read_frame)
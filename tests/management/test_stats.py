@@ -0,0 +1,88 @@
+"""Test the resource manager server's requests statistics."""
+# pylint: disable=invalid-name,too-many-public-methods
+import unittest
+
+from rotest.management.common.messages import LockResources
+from rotest.management.server.stats_page import flatten_stats
+from rotest.management.server.stats import (PathStats,
+                                            LatencyHistogram,
+                                            get_message_name)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Test recording latencies and computing their percentiles."""
+    def setUp(self):
+        """Create an empty histogram."""
+        self.histogram = LatencyHistogram()
+
+    def test_empty(self):
+        """Validate the percentiles of an empty histogram are 0."""
+        self.assertEqual(self.histogram.get_percentile(99), 0)
+        self.assertEqual(self.histogram.to_dict()["count"], 0)
+
+    def test_percentiles(self):
+        """Validate the percentiles are within the histogram's precision."""
+        for milliseconds in xrange(1, 1001):
+            self.histogram.record(milliseconds / 1000.0)
+
+        max_error = 1.0 / LatencyHistogram.SUB_BUCKETS
+        for percent in (50, 90, 99):
+            expected = percent / 100.0
+            self.assertAlmostEqual(self.histogram.get_percentile(percent),
+                                   expected, delta=expected * max_error)
+
+        self.assertEqual(self.histogram.get_percentile(100), 1.0)
+        self.assertEqual(self.histogram.count, 1000)
+
+    def test_merge(self):
+        """Validate merging histograms adds their latencies."""
+        other = LatencyHistogram()
+        self.histogram.record(0.001)
+        other.record(0.002)
+        other.record(5)
+
+        self.histogram.merge(other)
+
+        self.assertEqual(self.histogram.count, 3)
+        self.assertEqual(self.histogram.max_value, 5)
+
+
+class TestPathStats(unittest.TestCase):
+    """Test recording the handled requests of a path."""
+    def test_record(self):
+        """Validate requests are counted per message type."""
+        stats = PathStats()
+        stats.record("lock_resources", wait_time=0.5, handling_time=1,
+                     db_time=0.25)
+        stats.record("lock_resources", wait_time=0, handling_time=0.5,
+                     failed=True)
+        stats.record("query_resources", wait_time=0, handling_time=0.5)
+
+        summary = stats.to_dict(queue_depth=4)
+
+        self.assertEqual(summary["queue_depth"], 4)
+        self.assertEqual(summary["handled_count"], 3)
+        self.assertEqual(summary["max_latency"], 1.5)
+
+        handler = summary["handlers"]["lock_resources"]
+        self.assertEqual(handler["errors_count"], 1)
+        self.assertEqual(handler["db_time"], 0.25)
+        self.assertEqual(handler["handling_time"]["count"], 2)
+        self.assertEqual(summary["handlers"]["query_resources"]
+                         ["errors_count"], 0)
+
+    def test_message_name(self):
+        """Validate message types are named in snake_case."""
+        self.assertEqual(get_message_name(LockResources(descriptors=[])),
+                         "lock_resources")
+
+    def test_flatten(self):
+        """Validate the statistics are flattened to dotted names."""
+        stats = PathStats()
+        stats.record("lock_resources", wait_time=0, handling_time=1)
+
+        values = dict(flatten_stats({"resources": stats.to_dict(0)}))
+
+        self.assertEqual(values["resources.handled_count"], 1)
+        self.assertEqual(
+            values["resources.handlers.lock_resources.handling_time.max"], 1)
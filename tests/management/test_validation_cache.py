@@ -0,0 +1,61 @@
+"""Test the local cache of the resources' validations."""
+# pylint: disable=invalid-name,too-many-public-methods
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from rotest.management.client.validation_cache import ValidationCache
+
+
+class TestValidationCache(unittest.TestCase):
+    """Test caching, expiring and invalidating resources' validations."""
+    TTL = 60
+
+    def setUp(self):
+        """Create a cache in a temporary directory."""
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = ValidationCache(os.path.join(self.cache_dir,
+                                                  "cache.json"), self.TTL)
+
+    def tearDown(self):
+        """Remove the cache's directory."""
+        shutil.rmtree(self.cache_dir)
+
+    def test_fingerprint(self):
+        """Validate only resources in their validated state are cached."""
+        self.assertFalse(self.cache.is_valid("res1", "fingerprint"))
+
+        self.cache.add("res1", "fingerprint")
+        self.assertTrue(self.cache.is_valid("res1", "fingerprint"))
+        self.assertFalse(self.cache.is_valid("res1", "other_fingerprint"))
+        self.assertFalse(self.cache.is_valid("res2", "fingerprint"))
+
+        self.assertEqual(self.cache.hits_count, 1)
+        self.assertEqual(self.cache.misses_count, 3)
+
+    def test_expiration(self):
+        """Validate validations are cached only until their TTL expires."""
+        self.cache.ttl = 0.5
+        self.cache.add("res1", "fingerprint")
+        self.assertTrue(self.cache.is_valid("res1", "fingerprint"))
+
+        time.sleep(self.cache.ttl)
+        self.assertFalse(self.cache.is_valid("res1", "fingerprint"))
+
+    def test_invalidate(self):
+        """Validate invalidated resources aren't cached anymore."""
+        self.cache.add("res1", "fingerprint")
+        self.cache.add("res2", "fingerprint")
+        self.cache.invalidate("res1")
+
+        self.assertFalse(self.cache.is_valid("res1", "fingerprint"))
+        self.assertTrue(self.cache.is_valid("res2", "fingerprint"))
+
+    def test_shared_file(self):
+        """Validate caches which use the same file share their entries."""
+        self.cache.add("res1", "fingerprint")
+
+        other_cache = ValidationCache(self.cache.path, self.TTL)
+        self.assertTrue(other_cache.is_valid("res1", "fingerprint"))
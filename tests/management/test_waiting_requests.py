@@ -0,0 +1,70 @@
+"""Test the resource manager's waiting requests set."""
+# pylint: disable=invalid-name,too-many-public-methods
+import unittest
+
+from rotest.management.models.resource_data import ResourceData
+from rotest.management.server.waiting_requests import WaitingRequests
+from rotest.management.models.ut_models import (DemoResourceData,
+                                                DemoComplexResourceData)
+
+
+class TestWaitingRequests(unittest.TestCase):
+    """Test waking up waiting requests by type and by expiration."""
+    def setUp(self):
+        """Create an empty waiting set."""
+        self.waiting = WaitingRequests()
+
+    def test_wake_by_type(self):
+        """Validate only requests waiting for the freed type are woken."""
+        demo_request = object()
+        complex_request = object()
+        self.waiting.add(demo_request, [DemoResourceData])
+        self.waiting.add(complex_request, [DemoComplexResourceData])
+
+        self.assertEqual(self.waiting.wake([DemoResourceData]),
+                         [demo_request])
+        self.assertEqual(len(self.waiting), 1)
+        self.assertNotIn(demo_request, self.waiting)
+        self.assertIn(complex_request, self.waiting)
+
+    def test_wake_base_type_waiters(self):
+        """Validate requests waiting for a base type are woken by subtypes."""
+        base_request = object()
+        self.waiting.add(base_request, [ResourceData])
+
+        self.assertEqual(self.waiting.wake([DemoComplexResourceData]),
+                         [base_request])
+
+    def test_wake_in_arrival_order(self):
+        """Validate woken requests are returned in their arrival order."""
+        requests = [object() for _ in xrange(5)]
+        for request in requests:
+            self.waiting.add(request, [DemoResourceData,
+                                       DemoComplexResourceData])
+
+        self.assertEqual(self.waiting.wake_all(), requests)
+        self.assertEqual(len(self.waiting), 0)
+
+    def test_wake_expired(self):
+        """Validate only expired requests are woken by the timer."""
+        expiring_request = object()
+        late_request = object()
+        eternal_request = object()
+        self.waiting.add(late_request, [DemoResourceData], 20)
+        self.waiting.add(expiring_request, [DemoResourceData], 10)
+        self.waiting.add(eternal_request, [DemoResourceData])
+
+        self.assertEqual(self.waiting.next_expiration(), 10)
+        self.assertEqual(self.waiting.wake_expired(now=15),
+                         [expiring_request])
+        self.assertEqual(self.waiting.next_expiration(), 20)
+        self.assertEqual(len(self.waiting), 2)
+
+    def test_removed_request_timer(self):
+        """Validate the timer of a removed request is ignored."""
+        request = object()
+        self.waiting.add(request, [DemoResourceData], 10)
+        self.waiting.remove(request)
+
+        self.assertIsNone(self.waiting.next_expiration())
+        self.assertEqual(self.waiting.wake_expired(now=15), [])